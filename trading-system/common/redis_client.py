@@ -207,14 +207,36 @@ class RedisManager:
             logger.error(f"Failed to delete hash fields from Redis: {e}")
             return 0
     
-    def get_keys_pattern(self, pattern: str) -> List[str]:
-        """Get keys matching pattern."""
+    def get_keys_pattern(self, pattern: str, batch_size: int = 500) -> List[str]:
+        """Get keys matching pattern, using incremental SCAN rather than KEYS."""
         try:
-            return self.client.keys(pattern)
+            return list(self.client.scan_iter(match=pattern, count=batch_size))
         except Exception as e:
             logger.error(f"Failed to get keys with pattern from Redis: {e}")
             return []
     
+    def delete_keys_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """Delete keys matching pattern with SCAN and pipelined UNLINK batches."""
+        try:
+            deleted = 0
+            pipe = self.client.pipeline(transaction=False)
+            batch = []
+            for key in self.client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    pipe.unlink(*batch)
+                    batch = []
+                    if len(pipe) >= 10:
+                        deleted += sum(pipe.execute())
+            if batch:
+                pipe.unlink(*batch)
+            if len(pipe):
+                deleted += sum(pipe.execute())
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to delete keys with pattern from Redis: {e}")
+            return 0
+    
     def close(self):
         """Close Redis connection."""
         try:
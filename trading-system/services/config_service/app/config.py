@@ -164,6 +164,12 @@ class Settings(BaseSettings):
         le=300, 
         description="Circuit breaker timeout in seconds"
     )
+    circuit_breaker_failure_rate: float = Field(default=0.5, gt=0, le=1, description="Failed share of calls in the window that opens an endpoint's breaker")
+    circuit_breaker_slow_call_ms: int = Field(default=3000, ge=0, description="Calls slower than this count as slow (0 disables)")
+    circuit_breaker_slow_call_rate: float = Field(default=0.8, gt=0, le=1, description="Slow share of calls in the window that opens an endpoint's breaker")
+    circuit_breaker_window: int = Field(default=30, ge=1, description="Sliding window for failure and slow-call rates in seconds")
+    circuit_breaker_minimum_calls: int = Field(default=10, ge=1, description="Calls in the window before the rates are evaluated")
+    circuit_breaker_half_open_probes: int = Field(default=1, ge=1, description="Concurrent trial calls once the breaker timeout has passed")
     
     # Token Management Configuration
     token_refresh_threshold: int = Field(
@@ -178,6 +184,18 @@ class Settings(BaseSettings):
         le=86400, 
         description="Token cache TTL in seconds"
     )
+    token_refresh_retry_interval: int = Field(
+        default=10, 
+        ge=1, 
+        le=300, 
+        description="Seconds between failed background token refreshes"
+    )
+    token_refresh_lock_timeout: int = Field(
+        default=15, 
+        ge=1, 
+        le=120, 
+        description="Max seconds one replica holds the token refresh lock"
+    )
     
     # Feature Flags
     enable_ssi_service: bool = Field(default=True, description="Enable SSI service")
@@ -104,7 +104,8 @@ async def ssi_health_check(ssi_service: SSIService = Depends(get_ssi_service)):
             data={
                 "healthy": is_healthy,
                 "initialized": ssi_service.is_initialized,
-                "circuit_open": ssi_service.circuit_open
+                "circuit_open": ssi_service.circuit_open,
+                "circuit_breakers": ssi_service.circuit_breakers.metrics()
             }
         )
     except Exception as e:
@@ -317,11 +317,15 @@ class ConfigService:
         
         if self.redis_client:
             try:
-                # Delete all config keys from Redis
-                pattern = "config:*"
-                keys = await self.redis_client.keys(pattern)
-                if keys:
-                    await self.redis_client.delete(*keys)
+                # Delete all config keys from Redis, SCAN + UNLINK in batches
+                batch = []
+                async for key in self.redis_client.scan_iter(match="config:*", count=500):
+                    batch.append(key)
+                    if len(batch) >= 500:
+                        await self.redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    await self.redis_client.unlink(*batch)
             except Exception as e:
                 logger.warning(f"Redis cache clear failed: {str(e)}")
         
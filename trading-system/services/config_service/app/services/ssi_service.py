@@ -10,17 +10,42 @@ import hmac
 import json
 import logging
 import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from urllib.parse import urlencode
 
+import redis.asyncio as redis
+
 from ..config import Settings
+from .circuit_breaker import BreakerPolicy, CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
+# Token kind -> (token attribute, expiry attribute, lifetime attribute)
+_TOKEN_ATTRS = {
+    "data": ("access_token", "token_expires_at", "token_expires_in"),
+    "trading": ("trading_access_token", "trading_token_expires_at", "trading_token_expires_in"),
+}
+
+# Delete a lock only if this replica still owns it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
 
 class SSIService:
-    """SSI FastConnect API service for token management"""
+    """
+    SSI FastConnect API service for token management.
+    
+    Tokens are refreshed by background tasks `token_refresh_threshold`
+    seconds before they expire and handed out from memory. With Redis
+    configured, a refresh takes a per-token lock so one replica calls SSI
+    and the others adopt the token it stores.
+    """
     
     def __init__(self, settings: Settings):
         self.settings = settings
@@ -32,7 +57,9 @@ class SSIService:
         self.token_expires_in: Optional[int] = None
         self.trading_token_expires_in: Optional[int] = None
         self.is_initialized = False
-        self._lock = asyncio.Lock()
+        self.redis_client = None
+        self._locks = {kind: asyncio.Lock() for kind in _TOKEN_ATTRS}
+        self._refresh_tasks: List[asyncio.Task] = []
         
         # SSI configuration
         self.consumer_id = settings.consumer_id
@@ -43,10 +70,13 @@ class SSIService:
         self.two_fa_type = settings.two_fa_type
         self.notify_id = settings.notify_id
         
-        # Circuit breaker state
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.circuit_open = False
+        # Circuit breakers per SSI endpoint
+        self.circuit_breakers = CircuitBreakerRegistry(BreakerPolicy.from_settings(settings))
+    
+    @property
+    def circuit_open(self) -> bool:
+        """Every SSI endpoint called so far is cut off"""
+        return self.circuit_breakers.summary_state() == "OPEN"
         
     async def initialize(self):
         """Initialize the SSI service"""
@@ -79,9 +109,28 @@ class SSIService:
                 }
             )
             
+            # Shared token store and refresh lock across replicas
+            if self.settings.redis_url:
+                try:
+                    self.redis_client = redis.from_url(
+                        self.settings.redis_url,
+                        db=self.settings.redis_db,
+                        password=self.settings.redis_password or None,
+                        max_connections=self.settings.redis_max_connections,
+                        decode_responses=True
+                    )
+                    await self.redis_client.ping()
+                except Exception as e:
+                    logger.warning(f"Redis unavailable, tokens will be refreshed per replica: {str(e)}")
+                    self.redis_client = None
+            
             # Initialize tokens
             await self._refresh_tokens()
             
+            self._refresh_tasks = [
+                asyncio.create_task(self._refresh_loop(kind)) for kind in _TOKEN_ATTRS
+            ]
+            
             self.is_initialized = True
             logger.info("SSI service initialized successfully")
             
@@ -91,6 +140,15 @@ class SSIService:
     
     async def cleanup(self):
         """Cleanup resources"""
+        for task in self._refresh_tasks:
+            task.cancel()
+        await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
+        self._refresh_tasks = []
+        
+        if self.redis_client:
+            await self.redis_client.close()
+            self.redis_client = None
+        
         if self.session:
             await self.session.close()
             self.session = None
@@ -120,33 +178,31 @@ class SSIService:
     
     async def get_access_token(self) -> str:
         """Get SSI FastConnect Data API access token"""
-        async with self._lock:
-            if not self.is_initialized:
-                raise RuntimeError("SSI service not initialized")
-            
-            # Check if token is expired or about to expire
-            if self._should_refresh_token(self.token_expires_at):
-                await self._refresh_data_token()
-            
-            if not self.access_token:
-                raise RuntimeError("Failed to obtain access token")
-            
-            return self.access_token
+        if not self.is_initialized:
+            raise RuntimeError("SSI service not initialized")
+        
+        # Refreshed in the background; only wait if there is no valid token at all
+        if self._is_expired(self.token_expires_at):
+            await self._refresh_if_due("data")
+        
+        if not self.access_token:
+            raise RuntimeError("Failed to obtain access token")
+        
+        return self.access_token
     
     async def get_trading_access_token(self) -> str:
         """Get SSI FastConnect Trading API access token"""
-        async with self._lock:
-            if not self.is_initialized:
-                raise RuntimeError("SSI service not initialized")
-            
-            # Check if token is expired or about to expire
-            if self._should_refresh_token(self.trading_token_expires_at):
-                await self._refresh_trading_token()
-            
-            if not self.trading_access_token:
-                raise RuntimeError("Failed to obtain trading access token")
-            
-            return self.trading_access_token
+        if not self.is_initialized:
+            raise RuntimeError("SSI service not initialized")
+        
+        # Refreshed in the background; only wait if there is no valid token at all
+        if self._is_expired(self.trading_token_expires_at):
+            await self._refresh_if_due("trading")
+        
+        if not self.trading_access_token:
+            raise RuntimeError("Failed to obtain trading access token")
+        
+        return self.trading_access_token
     
     async def get_otp(self) -> Dict[str, Any]:
         """Get OTP for 2FA authentication"""
@@ -160,20 +216,26 @@ class SSIService:
             "consumerSecret": self.consumer_secret
         }
         
+        breaker, permit = self._acquire_endpoint(url)
+        started = time.perf_counter()
         try:
             async with self.session.post(url, json=payload) as response:
                 if response.status == 200:
                     data = await response.json()
                     logger.info("OTP request successful")
+                    breaker.record_success(permit, time.perf_counter() - started)
                     return data
                 else:
                     error_text = await response.text()
                     logger.error(f"OTP request failed: {response.status} - {error_text}")
                     raise RuntimeError(f"OTP request failed: {response.status}")
                     
+        except asyncio.CancelledError:
+            breaker.release(permit)
+            raise
         except Exception as e:
             logger.error(f"OTP request error: {str(e)}")
-            self._record_failure()
+            breaker.record_failure(permit, time.perf_counter() - started)
             raise
     
     def _should_refresh_token(self, expires_at: Optional[datetime]) -> bool:
@@ -185,14 +247,121 @@ class SSIService:
         threshold = timedelta(seconds=self.settings.token_refresh_threshold)
         return now >= (expires_at - threshold)
     
+    def _is_expired(self, expires_at: Optional[datetime]) -> bool:
+        """Check if token can no longer be used"""
+        return not expires_at or datetime.now() >= expires_at
+    
     async def _refresh_tokens(self):
         """Refresh both data and trading tokens"""
         await asyncio.gather(
-            self._refresh_data_token(),
-            self._refresh_trading_token(),
+            *(self._refresh_if_due(kind) for kind in _TOKEN_ATTRS),
             return_exceptions=True
         )
     
+    async def _refresh_loop(self, kind: str):
+        """Refresh one token ahead of its expiry until cancelled"""
+        expires_attr = _TOKEN_ATTRS[kind][1]
+        threshold = timedelta(seconds=self.settings.token_refresh_threshold)
+        while True:
+            expires_at = getattr(self, expires_attr)
+            if expires_at:
+                delay = (expires_at - threshold - datetime.now()).total_seconds()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                await self._refresh_if_due(kind)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Background {kind} token refresh failed: {str(e)}")
+                await asyncio.sleep(self.settings.token_refresh_retry_interval)
+    
+    async def _refresh_if_due(self, kind: str):
+        """Refresh a token once per replica set, unless another caller just did"""
+        async with self._locks[kind]:
+            if not self._should_refresh_token(getattr(self, _TOKEN_ATTRS[kind][1])):
+                return
+            
+            refresh = self._refresh_data_token if kind == "data" else self._refresh_trading_token
+            if not self.redis_client:
+                await refresh()
+                return
+            
+            token_key = f"ssi:token:{self.consumer_id}:{kind}"
+            lock_key = f"lock:{token_key}"
+            owner = uuid.uuid4().hex
+            try:
+                locked = await self.redis_client.set(
+                    lock_key, owner, nx=True, px=self.settings.token_refresh_lock_timeout * 1000
+                )
+            except Exception as e:
+                logger.warning(f"Token refresh lock unavailable: {str(e)}")
+                await refresh()
+                return
+            
+            try:
+                if not locked:
+                    # Another replica is refreshing; wait for its token
+                    deadline = time.monotonic() + self.settings.token_refresh_lock_timeout
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(0.2)
+                        if await self._adopt_shared_token(kind, token_key):
+                            return
+                
+                if await self._adopt_shared_token(kind, token_key):
+                    return
+                
+                await refresh()
+                await self._store_shared_token(kind, token_key)
+            
+            finally:
+                if locked:
+                    try:
+                        await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, owner)
+                    except Exception as e:
+                        logger.warning(f"Failed to release token refresh lock: {str(e)}")
+    
+    async def _adopt_shared_token(self, kind: str, token_key: str) -> bool:
+        """Use the token another replica stored, if it is not due for refresh"""
+        try:
+            raw = await self.redis_client.get(token_key)
+        except Exception:
+            return False
+        if not raw:
+            return False
+        
+        shared = json.loads(raw)
+        expires_at = datetime.fromtimestamp(shared["expires_at"])
+        if self._should_refresh_token(expires_at):
+            return False
+        
+        token_attr, expires_attr, expires_in_attr = _TOKEN_ATTRS[kind]
+        setattr(self, token_attr, shared["token"])
+        setattr(self, expires_attr, expires_at)
+        setattr(self, expires_in_attr, shared["expires_in"])
+        logger.info(f"Adopted shared {kind} token")
+        return True
+    
+    async def _store_shared_token(self, kind: str, token_key: str):
+        """Publish a freshly refreshed token to the other replicas"""
+        token_attr, expires_attr, expires_in_attr = _TOKEN_ATTRS[kind]
+        expires_at = getattr(self, expires_attr)
+        ttl = int((expires_at - datetime.now()).total_seconds())
+        if ttl <= 0:
+            return
+        try:
+            await self.redis_client.set(
+                token_key,
+                json.dumps({
+                    "token": getattr(self, token_attr),
+                    "expires_at": expires_at.timestamp(),
+                    "expires_in": getattr(self, expires_in_attr)
+                }),
+                ex=ttl
+            )
+        except Exception as e:
+            logger.warning(f"Failed to share {kind} token: {str(e)}")
+    
     async def _refresh_data_token(self):
         """Refresh SSI FastConnect Data API token"""
         url = f"{self.fc_data_url}/api/v2/Market/AccessToken"
@@ -202,6 +371,8 @@ class SSIService:
             "consumerSecret": self.consumer_secret
         }
         
+        breaker, permit = self._acquire_endpoint(url)
+        started = time.perf_counter()
         try:
             async with self.session.post(url, json=payload) as response:
                 if response.status == 200:
@@ -213,7 +384,7 @@ class SSIService:
                         self.token_expires_at = datetime.now() + timedelta(seconds=self.token_expires_in)
                         
                         logger.info("Data API token refreshed successfully")
-                        self._reset_failure_count()
+                        breaker.record_success(permit, time.perf_counter() - started)
                     else:
                         logger.error(f"Invalid token response: {data}")
                         raise RuntimeError("Invalid token response")
@@ -222,9 +393,12 @@ class SSIService:
                     logger.error(f"Token refresh failed: {response.status} - {error_text}")
                     raise RuntimeError(f"Token refresh failed: {response.status}")
                     
+        except asyncio.CancelledError:
+            breaker.release(permit)
+            raise
         except Exception as e:
             logger.error(f"Data token refresh error: {str(e)}")
-            self._record_failure()
+            breaker.record_failure(permit, time.perf_counter() - started)
             raise
     
     async def _refresh_trading_token(self):
@@ -239,6 +413,8 @@ class SSIService:
             "isSave": False
         }
         
+        breaker, permit = self._acquire_endpoint(url)
+        started = time.perf_counter()
         try:
             async with self.session.post(url, json=payload) as response:
                 if response.status == 200:
@@ -250,7 +426,7 @@ class SSIService:
                         self.trading_token_expires_at = datetime.now() + timedelta(seconds=self.trading_token_expires_in)
                         
                         logger.info("Trading API token refreshed successfully")
-                        self._reset_failure_count()
+                        breaker.record_success(permit, time.perf_counter() - started)
                     else:
                         logger.error(f"Invalid trading token response: {data}")
                         raise RuntimeError("Invalid trading token response")
@@ -259,9 +435,12 @@ class SSIService:
                     logger.error(f"Trading token refresh failed: {response.status} - {error_text}")
                     raise RuntimeError(f"Trading token refresh failed: {response.status}")
                     
+        except asyncio.CancelledError:
+            breaker.release(permit)
+            raise
         except Exception as e:
             logger.error(f"Trading token refresh error: {str(e)}")
-            self._record_failure()
+            breaker.record_failure(permit, time.perf_counter() - started)
             raise
     
     def _generate_signature(self, data: str) -> str:
@@ -285,31 +464,13 @@ class SSIService:
             logger.error(f"Signature generation failed: {str(e)}")
             raise
     
-    def _record_failure(self):
-        """Record a failure for circuit breaker"""
-        self.failure_count += 1
-        self.last_failure_time = datetime.now()
-        
-        if self.failure_count >= self.settings.circuit_breaker_failure_threshold:
-            self.circuit_open = True
-            logger.warning("Circuit breaker opened due to repeated failures")
-    
-    def _reset_failure_count(self):
-        """Reset failure count for circuit breaker"""
-        self.failure_count = 0
-        self.circuit_open = False
-    
-    async def _check_circuit_breaker(self):
-        """Check circuit breaker state"""
-        if self.circuit_open:
-            # Check if timeout has passed
-            if self.last_failure_time:
-                timeout_duration = timedelta(seconds=self.settings.circuit_breaker_timeout)
-                if datetime.now() - self.last_failure_time > timeout_duration:
-                    self._reset_failure_count()
-                    logger.info("Circuit breaker reset after timeout")
-                else:
-                    raise RuntimeError("Circuit breaker is open")
+    def _acquire_endpoint(self, url: str) -> Tuple[CircuitBreaker, int]:
+        """Breaker and call permit for an SSI endpoint; raises while its breaker is open"""
+        breaker = self.circuit_breakers.get(url.split("?", 1)[0])
+        try:
+            return breaker, breaker.acquire()
+        except CircuitOpenError as e:
+            raise RuntimeError(str(e))
     
     async def make_authenticated_request(
         self, 
@@ -319,8 +480,6 @@ class SSIService:
         use_trading_token: bool = False
     ) -> Dict[str, Any]:
         """Make an authenticated request to SSI API"""
-        await self._check_circuit_breaker()
-        
         # Get appropriate token
         if use_trading_token:
             token = await self.get_trading_access_token()
@@ -338,19 +497,23 @@ class SSIService:
             signature = self._generate_signature(data_str)
             headers['X-Signature'] = signature
         
+        breaker, permit = self._acquire_endpoint(url)
+        started = time.perf_counter()
         try:
             async with self.session.request(method, url, json=data, headers=headers) as response:
                 if response.status == 200:
                     result = await response.json()
-                    self._reset_failure_count()
+                    breaker.record_success(permit, time.perf_counter() - started)
                     return result
                 else:
                     error_text = await response.text()
                     logger.error(f"API request failed: {response.status} - {error_text}")
-                    self._record_failure()
                     raise RuntimeError(f"API request failed: {response.status}")
                     
+        except asyncio.CancelledError:
+            breaker.release(permit)
+            raise
         except Exception as e:
             logger.error(f"API request error: {str(e)}")
-            self._record_failure()
+            breaker.record_failure(permit, time.perf_counter() - started)
             raise 
\ No newline at end of file
@@ -8,16 +8,21 @@ import asyncio
 import logging
 import uuid
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta, time
-from typing import Dict, List, Optional, Any
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Dict, List, Optional, Any, Tuple
 
 import aioredis
 import httpx
-from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, status, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.openmetrics.exposition import (
+    generate_latest as generate_openmetrics,
+    CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE
+)
 from pydantic import ValidationError
 
 from app.config import get_settings
@@ -29,6 +34,12 @@ from app.models import (
     RuleExecutionResult, DecisionType, SignalSource,
     ConfidenceLevel, RiskLevel, MarketCondition
 )
+from app.services.decision_cache import DecisionCacheWriter, get_latest_decisions
+from app.services.exchange_calendar import Exchange, Session, get_exchange_calendar
+from app.services.portfolio_risk import PortfolioRiskModel
+from app.services.profiling import profile_event_loop
+from app.services.replay import run_backtest as replay_backtest, run_backtests, shutdown_backtest_pool, to_utc
+from app.services.signal_stream import SignalStreamProcessor
 
 # Configure logging
 logging.basicConfig(
@@ -38,16 +49,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Prometheus metrics
+# Labels stay bounded (no per-symbol labels); slow decisions are linked to logs via exemplars
 decision_requests_total = Counter(
     'decision_requests_total',
     'Total number of decision requests',
-    ['symbol', 'decision_type', 'status']
+    ['decision_type', 'status']
 )
 
 decision_processing_time = Histogram(
     'decision_processing_seconds',
     'Time spent processing decisions',
-    ['symbol', 'strategy']
+    ['strategy'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+decision_stage_time = Histogram(
+    'decision_stage_seconds',
+    'Time spent in each decision pipeline stage',
+    ['stage'],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
 )
 
 active_signals = Gauge(
@@ -59,22 +79,32 @@ active_signals = Gauge(
 decision_confidence = Histogram(
     'decision_confidence_score',
     'Distribution of decision confidence scores',
-    ['symbol', 'decision_type']
+    ['decision_type']
 )
 
 # Global variables
 redis_client: Optional[aioredis.Redis] = None
+signal_stream: Optional[SignalStreamProcessor] = None
+decision_cache_writer: Optional[DecisionCacheWriter] = None
 settings = get_settings()
 
 
 class DecisionEngine:
     """Core decision engine for trading decisions"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        record_side_effects: bool = True,
+        signal_weights: Optional[Dict[str, float]] = None
+    ):
+        # Replay runs disable metrics, Redis caching, history and per-decision logs
+        self.record_side_effects = record_side_effects
+        self.signal_weights = signal_weights
         self.signals_cache: Dict[str, List[Signal]] = {}
         self.market_context_cache: Optional[MarketContext] = None
         self.active_rules: List[TradingRule] = []
         self.decision_history: List[TradingDecision] = []
+        self.portfolio_risk = PortfolioRiskModel()
         
     async def initialize(self):
         """Initialize decision engine"""
@@ -149,66 +179,151 @@ class DecisionEngine:
         """Process trading decision based on signals and context"""
         
         try:
-            start_time = asyncio.get_event_loop().time()
-            
-            # Apply trading rules
-            rule_results = await self._apply_trading_rules(request, signals, market_context)
-            
-            # Aggregate signals
-            aggregated_signal = await self._aggregate_signals(signals, request.symbol)
-            
-            # Assess risk
-            risk_assessment = await self._assess_risk(request, market_context, portfolio_context)
-            
-            # Generate decision
-            decision = await self._generate_decision(
-                request, aggregated_signal, risk_assessment, market_context, rule_results
-            )
+            start_time = perf_counter()
+            decision, stage_times = await self._decide(request, signals, market_context)
             
-            # Record metrics
-            processing_time = asyncio.get_event_loop().time() - start_time
-            decision_processing_time.labels(
-                symbol=request.symbol,
-                strategy=request.strategy or "default"
-            ).observe(processing_time)
-            
-            decision_confidence.labels(
-                symbol=request.symbol,
-                decision_type=decision.decision_type.value
-            ).observe(decision.confidence_score)
-            
-            decision_requests_total.labels(
-                symbol=request.symbol,
-                decision_type=decision.decision_type.value,
-                status="success"
-            ).inc()
-            
-            # Store decision in history
-            self.decision_history.append(decision)
-            
-            # Cache decision in Redis
-            if redis_client:
-                await self._cache_decision(decision)
-            
-            logger.info(
-                f"Generated decision for {request.symbol}: "
-                f"{decision.decision_type.value} (confidence: {decision.confidence_score:.2f})"
-            )
+            # Enforce portfolio limits on the sized decision before it is emitted
+            if portfolio_context is not None:
+                mark = perf_counter()
+                self.score_decisions([decision], portfolio_context)
+                stage_times["portfolio_risk"] = perf_counter() - mark
             
+            if self.record_side_effects:
+                await self._record_decision(request, decision, stage_times, start_time)
             return decision
             
         except Exception as e:
             logger.error(f"Error processing decision for {request.symbol}: {e}")
-            decision_requests_total.labels(
-                symbol=request.symbol,
-                decision_type="ERROR",
-                status="error"
-            ).inc()
+            if self.record_side_effects:
+                decision_requests_total.labels(
+                    decision_type="ERROR",
+                    status="error"
+                ).inc()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Decision processing failed: {str(e)}"
             )
     
+    async def process_decisions(
+        self,
+        requests: List[DecisionRequest],
+        signals: Dict[str, List[Signal]],
+        market_context: MarketContext,
+        portfolio_context: PortfolioContext
+    ) -> List[TradingDecision]:
+        """Process several symbols, scoring the batch against the portfolio in one call.
+        
+        Portfolio limits are enforced on every decision before any of them
+        is recorded or cached. A symbol that fails is logged and left out.
+        """
+        
+        start_time = perf_counter()
+        decided = []
+        for request in requests:
+            try:
+                decision, stage_times = await self._decide(
+                    request, signals.get(request.symbol, []), market_context
+                )
+                decided.append((request, decision, stage_times))
+            except Exception as e:
+                logger.error(f"Error processing decision for {request.symbol}: {e}")
+                if self.record_side_effects:
+                    decision_requests_total.labels(decision_type="ERROR", status="error").inc()
+        
+        mark = perf_counter()
+        self.score_decisions([decision for _, decision, _ in decided], portfolio_context)
+        elapsed = perf_counter() - mark
+        for _, _, stage_times in decided:
+            stage_times["portfolio_risk"] = elapsed
+        
+        if self.record_side_effects:
+            for request, decision, stage_times in decided:
+                await self._record_decision(request, decision, stage_times, start_time)
+        return [decision for _, decision, _ in decided]
+    
+    async def _decide(
+        self,
+        request: DecisionRequest,
+        signals: List[Signal],
+        market_context: MarketContext
+    ) -> Tuple[TradingDecision, Dict[str, float]]:
+        """Rules, signal aggregation, risk assessment and generation, with per-stage times"""
+        
+        stage_times: Dict[str, float] = {}
+        start_time = perf_counter()
+        
+        # Apply trading rules
+        rule_results = await self._apply_trading_rules(request, signals, market_context)
+        mark = perf_counter()
+        stage_times["rules"] = mark - start_time
+        
+        # Aggregate signals
+        aggregated_signal = await self._aggregate_signals(signals, request.symbol)
+        stage_times["aggregation"] = perf_counter() - mark
+        mark = perf_counter()
+        
+        # Assess risk
+        risk_assessment = await self._assess_risk(request, market_context)
+        stage_times["risk"] = perf_counter() - mark
+        mark = perf_counter()
+        
+        # Generate decision
+        decision = await self._generate_decision(
+            request, aggregated_signal, risk_assessment, market_context, rule_results
+        )
+        stage_times["generation"] = perf_counter() - mark
+        return decision, stage_times
+    
+    async def _record_decision(
+        self,
+        request: DecisionRequest,
+        decision: TradingDecision,
+        stage_times: Dict[str, float],
+        start_time: float
+    ):
+        """Keep, cache, measure and log an emitted decision"""
+        
+        # Store decision in history
+        self.decision_history.append(decision)
+        
+        # Cache decision in Redis
+        if redis_client:
+            mark = perf_counter()
+            await self._cache_decision(decision)
+            stage_times["cache_write"] = perf_counter() - mark
+        
+        # Record metrics; the decision ID is the trace ID shared with logs
+        processing_time = perf_counter() - start_time
+        exemplar = {"trace_id": decision.decision_id}
+        decision_processing_time.labels(
+            strategy=request.strategy or "default"
+        ).observe(processing_time, exemplar=exemplar)
+        
+        for stage, seconds in stage_times.items():
+            decision_stage_time.labels(stage=stage).observe(seconds, exemplar=exemplar)
+        
+        decision_confidence.labels(
+            decision_type=decision.decision_type.value
+        ).observe(decision.confidence_score)
+        
+        decision_requests_total.labels(
+            decision_type=decision.decision_type.value,
+            status="success"
+        ).inc()
+        
+        if processing_time * 1000 >= settings.slow_decision_threshold_ms:
+            stages = ", ".join(f"{k}={v * 1000:.2f}ms" for k, v in stage_times.items())
+            logger.warning(
+                f"Slow decision trace_id={decision.decision_id} symbol={request.symbol}: "
+                f"{processing_time * 1000:.2f}ms ({stages})"
+            )
+        
+        logger.info(
+            f"Generated decision for {request.symbol}: "
+            f"{decision.decision_type.value} (confidence: {decision.confidence_score:.2f}, "
+            f"trace_id={decision.decision_id})"
+        )
+    
     async def _apply_trading_rules(
         self,
         request: DecisionRequest,
@@ -245,6 +360,7 @@ class DecisionEngine:
                     symbol=request.symbol,
                     executed=False,
                     conditions_met=False,
+                    execution_time_ms=int((asyncio.get_event_loop().time() - start_time) * 1000),
                     errors=[str(e)]
                 )
                 results.append(error_result)
@@ -282,7 +398,8 @@ class DecisionEngine:
             rule_id=rule.rule_id,
             symbol=request.symbol,
             executed=True,
-            conditions_met=False
+            conditions_met=False,
+            execution_time_ms=0  # Set by the caller once the rule has run
         )
         
         try:
@@ -370,7 +487,7 @@ class DecisionEngine:
             )
         
         # Weight signals by source and confidence
-        source_weights = settings.SIGNAL_WEIGHTS
+        source_weights = self.signal_weights or settings.source_weights
         
         total_weight = 0.0
         weighted_strength = 0.0
@@ -431,8 +548,7 @@ class DecisionEngine:
     async def _assess_risk(
         self,
         request: DecisionRequest,
-        market_context: MarketContext,
-        portfolio_context: Optional[PortfolioContext]
+        market_context: MarketContext
     ) -> RiskAssessment:
         """Assess risk for the trading decision"""
         
@@ -459,14 +575,7 @@ class DecisionEngine:
         adjusted_risk = min(base_risk * market_multiplier, 1.0)
         
         # Determine overall risk level
-        if adjusted_risk < 0.2:
-            overall_risk = RiskLevel.LOW
-        elif adjusted_risk < 0.4:
-            overall_risk = RiskLevel.MEDIUM
-        elif adjusted_risk < 0.7:
-            overall_risk = RiskLevel.HIGH
-        else:
-            overall_risk = RiskLevel.VERY_HIGH
+        overall_risk = self._risk_level(adjusted_risk)
         
         return RiskAssessment(
             symbol=request.symbol,
@@ -479,6 +588,68 @@ class DecisionEngine:
             risk_score=adjusted_risk
         )
     
+    @staticmethod
+    def _risk_level(risk_score: float) -> RiskLevel:
+        """Overall risk level for a 0-1 risk score"""
+        if risk_score < 0.2:
+            return RiskLevel.LOW
+        elif risk_score < 0.4:
+            return RiskLevel.MEDIUM
+        elif risk_score < 0.7:
+            return RiskLevel.HIGH
+        return RiskLevel.VERY_HIGH
+    
+    def score_decisions(
+        self,
+        decisions: List[TradingDecision],
+        portfolio_context: PortfolioContext
+    ):
+        """Score a batch of decisions against the portfolio in one call.
+        
+        Buys are sized at their recommended quantity and sells at the whole
+        position. Decisions are scored in order, each against the portfolio
+        plus the trades accepted before it, so an empty portfolio is scored
+        too. A buy that would breach a portfolio limit is turned into a
+        HOLD; sells only reduce exposure and are never withheld.
+        """
+        
+        candidates = []
+        sized = []
+        for decision in decisions:
+            if decision.decision_type not in (DecisionType.BUY, DecisionType.SELL):
+                continue
+            value = float((decision.quantity or 0) * (decision.price or 0))
+            if decision.decision_type == DecisionType.SELL:
+                value = -float(portfolio_context.positions.get(decision.symbol, 0))
+            candidates.append((decision.symbol, value))
+            sized.append(decision)
+        
+        if not candidates:
+            return
+        
+        self.portfolio_risk.set_portfolio(
+            portfolio_context.positions, portfolio_context.symbol_sectors
+        )
+        scores = self.portfolio_risk.score_candidates(
+            candidates, float(portfolio_context.total_value)
+        )
+        if not scores.covariance_ready:
+            logger.warning(
+                "Portfolio VaR unavailable: fewer than two price periods recorded via POST /risk/prices"
+                + ("; buys are withheld" if settings.risk_require_covariance else "")
+            )
+        
+        for i, decision in enumerate(sized):
+            row = scores.row(i)
+            decision.market_context["portfolio_risk"] = row
+            decision.risk_score = max(decision.risk_score, row["risk_score"])
+            decision.risk_level = self._risk_level(decision.risk_score)
+            if row["breach"] and decision.decision_type == DecisionType.BUY:
+                decision.decision_type = DecisionType.HOLD
+                decision.recommended_action = "HOLD - Portfolio risk limit breached"
+                decision.quantity = None
+                decision.reasoning += "; Buy withheld: portfolio risk limit breached"
+    
     async def _generate_decision(
         self,
         request: DecisionRequest,
@@ -580,7 +751,9 @@ class DecisionEngine:
     async def _cache_decision(self, decision: TradingDecision):
         """Cache decision in Redis"""
         try:
-            if redis_client:
+            if decision_cache_writer:
+                await decision_cache_writer.enqueue(decision)
+            elif redis_client:
                 cache_key = f"decision:{decision.symbol}:{decision.decision_id}"
                 await redis_client.setex(
                     cache_key,
@@ -606,7 +779,7 @@ async def lifespan(app: FastAPI):
     global redis_client
     try:
         redis_client = aioredis.from_url(
-            settings.REDIS_URL,
+            settings.redis_url,
             encoding="utf-8",
             decode_responses=True
         )
@@ -615,13 +788,34 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to Redis: {e}")
         redis_client = None
     
+    # Start write-behind decision cache
+    global decision_cache_writer
+    if redis_client and settings.enable_decision_caching:
+        decision_cache_writer = DecisionCacheWriter(redis_client)
+        await decision_cache_writer.start()
+    
     # Initialize decision engine
     await decision_engine.initialize()
     
+    # Start event-driven decision pipeline
+    global signal_stream
+    if settings.enable_signal_streaming:
+        try:
+            signal_stream = SignalStreamProcessor(decision_engine, get_current_market_context)
+            await signal_stream.start()
+        except Exception as e:
+            logger.error(f"Failed to start signal stream: {e}")
+            signal_stream = None
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Decision Engine service")
+    if signal_stream:
+        await signal_stream.stop()
+    if decision_cache_writer:
+        await decision_cache_writer.stop()
+    shutdown_backtest_pool()
     if redis_client:
         await redis_client.close()
 
@@ -637,7 +831,7 @@ app = FastAPI(
 # Add middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -645,7 +839,7 @@ app.add_middleware(
 
 app.add_middleware(
     TrustedHostMiddleware,
-    allowed_hosts=settings.ALLOWED_HOSTS
+    allowed_hosts=settings.allowed_hosts
 )
 
 
@@ -683,14 +877,43 @@ async def health_check():
         "decision_history_size": len(decision_engine.decision_history)
     }
     
+    if signal_stream:
+        health_status["signal_stream"] = signal_stream.get_status()
+    if decision_cache_writer:
+        health_status["decision_cache"] = {
+            "queued": decision_cache_writer.queue.qsize(),
+            **decision_cache_writer.stats
+        }
+    
     return health_status
 
 
 # Metrics endpoint
 @app.get("/metrics")
-async def get_metrics():
-    """Prometheus metrics endpoint"""
-    return generate_latest()
+async def get_metrics(request: Request):
+    """Prometheus metrics endpoint; OpenMetrics (with exemplars) when requested"""
+    if "application/openmetrics-text" in request.headers.get("accept", ""):
+        return Response(generate_openmetrics(), media_type=OPENMETRICS_CONTENT_TYPE)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = 5.0, interval_ms: float = 1.0, top: int = Query(30, ge=1, le=200)):
+    """Sample the event loop stack for a few seconds to locate latency hot spots"""
+    if not settings.enable_debug_profiling:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is disabled"
+        )
+    if not 0 < seconds <= 60 or not 0.1 <= interval_ms <= 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="seconds must be in (0, 60] and interval_ms in [0.1, 100]"
+        )
+    try:
+        return await profile_event_loop(seconds, interval=interval_ms / 1000, top=top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 # Main decision endpoints
@@ -753,55 +976,42 @@ async def make_batch_decisions(
     try:
         start_time = asyncio.get_event_loop().time()
         
-        decisions = []
-        buy_count = 0
-        sell_count = 0
-        hold_count = 0
-        total_risk = 0.0
-        max_risk_decision = None
-        max_risk_score = 0.0
-        
-        # Process each symbol
+        # Build each symbol's request and signals
+        requests = []
+        signals = {}
         for symbol in request.symbols:
             try:
-                # Create individual decision request
                 individual_request = DecisionRequest(
                     symbol=symbol,
                     current_price=1000.0,  # In production, fetch real price
                     available_capital=request.portfolio_context.available_cash,
-                    market=settings.DEFAULT_MARKET,
+                    market=settings.default_market,
                     strategy=request.strategy
                 )
-                
-                # Get signals and context
-                signals = await get_signals_for_symbol(symbol)
-                market_context = await get_current_market_context()
-                
-                # Process decision
-                decision = await decision_engine.process_decision(
-                    individual_request, signals, market_context, request.portfolio_context
-                )
-                
-                decisions.append(decision)
-                
-                # Update counters
-                if decision.decision_type == DecisionType.BUY:
-                    buy_count += 1
-                elif decision.decision_type == DecisionType.SELL:
-                    sell_count += 1
-                else:
-                    hold_count += 1
-                
-                # Track risk
-                total_risk += decision.risk_score
-                if decision.risk_score > max_risk_score:
-                    max_risk_score = decision.risk_score
-                    max_risk_decision = decision.decision_id
-                    
+                signals[individual_request.symbol] = await get_signals_for_symbol(symbol)
+                requests.append(individual_request)
             except Exception as e:
                 logger.error(f"Error processing decision for {symbol}: {e}")
                 continue
         
+        market_context = await get_current_market_context()
+        
+        # Portfolio limits are enforced on the whole batch before anything is cached
+        decisions = await decision_engine.process_decisions(
+            requests, signals, market_context, request.portfolio_context
+        )
+        
+        buy_count = sum(1 for d in decisions if d.decision_type == DecisionType.BUY)
+        sell_count = sum(1 for d in decisions if d.decision_type == DecisionType.SELL)
+        hold_count = len(decisions) - buy_count - sell_count
+        total_risk = sum(d.risk_score for d in decisions)
+        max_risk_decision = None
+        max_risk_score = 0.0
+        for decision in decisions:
+            if decision.risk_score > max_risk_score:
+                max_risk_score = decision.risk_score
+                max_risk_decision = decision.decision_id
+        
         processing_time = int((asyncio.get_event_loop().time() - start_time) * 1000)
         
         response = DecisionResponse(
@@ -917,6 +1127,96 @@ async def update_trading_rule(rule_id: str, enabled: bool):
         )
 
 
+# Portfolio risk endpoints
+@app.post("/risk/prices")
+async def record_risk_prices(prices: Dict[str, float]):
+    """Record one period of closing prices for the rolling covariance model"""
+    try:
+        decision_engine.portfolio_risk.add_prices(
+            {symbol.upper(): price for symbol, price in prices.items()}
+        )
+        return {
+            "status": "recorded",
+            "symbols": len(prices),
+            "tracked_symbols": len(decision_engine.portfolio_risk.symbol_index)
+        }
+    except Exception as e:
+        logger.error(f"Error recording risk prices: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to record prices: {str(e)}"
+        )
+
+
+# Backtest endpoints
+@app.post("/backtest", response_model=BacktestResult)
+async def run_backtest(request: BacktestRequest):
+    """Replay recorded signals for one strategy configuration in the shared worker pool"""
+    try:
+        if to_utc(request.end_date) <= to_utc(request.start_date):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_date must be after start_date"
+            )
+        return await replay_backtest(request)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error running backtest {request.strategy_name}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Backtest failed: {str(e)}"
+        )
+
+
+@app.post("/backtest/batch", response_model=List[BacktestResult])
+async def run_backtest_batch(requests: List[BacktestRequest]):
+    """Replay several strategy configurations in parallel processes"""
+    try:
+        if not requests:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="At least one backtest request is required"
+            )
+        return await run_backtests(requests)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error running backtest batch: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Backtest batch failed: {str(e)}"
+        )
+
+
+@app.get("/decisions/latest")
+async def get_latest_symbol_decisions(
+    symbols: Optional[str] = None,
+    redis_client: Optional[aioredis.Redis] = Depends(get_redis_client)
+):
+    """Get the latest cached decision per symbol (comma-separated filter)"""
+    if not redis_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Decision cache not available"
+        )
+    try:
+        symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else None
+        latest = await get_latest_decisions(redis_client, symbol_list)
+        return {
+            "decisions": {symbol: TradingDecision.parse_raw(payload) for symbol, payload in latest.items()},
+            "count": len(latest)
+        }
+    except Exception as e:
+        logger.error(f"Error getting latest decisions: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get latest decisions: {str(e)}"
+        )
+
+
 # Decision history and metrics
 @app.get("/decisions/history")
 async def get_decision_history(
@@ -987,23 +1287,20 @@ async def get_signals_for_symbol(symbol: str) -> List[Signal]:
     return signals
 
 
+# Exchange calendar sessions reported as the coarse market-context session
+_CONTEXT_SESSIONS = {
+    Session.MORNING_AUCTION: "MORNING",
+    Session.CONTINUOUS_MORNING: "MORNING",
+    Session.CONTINUOUS_AFTERNOON: "AFTERNOON",
+    Session.CLOSING_AUCTION: "AFTERNOON",
+    Session.POST_MARKET: "AFTERNOON",
+}
+
+
 async def get_current_market_context() -> MarketContext:
     """Get current market context (mock implementation)"""
     # In production, this would fetch from Market Data service
-    current_time = datetime.now().time()
-    
-    # Determine trading session
-    morning_start = time(9, 0)
-    morning_end = time(11, 30)
-    afternoon_start = time(13, 0)
-    afternoon_end = time(15, 0)
-    
-    if morning_start <= current_time <= morning_end:
-        session = "MORNING"
-    elif afternoon_start <= current_time <= afternoon_end:
-        session = "AFTERNOON"
-    else:
-        session = "CLOSED"
+    session = _CONTEXT_SESSIONS.get(get_exchange_calendar().session_at(Exchange.HOSE).session, "CLOSED")
     
     return MarketContext(
         market_condition=MarketCondition.BULL_MARKET,
@@ -1044,7 +1341,7 @@ if __name__ == "__main__":
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
-        port=settings.PORT,
-        reload=settings.DEBUG,
+        port=settings.port,
+        reload=settings.reload,
         log_level="info"
     )
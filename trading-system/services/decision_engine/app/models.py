@@ -306,6 +306,8 @@ class PortfolioContext(BaseModel):
     number_of_positions: int = Field(..., description="Number of open positions")
     sector_exposure: Dict[str, Decimal] = Field(default_factory=dict, description="Sector exposure")
     market_exposure: Dict[str, Decimal] = Field(default_factory=dict, description="Market exposure")
+    positions: Dict[str, Decimal] = Field(default_factory=dict, description="Position market value in VND by symbol")
+    symbol_sectors: Dict[str, str] = Field(default_factory=dict, description="Sector by symbol")
     
     # Performance
     daily_pnl: Optional[Decimal] = Field(None, description="Daily P&L")
@@ -417,4 +419,5 @@ class BacktestResult(BaseModel):
     
     # Summary
     backtest_period: str = Field(..., description="Backtest period")
+    failed_decisions: int = Field(0, description="Replayed events whose decision failed and were skipped")
     generated_at: datetime = Field(default_factory=datetime.utcnow, description="Result generation time")
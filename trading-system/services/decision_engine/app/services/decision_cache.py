@@ -0,0 +1,115 @@
+"""
+Decision Cache Writer
+Write-behind Redis caching of decisions, flushed in pipelined MULTI batches
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DECISION_TTL_SECONDS = 3600
+LATEST_DECISIONS_KEY = "decision:latest"
+
+# Queued by stop(); the flush loop writes everything ahead of it, then exits
+_STOP = object()
+
+
+class DecisionCacheWriter:
+    """Buffers decisions and writes them to Redis off the request path.
+
+    Each flush writes the per-decision keys with SETEX and updates the
+    `decision:latest` hash (field per symbol) in one MULTI/EXEC round trip.
+    The bounded queue applies backpressure when Redis falls behind.
+    """
+
+    def __init__(self, redis_client, batch_size: int = None, flush_interval_ms: int = None, max_queue_size: int = None):
+        self.redis = redis_client
+        self.batch_size = batch_size or settings.decision_cache_batch_size
+        self.flush_interval = (flush_interval_ms or settings.decision_cache_flush_interval_ms) / 1000
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size or settings.decision_cache_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"written": 0, "batches": 0, "errors": 0}
+
+    async def start(self):
+        """Start the background flush loop"""
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Decision cache writer started (batch_size={self.batch_size}, "
+            f"flush_interval={self.flush_interval * 1000:.0f}ms)"
+        )
+
+    async def stop(self):
+        """Flush what is queued, then stop the loop.
+
+        The loop is asked to stop through the queue rather than cancelled,
+        so a batch it has dequeued or is flushing is still written.
+        """
+        if self._task:
+            await self.queue.put(_STOP)
+            await self._task
+            self._task = None
+        # Decisions queued after the stop marker
+        remaining = []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+        if remaining:
+            await self._flush(remaining)
+        logger.info("Decision cache writer stopped")
+
+    async def enqueue(self, decision):
+        """Queue a decision; waits only when the queue is full"""
+        try:
+            self.queue.put_nowait(decision)
+        except asyncio.QueueFull:
+            await self.queue.put(decision)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List):
+        try:
+            latest: Dict[str, str] = {}
+            pipe = self.redis.pipeline(transaction=True)
+            for decision in batch:
+                payload = decision.json()
+                pipe.setex(f"decision:{decision.symbol}:{decision.decision_id}", DECISION_TTL_SECONDS, payload)
+                latest[decision.symbol] = payload
+            pipe.hset(LATEST_DECISIONS_KEY, mapping=latest)
+            await pipe.execute()
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error flushing {len(batch)} cached decisions: {e}")
+
+
+async def get_latest_decisions(redis_client, symbols: Optional[List[str]] = None) -> Dict[str, str]:
+    """Latest decision JSON per symbol in one round trip"""
+    if not symbols:
+        return await redis_client.hgetall(LATEST_DECISIONS_KEY)
+    values = await redis_client.hmget(LATEST_DECISIONS_KEY, symbols)
+    return {symbol: value for symbol, value in zip(symbols, values) if value is not None}
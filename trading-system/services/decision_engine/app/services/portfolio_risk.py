@@ -0,0 +1,293 @@
+"""
+Portfolio Risk Model
+Rolling returns/covariance state and sequential scoring of candidate trades
+against portfolio VaR, sector concentration and correlation limits
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One-sided normal quantiles for supported VaR confidence levels
+Z_SCORES = {0.90: 1.2816, 0.95: 1.6449, 0.975: 1.9600, 0.99: 2.3263}
+
+
+@dataclass
+class CandidateRiskScores:
+    """Column-oriented risk scores for a batch of candidate trades"""
+    symbols: List[str]
+    portfolio_var: float
+    marginal_var: np.ndarray
+    incremental_var: np.ndarray
+    sector_exposure: np.ndarray
+    max_correlation: np.ndarray
+    risk_score: np.ndarray
+    breaches: np.ndarray
+    covariance_ready: bool
+
+    def row(self, i: int) -> Dict[str, float]:
+        """Scores for one candidate as plain floats"""
+        return {
+            "portfolio_var": self.portfolio_var,
+            "covariance_ready": self.covariance_ready,
+            "marginal_var": float(self.marginal_var[i]),
+            "incremental_var": float(self.incremental_var[i]),
+            "sector_exposure": float(self.sector_exposure[i]),
+            "max_correlation": float(self.max_correlation[i]),
+            "risk_score": float(self.risk_score[i]),
+            "breach": bool(self.breaches[i])
+        }
+
+
+class PortfolioRiskModel:
+    """Rolling covariance of symbol returns plus the current portfolio.
+
+    Returns are kept in a ring buffer of `window` periods. Running sums and
+    cross-products are updated per period, so covariance costs one outer
+    product instead of a full recomputation.
+    """
+
+    def __init__(
+        self,
+        window: int = None,
+        confidence: float = None,
+        initial_capacity: int = 64
+    ):
+        self.window = window or settings.risk_returns_window
+        confidence = confidence or settings.risk_var_confidence
+        if confidence not in Z_SCORES:
+            raise ValueError(
+                f"Unsupported VaR confidence {confidence}; use one of {sorted(Z_SCORES)}"
+            )
+        self.z_score = Z_SCORES[confidence]
+        self.symbol_index: Dict[str, int] = {}
+        self._capacity = initial_capacity
+        self._returns = np.zeros((self.window, initial_capacity))
+        self._sum = np.zeros(initial_capacity)
+        self._cross = np.zeros((initial_capacity, initial_capacity))
+        self._cursor = 0
+        self._count = 0
+        self._updates_since_rebuild = 0
+        self._last_prices: Dict[str, float] = {}
+
+        self.positions = np.zeros(initial_capacity)
+        self.symbol_sectors: Dict[str, str] = {}
+        self._sector_index: Dict[str, int] = {}
+        self._symbol_sector = np.full(initial_capacity, -1, dtype=np.int64)
+
+    # Universe management
+
+    def _ensure_symbols(self, symbols: Sequence[str]) -> np.ndarray:
+        """Register symbols, growing the matrices when capacity runs out"""
+        for symbol in symbols:
+            if symbol not in self.symbol_index:
+                self.symbol_index[symbol] = len(self.symbol_index)
+        needed = len(self.symbol_index)
+        if needed > self._capacity:
+            new_capacity = max(needed, self._capacity * 2)
+            pad = new_capacity - self._capacity
+            self._returns = np.pad(self._returns, ((0, 0), (0, pad)))
+            self._sum = np.pad(self._sum, (0, pad))
+            self._cross = np.pad(self._cross, ((0, pad), (0, pad)))
+            self.positions = np.pad(self.positions, (0, pad))
+            self._symbol_sector = np.pad(self._symbol_sector, (0, pad), constant_values=-1)
+            self._capacity = new_capacity
+        return np.fromiter((self.symbol_index[s] for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def _sector_id(self, sector: str) -> int:
+        if sector not in self._sector_index:
+            self._sector_index[sector] = len(self._sector_index)
+        return self._sector_index[sector]
+
+    # State updates
+
+    def add_returns(self, returns: Dict[str, float]):
+        """Append one period of returns; symbols without a value get zero"""
+        idx = self._ensure_symbols(list(returns))
+        row = np.zeros(self._capacity)
+        row[idx] = np.fromiter(returns.values(), dtype=float, count=len(returns))
+
+        if self._count == self.window:
+            evicted = self._returns[self._cursor]
+            self._sum -= evicted
+            self._cross -= np.outer(evicted, evicted)
+        else:
+            self._count += 1
+
+        self._returns[self._cursor] = row
+        self._sum += row
+        self._cross += np.outer(row, row)
+        self._cursor = (self._cursor + 1) % self.window
+
+        # Periodically rebuild from the buffer to bound floating point drift
+        self._updates_since_rebuild += 1
+        if self._updates_since_rebuild >= self.window:
+            self._sum = self._returns.sum(axis=0)
+            self._cross = self._returns.T @ self._returns
+            self._updates_since_rebuild = 0
+
+    def add_prices(self, prices: Dict[str, float]):
+        """Append one period from closing prices, converting to simple returns"""
+        returns = {}
+        for symbol, price in prices.items():
+            previous = self._last_prices.get(symbol)
+            if previous:
+                returns[symbol] = price / previous - 1.0
+            self._last_prices[symbol] = price
+        if returns:
+            self.add_returns(returns)
+
+    def set_portfolio(self, positions: Dict[str, float], sectors: Optional[Dict[str, str]] = None):
+        """Replace current position values (VND) and the symbol to sector map.
+
+        Both are rebuilt from the arguments, so symbols and sectors from an
+        earlier portfolio do not carry over.
+        """
+        self.symbol_sectors = {s.upper(): sector for s, sector in (sectors or {}).items()}
+        self._sector_index = {}
+        symbols = [s.upper() for s in positions]
+        idx = self._ensure_symbols(symbols + list(self.symbol_sectors))
+        self.positions[:] = 0.0
+        self.positions[idx[:len(symbols)]] = np.fromiter(
+            (float(v) for v in positions.values()), dtype=float, count=len(symbols)
+        )
+        self._symbol_sector[:] = -1
+        for symbol, sector in self.symbol_sectors.items():
+            self._symbol_sector[self.symbol_index[symbol]] = self._sector_id(sector)
+
+    # Derived matrices
+
+    @property
+    def covariance_ready(self) -> bool:
+        """Whether enough return periods are recorded to estimate covariance"""
+        return self._count >= 2
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance over the rolling window"""
+        n = self._count
+        size = len(self.symbol_index)
+        if n < 2:
+            return np.zeros((size, size))
+        s = self._sum[:size]
+        return (self._cross[:size, :size] - np.outer(s, s) / n) / (n - 1)
+
+    def correlation(self, cov: Optional[np.ndarray] = None) -> np.ndarray:
+        """Correlation matrix; symbols without variance correlate with nothing"""
+        cov = self.covariance() if cov is None else cov
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        return np.nan_to_num(corr)
+
+    def portfolio_var(self) -> float:
+        """Parametric one-period VaR of the current portfolio in VND"""
+        size = len(self.symbol_index)
+        w = self.positions[:size]
+        variance = float(w @ self.covariance() @ w)
+        return self.z_score * float(np.sqrt(max(variance, 0.0)))
+
+    # Candidate scoring
+
+    def score_candidates(
+        self,
+        candidates: Sequence[Tuple[str, float]],
+        portfolio_value: float
+    ) -> CandidateRiskScores:
+        """Score (symbol, value change in VND) candidates against the portfolio in order.
+
+        Each candidate is scored against the portfolio plus the candidates
+        before it that were accepted, so trades that only breach a limit
+        together are caught. A candidate that adds exposure and breaches is
+        taken to be withheld and is not carried forward; all others are.
+        Until covariance can be estimated, VaR is unknown and, when
+        `risk_require_covariance` is set, every candidate adding exposure
+        breaches.
+        """
+        symbols = [symbol.upper() for symbol, _ in candidates]
+        idx = self._ensure_symbols(symbols)
+        delta = np.fromiter((float(d) for _, d in candidates), dtype=float, count=len(candidates))
+        size = len(self.symbol_index)
+        count = len(candidates)
+
+        cov = self.covariance()
+        variances = np.clip(np.diag(cov), 0.0, None)
+        corr = np.abs(self.correlation(cov))
+        w = self.positions[:size].copy()
+        sigma_w = cov @ w
+        variance = float(w @ sigma_w)
+        portfolio_var = self.z_score * float(np.sqrt(max(variance, 0.0)))
+        fail_closed = settings.risk_require_covariance and not self.covariance_ready
+
+        total = max(portfolio_value, 1.0)
+        var_limit = settings.max_portfolio_risk * total
+        sector_of = self._symbol_sector[:size]
+        known = sector_of >= 0
+        sector_values = np.bincount(
+            sector_of[known], weights=w[known], minlength=max(len(self._sector_index), 1)
+        )
+
+        marginal_var = np.zeros(count)
+        incremental_var = np.zeros(count)
+        sector_exposure = np.zeros(count)
+        max_correlation = np.zeros(count)
+        risk_score = np.zeros(count)
+        breaches = np.zeros(count, dtype=bool)
+
+        for j in range(count):
+            i, d = idx[j], delta[j]
+            sigma_p = np.sqrt(max(variance, 0.0))
+
+            # Marginal VaR: dVaR/dw_i = z * (Σw)_i / σp
+            if sigma_p > 0:
+                marginal_var[j] = self.z_score * sigma_w[i] / sigma_p
+            else:
+                marginal_var[j] = self.z_score * np.sqrt(variances[i])
+
+            # Incremental VaR: exact change in portfolio VaR for w + δ·e_i
+            new_variance = variance + 2.0 * d * sigma_w[i] + d ** 2 * cov[i, i]
+            incremental_var[j] = self.z_score * (np.sqrt(max(new_variance, 0.0)) - sigma_p)
+
+            # Sector concentration after the trade
+            sector = sector_of[i]
+            if sector >= 0:
+                sector_exposure[j] = (sector_values[sector] + d) / total
+
+            # Highest correlation with any other holding
+            held = w > 0
+            held[i] = False
+            if held.any():
+                max_correlation[j] = corr[i, held].max()
+
+            # Utilisation of each configured limit; the worst one drives the score
+            utilisation = max(
+                max(incremental_var[j], 0.0) / var_limit,
+                sector_exposure[j] / settings.max_sector_exposure,
+                max_correlation[j] / settings.max_correlation_threshold
+            )
+            risk_score[j] = min(max(utilisation, 0.0), 1.0)
+            breaches[j] = utilisation > 1.0 or (fail_closed and d > 0)
+
+            if d <= 0 or not breaches[j]:
+                w[i] += d
+                sigma_w += cov[:, i] * d
+                variance = new_variance
+                if sector >= 0:
+                    sector_values[sector] += d
+
+        return CandidateRiskScores(
+            symbols=symbols,
+            portfolio_var=portfolio_var,
+            marginal_var=marginal_var,
+            incremental_var=incremental_var,
+            sector_exposure=sector_exposure,
+            max_correlation=max_correlation,
+            risk_score=risk_score,
+            breaches=breaches,
+            covariance_ready=self.covariance_ready
+        )
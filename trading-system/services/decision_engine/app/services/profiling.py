@@ -0,0 +1,82 @@
+"""
+On-demand Stack Sampling Profiler
+Samples the event loop thread's stack to show where decision latency is spent
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread.
+
+    Sampling from outside the profiled thread keeps overhead low enough to run
+    against live traffic, unlike deterministic tracing. The helper needs the GIL
+    to sample, so effective resolution is bounded by sys.getswitchinterval().
+    """
+
+    def __init__(self, target_thread_id: int, interval: float = 0.001, max_depth: int = 64):
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.leaves: Counter = Counter()
+        self.samples = 0
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.target_thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        if not stack:
+            return
+        self.samples += 1
+        self.leaves[stack[0]] += 1
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def run(self, duration: float):
+        """Sample until duration elapses; blocks the calling (helper) thread"""
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            self._sample()
+            time.sleep(self.interval)
+
+    def report(self, top: int = 30) -> Dict[str, Any]:
+        def share(count: int) -> float:
+            return round(count / self.samples, 4) if self.samples else 0.0
+
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "top_functions": [
+                {"function": name, "samples": count, "share": share(count)}
+                for name, count in self.leaves.most_common(top)
+            ],
+            # Collapsed stacks, usable directly with flamegraph.pl / speedscope
+            "collapsed_stacks": [f"{stack} {count}" for stack, count in self.stacks.most_common(top)]
+        }
+
+
+_profile_lock = asyncio.Lock()
+
+
+async def profile_event_loop(duration: float, interval: float = 0.001, top: int = 30) -> Dict[str, Any]:
+    """Profile the running event loop's thread for `duration` seconds; one profile at a time"""
+    if _profile_lock.locked():
+        raise RuntimeError("A profile is already running")
+    async with _profile_lock:
+        sampler = StackSampler(threading.get_ident(), interval=interval)
+        helper = threading.Thread(target=sampler.run, args=(duration,), daemon=True)
+        helper.start()
+        # Keep serving traffic while the helper samples this thread
+        while helper.is_alive():
+            await asyncio.sleep(0.05)
+        return sampler.report(top)
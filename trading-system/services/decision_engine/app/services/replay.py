@@ -0,0 +1,294 @@
+"""
+Decision Replay Engine
+Fast-forward backtesting of recorded signals and market context through the
+same DecisionEngine.process_decision pipeline used live
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import math
+import os
+import time as time_module
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.models import (
+    BacktestRequest, BacktestResult, DecisionRequest, DecisionType,
+    MarketContext, MarketEnum, Signal
+)
+
+logger = logging.getLogger(__name__)
+
+# Worker processes shared by every backtest; created on first use
+_backtest_pool: Optional[ProcessPoolExecutor] = None
+
+
+def to_utc(value: datetime) -> datetime:
+    """UTC-aware copy of a datetime; naive values are taken to be UTC already"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@dataclass
+class ReplayEvent:
+    """One recorded decision input for a symbol"""
+    timestamp: datetime
+    symbol: str
+    price: Decimal
+    market: MarketEnum
+    signals: List[Signal]
+    market_context: MarketContext
+
+
+def _read_symbol_events(path: str, symbol: str, start: datetime, end: datetime) -> Iterator[ReplayEvent]:
+    """Stream one symbol's recording, which is stored in timestamp order"""
+    context_cache: Dict[str, MarketContext] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            timestamp = to_utc(datetime.fromisoformat(record["timestamp"]))
+            if timestamp < start:
+                continue
+            if timestamp > end:
+                break
+
+            # Market context is shared across symbols and usually repeats; parse each distinct one once
+            context_key = json.dumps(record["market_context"], sort_keys=True)
+            market_context = context_cache.get(context_key)
+            if market_context is None:
+                market_context = context_cache[context_key] = MarketContext.parse_obj(record["market_context"])
+
+            yield ReplayEvent(
+                timestamp=timestamp,
+                symbol=symbol,
+                price=Decimal(str(record["price"])),
+                market=MarketEnum(record.get("market", MarketEnum.HOSE.value)),
+                signals=[Signal.parse_obj(s) for s in record.get("signals", [])],
+                market_context=market_context
+            )
+
+
+def load_events(request: BacktestRequest, data_path: str) -> Iterator[ReplayEvent]:
+    """Merge per-symbol recordings (<data_path>/<SYMBOL>.jsonl) into one time-ordered stream.
+
+    Recorded timestamps and the requested range are compared in UTC, so
+    naive and offset-aware values can be mixed.
+    """
+    start, end = to_utc(request.start_date), to_utc(request.end_date)
+    streams = []
+    for symbol in request.symbols:
+        path = os.path.join(data_path, f"{symbol}.jsonl")
+        if not os.path.exists(path):
+            logger.warning(f"No replay data for {symbol} at {path}")
+            continue
+        streams.append(_read_symbol_events(path, symbol, start, end))
+    return heapq.merge(*streams, key=lambda e: e.timestamp)
+
+
+class ReplaySimulator:
+    """Paper portfolio fed by replayed decisions"""
+
+    def __init__(self, initial_capital: float):
+        self.initial_capital = initial_capital
+        self.cash = initial_capital
+        self.positions: Dict[str, int] = {}
+        self.cost_basis: Dict[str, float] = {}
+        self.last_prices: Dict[str, float] = {}
+        self.trades: List[Dict[str, Any]] = []
+        self.equity_curve: List[Dict[str, Any]] = []
+        self._current_day = None
+
+    def equity(self) -> float:
+        return self.cash + sum(qty * self.last_prices.get(s, 0.0) for s, qty in self.positions.items())
+
+    def mark(self, timestamp: datetime, symbol: str, price: float):
+        """Update the last price and close out the equity point for the previous day"""
+        day = timestamp.date()
+        if self._current_day is not None and day != self._current_day:
+            self.equity_curve.append({"date": self._current_day.isoformat(), "equity": self.equity()})
+        self._current_day = day
+        self.last_prices[symbol] = price
+
+    def apply(self, timestamp: datetime, decision, price: float):
+        """Execute a decision at the replayed price"""
+        symbol = decision.symbol
+        held = self.positions.get(symbol, 0)
+
+        if decision.decision_type == DecisionType.BUY and decision.quantity:
+            quantity = min(decision.quantity, int(self.cash // price // 100) * 100)
+            if quantity <= 0:
+                return
+            self.cash -= quantity * price
+            self.cost_basis[symbol] = (self.cost_basis.get(symbol, 0.0) * held + quantity * price) / (held + quantity)
+            self.positions[symbol] = held + quantity
+            self.trades.append({
+                "timestamp": timestamp.isoformat(), "symbol": symbol,
+                "side": "BUY", "quantity": quantity, "price": price
+            })
+        elif decision.decision_type in (DecisionType.SELL, DecisionType.CLOSE_POSITION) and held > 0:
+            self.cash += held * price
+            pnl = (price - self.cost_basis.pop(symbol, price)) * held
+            del self.positions[symbol]
+            self.trades.append({
+                "timestamp": timestamp.isoformat(), "symbol": symbol,
+                "side": "SELL", "quantity": held, "price": price, "pnl": pnl
+            })
+
+    def finish(self) -> None:
+        if self._current_day is not None:
+            self.equity_curve.append({"date": self._current_day.isoformat(), "equity": self.equity()})
+
+    def result(self, request: BacktestRequest, decisions: int, elapsed: float, failed: int = 0) -> BacktestResult:
+        """Summarize performance in the BacktestResult shape"""
+        equities = [point["equity"] for point in self.equity_curve] or [self.initial_capital]
+        final_equity = equities[-1]
+        total_return = final_equity / self.initial_capital - 1.0
+
+        days = max((to_utc(request.end_date) - to_utc(request.start_date)).days, 1)
+        annualized_return = (1.0 + total_return) ** (365.0 / days) - 1.0 if total_return > -1.0 else -1.0
+
+        daily_returns = [b / a - 1.0 for a, b in zip(equities, equities[1:]) if a > 0]
+        volatility = 0.0
+        sharpe = None
+        var_95 = None
+        if len(daily_returns) > 1:
+            mean = sum(daily_returns) / len(daily_returns)
+            std = math.sqrt(sum((r - mean) ** 2 for r in daily_returns) / (len(daily_returns) - 1))
+            volatility = std * math.sqrt(252)
+            sharpe = mean / std * math.sqrt(252) if std > 0 else None
+            var_95 = -sorted(daily_returns)[int(0.05 * len(daily_returns))]
+
+        peak = equities[0]
+        max_drawdown = 0.0
+        for equity in equities:
+            peak = max(peak, equity)
+            max_drawdown = max(max_drawdown, (peak - equity) / peak if peak > 0 else 0.0)
+
+        closed = [t for t in self.trades if "pnl" in t]
+        winning = sum(1 for t in closed if t["pnl"] > 0)
+        losing = sum(1 for t in closed if t["pnl"] <= 0)
+
+        logger.info(
+            f"Replay {request.strategy_name}: {decisions} decisions in {elapsed:.2f}s "
+            f"({decisions / elapsed if elapsed > 0 else 0:.0f}/s), {failed} failed"
+        )
+
+        return BacktestResult(
+            strategy_name=request.strategy_name,
+            total_return=Decimal(str(round(total_return, 6))),
+            annualized_return=Decimal(str(round(annualized_return, 6))),
+            sharpe_ratio=Decimal(str(round(sharpe, 4))) if sharpe is not None else None,
+            max_drawdown=Decimal(str(round(max_drawdown, 6))),
+            total_trades=len(self.trades),
+            winning_trades=winning,
+            losing_trades=losing,
+            win_rate=Decimal(str(round(winning / len(closed) * 100, 2))) if closed else Decimal("0"),
+            volatility=Decimal(str(round(volatility, 6))),
+            var_95=Decimal(str(round(var_95, 6))) if var_95 is not None else None,
+            trades=self.trades,
+            equity_curve=self.equity_curve,
+            backtest_period=f"{request.start_date.date()} - {request.end_date.date()}",
+            failed_decisions=failed
+        )
+
+
+async def replay(request: BacktestRequest, data_path: Optional[str] = None) -> BacktestResult:
+    """Replay recorded events for one strategy configuration"""
+    # Imported here: app.main imports this module for its endpoints
+    from app.main import DecisionEngine
+
+    params = request.strategy_params
+    engine = DecisionEngine(
+        record_side_effects=False,
+        signal_weights=params.get("signal_weights")
+    )
+    await engine.initialize()
+    disabled_rules = set(params.get("disabled_rules", []))
+    engine.active_rules = [r for r in engine.active_rules if r.rule_id not in disabled_rules]
+
+    min_confidence = params.get("min_confidence", settings.min_confidence_threshold)
+    max_position_size = params.get("max_position_size")
+    simulator = ReplaySimulator(float(request.initial_capital))
+
+    decisions = 0
+    failed = 0
+    started = time_module.perf_counter()
+    for event in load_events(request, data_path or settings.replay_data_path):
+        price = float(event.price)
+        simulator.mark(event.timestamp, event.symbol, price)
+
+        # Capital is equity (cash plus marked positions), as live callers pass portfolio value
+        try:
+            decision_request = DecisionRequest(
+                symbol=event.symbol,
+                current_price=event.price,
+                current_position=simulator.positions.get(event.symbol),
+                available_capital=Decimal(str(round(max(simulator.equity(), 0.0), 2))),
+                market=event.market,
+                strategy=request.strategy_name,
+                max_position_size=max_position_size
+            )
+            decision = await engine.process_decision(decision_request, event.signals, event.market_context)
+        except Exception as e:
+            # One bad event is skipped and counted rather than aborting the run
+            failed += 1
+            logger.debug(f"Replay {request.strategy_name}: {event.symbol} at {event.timestamp} failed: {e}")
+            continue
+        decisions += 1
+
+        if decision.confidence_score >= min_confidence:
+            simulator.apply(event.timestamp, decision, price)
+
+    simulator.finish()
+    return simulator.result(request, decisions, time_module.perf_counter() - started, failed)
+
+
+def _replay_in_process(request_data: Dict[str, Any], data_path: Optional[str]) -> Dict[str, Any]:
+    """Process pool entry point; requests and results cross the boundary as plain dicts"""
+    result = asyncio.run(replay(BacktestRequest.parse_obj(request_data), data_path))
+    return json.loads(result.json())
+
+
+def get_backtest_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all backtest requests, sized by backtest_max_workers"""
+    global _backtest_pool
+    if _backtest_pool is None:
+        _backtest_pool = ProcessPoolExecutor(max_workers=settings.backtest_max_workers)
+    return _backtest_pool
+
+
+def shutdown_backtest_pool() -> None:
+    """Stop the shared worker processes; called on application shutdown"""
+    global _backtest_pool
+    if _backtest_pool is not None:
+        _backtest_pool.shutdown(cancel_futures=True)
+        _backtest_pool = None
+
+
+async def run_backtest(request: BacktestRequest, data_path: Optional[str] = None) -> BacktestResult:
+    """Replay one strategy configuration in the shared pool, off the event loop"""
+    result, = await run_backtests([request], data_path=data_path)
+    return result
+
+
+async def run_backtests(
+    requests: List[BacktestRequest],
+    data_path: Optional[str] = None
+) -> List[BacktestResult]:
+    """Replay many strategy configurations in parallel on the shared pool, one task per configuration"""
+    loop = asyncio.get_running_loop()
+    pool = get_backtest_pool()
+    results = await asyncio.gather(*[
+        loop.run_in_executor(pool, _replay_in_process, json.loads(r.json()), data_path)
+        for r in requests
+    ])
+    return [BacktestResult.parse_obj(r) for r in results]
@@ -0,0 +1,296 @@
+"""
+Signal Stream Processor
+Event-driven decision pipeline consuming technical analysis, prediction and
+market data topics from Kafka and publishing TradingDecision events
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, ConsumerRebalanceListener, TopicPartition
+from aiokafka.coordinator.assignors.range import RangePartitionAssignor
+
+from app.config import settings
+from app.models import DecisionRequest, MarketContext, MarketEnum, Signal, SignalSource
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """UTC-aware copy of a signal timestamp; naive values are taken to be UTC already"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@dataclass
+class SymbolSignalState:
+    """Latest inputs for one symbol inside the aggregation window"""
+    symbol: str
+    signals: Dict[SignalSource, Signal] = field(default_factory=dict)
+    price: Optional[Decimal] = None
+    market: MarketEnum = MarketEnum.HOSE
+    partitions: Set[TopicPartition] = field(default_factory=set)
+    evaluated_fingerprint: Optional[Tuple] = None
+
+    def prune(self, now: datetime, window: timedelta) -> bool:
+        """Drop signals older than the window or past their expiry; return True if any were dropped.
+
+        `now` and the signal timestamps are UTC-aware.
+        """
+        expired = [
+            source for source, signal in self.signals.items()
+            if signal.generated_at < now - window
+            or (signal.expires_at is not None and signal.expires_at <= now)
+        ]
+        for source in expired:
+            del self.signals[source]
+        return bool(expired)
+
+    def fingerprint(self) -> Tuple:
+        """Identity of the current inputs, used to skip redundant re-evaluation"""
+        return (
+            self.price,
+            tuple(sorted(
+                (source.value, signal.signal_id, signal.signal_type.value, signal.strength, signal.confidence)
+                for source, signal in self.signals.items()
+            ))
+        )
+
+
+class _PartitionStateListener(ConsumerRebalanceListener):
+    """Drops per-symbol state for partitions handed to another replica"""
+
+    def __init__(self, processor: "SignalStreamProcessor"):
+        self.processor = processor
+
+    async def on_partitions_revoked(self, revoked):
+        self.processor.drop_partitions(set(revoked))
+
+    async def on_partitions_assigned(self, assigned):
+        logger.info(f"Signal stream assigned {len(assigned)} partitions")
+
+
+class SignalStreamProcessor:
+    """Consumes upstream signals and re-evaluates a symbol only when its inputs change.
+
+    Upstream producers key messages by symbol and every input topic has the
+    same number of partitions, so a symbol lands on the same partition number
+    in each topic. The range assignor gives a consumer the same partition
+    numbers of every topic, so all of a symbol's inputs reach one replica and
+    its state never has to be shared.
+    """
+
+    def __init__(
+        self,
+        decision_engine: Any,
+        market_context_provider: Callable[[], Awaitable[MarketContext]]
+    ):
+        self.decision_engine = decision_engine
+        self.market_context_provider = market_context_provider
+        self.window = timedelta(seconds=settings.signal_aggregation_window)
+        self.states: Dict[str, SymbolSignalState] = {}
+        self.consumer: Optional[AIOKafkaConsumer] = None
+        self.producer: Optional[AIOKafkaProducer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._topic_sources = {
+            settings.kafka_technical_analysis_topic: SignalSource.TECHNICAL_ANALYSIS,
+            settings.kafka_prediction_topic: SignalSource.PREDICTION_MODEL
+        }
+        self.stats = {"messages": 0, "evaluations": 0, "skipped": 0, "errors": 0}
+
+    async def start(self):
+        """Start consumer, producer and the processing loop"""
+        self.consumer = AIOKafkaConsumer(
+            bootstrap_servers=settings.kafka_bootstrap_servers,
+            group_id=settings.kafka_consumer_group,
+            max_poll_records=settings.stream_max_poll_records,
+            auto_offset_reset="latest",
+            partition_assignment_strategy=(RangePartitionAssignor,)
+        )
+        self.consumer.subscribe(
+            topics=list(settings.kafka_input_topics.values()),
+            listener=_PartitionStateListener(self)
+        )
+        self.producer = AIOKafkaProducer(
+            bootstrap_servers=settings.kafka_bootstrap_servers,
+            linger_ms=1
+        )
+        await self.producer.start()
+        try:
+            await self._check_co_partitioned()
+            await self.consumer.start()
+        except Exception:
+            await self.producer.stop()
+            raise
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Signal stream started on topics {list(settings.kafka_input_topics.values())}")
+
+    async def stop(self):
+        """Stop the processing loop and close Kafka clients"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self.consumer:
+            await self.consumer.stop()
+        if self.producer:
+            await self.producer.stop()
+        logger.info("Signal stream stopped")
+
+    async def _check_co_partitioned(self):
+        """Refuse to start unless every input topic has the same partition count"""
+        counts = {
+            topic: len(await self.producer.partitions_for(topic))
+            for topic in settings.kafka_input_topics.values()
+        }
+        if len(set(counts.values())) > 1:
+            raise RuntimeError(
+                f"Signal stream input topics must have equal partition counts to keep "
+                f"a symbol on one replica: {counts}"
+            )
+
+    def drop_partitions(self, revoked: Set[TopicPartition]):
+        """Forget symbols whose partitions moved to another consumer"""
+        dropped = [symbol for symbol, state in self.states.items() if state.partitions & revoked]
+        for symbol in dropped:
+            del self.states[symbol]
+        if dropped:
+            logger.info(f"Dropped signal state for {len(dropped)} symbols after rebalance")
+
+    async def _run(self):
+        """Poll batches, fold them into symbol state and evaluate each changed symbol once"""
+        while True:
+            try:
+                batches = await self.consumer.getmany(timeout_ms=settings.stream_poll_timeout_ms)
+                changed: Set[str] = set()
+                for tp, messages in batches.items():
+                    for message in messages:
+                        symbol = self.apply_message(tp, message.value)
+                        if symbol:
+                            changed.add(symbol)
+
+                if changed:
+                    await self.evaluate_symbols(changed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error in signal stream loop: {e}")
+                await asyncio.sleep(0.1)
+
+    def apply_message(self, tp: TopicPartition, raw: bytes) -> Optional[str]:
+        """Update symbol state from one message; return the symbol if its inputs changed"""
+        self.stats["messages"] += 1
+        try:
+            payload = json.loads(raw)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipping undecodable message on {tp.topic}: {e}")
+            return None
+
+        symbol = str(payload.get("symbol", "")).upper()
+        if not symbol:
+            return None
+
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = SymbolSignalState(symbol=symbol)
+        state.partitions.add(tp)
+
+        if tp.topic == settings.kafka_market_data_topic:
+            price = payload.get("price", payload.get("last_price"))
+            if price is None:
+                return None
+            market = payload.get("market") or payload.get("exchange")
+            if market in MarketEnum.__members__:
+                state.market = MarketEnum(market)
+            price = Decimal(str(price))
+            if price == state.price:
+                return None
+            state.price = price
+            return symbol
+
+        try:
+            payload.setdefault("source", self._topic_sources.get(tp.topic, SignalSource.MANUAL).value)
+            signal = Signal.parse_obj(payload)
+            signal.generated_at = _as_utc(signal.generated_at)
+            signal.expires_at = _as_utc(signal.expires_at)
+        except Exception as e:
+            logger.warning(f"Skipping invalid signal for {symbol} on {tp.topic}: {e}")
+            return None
+
+        previous = state.signals.get(signal.source)
+        if previous is not None and previous.generated_at > signal.generated_at:
+            return None
+        state.signals[signal.source] = signal
+        return symbol
+
+    async def evaluate_symbols(self, symbols: Set[str]):
+        """Run the decision pipeline for symbols whose inputs actually changed.
+
+        A symbol that fails is counted and logged; the others are still evaluated.
+        """
+        now = datetime.now(timezone.utc)
+        market_context = await self.market_context_provider()
+
+        for symbol in symbols:
+            try:
+                await self._evaluate_symbol(symbol, now, market_context)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Streaming decision failed for {symbol}: {e}")
+
+    async def _evaluate_symbol(self, symbol: str, now: datetime, market_context: MarketContext):
+        state = self.states.get(symbol)
+        if state is None:
+            return
+        state.prune(now, self.window)
+        if state.price is None or not state.signals:
+            return
+
+        fingerprint = state.fingerprint()
+        if fingerprint == state.evaluated_fingerprint:
+            self.stats["skipped"] += 1
+            return
+
+        request = DecisionRequest(
+            symbol=symbol,
+            current_price=state.price,
+            available_capital=Decimal(str(settings.stream_available_capital)),
+            market=state.market,
+            strategy=settings.default_strategy.value
+        )
+        decision = await self.decision_engine.process_decision(
+            request, list(state.signals.values()), market_context
+        )
+        state.evaluated_fingerprint = fingerprint
+        self.stats["evaluations"] += 1
+        await self.publish_decision(decision)
+
+    async def publish_decision(self, decision):
+        """Publish a decision event keyed by symbol"""
+        if not self.producer:
+            return
+        await self.producer.send(
+            settings.kafka_topics["decisions"],
+            key=decision.symbol.encode(),
+            value=decision.json().encode()
+        )
+
+    def get_status(self) -> Dict[str, Any]:
+        """Streaming status for health reporting"""
+        assignment: List[TopicPartition] = list(self.consumer.assignment()) if self.consumer else []
+        return {
+            "tracked_symbols": len(self.states),
+            "assigned_partitions": len(assignment),
+            **self.stats
+        }
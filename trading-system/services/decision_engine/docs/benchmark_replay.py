@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark backtest replay (decisions/sec, single process and across the worker pool)
+
+Target: 100,000 replayed decisions/sec in aggregate across backtest workers.
+
+Measured (200,000 events per configuration, 4 workers), the target is not met:
+    review machine:    ~3,500/sec single process, ~3,100/sec on the pool
+    single-core host:  ~5,100/sec single process, ~5,100/sec on the pool
+Every event runs the full process_decision pipeline; the pool only scales with free cores.
+
+Run from the service root: python docs/benchmark_replay.py
+"""
+
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.models import BacktestRequest
+from app.services.replay import replay, run_backtests, shutdown_backtest_pool
+
+SYMBOLS = 20
+EVENTS_PER_SYMBOL = 10_000
+CONFIGURATIONS = settings.backtest_max_workers
+TARGET = 100_000
+
+START = datetime(2024, 1, 2, 2, 0)  # 09:00 Asia/Ho_Chi_Minh, in UTC
+
+MARKET_CONTEXT = {
+    "market_condition": "SIDEWAYS",
+    "market_trend": "neutral",
+    "volatility_level": "MEDIUM",
+    "current_session": "MORNING"
+}
+
+
+def write_recordings(directory: str) -> list:
+    """One JSONL recording per symbol: a price walk with a technical signal on every event"""
+    rng = random.Random(42)
+    symbols = [f"S{i:03d}" for i in range(SYMBOLS)]
+    for symbol in symbols:
+        price = rng.randrange(10_000, 100_000, 100)
+        with open(os.path.join(directory, f"{symbol}.jsonl"), "w", encoding="utf-8") as f:
+            for i in range(EVENTS_PER_SYMBOL):
+                price = max(1_000, round(price * rng.uniform(0.98, 1.02), -2))
+                timestamp = START + timedelta(minutes=i)
+                signal_type = rng.choice(["BUY", "SELL", "HOLD"])
+                f.write(json.dumps({
+                    "timestamp": timestamp.isoformat(),
+                    "price": price,
+                    "market": "HOSE",
+                    "signals": [{
+                        "signal_id": f"{symbol}-{i}",
+                        "symbol": symbol,
+                        "signal_type": signal_type,
+                        "source": "TECHNICAL_ANALYSIS",
+                        "strength": rng.random(),
+                        "confidence": rng.random(),
+                        "generated_at": timestamp.isoformat()
+                    }],
+                    "market_context": MARKET_CONTEXT
+                }) + "\n")
+    return symbols
+
+
+def build_request(symbols: list, name: str) -> BacktestRequest:
+    return BacktestRequest(
+        strategy_name=name,
+        symbols=symbols,
+        start_date=START,
+        end_date=START + timedelta(minutes=EVENTS_PER_SYMBOL),
+        initial_capital=1_000_000_000,
+        strategy_params={"min_confidence": 0.5}
+    )
+
+
+async def main():
+    total = SYMBOLS * EVENTS_PER_SYMBOL
+    with tempfile.TemporaryDirectory() as directory:
+        symbols = write_recordings(directory)
+
+        # One configuration in this process
+        started = time.perf_counter()
+        await replay(build_request(symbols, "single"), data_path=directory)
+        single = total / (time.perf_counter() - started)
+
+        # One configuration per worker on the shared pool
+        requests = [build_request(symbols, f"config-{i}") for i in range(CONFIGURATIONS)]
+        started = time.perf_counter()
+        await run_backtests(requests, data_path=directory)
+        aggregate = total * CONFIGURATIONS / (time.perf_counter() - started)
+        shutdown_backtest_pool()
+
+    print(f"Decisions per configuration: {total:,}")
+    print(f"Single process:   {single:,.0f} decisions/sec")
+    print(f"Pool ({CONFIGURATIONS} workers): {aggregate:,.0f} decisions/sec")
+    print(f"Target:           {TARGET:,} decisions/sec ({'met' if aggregate >= TARGET else 'not met'})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""
+Write-behind decision cache: everything queued is written before stop() returns
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.decision_cache import LATEST_DECISIONS_KEY, DecisionCacheWriter
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def setex(self, key, ttl, value):
+        self.calls.append(("setex", key, value))
+
+    def hset(self, key, mapping):
+        self.calls.append(("hset", key, mapping))
+
+    async def execute(self):
+        await asyncio.sleep(self.redis.latency)
+        for call in self.calls:
+            if call[0] == "setex":
+                self.redis.data[call[1]] = call[2]
+            else:
+                self.redis.data.setdefault(call[1], {}).update(call[2])
+
+
+class FakeRedis:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakeDecision:
+    def __init__(self, symbol, decision_id):
+        self.symbol = symbol
+        self.decision_id = decision_id
+
+    def json(self):
+        return json.dumps({"symbol": self.symbol, "decision_id": self.decision_id})
+
+
+def decision_keys(redis):
+    return sorted(key for key in redis.data if key != LATEST_DECISIONS_KEY)
+
+
+@pytest.mark.asyncio
+async def test_stop_writes_every_queued_decision():
+    redis = FakeRedis()
+    writer = DecisionCacheWriter(redis, batch_size=4, flush_interval_ms=60_000, max_queue_size=100)
+    await writer.start()
+
+    for i in range(10):
+        await writer.enqueue(FakeDecision("VCB" if i % 2 else "FPT", str(i)))
+    await writer.stop()
+
+    assert len(decision_keys(redis)) == 10
+    assert writer.stats["written"] == 10
+    assert json.loads(redis.data[LATEST_DECISIONS_KEY]["VCB"])["decision_id"] == "9"
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_the_batch_in_flight_and_what_follows_the_marker():
+    redis = FakeRedis(latency=0.05)
+    writer = DecisionCacheWriter(redis, batch_size=1, flush_interval_ms=60_000, max_queue_size=100)
+    await writer.start()
+    await writer.enqueue(FakeDecision("VCB", "1"))
+    await asyncio.sleep(0.01)  # The loop has dequeued it and is flushing
+
+    stopping = asyncio.create_task(writer.stop())
+    await asyncio.sleep(0)
+    await writer.enqueue(FakeDecision("HPG", "2"))  # Queued behind the stop marker
+    await stopping
+
+    assert decision_keys(redis) == ["decision:HPG:2", "decision:VCB:1"]
+    assert writer.stats["errors"] == 0
@@ -0,0 +1,66 @@
+"""
+Portfolio risk model: rolling covariance and sequential candidate scoring
+"""
+
+import numpy as np
+
+from app.services.portfolio_risk import PortfolioRiskModel
+
+
+def test_incremental_covariance_matches_the_batch_estimate():
+    rng = np.random.default_rng(7)
+    model = PortfolioRiskModel(window=10, initial_capacity=2)
+    rows = []
+    for period in range(25):
+        # A third symbol appears part way through, growing the matrices
+        symbols = ["VCB", "FPT"] + (["HPG"] if period >= 5 else [])
+        returns = dict(zip(symbols, rng.normal(0.0, 0.02, len(symbols))))
+        model.add_returns(returns)
+        rows.append([returns.get(symbol, 0.0) for symbol in ("VCB", "FPT", "HPG")])
+
+    expected = np.cov(np.array(rows[-10:]), rowvar=False)
+    assert np.allclose(model.covariance(), expected)
+
+
+def uncorrelated_model() -> PortfolioRiskModel:
+    """Two banks whose returns are uncorrelated, so only sector exposure binds"""
+    model = PortfolioRiskModel(window=20)
+    for period in range(20):
+        model.add_returns({
+            "VCB": 0.01 if period % 2 else -0.01,
+            "BID": 0.01 if period % 4 < 2 else -0.01
+        })
+    return model
+
+
+def test_buys_that_only_breach_together_are_caught():
+    model = uncorrelated_model()
+    model.set_portfolio({}, {"VCB": "Banking", "BID": "Banking"})
+
+    scores = model.score_candidates([("VCB", 200.0), ("BID", 200.0)], portfolio_value=1_000.0)
+
+    assert scores.breaches.tolist() == [False, True]
+    assert np.allclose(scores.sector_exposure, [0.2, 0.4])
+
+
+def test_withheld_buys_do_not_count_against_later_candidates():
+    model = uncorrelated_model()
+    model.set_portfolio({"VCB": 200.0}, {"VCB": "Banking", "BID": "Banking"})
+
+    scores = model.score_candidates(
+        [("BID", 500.0), ("BID", 50.0), ("VCB", -200.0), ("BID", 200.0)], portfolio_value=1_000.0
+    )
+
+    # The sale frees sector room for the last buy
+    assert scores.breaches.tolist() == [True, False, False, False]
+    assert np.allclose(scores.sector_exposure, [0.7, 0.25, 0.05, 0.25])
+
+
+def test_buys_are_withheld_until_covariance_can_be_estimated():
+    model = PortfolioRiskModel(window=20)
+    model.set_portfolio({"VCB": 500.0})
+
+    scores = model.score_candidates([("FPT", 10.0), ("VCB", -500.0)], portfolio_value=1_000.0)
+
+    assert not scores.covariance_ready
+    assert scores.row(0)["breach"] and not scores.row(1)["breach"]
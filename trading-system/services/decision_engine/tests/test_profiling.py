@@ -0,0 +1,42 @@
+"""
+On-demand profiler: disabled by default, refused in production, bounded output
+"""
+
+import httpx
+import pytest
+
+from app import main
+from app.config import Settings
+
+
+def production(**overrides) -> Settings:
+    return Settings(environment="production", allowed_origins=["https://trading.example.vn"], **overrides)
+
+
+def test_profiler_cannot_be_enabled_in_production():
+    assert not production().enable_debug_profiling
+    with pytest.raises(ValueError, match="Debug profiling cannot be enabled in production"):
+        production(enable_debug_profiling=True)
+
+
+@pytest.fixture
+def http():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_profile_route_is_off_by_default(http):
+    response = await http.get("/debug/profile", params={"seconds": 0.01})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_profile_route_bounds_the_stacks_returned(http, monkeypatch):
+    monkeypatch.setattr(main.settings, "enable_debug_profiling", True)
+
+    response = await http.get("/debug/profile", params={"seconds": 0.01, "top": 10_000})
+    assert response.status_code == 422
+
+    response = await http.get("/debug/profile", params={"seconds": 0.05, "top": 5})
+    assert response.status_code == 200
+    assert len(response.json()["collapsed_stacks"]) <= 5
@@ -0,0 +1,76 @@
+"""
+Backtest replay through the live decision pipeline
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import BacktestRequest
+from app.services.replay import replay
+
+START = datetime(2024, 1, 2, 2, 0)
+
+MARKET_CONTEXT = {
+    "market_condition": "BULL_MARKET",
+    "market_trend": "up",
+    "volatility_level": "LOW",
+    "current_session": "MORNING"
+}
+
+
+def write_recording(directory, symbol, prices, signal_type="BUY"):
+    with open(directory / f"{symbol}.jsonl", "w", encoding="utf-8") as f:
+        for i, price in enumerate(prices):
+            timestamp = START + timedelta(minutes=i)
+            f.write(json.dumps({
+                "timestamp": timestamp.isoformat(),
+                "price": price,
+                "market": "HOSE",
+                "signals": [{
+                    "signal_id": f"{symbol}-{i}",
+                    "symbol": symbol,
+                    "signal_type": signal_type,
+                    "source": "TECHNICAL_ANALYSIS",
+                    "strength": 0.9,
+                    "confidence": 0.9,
+                    "generated_at": timestamp.isoformat()
+                }],
+                "market_context": MARKET_CONTEXT
+            }) + "\n")
+
+
+def backtest(symbols, minutes, **params):
+    return BacktestRequest(
+        strategy_name="growing-position",
+        symbols=symbols,
+        start_date=START,
+        end_date=START + timedelta(minutes=minutes),
+        initial_capital=1_000_000_000,
+        strategy_params={"min_confidence": 0.0, **params}
+    )
+
+
+@pytest.mark.asyncio
+async def test_replay_keeps_deciding_once_the_position_outgrows_cash(tmp_path):
+    # Without the exposure rule, buys keep adding until the position is worth more than the cash
+    write_recording(tmp_path, "VCB", [50_000 + 500 * i for i in range(40)])
+
+    result = await replay(
+        backtest(["VCB"], 40, disabled_rules=["risk_limit_check"]), data_path=str(tmp_path)
+    )
+
+    held = sum(trade["quantity"] for trade in result.trades)
+    cash = 1_000_000_000 - sum(trade["quantity"] * trade["price"] for trade in result.trades)
+    assert held * 69_500 > cash
+    assert result.failed_decisions == 0
+
+
+@pytest.mark.asyncio
+async def test_a_failing_event_is_counted_and_skipped(tmp_path):
+    write_recording(tmp_path, "VCB", [50_000, 0, 51_000])
+
+    result = await replay(backtest(["VCB"], 3), data_path=str(tmp_path))
+
+    assert result.failed_decisions == 1
@@ -0,0 +1,126 @@
+"""
+Streaming decisions: co-partitioned input topics and per-symbol failure isolation
+"""
+
+import json
+
+import pytest
+from aiokafka import TopicPartition
+
+from app.config import settings
+from app.models import MarketContext
+from app.services import signal_stream
+from app.services.signal_stream import SignalStreamProcessor
+
+
+class FakeProducer:
+    def __init__(self, partitions=None, **kwargs):
+        self.partitions = partitions or {}
+        self.sent = []
+        self.stopped = False
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        self.stopped = True
+
+    async def partitions_for(self, topic):
+        return set(range(self.partitions.get(topic, 6)))
+
+    async def send(self, topic, key=None, value=None):
+        self.sent.append((topic, key, value))
+
+
+class FakeConsumer:
+    def __init__(self, *args, **kwargs):
+        self.started = False
+
+    def subscribe(self, topics, listener=None):
+        self.topics = topics
+
+    async def start(self):
+        self.started = True
+
+
+class FakeDecision:
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def json(self):
+        return json.dumps({"symbol": self.symbol})
+
+
+class FakeEngine:
+    """Decides for every symbol except those listed as failing"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    async def process_decision(self, request, signals, market_context):
+        if request.symbol in self.failing:
+            raise RuntimeError(f"no decision for {request.symbol}")
+        return FakeDecision(request.symbol)
+
+
+async def market_context():
+    return MarketContext(market_condition="SIDEWAYS", market_trend="neutral", volatility_level="MEDIUM",
+                         current_session="MORNING")
+
+
+def feed(processor, symbol, price):
+    processor.apply_message(
+        TopicPartition(settings.kafka_market_data_topic, 0),
+        json.dumps({"symbol": symbol, "price": price}).encode()
+    )
+    processor.apply_message(
+        TopicPartition(settings.kafka_technical_analysis_topic, 0),
+        json.dumps({
+            "signal_id": f"{symbol}-1", "symbol": symbol, "signal_type": "BUY",
+            "strength": 0.8, "confidence": 0.7
+        }).encode()
+    )
+
+
+@pytest.mark.asyncio
+async def test_start_refuses_input_topics_with_unequal_partition_counts(monkeypatch):
+    producer = FakeProducer({settings.kafka_prediction_topic: 3})
+    consumer = FakeConsumer()
+    monkeypatch.setattr(signal_stream, "AIOKafkaProducer", lambda **kwargs: producer)
+    monkeypatch.setattr(signal_stream, "AIOKafkaConsumer", lambda **kwargs: consumer)
+    processor = SignalStreamProcessor(FakeEngine(), market_context)
+
+    with pytest.raises(RuntimeError, match="equal partition counts"):
+        await processor.start()
+
+    assert not consumer.started
+    assert producer.stopped
+
+
+@pytest.mark.asyncio
+async def test_co_partitioned_input_topics_pass_the_check():
+    processor = SignalStreamProcessor(FakeEngine(), market_context)
+    processor.producer = FakeProducer()
+
+    await processor._check_co_partitioned()
+
+
+@pytest.mark.asyncio
+async def test_a_failing_symbol_does_not_stop_the_others():
+    processor = SignalStreamProcessor(FakeEngine(failing={"HPG"}), market_context)
+    processor.producer = FakeProducer()
+    for symbol in ("VCB", "HPG", "FPT"):
+        feed(processor, symbol, 85_000)
+
+    await processor.evaluate_symbols({"VCB", "HPG", "FPT"})
+
+    assert sorted(key for _, key, _ in processor.producer.sent) == [b"FPT", b"VCB"]
+    assert processor.stats["errors"] == 1
+    assert processor.stats["evaluations"] == 2
+
+    # The failed symbol is retried with the same inputs; the decided ones are skipped
+    processor.decision_engine.failing.clear()
+    await processor.evaluate_symbols({"VCB", "HPG", "FPT"})
+
+    assert processor.producer.sent[-1][1] == b"HPG"
+    assert processor.stats["skipped"] == 2
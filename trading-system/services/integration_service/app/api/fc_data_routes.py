@@ -1,8 +1,8 @@
 """
 FC Data API routes
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from typing import List, Optional
 from app.services.fc_data_service import FCDataService
 from app.schemas.fc_data import *
 from app.schemas.base import ErrorResponse
@@ -382,3 +382,87 @@ async def get_daily_stock_price(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"message": "Internal server error", "error": str(e)}
         )
+
+
+@router.get(
+    "/symbol-snapshot",
+    response_model=SymbolSnapshotResponse,
+    response_model_exclude_none=True,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"}
+    },
+    summary="Get Symbol Snapshot",
+    description="Securities details, latest daily price, daily OHLC and index membership of a symbol, "
+                "fetched concurrently in one call. Parts that fail are listed in `errors`."
+)
+async def get_symbol_snapshot(
+    symbol: str = Query(..., max_length=10, description="Stock symbol"),
+    from_date: str = Query(..., description="Start date (dd/mm/yyyy)"),
+    to_date: str = Query(..., description="End date (dd/mm/yyyy)"),
+    market: Optional[Market] = Query(None, description="Market"),
+    index_ids: Optional[List[str]] = Query(None, description="Indices to check membership of (default VN30)"),
+    page_size: int = Query(30, ge=10, le=1000, description="Daily rows in the date range (10-1000)"),
+    service: FCDataService = Depends(get_fc_data_service)
+) -> SymbolSnapshotResponse:
+    """Get symbol snapshot"""
+    try:
+        request = SymbolSnapshotRequest(
+            symbol=symbol,
+            from_date=from_date,
+            to_date=to_date,
+            market=market,
+            page_size=page_size,
+            **({"index_ids": index_ids} if index_ids else {})
+        )
+        return await service.get_symbol_snapshot(request)
+    
+    except SSIAPIError as e:
+        raise ssi_api_error_to_http_exception(e)
+    except SSIIntegrationError as e:
+        raise ssi_integration_error_to_http_exception(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"message": "Internal server error", "error": str(e)}
+        )
+
+
+@router.post(
+    "/symbol-snapshot/batch",
+    response_model=SymbolSnapshotBatchResponse,
+    response_model_exclude_none=True,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"}
+    },
+    summary="Get Symbol Snapshots",
+    description="Symbol snapshots for up to 50 symbols in one call. Calls shared by several symbols, "
+                "such as index components, are made once."
+)
+async def get_symbol_snapshots(
+    request: SymbolSnapshotBatchRequest = Body(...,
+        example={
+            "symbols": ["SSI", "HPG", "VNM"],
+            "from_date": "01/06/2024",
+            "to_date": "30/06/2024",
+            "index_ids": ["VN30"]
+        }
+    ),
+    service: FCDataService = Depends(get_fc_data_service)
+) -> SymbolSnapshotBatchResponse:
+    """Get symbol snapshots"""
+    try:
+        return await service.get_symbol_snapshots(request)
+    
+    except SSIAPIError as e:
+        raise ssi_api_error_to_http_exception(e)
+    except SSIIntegrationError as e:
+        raise ssi_integration_error_to_http_exception(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"message": "Internal server error", "error": str(e)}
+        )
@@ -3,20 +3,84 @@ Base HTTP client for SSI APIs
 """
 import asyncio
 import json
-from typing import Any, Dict, Optional, Union
+import time
+from typing import Any, Dict, Iterable, Optional, Union
 from urllib.parse import urljoin
 import httpx
-from app.core.logging_config import LoggerMixin
+from app.core.logging_config import LoggerMixin, PayloadPreview, payload_sampled
 from app.core.exceptions import (
     SSIAPIError, SSINetworkError, SSIAuthenticationError,
     SSIRateLimitError, SSIServerError
 )
+from app.utils.retry import RetryBudget, backoff_delay, hedge_delay, latency_tracker, retry_budget
 from config import settings
 
+# Safe to send twice: retried on any network error and eligible for hedging
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional h2 package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class SharedHTTPClients(LoggerMixin):
+    """App-lifetime HTTP clients, one per SSI upstream.
+    
+    Started in the application lifespan and reused by every BaseHTTPClient
+    with the same base URL, so keep-alive connections, TLS sessions and
+    HTTP/2 streams outlive the API request that opened them. Clients for
+    other base URLs, or created before startup, keep their own client.
+    """
+    
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+    
+    async def start(self, base_urls: Iterable[str]) -> None:
+        """Create one pooled client per upstream base URL"""
+        http2 = settings.http2_enabled and _http2_available()
+        if settings.http2_enabled and not http2:
+            self.log_warning("h2 package not installed, SSI upstreams will use HTTP/1.1")
+        
+        for base_url in base_urls:
+            base_url = base_url.rstrip('/')
+            if base_url in self._clients:
+                continue
+            self._clients[base_url] = httpx.AsyncClient(
+                base_url=base_url,
+                http2=http2,
+                timeout=httpx.Timeout(settings.request_timeout, connect=settings.connection_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry
+                ),
+                follow_redirects=True
+            )
+            self.log_info("Shared HTTP client started", base_url=base_url, http2=http2)
+    
+    def get(self, base_url: str) -> Optional[httpx.AsyncClient]:
+        """Shared client for a base URL, if one was started"""
+        return self._clients.get(base_url.rstrip('/'))
+    
+    async def close(self) -> None:
+        """Close every shared client and its connections"""
+        clients, self._clients = self._clients, {}
+        for base_url, client in clients.items():
+            await client.aclose()
+            self.log_info("Shared HTTP client closed", base_url=base_url)
+
 
 class BaseHTTPClient(LoggerMixin):
     """Base HTTP client with common functionality"""
     
+    # Race a second copy of slow idempotent requests (see _send_hedged)
+    hedge_reads = False
+    
     def __init__(
         self,
         base_url: str,
@@ -29,6 +93,7 @@ class BaseHTTPClient(LoggerMixin):
         self.retries = retries or settings.max_retries
         self.default_headers = headers or {}
         self._client: Optional[httpx.AsyncClient] = None
+        self._owns_client = False
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -40,8 +105,15 @@ class BaseHTTPClient(LoggerMixin):
         await self.disconnect()
     
     async def connect(self) -> None:
-        """Initialize HTTP client"""
+        """Attach to the shared client for this upstream, or create a private one"""
         if self._client is None:
+            shared = http_clients.get(self.base_url)
+            if shared is not None:
+                self._client = shared
+                self._owns_client = False
+                return
+            
+            self._owns_client = True
             self._client = httpx.AsyncClient(
                 base_url=self.base_url,
                 timeout=httpx.Timeout(self.timeout),
@@ -55,11 +127,12 @@ class BaseHTTPClient(LoggerMixin):
             self.log_info("HTTP client connected", base_url=self.base_url)
     
     async def disconnect(self) -> None:
-        """Close HTTP client"""
+        """Close a private HTTP client; shared clients stay open for the app lifetime"""
         if self._client:
-            await self._client.aclose()
+            if self._owns_client:
+                await self._client.aclose()
+                self.log_info("HTTP client disconnected")
             self._client = None
-            self.log_info("HTTP client disconnected")
     
     @property
     def client(self) -> httpx.AsyncClient:
@@ -97,29 +170,32 @@ class BaseHTTPClient(LoggerMixin):
         self,
         method: str,
         url: str,
+        idempotent: Optional[bool] = None,
         **kwargs
     ) -> httpx.Response:
-        """Make HTTP request with retry logic"""
-        import time
+        """Make HTTP request with retry logic
+        
+        Idempotent requests (GET by default) are retried on network errors
+        and 5xx responses, and hedged if the client sets `hedge_reads`.
+        Other requests are only retried when the connection could not be
+        opened, i.e. SSI never received them. Retries and hedges are drawn
+        from the upstream's retry budget.
+        """
         start_time = time.time()
         last_exception = None
+        if idempotent is None:
+            idempotent = method in _IDEMPOTENT_METHODS
+        hedged = idempotent and self.hedge_reads and settings.hedge_enabled
+        budget = retry_budget(self.base_url)
+        budget.deposit()
         
-        # Log request details
-        request_data = {
-            "method": method,
-            "url": url,
-            "headers": kwargs.get("headers", {}),
-            "params": kwargs.get("params", {}),
-            "json": kwargs.get("json", {}),
-            "data": kwargs.get("data", {})
-        }
+        # Shared clients carry no per-client headers
+        if not self._owns_client:
+            kwargs["headers"] = {**self.default_headers, **(kwargs.get("headers") or {})}
         
-        # Mask sensitive data in logs
-        masked_request = self._mask_sensitive_data(request_data.copy())
-        self.log_info(
-            "SSI API Request",
-            **masked_request
-        )
+        # Payloads are logged for a sample of calls only
+        sampled = payload_sampled()
+        self._log_request(method, url, kwargs, sampled)
         
         for attempt in range(self.retries + 1):
             try:
@@ -131,96 +207,138 @@ class BaseHTTPClient(LoggerMixin):
                     max_attempts=self.retries + 1
                 )
                 
-                response = await self.client.request(method, url, **kwargs)
-                
-                # Calculate duration
-                duration_ms = (time.time() - start_time) * 1000
-                
-                # Log response details
-                try:
-                    response_data = response.json() if response.content else {}
-                    masked_response = self._mask_sensitive_data(response_data.copy())
-                    
-                    self.log_info(
-                        "SSI API Response",
-                        method=method,
-                        url=url,
-                        status_code=response.status_code,
-                        response_size=len(response.content) if response.content else 0,
-                        response_data=masked_response
-                    )
-                except Exception as e:
-                    # If response is not JSON, log text content (truncated)
-                    response_text = response.text[:500] if response.text else ""
-                    self.log_info(
-                        "SSI API Response (non-JSON)",
-                        method=method,
-                        url=url,
-                        status_code=response.status_code,
-                        response_size=len(response.content) if response.content else 0,
-                        response_text=response_text,
-                        parse_error=str(e)
-                    )
-                
-                # Log performance metrics
-                self._log_api_performance(
-                    method=method,
-                    endpoint=url.split(self.base_url)[-1] if self.base_url in url else url,
-                    duration_ms=duration_ms,
-                    status_code=response.status_code,
-                    response_size=len(response.content) if response.content else 0
-                )
-                
-                # Check for errors
-                self._handle_response_errors(response)
-                return response
+                if hedged:
+                    return await self._send_hedged(method, url, kwargs, sampled, start_time, budget)
+                return await self._send(method, url, kwargs, sampled, start_time)
                 
             except (httpx.TimeoutException, httpx.ConnectError) as e:
                 last_exception = SSINetworkError(f"Network error: {e}")
-                if attempt < self.retries:
-                    wait_time = settings.retry_delay * (2 ** attempt)  # Exponential backoff
-                    self.log_warning(
-                        "Request failed, retrying",
-                        error=str(e),
-                        attempt=attempt + 1,
-                        wait_time=wait_time
-                    )
-                    await asyncio.sleep(wait_time)
-                else:
-                    break
+                retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+            except SSIServerError as e:
+                last_exception = e
+                retryable = idempotent
             except SSIAPIError:
                 # Don't retry API errors
                 raise
             except Exception as e:
                 last_exception = SSINetworkError(f"Unexpected error: {e}")
                 break
+            
+            if not retryable or attempt >= self.retries:
+                break
+            if not budget.try_spend():
+                self.log_warning("Retry budget exhausted, not retrying", url=url, error=str(last_exception))
+                break
+            
+            wait_time = backoff_delay(attempt)
+            self.log_warning(
+                "Request failed, retrying",
+                error=str(last_exception),
+                attempt=attempt + 1,
+                wait_time=round(wait_time, 3)
+            )
+            await asyncio.sleep(wait_time)
         
         # If we get here, all retries failed
         raise last_exception or SSINetworkError("All retry attempts failed")
     
-    def _mask_sensitive_data(self, data: Any) -> Any:
-        """Mask sensitive data in logs"""
-        if isinstance(data, dict):
-            masked = {}
-            for key, value in data.items():
-                key_lower = key.lower()
-                if any(sensitive in key_lower for sensitive in [
-                    'password', 'token', 'secret', 'key', 'auth', 
-                    'consumer_secret', 'access_token', 'accesstoken',
-                    'code', 'otp', 'pin'
-                ]):
-                    # Show only first 4 and last 4 characters for tokens/secrets
-                    if isinstance(value, str) and len(value) > 8:
-                        masked[key] = f"{value[:4]}***{value[-4:]}"
-                    else:
-                        masked[key] = "***MASKED***"
-                else:
-                    masked[key] = self._mask_sensitive_data(value)
-            return masked
-        elif isinstance(data, list):
-            return [self._mask_sensitive_data(item) for item in data]
-        else:
-            return data
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        kwargs: Dict[str, Any],
+        sampled: bool,
+        start_time: float
+    ) -> httpx.Response:
+        """Send one attempt, record its latency and check the response"""
+        started = time.monotonic()
+        response = await self.client.request(method, url, **kwargs)
+        latency_tracker(url).record(time.monotonic() - started)
+        
+        duration_ms = (time.time() - start_time) * 1000
+        self._log_response(method, url, response, duration_ms, sampled)
+        
+        self._handle_response_errors(response)
+        return response
+    
+    async def _send_hedged(
+        self,
+        method: str,
+        url: str,
+        kwargs: Dict[str, Any],
+        sampled: bool,
+        start_time: float,
+        budget: RetryBudget
+    ) -> httpx.Response:
+        """Send; if there is no answer after the endpoint's p95 latency, race a second copy
+        
+        The first successful response wins and the other attempt is
+        cancelled. Errors are only raised once both attempts have failed.
+        """
+        tasks = {asyncio.ensure_future(self._send(method, url, kwargs, sampled, start_time))}
+        try:
+            delay = hedge_delay(url)
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and budget.try_spend():
+                self.log_debug("Hedging slow request", method=method, url=url, hedge_delay=round(delay, 3))
+                tasks.add(asyncio.ensure_future(self._send(method, url, kwargs, sampled, start_time)))
+            
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                failed = None
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    failed = task
+                if not tasks:
+                    return failed.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _log_request(self, method: str, url: str, kwargs: Dict[str, Any], sampled: bool) -> None:
+        """Log an outgoing request, with masked payload previews when sampled"""
+        if not sampled:
+            self.log_debug("SSI API Request", method=method, url=url)
+            return
+        
+        self.log_info(
+            "SSI API Request",
+            method=method,
+            url=url,
+            headers=PayloadPreview(kwargs.get("headers")),
+            params=PayloadPreview(kwargs.get("params")),
+            json=PayloadPreview(kwargs.get("json")),
+            data=PayloadPreview(kwargs.get("data"))
+        )
+    
+    def _log_response(
+        self,
+        method: str,
+        url: str,
+        response: httpx.Response,
+        duration_ms: float,
+        sampled: bool
+    ) -> None:
+        """Log a response summary; the body only when sampled or on errors"""
+        response_size = len(response.content) if response.content else 0
+        if sampled or response.status_code >= 400:
+            self.log_info(
+                "SSI API Response",
+                method=method,
+                url=url,
+                status_code=response.status_code,
+                response_size=response_size,
+                response_data=PayloadPreview(response.content)
+            )
+        
+        self._log_api_performance(
+            method=method,
+            endpoint=url.split(self.base_url)[-1] if self.base_url in url else url,
+            duration_ms=duration_ms,
+            status_code=response.status_code,
+            response_size=response_size
+        )
     
     def _log_api_performance(
         self, 
@@ -297,3 +415,7 @@ class BaseHTTPClient(LoggerMixin):
             "DELETE", url, headers=headers, **kwargs
         )
         return response.json()
+
+
+# Global shared HTTP clients, started in the application lifespan
+http_clients = SharedHTTPClients()
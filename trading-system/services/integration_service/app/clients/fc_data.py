@@ -3,14 +3,20 @@ FC Data API client
 """
 from typing import Dict, Any, Optional
 from app.clients.base import BaseHTTPClient
+from app.core.logging_config import PayloadPreview
 from app.utils.cache import cache_manager, CacheKeys
+from app.utils.token_manager import TokenManager
 from app.schemas.fc_data import *
+from app.schemas.base import from_cached
 from config import settings
 
 
 class FCDataClient(BaseHTTPClient):
     """FC Data API client"""
     
+    # Market data reads are idempotent, hedge the slow ones
+    hedge_reads = True
+    
     def __init__(self):
         super().__init__(
             base_url=settings.fc_data_url,
@@ -25,16 +31,11 @@ class FCDataClient(BaseHTTPClient):
         self.public_key = settings.public_key_fc_data
     
     async def _get_access_token(self) -> str:
-        """Get access token with caching"""
-        cache_key = CacheKeys.token_key("fc_data", self.consumer_id)
-        
-        # Try to get from cache first
-        cached_token = await cache_manager.get(cache_key)
-        if cached_token:
-            self.log_debug("Using cached FC Data token", cache_key=cache_key)
-            return cached_token
-        
-        # Request new token from SSI FastConnect Data API automatically
+        """Get access token, kept fresh in the background by fc_data_tokens"""
+        return await fc_data_tokens.get_token()
+    
+    async def _request_access_token(self) -> str:
+        """Request a new access token from SSI FastConnect Data API"""
         endpoint = "api/v2/Market/AccessToken"
         self.log_info(
             "Requesting new FC Data access token",
@@ -49,8 +50,9 @@ class FCDataClient(BaseHTTPClient):
         
         try:
             # Call SSI FastConnect Data AccessToken API without auth headers
-            # since this is the authentication endpoint itself
-            data = await self.post(endpoint, json=payload)
+            # since this is the authentication endpoint itself. Requesting a
+            # token has no side effects, so it is retried like a read.
+            data = await self.post(endpoint, json=payload, idempotent=True)
             
             self.log_info(
                 "FC Data access token response received",
@@ -72,11 +74,7 @@ class FCDataClient(BaseHTTPClient):
                 self.log_error("No access token in response", response_data=data)
                 raise Exception("No access token received from SSI")
             
-            # Cache the token with 15 minutes TTL (as specified by SSI)
-            ttl_seconds = 15 * 60  # 15 minutes
-            await cache_manager.set(cache_key, access_token, ttl=ttl_seconds)
-            
-            self.log_info("FC Data access token obtained and cached", ttl_minutes=15)
+            self.log_info("FC Data access token obtained")
             return access_token
             
         except Exception as e:
@@ -115,8 +113,9 @@ class FCDataClient(BaseHTTPClient):
         
         try:
             # Call SSI FastConnect Data AccessToken API without auth headers
-            # since this is the authentication endpoint itself
-            data = await self.post(endpoint, json=payload)
+            # since this is the authentication endpoint itself. Requesting a
+            # token has no side effects, so it is retried like a read.
+            data = await self.post(endpoint, json=payload, idempotent=True)
             
             response = FCDataAccessTokenResponse(**data)
             
@@ -150,7 +149,6 @@ class FCDataClient(BaseHTTPClient):
     ) -> GetSecuritiesInfoResponse:
         """Get securities information"""
         endpoint = "api/v2/Market/Securities"
-        headers = await self._get_auth_headers()
         
         params = {
             "pageIndex": request.page_index,
@@ -170,23 +168,16 @@ class FCDataClient(BaseHTTPClient):
             f"{request.market}_{request.symbol}_{request.page_index}_{request.page_size}"
         )
         
-        cached_result = await cache_manager.get(cache_key)
-        if cached_result:
-            self.log_debug("Using cached securities info", cache_key=cache_key)
-            return GetSecuritiesInfoResponse(**cached_result)
-
-        self.log_info(
-            "Requesting securities info from SSI",
-            endpoint=endpoint,
-            market=request.market,
-            symbol=request.symbol,
-            page_index=request.page_index,
-            page_size=request.page_size
-        )
-        
-        # Make API call
-        try:
-            data = await self.get(endpoint, params=params, headers=headers)
+        async def fetch() -> Dict[str, Any]:
+            self.log_info(
+                "Requesting securities info from SSI",
+                endpoint=endpoint,
+                market=request.market,
+                symbol=request.symbol,
+                page_index=request.page_index,
+                page_size=request.page_size
+            )
+            data = await _fill_read(endpoint, params)
             response = GetSecuritiesInfoResponse(**data)
             
             self.log_info(
@@ -197,15 +188,13 @@ class FCDataClient(BaseHTTPClient):
                 total_records=response.totalRecord,
                 data_count=len(response.data) if response.data else 0
             )
-            
-            # Cache the result
-            await cache_manager.set(
-                cache_key,
-                response.model_dump(),
-                ttl=settings.cache_ttl_master_data
+            return response.model_dump()
+        
+        try:
+            cached_result = await cache_manager.get_or_set(
+                cache_key, fetch, ttl=settings.cache_ttl_master_data
             )
-            
-            return response
+            return from_cached(GetSecuritiesInfoResponse, cached_result)
             
         except Exception as e:
             self.log_error("Failed to get securities info", error=str(e), params=params)
@@ -216,7 +205,6 @@ class FCDataClient(BaseHTTPClient):
         request: GetDailyOhlcRequest
     ) -> GetDailyOhlcResponse:
         """Get daily OHLC data"""
-        headers = await self._get_auth_headers()
         
         params = {
             "pageIndex": request.page_index,
@@ -239,24 +227,17 @@ class FCDataClient(BaseHTTPClient):
             f"daily_ohlc_{request.from_date}_{request.to_date}_{request.page_index}_{request.page_size}"
         )
         
-        cached_result = await cache_manager.get(cache_key)
-        if cached_result:
-            self.log_debug("Using cached daily OHLC", cache_key=cache_key)
-            return GetDailyOhlcResponse(**cached_result)
+        async def fetch() -> Dict[str, Any]:
+            data = await _fill_read("api/v2/Market/DailyOhlc", params)
+            self.log_debug("Raw daily OHLC response", data=PayloadPreview(data))
+            return GetDailyOhlcResponse(**data).model_dump()
         
         try:
-            data = await self.get("api/v2/Market/DailyOhlc", params=params, headers=headers)
-            self.log_info("Raw daily OHLC response", data=data)
-            response = GetDailyOhlcResponse(**data)
-            
-            # Cache with shorter TTL for market data
-            await cache_manager.set(
-                cache_key,
-                response.model_dump(),
-                ttl=settings.cache_ttl_market_data
+            # Shorter TTL for market data
+            cached_result = await cache_manager.get_or_set(
+                cache_key, fetch, ttl=settings.cache_ttl_market_data
             )
-            
-            return response
+            return from_cached(GetDailyOhlcResponse, cached_result)
             
         except Exception as e:
             self.log_error("Failed to get daily OHLC", error=str(e), params=params)
@@ -285,7 +266,7 @@ class FCDataClient(BaseHTTPClient):
         
         try:
             data = await self.get("api/v2/Market/IntradayOhlc", params=params, headers=headers)
-            self.log_info("Raw intraday OHLC response", data=data)
+            self.log_debug("Raw intraday OHLC response", data=PayloadPreview(data))
             return GetIntradayOhlcResponse(**data)
             
         except Exception as e:
@@ -297,7 +278,6 @@ class FCDataClient(BaseHTTPClient):
         request: GetDailyIndexRequest
     ) -> GetDailyIndexResponse:
         """Get daily index data"""
-        headers = await self._get_auth_headers()
         
         params = {
             "pageIndex": request.page_index,
@@ -317,23 +297,16 @@ class FCDataClient(BaseHTTPClient):
             f"daily_{request.from_date}_{request.to_date}_{request.page_index}_{request.page_size}"
         )
         
-        cached_result = await cache_manager.get(cache_key)
-        if cached_result:
-            self.log_debug("Using cached daily index", cache_key=cache_key)
-            return GetDailyIndexResponse(**cached_result)
+        async def fetch() -> Dict[str, Any]:
+            data = await _fill_read("api/v2/Market/DailyIndex", params)
+            self.log_debug("Raw daily index response", data=PayloadPreview(data))
+            return GetDailyIndexResponse(**data).model_dump()
         
         try:
-            data = await self.get("api/v2/Market/DailyIndex", params=params, headers=headers)
-            self.log_info("Raw daily index response", data=data)
-            response = GetDailyIndexResponse(**data)
-            
-            await cache_manager.set(
-                cache_key,
-                response.model_dump(),
-                ttl=settings.cache_ttl_market_data
+            cached_result = await cache_manager.get_or_set(
+                cache_key, fetch, ttl=settings.cache_ttl_market_data
             )
-            
-            return response
+            return from_cached(GetDailyIndexResponse, cached_result)
             
         except Exception as e:
             self.log_error("Failed to get daily index", error=str(e), params=params)
@@ -344,8 +317,6 @@ class FCDataClient(BaseHTTPClient):
         request: GetDailyStockPriceRequest
     ) -> GetDailyStockPriceResponse:
         """Get daily stock price data"""
-        headers = await self._get_auth_headers()
-        
         params = {
             "pageIndex": request.page_index,
             "pageSize": request.page_size,
@@ -358,10 +329,22 @@ class FCDataClient(BaseHTTPClient):
         if request.market:
             params["market"] = request.market.value
         
+        cache_key = CacheKeys.market_data_key(
+            request.symbol or "ALL",
+            request.market.value if request.market else "ALL",
+            f"daily_stock_price_{request.from_date}_{request.to_date}_{request.page_index}_{request.page_size}"
+        )
+        
+        async def fetch() -> Dict[str, Any]:
+            data = await _fill_read("api/v2/Market/DailyStockPrice", params)
+            self.log_debug("Raw daily stock price response", data=PayloadPreview(data))
+            return GetDailyStockPriceResponse(**data).model_dump()
+        
         try:
-            data = await self.get("api/v2/Market/DailyStockPrice", params=params, headers=headers)
-            self.log_info("Raw daily stock price response", data=data)
-            return GetDailyStockPriceResponse(**data)
+            cached_result = await cache_manager.get_or_set(
+                cache_key, fetch, ttl=settings.cache_ttl_market_data
+            )
+            return from_cached(GetDailyStockPriceResponse, cached_result)
             
         except Exception as e:
             self.log_error("Failed to get daily stock price", error=str(e), params=params)
@@ -374,8 +357,6 @@ class FCDataClient(BaseHTTPClient):
         request: GetSecuritiesDetailsRequest
     ) -> GetSecuritiesDetailsResponse:
         """Get securities details"""
-        headers = await self._get_auth_headers()
-        
         params = {
             "symbol": request.symbol
         }
@@ -383,10 +364,21 @@ class FCDataClient(BaseHTTPClient):
         if request.market:
             params["market"] = request.market.value
         
+        cache_key = CacheKeys.master_data_key(
+            "securities_details",
+            f"{request.market.value if request.market else 'ALL'}_{request.symbol}"
+        )
+        
+        async def fetch() -> Dict[str, Any]:
+            data = await _fill_read("api/v2/Market/SecuritiesDetails", params)
+            self.log_debug("Raw securities details response", data=PayloadPreview(data))
+            return GetSecuritiesDetailsResponse(**data).model_dump()
+        
         try:
-            data = await self.get("api/v2/Market/SecuritiesDetails", params=params, headers=headers)
-            self.log_info("Raw securities details response", data=data)
-            return GetSecuritiesDetailsResponse(**data)
+            cached_result = await cache_manager.get_or_set(
+                cache_key, fetch, ttl=settings.cache_ttl_master_data
+            )
+            return from_cached(GetSecuritiesDetailsResponse, cached_result)
             
         except Exception as e:
             self.log_error("Failed to get securities details", error=str(e), params=params)
@@ -397,18 +389,26 @@ class FCDataClient(BaseHTTPClient):
         request: GetIndexComponentsRequest
     ) -> GetIndexComponentsResponse:
         """Get index components"""
-        headers = await self._get_auth_headers()
-        
         params = {
             "indexId": request.index_id,
             "pageIndex": request.page_index,
             "pageSize": request.page_size
         }
         
+        cache_key = CacheKeys.master_data_key(
+            "index_components", f"{request.index_id}_{request.page_index}_{request.page_size}"
+        )
+        
+        async def fetch() -> Dict[str, Any]:
+            data = await _fill_read("api/v2/Market/IndexComponents", params)
+            self.log_debug("Raw index components response", data=PayloadPreview(data))
+            return GetIndexComponentsResponse(**data).model_dump()
+        
         try:
-            data = await self.get("api/v2/Market/IndexComponents", params=params, headers=headers)
-            self.log_info("Raw index components response", data=data)
-            return GetIndexComponentsResponse(**data)
+            cached_result = await cache_manager.get_or_set(
+                cache_key, fetch, ttl=settings.cache_ttl_master_data
+            )
+            return from_cached(GetIndexComponentsResponse, cached_result)
             
         except Exception as e:
             self.log_error("Failed to get index components", error=str(e), params=params)
@@ -431,9 +431,36 @@ class FCDataClient(BaseHTTPClient):
         
         try:
             data = await self.get("api/v2/Market/IndexList", params=params, headers=headers)
-            self.log_info("Raw index list response", data=data)
+            self.log_debug("Raw index list response", data=PayloadPreview(data))
             return GetIndexListResponse(**data)
             
         except Exception as e:
             self.log_error("Failed to get index list", error=str(e), params=params)
             raise
+
+
+async def _fill_read(endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    GET for a cache fill, through a client of its own.
+    
+    Stale entries are refreshed in the background after the API request
+    that served them has closed its FCDataClient, so fills never use the
+    caller's client. The new one attaches to the app-lifetime shared HTTP
+    client.
+    """
+    async with FCDataClient() as client:
+        return await client.get(endpoint, params=params, headers=await client._get_auth_headers())
+
+
+async def _request_fc_data_token() -> str:
+    async with FCDataClient() as client:
+        return await client._request_access_token()
+
+
+# FC Data token shared by every FCDataClient; started in the app lifespan
+fc_data_tokens = TokenManager(
+    "fc_data",
+    CacheKeys.token_key("fc_data", settings.consumer_id_fc_data),
+    _request_fc_data_token,
+    ttl=settings.fc_data_token_ttl
+)
@@ -2,11 +2,15 @@
 FC Trading API client
 """
 import uuid
-from typing import Dict, Any, Optional
+from typing import Awaitable, Callable, Dict, Any, Optional
 from app.clients.base import BaseHTTPClient
+from app.core.logging_config import PayloadPreview
 from app.utils.cache import cache_manager, CacheKeys
 from app.schemas.fc_trading import *
-from app.core.exceptions import SSIAuthenticationError, SSIAPIError, SSIIntegrationError
+from app.core.exceptions import (
+    SSIAuthenticationError, SSIAPIError, SSIIntegrationError,
+    SSICacheError, SSIDuplicateRequestError, SSIServerError
+)
 from config import settings
 
 
@@ -205,6 +209,67 @@ class FCTradingClient(BaseHTTPClient):
             )
             raise
     
+    async def _send_once(
+        self,
+        account: str,
+        request_id: Optional[str],
+        send: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Send an order write at most once per client request ID
+        
+        The ID is claimed in Redis before sending. A repeat gets the stored
+        SSI response, or a conflict while the first call is in flight or
+        its outcome is unknown (timeout, 5xx): the caller must check the
+        order book rather than send again. A rejection by SSI frees the ID.
+        Without a request ID the write is simply sent.
+        """
+        if not request_id:
+            return await send()
+        
+        key = CacheKeys.order_request_key(account, request_id)
+        try:
+            claimed = await cache_manager.add(key, {"state": "pending"}, settings.order_dedup_ttl)
+        except SSICacheError:
+            # Without Redis there is nothing to deduplicate against
+            self.log_warning("Order request ID not deduplicated", account=account, request_id=request_id)
+            return await send()
+        
+        if not claimed:
+            previous = await cache_manager.get(key) or {}
+            if previous.get("state") == "done":
+                self.log_info("Returning stored response for repeated order request", account=account, request_id=request_id)
+                return previous["response"]
+            raise SSIDuplicateRequestError(
+                "Request ID already sent; check the order book before placing it again",
+                details={"request_id": request_id, "state": previous.get("state", "pending")}
+            )
+        
+        try:
+            data = await send()
+        except SSIAPIError as e:
+            if isinstance(e, SSIServerError):
+                await self._remember_request(key, {"state": "unknown"})
+            else:
+                # SSI refused the request, so it may be sent again
+                await self._remember_request(key, None)
+            raise
+        except BaseException:
+            await self._remember_request(key, {"state": "unknown"})
+            raise
+        
+        await self._remember_request(key, {"state": "done", "response": data})
+        return data
+    
+    async def _remember_request(self, key: str, value: Optional[Dict[str, Any]]) -> None:
+        """Store the state of an order request ID; None frees the ID"""
+        try:
+            if value is None:
+                await cache_manager.delete(key)
+            else:
+                await cache_manager.set(key, value, ttl=settings.order_dedup_ttl)
+        except SSICacheError as e:
+            self.log_warning("Failed to store order request state", key=key, error=str(e))
+    
     async def new_order(self, request: NewOrderRequest) -> NewOrderResponse:
         """Place new order"""
         endpoint = "api/v2/Trading/NewOrder"
@@ -228,7 +293,7 @@ class FCTradingClient(BaseHTTPClient):
             "deviceId": request.device_id or self._get_device_id(),
             "userAgent": request.user_agent or self._get_user_agent(),
             "channelID": "WEB",  # Add required Channel ID
-            "requestID": self._generate_unique_id()  # Add required Request ID
+            "requestID": request.request_id or self._generate_unique_id()  # Add required Request ID
         }
         
         self.log_info(
@@ -241,11 +306,15 @@ class FCTradingClient(BaseHTTPClient):
             order_type=request.order_type.value,
             quantity=request.quantity,
             price=float(request.price),
-            unique_id=payload["uniqueID"]
+            unique_id=payload["uniqueID"],
+            request_id=payload["requestID"]
         )
         
         try:
-            data = await self.post(endpoint, json=payload, headers=headers)
+            data = await self._send_once(
+                request.account, request.request_id,
+                lambda: self.post(endpoint, json=payload, headers=headers)
+            )
             response = NewOrderResponse(**data)
             
             self.log_info(
@@ -297,11 +366,15 @@ class FCTradingClient(BaseHTTPClient):
             symbol=request.instrument_id,
             new_price=float(request.price),
             new_quantity=request.quantity,
-            unique_id=payload["uniqueID"]
+            unique_id=payload["uniqueID"],
+            request_id=request.request_id
         )
         
         try:
-            data = await self.post(endpoint, json=payload, headers=headers)
+            data = await self._send_once(
+                request.account, request.request_id,
+                lambda: self.post(endpoint, json=payload, headers=headers)
+            )
             response = ModifyOrderResponse(**data)
             
             self.log_info(
@@ -447,7 +520,7 @@ class FCTradingClient(BaseHTTPClient):
         
         try:
             data = await self.get("api/v2/Trading/orderHistory", params=params, headers=headers)
-            self.log_info("Raw order history response", data=data)
+            self.log_debug("Raw order history response", data=PayloadPreview(data))
             return OrderHistoryResponse(**data)
             
         except SSIAPIError as e:
@@ -58,6 +58,13 @@ class SSIRateLimitError(SSIAPIError):
         super().__init__(message, status.HTTP_429_TOO_MANY_REQUESTS, "RATE_LIMIT", details)
 
 
+class SSIDuplicateRequestError(SSIAPIError):
+    """Exception for an order request ID that was already sent"""
+    
+    def __init__(self, message: str = "Duplicate request", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, status.HTTP_409_CONFLICT, "DUPLICATE_REQUEST", details)
+
+
 class SSINetworkError(SSIIntegrationError):
     """Exception for network-related errors"""
     
@@ -1,9 +1,16 @@
 """
 Logging configuration for SSI Integration Service
 """
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
+import re
 import sys
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Optional
 import structlog
 from rich.logging import RichHandler
 from config import settings
@@ -33,18 +40,20 @@ def setup_logging() -> None:
     )
     
     # Configure standard library logging
+    handler: logging.Handler
     if settings.log_format == "json":
-        logging.basicConfig(
-            format="%(message)s",
-            stream=sys.stdout,
-            level=getattr(logging, settings.log_level.upper()),
-        )
+        handler = logging.StreamHandler(sys.stdout)
     else:
-        logging.basicConfig(
-            format="%(message)s",
-            level=getattr(logging, settings.log_level.upper()),
-            handlers=[RichHandler()],
-        )
+        handler = RichHandler()
+    
+    if settings.log_async and not logging.getLogger().handlers:
+        handler = start_async_sink(handler, settings.log_queue_size)
+    
+    logging.basicConfig(
+        format="%(message)s",
+        level=getattr(logging, settings.log_level.upper()),
+        handlers=[handler],
+    )
     
     # Set specific loggers
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
@@ -52,6 +61,157 @@ def setup_logging() -> None:
     logging.getLogger("aioredis").setLevel(logging.WARNING)
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+
+def start_async_sink(handler: logging.Handler, queue_size: int) -> DroppingQueueHandler:
+    """
+    Write records through `handler` from a background thread.
+    
+    Returns the handler to install instead: it only puts records on a
+    bounded queue, so a slow stdout or terminal never blocks the event
+    loop. Records are dropped, and counted, when the writer falls behind.
+    """
+    global _listener, _queue_handler
+    stop_async_sink()
+    
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_async_sink)
+    return _queue_handler
+
+
+def stop_async_sink() -> None:
+    """Flush queued records and stop the background writer"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    if _queue_handler.dropped:
+        for handler in _listener.handlers:
+            handler.handle(logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Dropped {_queue_handler.dropped} log records, log queue was full",
+            }))
+    _listener = None
+    _queue_handler = None
+
+
+# Payload logging
+#
+# SSI request and response bodies are only logged for a sample of calls
+# (log_payload_mode / log_payload_sample_rate), and then as a PayloadPreview:
+# masking and rendering happen only if the event is actually emitted, and
+# stop at log_payload_max_items per list and log_payload_max_bytes overall.
+
+_SENSITIVE_KEY = re.compile(r"password|token|secret|key|auth|code|otp|pin", re.IGNORECASE)
+_MASKED = "***MASKED***"
+
+
+@lru_cache(maxsize=4096)
+def is_sensitive_key(key: Any) -> bool:
+    """Whether values under this key are masked in logs"""
+    return isinstance(key, str) and _SENSITIVE_KEY.search(key) is not None
+
+
+def mask_value(value: Any) -> str:
+    """Show only first 4 and last 4 characters of tokens/secrets"""
+    if isinstance(value, str) and len(value) > 8:
+        return f"{value[:4]}***{value[-4:]}"
+    return _MASKED
+
+
+def mask_sensitive(data: Any, max_items: Optional[int] = None) -> Any:
+    """
+    Copy of `data` with sensitive values masked.
+    
+    Scalars are returned as is. With `max_items`, lists keep their first
+    `max_items` entries followed by a marker with the number left out.
+    """
+    if isinstance(data, dict):
+        return {
+            key: mask_value(value) if is_sensitive_key(key) else mask_sensitive(value, max_items)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        if max_items is not None and len(data) > max_items:
+            head = [mask_sensitive(item, max_items) for item in data[:max_items]]
+            head.append(f"... {len(data) - max_items} more items")
+            return head
+        return [mask_sensitive(item, max_items) for item in data]
+    return data
+
+
+def payload_sampled() -> bool:
+    """Whether this SSI call gets its payloads logged"""
+    mode = settings.log_payload_mode
+    if mode == "all":
+        return True
+    if mode == "sampled":
+        return random.random() < settings.log_payload_sample_rate
+    return False
+
+
+class PayloadPreview:
+    """
+    Log field value rendered lazily as a masked, size-capped preview.
+    
+    Nothing is parsed, masked or serialized unless a renderer asks for
+    it, so payloads passed to filtered-out log levels cost nothing. Raw
+    response bodies (bytes) are parsed as JSON when possible.
+    """
+    
+    __slots__ = ("data", "max_bytes", "max_items", "_rendered")
+    
+    def __init__(self, data: Any, max_bytes: Optional[int] = None, max_items: Optional[int] = None):
+        self.data = data
+        self.max_bytes = max_bytes or settings.log_payload_max_bytes
+        self.max_items = max_items or settings.log_payload_max_items
+        self._rendered: Optional[str] = None
+    
+    def render(self) -> str:
+        if self._rendered is None:
+            data = self.data
+            if isinstance(data, (bytes, bytearray)):
+                try:
+                    data = json.loads(data) if data else None
+                except ValueError:
+                    data = data[:self.max_bytes].decode("utf-8", "replace")
+            if isinstance(data, str):
+                text = data
+            else:
+                text = json.dumps(mask_sensitive(data, self.max_items), default=str, ensure_ascii=False)
+            if len(text) > self.max_bytes:
+                text = f"{text[:self.max_bytes]}... ({len(text) - self.max_bytes} more chars)"
+            self._rendered = text
+        return self._rendered
+    
+    # JSONRenderer calls __structlog__, ConsoleRenderer calls repr
+    __structlog__ = render
+    
+    def __repr__(self) -> str:
+        return self.render()
+
+
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     """Get a structured logger instance"""
     return structlog.get_logger(name)
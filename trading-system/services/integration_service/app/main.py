@@ -21,6 +21,8 @@ from app.core.exceptions import (
     ssi_api_error_to_http_exception
 )
 from app.utils.cache import cache_manager
+from app.clients.base import http_clients
+from app.clients.fc_data import fc_data_tokens
 from app.schemas.base import HealthCheckResponse, ErrorResponse
 from config import settings
 
@@ -38,11 +40,19 @@ async def lifespan(app: FastAPI):
         await cache_manager.connect()
         logger.info("Cache manager connected")
         
+        # One pooled client per SSI upstream for the app lifetime
+        await http_clients.start([settings.fc_data_url, settings.fc_trading_url])
+        
+        # Keep the FC Data token fresh so requests never wait on SSI auth
+        await fc_data_tokens.start()
+        
         yield
         
     finally:
         # Shutdown
         logger.info("Shutting down SSI Integration Service")
+        await fc_data_tokens.stop()
+        await http_clients.close()
         await cache_manager.disconnect()
         logger.info("Cache manager disconnected")
 
@@ -1,11 +1,14 @@
 """
 Common base schemas for SSI Integration Service
 """
-from typing import Any, Dict, Optional, List, Union
+from typing import Any, Dict, NamedTuple, Optional, List, Tuple, Type, TypeVar, Union, get_args, get_origin
 from datetime import datetime
+from functools import lru_cache
 from pydantic import BaseModel, Field, ConfigDict
 from enum import Enum
 
+M = TypeVar("M", bound=BaseModel)
+
 
 class BaseResponse(BaseModel):
     """Base response model"""
@@ -149,3 +152,110 @@ class HealthCheckResponse(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Check timestamp")
     version: str = Field(..., description="Service version")
     services: Dict[str, str] = Field(..., description="Dependent services status")
+
+
+# Trusted cache reads
+
+_JSON_NATIVE = (str, int, float, bool, type(None))
+
+
+def _is_json_native(annotation: Any) -> bool:
+    """Whether values of this type come back from the cache unchanged"""
+    if annotation is Any or annotation in _JSON_NATIVE:
+        return True
+    origin = get_origin(annotation)
+    if origin in (Union, list, dict):
+        return all(_is_json_native(arg) for arg in get_args(annotation))
+    return False
+
+
+def _model_field(annotation: Any) -> Optional[Tuple[bool, Type[BaseModel]]]:
+    """(is_list, model) for X, Optional[X], List[X] or Optional[List[X]] of a model X"""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return None
+        annotation = args[0]
+    is_list = get_origin(annotation) is list
+    if is_list:
+        annotation = get_args(annotation)[0]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return is_list, annotation
+    return None
+
+
+class _Layout(NamedTuple):
+    native: bool  # All own fields are JSON-native
+    nested: Dict[str, Tuple[bool, Type[BaseModel]]]
+    fields: frozenset
+    direct: bool  # Safe to build without model_construct
+
+
+@lru_cache(maxsize=None)
+def _cached_layout(model: Type[BaseModel]) -> _Layout:
+    native = True
+    nested = {}
+    for name, field in model.model_fields.items():
+        model_field = _model_field(field.annotation)
+        if model_field is not None:
+            nested[name] = model_field
+        elif not _is_json_native(field.annotation):
+            native = False
+    direct = native and not model.__private_attributes__ and model.model_config.get("extra") != "allow"
+    return _Layout(native, nested, frozenset(model.model_fields), direct)
+
+
+def _construct(model: Type[M], values: Dict[str, Any], fields_set: Optional[set] = None) -> M:
+    """What model_construct does when values hold exactly the model's fields"""
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(values) if fields_set is None else fields_set)
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _from_cached_list(model: Type[M], items: List[Dict[str, Any]]) -> List[M]:
+    layout = _cached_layout(model)
+    if not layout.direct or layout.nested:
+        return [from_cached(model, item) for item in items]
+    
+    # Flat rows, e.g. OHLC bars: the hot path for large cached responses.
+    # Every field is set, so rows can share one fields set.
+    fields = layout.fields
+    fields_set = set(fields)
+    return [
+        _construct(model, dict(item), fields_set) if item.keys() == fields else from_cached(model, item)
+        for item in items
+    ]
+
+
+def from_cached(model: Type[M], data: Dict[str, Any]) -> M:
+    """
+    Rebuild a model from a model_dump() it produced earlier, e.g. a cache hit.
+    
+    Models whose fields are all JSON-native (such as OHLC rows) skip
+    validation: data was validated before it was cached. When the dump
+    holds exactly the model's fields they are built the way model_construct
+    does, minus its per-field Python loop, which is slower than validating.
+    Fields that do not survive serialization as-is (datetime, Decimal,
+    enums) are still validated so they keep their types.
+    """
+    layout = _cached_layout(model)
+    values = dict(data)  # Cached dicts may be shared, e.g. by the local cache
+    for name, (is_list, child) in layout.nested.items():
+        value = values.get(name)
+        if value is not None:
+            values[name] = _from_cached_list(child, value) if is_list else from_cached(child, value)
+    
+    if layout.direct and values.keys() == layout.fields:
+        return _construct(model, values)
+    if layout.native:
+        return model.model_construct(**values)
+    
+    children = {name: values.pop(name) for name in layout.nested if values.get(name) is not None}
+    instance = model.model_validate(values)
+    for name, value in children.items():
+        instance.__dict__[name] = value  # Bypass validate_assignment
+        instance.__pydantic_fields_set__.add(name)
+    return instance
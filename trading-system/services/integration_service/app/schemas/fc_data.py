@@ -1,7 +1,7 @@
 """
 FC Data API schemas
 """
-from typing import Optional, List, Union
+from typing import Optional, List, Dict, Union
 from decimal import Decimal
 from datetime import datetime
 from pydantic import BaseModel, Field, validator, ConfigDict
@@ -486,3 +486,52 @@ class GetDailyStockPriceResponse(SuccessResponse):
     """Get daily stock price response"""
     data: Optional[List[StockPriceData]] = None
     totalRecord: Optional[int] = Field(None, description="Total record count")
+
+
+# Composite DTOs
+class SymbolSnapshotRequest(DateRangeRequest):
+    """Symbol snapshot request"""
+    symbol: str = Field(..., max_length=10, description="Stock symbol")
+    market: Optional[Market] = Field(None, description="Market")
+    index_ids: List[str] = Field(default_factory=lambda: ["VN30"], description="Indices to check membership of")
+    page_size: int = Field(default=30, ge=10, le=1000, description="Daily rows in the date range (10-1000)")
+    
+    @validator('symbol')
+    def validate_symbol(cls, v):
+        return v.upper().strip()
+    
+    @validator('index_ids', each_item=True)
+    def validate_index_ids(cls, v):
+        return v.upper().strip()
+
+
+class SymbolSnapshotBatchRequest(DateRangeRequest):
+    """Symbol snapshot batch request"""
+    symbols: List[str] = Field(..., min_length=1, max_length=50, description="Stock symbols (up to 50)")
+    market: Optional[Market] = Field(None, description="Market")
+    index_ids: List[str] = Field(default_factory=lambda: ["VN30"], description="Indices to check membership of")
+    page_size: int = Field(default=30, ge=10, le=1000, description="Daily rows per symbol in the date range (10-1000)")
+    
+    @validator('symbols', 'index_ids', each_item=True)
+    def validate_codes(cls, v):
+        return v.upper().strip()
+
+
+class SymbolSnapshot(BaseModel):
+    """Securities details, latest price, daily OHLC and index membership of one symbol"""
+    symbol: str = Field(..., description="Stock symbol")
+    details: Optional[SecurityDetailInfo] = Field(None, description="Security details")
+    latest_price: Optional[StockPriceData] = Field(None, description="Most recent daily stock price in the range")
+    daily_ohlc: List[OhlcData] = Field(default_factory=list, description="Daily OHLC in the range")
+    indices: List[str] = Field(default_factory=list, description="Requested indices that include the symbol")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Parts that could not be fetched, by part name")
+
+
+class SymbolSnapshotResponse(SuccessResponse):
+    """Symbol snapshot response"""
+    data: Optional[SymbolSnapshot] = None
+
+
+class SymbolSnapshotBatchResponse(SuccessResponse):
+    """Symbol snapshot batch response"""
+    data: List[SymbolSnapshot] = Field(default_factory=list)
@@ -45,6 +45,7 @@ class NewOrderRequest(BaseModel):
     profit_step: Optional[Decimal] = Field(default=0, ge=0, description="Profit step")
     device_id: Optional[str] = Field(None, description="Device ID")
     user_agent: Optional[str] = Field(None, description="User agent")
+    request_id: Optional[str] = Field(None, pattern=r"^\d{8}$", description="Request ID (8 digits, unique per account per day); repeats are not re-sent to SSI")
     
     @validator('instrument_id')
     def validate_instrument_id(cls, v):
@@ -67,6 +68,7 @@ class ModifyOrderRequest(BaseModel):
     quantity: int = Field(..., gt=0, description="New quantity")
     device_id: Optional[str] = Field(None, description="Device ID")
     user_agent: Optional[str] = Field(None, description="User agent")
+    request_id: Optional[str] = Field(None, pattern=r"^\d{8}$", description="Request ID (8 digits, unique per account per day); repeats are not re-sent to SSI")
     
     @validator('instrument_id')
     def validate_instrument_id(cls, v):
@@ -1,11 +1,17 @@
 """
 FC Data service layer
 """
-from typing import List, Optional
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
 from app.clients.fc_data import FCDataClient
 from app.schemas.fc_data import *
 from app.core.logging_config import LoggerMixin
 from app.core.exceptions import SSIIntegrationError
+from config import settings
+
+# Parts of a symbol snapshot besides one membership check per index
+_SNAPSHOT_PARTS = ("details", "latest_price", "daily_ohlc")
 
 
 class FCDataService(LoggerMixin):
@@ -376,3 +382,135 @@ class FCDataService(LoggerMixin):
         except Exception as e:
             self.log_error("Failed to get index list", error=str(e))
             raise SSIIntegrationError(f"Index list retrieval failed: {e}")
+
+    # Composite endpoints
+    
+    async def get_symbol_snapshot(self, request: SymbolSnapshotRequest) -> SymbolSnapshotResponse:
+        """Details, latest price, daily OHLC and index membership of a symbol in one call"""
+        self._validate_date_range(request.from_date, request.to_date)
+        self.log_info("Getting symbol snapshot", symbol=request.symbol, index_ids=request.index_ids)
+        
+        snapshot, = await self._build_snapshots([request.symbol], request)
+        if len(snapshot.errors) == len(_SNAPSHOT_PARTS) + len(set(request.index_ids)):
+            raise SSIIntegrationError(
+                f"Symbol snapshot retrieval failed for {request.symbol}", details=snapshot.errors
+            )
+        return SymbolSnapshotResponse(message="Success", status=200, data=snapshot)
+    
+    async def get_symbol_snapshots(self, request: SymbolSnapshotBatchRequest) -> SymbolSnapshotBatchResponse:
+        """Snapshots of several symbols; calls they have in common are made once"""
+        self._validate_date_range(request.from_date, request.to_date)
+        symbols = list(dict.fromkeys(request.symbols))
+        self.log_info("Getting symbol snapshots", count=len(symbols), index_ids=request.index_ids)
+        
+        snapshots = await self._build_snapshots(symbols, request)
+        return SymbolSnapshotBatchResponse(
+            message="Success", status=200, data=snapshots, total_record=len(snapshots)
+        )
+    
+    async def _build_snapshots(self, symbols: List[str], request: Any) -> List[SymbolSnapshot]:
+        """
+        Fetch every part of every snapshot concurrently.
+        
+        Each distinct SSI call runs once and is shared by all symbols that
+        need it (index components in particular), at most
+        `snapshot_max_concurrency` at a time. The client's cache and
+        single-flight also collapse calls made by concurrent requests. A
+        failed part is reported in the snapshot's `errors`, not raised.
+        """
+        semaphore = asyncio.Semaphore(settings.snapshot_max_concurrency)
+        calls: Dict[Hashable, asyncio.Future] = {}
+        
+        def call(key: Hashable, factory: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+            if key not in calls:
+                async def run() -> Any:
+                    async with semaphore:
+                        return await factory()
+                calls[key] = asyncio.ensure_future(run())
+            return calls[key]
+        
+        market = request.market
+        index_ids = list(dict.fromkeys(request.index_ids))
+        
+        async def snapshot(symbol: str) -> SymbolSnapshot:
+            parts = {
+                "details": call(("details", symbol), lambda: self.client.get_securities_details(
+                    GetSecuritiesDetailsRequest(symbol=symbol, market=market)
+                )),
+                "latest_price": call(("price", symbol), lambda: self.client.get_daily_stock_price(
+                    GetDailyStockPriceRequest(
+                        symbol=symbol, market=market, from_date=request.from_date,
+                        to_date=request.to_date, page_size=request.page_size
+                    )
+                )),
+                "daily_ohlc": call(("ohlc", symbol), lambda: self.client.get_daily_ohlc(
+                    GetDailyOhlcRequest(
+                        symbol=symbol, market=market, from_date=request.from_date,
+                        to_date=request.to_date, page_size=request.page_size
+                    )
+                )),
+            }
+            for index_id in index_ids:
+                parts[f"index:{index_id}"] = call(("index", index_id), lambda index_id=index_id: (
+                    self.client.get_index_components(
+                        GetIndexComponentsRequest(index_id=index_id, page_size=1000)
+                    )
+                ))
+            
+            results = dict(zip(parts, await asyncio.gather(*parts.values(), return_exceptions=True)))
+            return self._assemble_snapshot(symbol, results)
+        
+        try:
+            return list(await asyncio.gather(*(snapshot(symbol) for symbol in symbols)))
+        finally:
+            for task in calls.values():
+                task.cancel()
+    
+    def _assemble_snapshot(self, symbol: str, results: Dict[str, Any]) -> SymbolSnapshot:
+        """Compact snapshot of one symbol from the responses of its parts"""
+        snapshot = SymbolSnapshot(symbol=symbol)
+        for part, result in results.items():
+            if isinstance(result, Exception):
+                self.log_warning("Symbol snapshot part failed", symbol=symbol, part=part, error=str(result))
+                snapshot.errors[part] = str(result)
+        
+        details = results["details"]
+        if not isinstance(details, Exception):
+            for item in details.data or []:
+                for info in item.RepeatedInfo or []:
+                    if info.Symbol is None or info.Symbol.upper() == symbol:
+                        snapshot.details = info
+                        break
+                if snapshot.details:
+                    break
+        
+        prices = results["latest_price"]
+        if not isinstance(prices, Exception) and prices.data:
+            rows = [row for row in prices.data if row.symbol.upper() == symbol]
+            if rows:
+                snapshot.latest_price = max(rows, key=lambda row: self._trading_date_key(row.trading_date))
+        
+        ohlc = results["daily_ohlc"]
+        if not isinstance(ohlc, Exception) and ohlc.data:
+            snapshot.daily_ohlc = ohlc.data
+        
+        for part, result in results.items():
+            if not part.startswith("index:") or isinstance(result, Exception):
+                continue
+            members = (
+                stock.StockSymbol.upper()
+                for index in result.data or []
+                for stock in index.IndexComponent
+            )
+            if symbol in members:
+                snapshot.indices.append(part[len("index:"):])
+        
+        return snapshot
+    
+    @staticmethod
+    def _trading_date_key(trading_date: str) -> datetime:
+        """Sort key for SSI trading dates (dd/mm/yyyy)"""
+        try:
+            return datetime.strptime(trading_date, "%d/%m/%Y")
+        except (TypeError, ValueError):
+            return datetime.min
@@ -6,7 +6,7 @@ from decimal import Decimal
 from app.clients.fc_trading import FCTradingClient
 from app.schemas.fc_trading import *
 from app.core.logging_config import LoggerMixin
-from app.core.exceptions import SSIIntegrationError, SSIValidationError
+from app.core.exceptions import SSIIntegrationError, SSIValidationError, SSIDuplicateRequestError
 from app.core.auth_middleware import SSIServiceAuth
 
 
@@ -104,6 +104,8 @@ class FCTradingService(LoggerMixin):
             
             return response
             
+        except SSIDuplicateRequestError:
+            raise
         except Exception as e:
             self.log_error("Order placement failed", error=str(e))
             raise SSIIntegrationError(f"Order placement failed: {e}")
@@ -132,6 +134,8 @@ class FCTradingService(LoggerMixin):
             
             return response
             
+        except SSIDuplicateRequestError:
+            raise
         except Exception as e:
             self.log_error("Order modification failed", error=str(e))
             raise SSIIntegrationError(f"Order modification failed: {e}")
@@ -1,23 +1,115 @@
 """
 Redis cache utility for SSI Integration Service
 """
+import asyncio
 import json
 import pickle
-from typing import Any, Optional, Union, TypeVar, Generic
+import random
+import time
+import uuid
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Tuple, Union, TypeVar, Generic
 from datetime import timedelta
 import aioredis
 from config import settings
 from app.core.logging_config import LoggerMixin
-from app.core.exceptions import SSICacheError
+from app.core.exceptions import SSIAPIError, SSICacheError
+from app.utils.codecs import ValueCodec
 
 T = TypeVar('T')
 
+# Marks values written by get_or_set, which carry their own freshness
+_ENTRY_MARKER = "__cache_entry__"
+
+# Delete a lock only if this caller still owns it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU in front of Redis.
+    
+    Entries expire with the Redis TTL they were read with, capped at
+    `max_ttl` so a missed invalidation cannot keep a value forever. Values
+    are shared between callers and must not be mutated.
+    """
+    
+    def __init__(self, max_entries: int, max_ttl: float):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.epoch = 0  # Bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: str) -> Any:
+        item = self._entries.get(key)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return item[1]
+    
+    def set(self, key: str, value: Any, ttl: Optional[float], epoch: int) -> None:
+        """Store a value read from Redis, unless anything was invalidated since the read began"""
+        if epoch != self.epoch or value is None:
+            return
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, key: str) -> None:
+        self.epoch += 1
+        self._entries.pop(key, None)
+    
+    def invalidate_pattern(self, pattern: str) -> None:
+        self.epoch += 1
+        for key in [key for key in self._entries if fnmatchcase(key, pattern)]:
+            del self._entries[key]
+    
+    def clear(self) -> None:
+        self.epoch += 1
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
 
 class CacheManager(LoggerMixin, Generic[T]):
-    """Redis cache manager with type hints"""
+    """
+    Redis cache manager with type hints.
+    
+    Keys under `cache_local_prefixes` (tokens and master data) are also
+    kept in a `LocalCache`. Every write or delete of such a key is
+    published on `cache_invalidation_channel` so other replicas drop their
+    copy; if the subscription breaks, the local cache is cleared.
+    """
     
     def __init__(self):
         self._redis: Optional[aioredis.Redis] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.local = LocalCache(settings.cache_local_max_entries, settings.cache_local_max_ttl)
+        self._local_prefixes = tuple(settings.cache_local_prefixes) if settings.cache_local_enabled else ()
+        self._instance_id = uuid.uuid4().hex
+        self._invalidation_task: Optional[asyncio.Task] = None
+        self.codec = ValueCodec(
+            settings.cache_codec,
+            settings.cache_compression_threshold,
+            settings.cache_compression_level
+        )
     
     async def connect(self) -> None:
         """Connect to Redis"""
@@ -34,12 +126,24 @@ class CacheManager(LoggerMixin, Generic[T]):
             # Test connection
             await self._redis.ping()
             self.log_info("Connected to Redis", url=settings.redis_url)
+            
+            if self._local_prefixes:
+                self._invalidation_task = asyncio.create_task(self._listen_invalidations())
         except Exception as e:
             self.log_error("Failed to connect to Redis", error=str(e))
             raise SSICacheError(f"Failed to connect to Redis: {e}")
     
     async def disconnect(self) -> None:
         """Disconnect from Redis"""
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self._invalidation_task = None
+        self.local.clear()
+        
         if self._redis:
             await self._redis.close()
             self.log_info("Disconnected from Redis")
@@ -53,15 +157,29 @@ class CacheManager(LoggerMixin, Generic[T]):
     
     async def get(self, key: str, use_json: bool = True) -> Optional[T]:
         """Get value from cache"""
+        local = self._is_local(key)
+        if local:
+            value = self.local.get(key)
+            if value is not None:
+                return value
+            epoch = self.local.epoch
+        
         try:
-            value = await self.redis.get(key)
+            if local:
+                value, ttl = await self._get_raw_with_ttl(key)
+            else:
+                value = await self.redis.get(key)
             if value is None:
                 return None
             
             if use_json:
-                return json.loads(value)
+                value = self.codec.decode(value)
             else:
-                return pickle.loads(value)
+                value = pickle.loads(value)
+            
+            if local:
+                self.local.set(key, value, ttl, epoch)
+            return value
                 
         except Exception as e:
             self.log_error("Failed to get from cache", key=key, error=str(e))
@@ -77,28 +195,61 @@ class CacheManager(LoggerMixin, Generic[T]):
         """Set value in cache"""
         try:
             if use_json:
-                serialized_value = json.dumps(value, default=str)
+                serialized_value = self.codec.encode(value)
             else:
                 serialized_value = pickle.dumps(value)
             
-            await self.redis.set(key, serialized_value, ex=ttl)
+            await self._store(key, serialized_value, ttl)
             self.log_debug("Set cache value", key=key, ttl=ttl)
+            await self._invalidate_local(key)
             
         except Exception as e:
             self.log_error("Failed to set cache", key=key, error=str(e))
             raise SSICacheError(f"Failed to set cache: {e}")
     
+    async def add(self, key: str, value: T, ttl: int) -> bool:
+        """Set value only if the key does not exist; True if it was set"""
+        try:
+            return bool(await self.redis.set(key, self.codec.encode(value), nx=True, ex=ttl))
+        except Exception as e:
+            self.log_error("Failed to add cache value", key=key, error=str(e))
+            raise SSICacheError(f"Failed to add cache value: {e}")
+    
     async def delete(self, key: str) -> bool:
         """Delete key from cache"""
         try:
-            result = await self.redis.delete(key)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                result, _ = await pipe.delete(key).zrem(CacheKeys.index_key(key), key).execute()
             self.log_debug("Deleted cache key", key=key, existed=bool(result))
+            await self._invalidate_local(key)
             return bool(result)
             
         except Exception as e:
             self.log_error("Failed to delete from cache", key=key, error=str(e))
             raise SSICacheError(f"Failed to delete from cache: {e}")
     
+    async def get_with_ttl(self, key: str, use_json: bool = True) -> Tuple[Optional[T], Optional[float]]:
+        """Value from Redis and its remaining TTL in seconds, bypassing the local cache"""
+        try:
+            value, ttl = await self._get_raw_with_ttl(key)
+            if value is None:
+                return None, None
+            return (self.codec.decode(value) if use_json else pickle.loads(value)), ttl
+            
+        except Exception as e:
+            self.log_error("Failed to get from cache", key=key, error=str(e))
+            raise SSICacheError(f"Failed to get from cache: {e}")
+    
+    async def _store(self, key: str, serialized_value: bytes, ttl: Optional[int]) -> None:
+        """SET key and record it in its namespace index, scored by expiry"""
+        now = time.time()
+        index_key = CacheKeys.index_key(key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, serialized_value, ex=ttl)
+            pipe.zadd(index_key, {key: now + ttl if ttl else float("inf")})
+            pipe.zremrangebyscore(index_key, "-inf", now)  # Keys that expired on their own
+            await pipe.execute()
+    
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
         try:
@@ -124,42 +275,335 @@ class CacheManager(LoggerMixin, Generic[T]):
         key: str, 
         factory_func, 
         ttl: Optional[int] = None,
-        use_json: bool = True
+        use_json: bool = True,
+        stale_ttl: Optional[int] = None,
+        negative_ttl: Optional[int] = None
+    ) -> T:
+        """
+        Get value from cache or set using factory function.
+        
+        Entries are fresh for a jittered `ttl` and kept `stale_ttl` seconds
+        longer: a stale hit is returned at once while one background task
+        refreshes it. Each key has at most one factory call in flight per
+        process, and a Redis lock keeps other replicas waiting for that
+        value instead of fetching it too. Upstream 404s are cached for
+        `negative_ttl` seconds and re-raised without calling the factory.
+        """
+        stale_ttl = settings.cache_stale_ttl if stale_ttl is None else stale_ttl
+        negative_ttl = settings.cache_negative_ttl if negative_ttl is None else negative_ttl
+        
+        entry = await self._read_entry(key, use_json)
+        if entry is not None:
+            if self._is_fresh(entry):
+                return self._entry_value(entry)
+            
+            # Stale: serve it and let one task refresh it
+            self._start_fill(key, factory_func, ttl, use_json, stale_ttl, negative_ttl, background=True)
+            self.log_debug("Serving stale cache value", key=key)
+            return self._entry_value(entry)
+        
+        task = self._start_fill(key, factory_func, ttl, use_json, stale_ttl, negative_ttl)
+        return await asyncio.shield(task)
+    
+    def _start_fill(
+        self,
+        key: str,
+        factory_func,
+        ttl: Optional[int],
+        use_json: bool,
+        stale_ttl: int,
+        negative_ttl: int,
+        background: bool = False
+    ) -> asyncio.Task:
+        """Start a fill for key, or join the one already running"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._fill(key, factory_func, ttl, use_json, stale_ttl, negative_ttl)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._fill_done(key, done, background))
+        return task
+    
+    def _fill_done(self, key: str, task: asyncio.Task, background: bool) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is None:
+            return
+        if background:
+            # Nobody awaits a refresh, and the stale value keeps being served
+            self.log_warning("Cache refresh failed", key=key, error=str(task.exception()))
+        else:
+            # Awaiting callers get the error; retrieve it for joined waiters that left
+            self.log_debug("Cache fill failed", key=key, error=str(task.exception()))
+    
+    async def _fill(
+        self,
+        key: str,
+        factory_func,
+        ttl: Optional[int],
+        use_json: bool,
+        stale_ttl: int,
+        negative_ttl: int
     ) -> T:
-        """Get value from cache or set using factory function"""
-        value = await self.get(key, use_json)
-        if value is not None:
+        """Call the factory under the cross-replica lock and store its result"""
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        locked = await self.acquire_lock(lock_key, token)
+        try:
+            if not locked:
+                # Another replica is filling it; use its value
+                entry = await self._wait_for_entry(key, use_json)
+                if entry is not None:
+                    return self._entry_value(entry)
+                # The lock holder is slow or gone; fetch it ourselves
+            
+            try:
+                value = await factory_func() if callable(factory_func) else factory_func
+            except SSIAPIError as e:
+                if e.status_code == 404 and negative_ttl:
+                    await self._write_entry(key, None, negative_ttl, 0, use_json, missing=e.message)
+                raise
+            
+            await self._write_entry(key, value, ttl, stale_ttl, use_json)
             return value
         
-        # Generate new value
-        new_value = await factory_func() if callable(factory_func) else factory_func
-        await self.set(key, new_value, ttl, use_json)
-        return new_value
+        finally:
+            if locked:
+                await self.release_lock(lock_key, token)
+    
+    async def _read_entry(self, key: str, use_json: bool) -> Optional[Dict[str, Any]]:
+        """Read a get_or_set entry; Redis errors count as a miss"""
+        local = self._is_local(key)
+        if local:
+            entry = self.local.get(key)
+            if entry is not None:
+                return entry
+            epoch = self.local.epoch
+        
+        try:
+            if local:
+                raw, ttl = await self._get_raw_with_ttl(key)
+            else:
+                raw = await self.redis.get(key)
+            if raw is None:
+                return None
+            entry = self.codec.decode(raw) if use_json else pickle.loads(raw)
+        except Exception as e:
+            self.log_warning("Failed to read cache entry", key=key, error=str(e))
+            return None
+        
+        if not isinstance(entry, dict) or _ENTRY_MARKER not in entry:
+            return None  # Written by plain set(); refill it
+        if local:
+            self.local.set(key, entry, ttl, epoch)
+        return entry
+    
+    async def _write_entry(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int],
+        stale_ttl: int,
+        use_json: bool,
+        missing: Optional[str] = None
+    ) -> None:
+        """Store value with its fresh-until time; Redis keeps it through the stale window"""
+        ttl = self._jitter(ttl) if ttl else None
+        entry = {
+            _ENTRY_MARKER: 1,
+            "value": value,
+            "fresh_until": time.time() + ttl if ttl else None,
+            "missing": missing
+        }
+        try:
+            if use_json:
+                serialized_value = self.codec.encode(entry)
+            else:
+                serialized_value = pickle.dumps(entry)
+            
+            expiry = int(ttl + stale_ttl) + 1 if ttl else None
+            await self._store(key, serialized_value, expiry)
+            self.log_debug("Set cache entry", key=key, ttl=ttl, negative=missing is not None)
+            await self._invalidate_local(key)
+            
+        except Exception as e:
+            self.log_warning("Failed to write cache entry", key=key, error=str(e))
+    
+    async def _wait_for_entry(self, key: str, use_json: bool) -> Optional[Dict[str, Any]]:
+        """Poll for a fresh entry while another replica holds the fill lock"""
+        deadline = time.monotonic() + settings.cache_lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await self._read_entry(key, use_json)
+            if entry is not None and self._is_fresh(entry):
+                return entry
+        return None
+    
+    async def acquire_lock(self, lock_key: str, token: str, timeout: Optional[float] = None) -> bool:
+        """Take a cross-replica lock held at most `timeout` seconds; True if Redis is down"""
+        timeout = timeout or settings.cache_lock_timeout
+        try:
+            return bool(await self.redis.set(lock_key, token, nx=True, px=int(timeout * 1000)))
+        except Exception as e:
+            # Without Redis only the local single-flight applies
+            self.log_warning("Failed to acquire cache lock", key=lock_key, error=str(e))
+            return True
+    
+    async def release_lock(self, lock_key: str, token: str) -> None:
+        """Release a lock taken with acquire_lock, if still held by token"""
+        try:
+            await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            self.log_warning("Failed to release cache lock", key=lock_key, error=str(e))
+    
+    # ------------------------------------------------------------------
+    # Local cache
+    # ------------------------------------------------------------------
+    
+    def _is_local(self, key: str) -> bool:
+        return bool(self._local_prefixes) and key.startswith(self._local_prefixes)
+    
+    async def _get_raw_with_ttl(self, key: str) -> Tuple[Optional[bytes], Optional[float]]:
+        """Value and remaining TTL in seconds (None if the key never expires), in one round trip"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            value, pttl = await pipe.get(key).pttl(key).execute()
+        return value, pttl / 1000 if pttl >= 0 else None
+    
+    async def _invalidate_local(self, key: Optional[str] = None, pattern: Optional[str] = None) -> None:
+        """Drop a key (or pattern) here and tell other replicas to drop it"""
+        if pattern is not None:
+            if not self._local_prefixes:
+                return
+            self.local.invalidate_pattern(pattern)
+        elif self._is_local(key):
+            self.local.invalidate(key)
+        else:
+            return
+        
+        message = {"origin": self._instance_id, "key": key, "pattern": pattern}
+        try:
+            await self.redis.publish(settings.cache_invalidation_channel, json.dumps(message))
+        except Exception as e:
+            self.log_warning("Failed to publish cache invalidation", key=key, pattern=pattern, error=str(e))
+    
+    async def _listen_invalidations(self) -> None:
+        """Apply other replicas' invalidations; resubscribes after errors"""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(settings.cache_invalidation_channel)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if data["origin"] == self._instance_id:
+                        continue
+                    if data["pattern"] is not None:
+                        self.local.invalidate_pattern(data["pattern"])
+                    else:
+                        self.local.invalidate(data["key"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log_warning("Cache invalidation subscription failed", error=str(e))
+            finally:
+                # Invalidations may be missed while unsubscribed
+                self.local.clear()
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            await asyncio.sleep(1.0)
+    
+    @staticmethod
+    def _jitter(ttl: int) -> float:
+        """Spread expiries of keys written together by +/- cache_ttl_jitter"""
+        spread = settings.cache_ttl_jitter
+        return max(1.0, ttl * random.uniform(1 - spread, 1 + spread))
+    
+    @staticmethod
+    def _is_fresh(entry: Dict[str, Any]) -> bool:
+        fresh_until = entry["fresh_until"]
+        return fresh_until is None or time.time() < fresh_until
+    
+    @staticmethod
+    def _entry_value(entry: Dict[str, Any]) -> Any:
+        if entry["missing"] is not None:
+            raise SSIAPIError(entry["missing"], 404)
+        return entry["value"]
     
     async def clear_pattern(self, pattern: str) -> int:
-        """Clear all keys matching pattern"""
+        """
+        Clear all keys matching pattern.
+        
+        A pattern within one namespace (e.g. "market_data:HOSE:*") walks
+        that namespace's key index; anything else uses incremental SCAN.
+        Keys are removed with pipelined UNLINK in batches, so Redis never
+        blocks on KEYS or one large DEL.
+        """
+        batch_size = settings.cache_scan_batch_size
+        namespace = pattern.split(":", 1)[0]
         try:
-            keys = await self.redis.keys(pattern)
-            if keys:
-                deleted = await self.redis.delete(*keys)
+            if ":" in pattern and not any(char in namespace for char in "*?[\\"):
+                keys = (key async for key, _ in self.redis.zscan_iter(
+                    CacheKeys.index_key(pattern), match=pattern, count=batch_size
+                ))
+            else:
+                keys = self.redis.scan_iter(match=pattern, count=batch_size)
+            
+            deleted = 0
+            batch = []
+            async for key in keys:
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += await self._unlink(batch)
+                    batch = []
+            if batch:
+                deleted += await self._unlink(batch)
+            
+            if deleted:
                 self.log_info("Cleared cache pattern", pattern=pattern, count=deleted)
-                return deleted
-            return 0
+                await self._invalidate_local(pattern=pattern)
+            return deleted
             
         except Exception as e:
             self.log_error("Failed to clear cache pattern", pattern=pattern, error=str(e))
             raise SSICacheError(f"Failed to clear cache pattern: {e}")
+    
+    async def _unlink(self, keys: List[bytes]) -> int:
+        """UNLINK a batch of keys and drop them from their namespace indexes"""
+        by_index: Dict[str, List[bytes]] = {}
+        for key in keys:
+            by_index.setdefault(CacheKeys.index_key(key.decode()), []).append(key)
+        
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.unlink(*keys)
+            for index_key, members in by_index.items():
+                pipe.zrem(index_key, *members)
+            results = await pipe.execute()
+        return results[0]
 
 
 # Cache key builders
 class CacheKeys:
     """Cache key builders for different data types"""
     
+    @staticmethod
+    def index_key(key: str) -> str:
+        """Build the key of the sorted set indexing a key's namespace"""
+        return f"cache_index:{key.split(':', 1)[0]}"
+    
     @staticmethod
     def token_key(service: str, consumer_id: str) -> str:
         """Build cache key for access tokens"""
         return f"token:{service}:{consumer_id}"
     
+    @staticmethod
+    def order_request_key(account: str, request_id: str) -> str:
+        """Build cache key remembering an order request ID"""
+        return f"order_request:{account}:{request_id}"
+    
     @staticmethod
     def market_data_key(symbol: str, market: str, data_type: str) -> str:
         """Build cache key for market data"""
@@ -0,0 +1,116 @@
+"""
+Cache value codecs
+
+Values written by CacheManager start with a 4-byte header: the magic
+b"\x00C", a format version, and a flags byte carrying the codec ID (low
+7 bits) and whether the body is zstd-compressed (high bit). Values
+written before the header existed are plain JSON and still decode.
+"""
+import json
+from typing import Any, Callable, Dict, NamedTuple
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to msgpack or json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: values are stored uncompressed
+    zstandard = None
+
+MAGIC = b"\x00C"
+FORMAT_VERSION = 1
+_COMPRESSED = 0x80
+
+
+class Codec(NamedTuple):
+    """Serializer for cache values; `codec_id` is persisted in the header"""
+    codec_id: int
+    name: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+def _json_encode(value: Any) -> bytes:
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+
+CODECS: Dict[str, Codec] = {"json": Codec(1, "json", _json_encode, json.loads)}
+
+if orjson is not None:
+    CODECS["orjson"] = Codec(
+        2, "orjson",
+        lambda value: orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS),
+        orjson.loads
+    )
+
+if msgpack is not None:
+    CODECS["msgpack"] = Codec(
+        3, "msgpack",
+        lambda value: msgpack.packb(value, default=str, use_bin_type=True),
+        lambda body: msgpack.unpackb(body, raw=False, strict_map_key=False)
+    )
+
+_CODECS_BY_ID = {codec.codec_id: codec for codec in CODECS.values()}
+
+
+def resolve_codec(name: str) -> Codec:
+    """Codec by name; "auto" picks the fastest one installed"""
+    if name == "auto":
+        for candidate in ("orjson", "msgpack", "json"):
+            if candidate in CODECS:
+                return CODECS[candidate]
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Cache codec {name!r} is not available")
+    return codec
+
+
+class ValueCodec:
+    """
+    Encodes cache values with one codec, zstd-compressing bodies of at
+    least `compression_threshold` bytes (0 disables compression).
+
+    Decoding follows the header, so values written by replicas configured
+    with another codec still read; one written with a codec or compression
+    this process lacks raises ValueError, which callers treat as a miss.
+    """
+    
+    def __init__(self, codec: str = "auto", compression_threshold: int = 0, compression_level: int = 3):
+        self.codec = resolve_codec(codec)
+        self.compression_threshold = compression_threshold if zstandard is not None else 0
+        self._compressor = zstandard.ZstdCompressor(level=compression_level) if zstandard is not None else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+    
+    def encode(self, value: Any) -> bytes:
+        body = self.codec.encode(value)
+        flags = self.codec.codec_id
+        if self.compression_threshold and len(body) >= self.compression_threshold:
+            body = self._compressor.compress(body)
+            flags |= _COMPRESSED
+        return MAGIC + bytes((FORMAT_VERSION, flags)) + body
+    
+    def decode(self, raw: bytes) -> Any:
+        if raw[:2] != MAGIC:
+            return json.loads(raw)  # Written before codecs existed
+        
+        version, flags = raw[2], raw[3]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache value format version {version}")
+        
+        body = raw[4:]
+        if flags & _COMPRESSED:
+            if self._decompressor is None:
+                raise ValueError("Cache value is zstd-compressed but zstandard is not installed")
+            body = self._decompressor.decompress(body)
+        
+        codec = _CODECS_BY_ID.get(flags & ~_COMPRESSED)
+        if codec is None:
+            raise ValueError(f"Cache value written with unavailable codec {flags & ~_COMPRESSED}")
+        return codec.decode(body)
@@ -0,0 +1,112 @@
+"""
+Retry budgets, backoff and hedging delays for SSI requests
+"""
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from config import settings
+
+
+class RetryBudget:
+    """
+    Token bucket bounding retries to a share of the traffic to one upstream.
+    
+    Every request deposits `ratio` tokens and the bucket also refills at
+    `min_per_second`; each retry or hedged request withdraws a whole token.
+    While SSI is browning out the bucket drains and failing calls fail
+    fast instead of multiplying the load on it.
+    """
+    
+    def __init__(self, ratio: float, min_per_second: float, capacity: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+    
+    def deposit(self) -> None:
+        """Credit one request"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+    
+    def try_spend(self) -> bool:
+        """Take a token for one retry; False if the budget is exhausted"""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+
+class LatencyTracker:
+    """Recent latencies of one endpoint and their hedging quantile"""
+    
+    def __init__(self, window: int, quantile: float, min_samples: int):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._value: Optional[float] = None
+        self._stale = 0
+        # Re-sort after a tenth of the window has changed
+        self._refresh_every = max(1, window // 10)
+    
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._stale += 1
+    
+    def value(self) -> Optional[float]:
+        """Latency quantile in seconds, None until there are enough samples"""
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._value is None or self._stale >= self._refresh_every:
+            ordered = sorted(self._samples)
+            self._value = ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+            self._stale = 0
+        return self._value
+
+
+_budgets: Dict[str, RetryBudget] = {}
+_latencies: Dict[str, LatencyTracker] = {}
+
+
+def retry_budget(upstream: str) -> RetryBudget:
+    """Retry budget shared by every client of an upstream base URL"""
+    budget = _budgets.get(upstream)
+    if budget is None:
+        budget = _budgets[upstream] = RetryBudget(
+            settings.retry_budget_ratio,
+            settings.retry_budget_min_per_second,
+            settings.retry_budget_capacity
+        )
+    return budget
+
+
+def latency_tracker(endpoint: str) -> LatencyTracker:
+    """Latency samples for an endpoint URL (without query string)"""
+    tracker = _latencies.get(endpoint)
+    if tracker is None:
+        tracker = _latencies[endpoint] = LatencyTracker(
+            settings.hedge_window,
+            settings.hedge_quantile,
+            settings.hedge_min_samples
+        )
+    return tracker
+
+
+def hedge_delay(endpoint: str) -> float:
+    """Seconds to wait for a read before sending a hedged copy"""
+    observed = latency_tracker(endpoint).value()
+    if observed is None:
+        return settings.hedge_default_delay
+    return max(settings.hedge_min_delay, observed)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so retrying callers spread out"""
+    return random.uniform(0, min(settings.retry_max_delay, settings.retry_delay * (2 ** attempt)))
@@ -0,0 +1,130 @@
+"""
+Background-refreshed SSI access tokens
+"""
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+from config import settings
+from app.core.logging_config import LoggerMixin
+from app.utils.cache import cache_manager
+
+
+class TokenManager(LoggerMixin):
+    """
+    Keeps one SSI access token fresh ahead of its expiry.
+    
+    The current token is held in memory and in Redis under `cache_key`. A
+    background task refreshes it `token_refresh_ahead` seconds before it
+    expires, under a Redis lock: one replica calls SSI and the others adopt
+    its token from Redis. `get_token` only waits on SSI when there is no
+    unexpired token at all, e.g. when SSI was unreachable at startup.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        cache_key: str,
+        fetch: Callable[[], Awaitable[str]],
+        ttl: int
+    ):
+        self.name = name
+        self.cache_key = cache_key
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = min(settings.token_refresh_ahead, ttl / 2)
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self) -> None:
+        """Fetch or adopt the first token and start refreshing in the background"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.log_warning("Initial token refresh failed", token=self.name, error=str(e))
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def get_token(self) -> str:
+        """Current token from memory"""
+        if self._token is not None and time.time() < self._expires_at:
+            return self._token
+        
+        # Nothing usable yet; this caller has to wait for SSI
+        await self.refresh()
+        return self._token
+    
+    async def refresh(self) -> None:
+        """Replace the token unless another caller or replica just did"""
+        async with self._lock:
+            if self._fresh():
+                return
+            
+            lock_key = f"lock:{self.cache_key}"
+            owner = uuid.uuid4().hex
+            locked = await cache_manager.acquire_lock(lock_key, owner, settings.token_refresh_lock_timeout)
+            try:
+                if not locked and await self._wait_for_shared():
+                    return
+                if await self._adopt_shared():
+                    return
+                
+                token = await self.fetch()
+                await cache_manager.set(self.cache_key, token, ttl=self.ttl)
+                self._set(token, self.ttl)
+                self.log_info("Access token refreshed", token=self.name, ttl=self.ttl)
+            
+            finally:
+                if locked:
+                    await cache_manager.release_lock(lock_key, owner)
+    
+    def _fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self.refresh_ahead
+    
+    def _set(self, token: str, ttl: float) -> None:
+        self._token = token
+        self._expires_at = time.time() + ttl
+    
+    async def _adopt_shared(self) -> bool:
+        """Use the token in Redis if it is not due for refresh yet"""
+        try:
+            token, ttl = await cache_manager.get_with_ttl(self.cache_key)
+        except Exception:
+            return False
+        if not token or ttl is None or ttl <= self.refresh_ahead:
+            return False
+        self._set(token, ttl)
+        self.log_debug("Adopted shared access token", token=self.name, ttl=ttl)
+        return True
+    
+    async def _wait_for_shared(self) -> bool:
+        """Wait for the replica holding the refresh lock to publish its token"""
+        deadline = time.monotonic() + settings.token_refresh_lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+            if await self._adopt_shared():
+                return True
+        return False
+    
+    async def _run(self) -> None:
+        while True:
+            delay = self._expires_at - self.refresh_ahead - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log_warning("Background token refresh failed", token=self.name, error=str(e))
+                await asyncio.sleep(settings.token_refresh_retry_interval)
@@ -3,7 +3,7 @@ Configuration settings for SSI Integration Service
 """
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 import os
 
 
@@ -40,6 +40,24 @@ class Settings(BaseSettings):
     cache_ttl_token: int = Field(default=3600, description="Token cache TTL")
     cache_ttl_master_data: int = Field(default=86400, description="Master data cache TTL")
     cache_ttl_market_data: int = Field(default=300, description="Market data cache TTL")
+    cache_ttl_jitter: float = Field(default=0.1, description="Random +/- fraction applied to cache TTLs")
+    cache_stale_ttl: int = Field(default=60, description="Seconds an expired entry is still served while it refreshes")
+    cache_negative_ttl: int = Field(default=30, description="Seconds upstream 404s stay cached")
+    cache_lock_timeout: float = Field(default=10.0, description="Max seconds a replica holds a cache fill lock")
+    cache_lock_wait: float = Field(default=5.0, description="Seconds to wait for another replica's fill before fetching")
+    
+    # Cache serialization settings
+    cache_codec: str = Field(default="auto", description="Cache value codec: auto, orjson, msgpack or json")
+    cache_compression_threshold: int = Field(default=4096, description="zstd-compress cache values of at least this many bytes (0 disables)")
+    cache_compression_level: int = Field(default=3, description="zstd compression level for cache values")
+    
+    # In-process cache settings (in front of Redis)
+    cache_local_enabled: bool = Field(default=True, description="Keep hot keys in process memory")
+    cache_local_prefixes: List[str] = Field(default=["token:", "master_data:"], description="Key prefixes kept in process memory")
+    cache_local_max_entries: int = Field(default=10000, description="Max keys kept in process memory")
+    cache_local_max_ttl: float = Field(default=300.0, description="Max seconds a key stays in process memory")
+    cache_invalidation_channel: str = Field(default="cache:invalidate", description="Redis pub/sub channel for cache invalidations")
+    cache_scan_batch_size: int = Field(default=500, description="Keys per SCAN step and UNLINK batch in pattern clears")
     
     # SSI API FCData Credentials 
     consumer_id_fc_data: str = Field(default="9db5f2ee570f4624a7e9e08d408c663a", description="SSI Consumer ID")
@@ -67,6 +85,12 @@ class Settings(BaseSettings):
         description="SSI Public Key (Base64)"
     )
     
+    # Token refresh settings
+    fc_data_token_ttl: int = Field(default=900, description="FC Data access token lifetime in seconds (15 minutes per SSI)")
+    token_refresh_ahead: int = Field(default=120, description="Seconds before expiry a token is refreshed in the background")
+    token_refresh_retry_interval: float = Field(default=5.0, description="Seconds between failed background token refreshes")
+    token_refresh_lock_timeout: float = Field(default=15.0, description="Max seconds a replica holds the token refresh lock")
+    
     # SSI API URLs
     fc_data_url: str = Field(default="https://fc-data.ssi.com.vn/", description="FC Data API URL")
     fc_data_stream_url: str = Field(default="https://fc-datahub.ssi.com.vn/", description="FC Data Stream URL")
@@ -81,13 +105,43 @@ class Settings(BaseSettings):
     request_timeout: int = Field(default=30, description="Request timeout in seconds")
     connection_timeout: int = Field(default=10, description="Connection timeout in seconds")
     
+    # HTTP connection pool settings (one shared client per SSI upstream)
+    http2_enabled: bool = Field(default=True, description="Use HTTP/2 to SSI upstreams when h2 is installed")
+    http_max_connections: int = Field(default=100, description="Max connections per SSI upstream")
+    http_max_keepalive_connections: int = Field(default=50, description="Idle keep-alive connections kept per SSI upstream")
+    http_keepalive_expiry: float = Field(default=60.0, description="Seconds an idle connection stays open")
+    
     # Retry settings
     max_retries: int = Field(default=3, description="Maximum retry attempts")
     retry_delay: float = Field(default=1.0, description="Retry delay in seconds")
+    retry_max_delay: float = Field(default=10.0, description="Upper bound of a retry backoff delay in seconds")
+    retry_budget_ratio: float = Field(default=0.1, description="Retries earned per request sent to an SSI upstream")
+    retry_budget_min_per_second: float = Field(default=1.0, description="Retries always allowed per second per SSI upstream")
+    retry_budget_capacity: float = Field(default=10.0, description="Max retries banked per SSI upstream")
+    
+    # Hedged read settings (idempotent market data requests)
+    hedge_enabled: bool = Field(default=True, description="Send a second copy of slow market data reads")
+    hedge_quantile: float = Field(default=0.95, description="Latency quantile after which a read is hedged")
+    hedge_window: int = Field(default=200, description="Recent latencies kept per endpoint")
+    hedge_min_samples: int = Field(default=20, description="Latencies needed before the quantile is used")
+    hedge_default_delay: float = Field(default=0.5, description="Hedge delay in seconds until enough latencies are known")
+    hedge_min_delay: float = Field(default=0.05, description="Lower bound of the hedge delay in seconds")
+    
+    # Symbol snapshot settings
+    snapshot_max_concurrency: int = Field(default=10, description="SSI calls in flight at once for one symbol snapshot request")
+    
+    # Order write deduplication
+    order_dedup_ttl: int = Field(default=86400, description="Seconds an order request ID is remembered (SSI request IDs are unique per day)")
     
     # Logging
     log_level: str = Field(default="INFO", description="Log level")
     log_format: str = Field(default="json", description="Log format")
+    log_async: bool = Field(default=True, description="Write log records from a background thread instead of the event loop")
+    log_queue_size: int = Field(default=10000, description="Log records buffered for the background writer before dropping")
+    log_payload_mode: str = Field(default="sampled", description="SSI request/response payload logging: off, sampled or all")
+    log_payload_sample_rate: float = Field(default=0.01, description="Share of SSI calls logged with payloads in sampled mode")
+    log_payload_max_bytes: int = Field(default=2048, description="Max characters of a logged payload preview")
+    log_payload_max_items: int = Field(default=5, description="List items kept per list in a logged payload preview")
     
     @property
     def redis_url(self) -> str:
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cache codecs for OHLC payloads
+
+Encodes a cached GetDailyOhlcResponse dump (N rows shaped like SSI's
+DailyOhlc response) with every installed codec, with and without zstd,
+and reports bytes stored plus encode/decode time. Then times the full
+cache-hit path: decode and rebuild the response by validation (the old
+behaviour) or with from_cached.
+
+Run from the service root: python docs/benchmark_cache_codecs.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.codecs import CODECS, ValueCodec, zstandard  # noqa: E402
+
+
+def payload(rows: int) -> dict:
+    data = []
+    for i in range(rows):
+        close = 25000 + (i * 37) % 5000
+        data.append({
+            "Symbol": "SSI",
+            "Market": "HOSE",
+            "TradingDate": f"{1 + i % 28:02d}/{1 + (i // 28) % 12:02d}/{2015 + i // 336}",
+            "Time": None,
+            "Open": str(close - 150),
+            "High": str(close + 300),
+            "Low": str(close - 400),
+            "Close": str(close),
+            "Volume": str(1000000 + (i * 7919) % 900000),
+            "Value": str(close * (1000000 + (i * 7919) % 900000)),
+        })
+    return {
+        "message": "Success",
+        "status": 200,
+        "timestamp": "2024-06-03T02:15:00.123456",
+        "data": data,
+        "total_record": None,
+        "totalRecord": rows,
+    }
+
+
+def timed(func: Callable[[], Any], repeat: int) -> float:
+    """Best-of-three mean milliseconds per call"""
+    func()
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    value = payload(args.rows)
+    legacy = json.dumps(value, default=str).encode()
+    print(f"{args.rows} OHLC rows; legacy json.dumps: {len(legacy):,} bytes\n")
+    print(f"{'codec':<16}{'bytes':>12}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+
+    variants = [(name, 0) for name in CODECS]
+    if zstandard is not None:
+        variants += [(name, 1) for name in CODECS]
+    else:
+        print("(zstandard not installed: compressed variants skipped)")
+
+    for name, threshold in variants:
+        codec = ValueCodec(name, threshold)
+        encoded = codec.encode(value)
+        assert codec.decode(encoded) == json.loads(json.dumps(value))
+        label = name + ("+zstd" if threshold else "")
+        print(
+            f"{label:<16}{len(encoded):>12,}{len(encoded) / len(legacy):>8.2f}"
+            f"{timed(lambda: codec.encode(value), args.repeat):>12.2f}"
+            f"{timed(lambda: codec.decode(encoded), args.repeat):>12.2f}"
+        )
+
+    try:
+        from app.schemas.base import from_cached
+        from app.schemas.fc_data import GetDailyOhlcResponse
+    except ImportError as e:
+        print(f"\nSkipping hit-path timing ({e})")
+        return
+
+    fastest = ValueCodec("auto", 4096)
+    encoded = fastest.encode(value)
+    print(f"\nCache hit, decode + rebuild response ({fastest.codec.name}, zstd if installed)")
+    print(f"  json.loads + validate    {timed(lambda: GetDailyOhlcResponse(**json.loads(legacy)), args.repeat):8.2f} ms")
+    print(f"  decode + validate        {timed(lambda: GetDailyOhlcResponse(**fastest.decode(encoded)), args.repeat):8.2f} ms")
+    print(f"  decode + from_cached     {timed(lambda: from_cached(GetDailyOhlcResponse, fastest.decode(encoded)), args.repeat):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
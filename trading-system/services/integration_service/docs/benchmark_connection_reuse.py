@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Load test: per-request httpx clients vs. one shared pooled client
+
+Compares the old dependency behaviour (a new AsyncClient per API request,
+closed afterwards) with the app-lifetime shared client. By default it runs
+against a local keep-alive server that charges a fixed delay per new
+connection to stand in for TCP + TLS setup to SSI; pass --url to hit a
+real upstream instead.
+
+Run from the service root: python docs/benchmark_connection_reuse.py
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+BODY = b'{"status": 200, "message": "Success", "data": []}'
+
+
+async def serve(host: str, port: int, handshake_ms: float) -> asyncio.AbstractServer:
+    """Minimal HTTP/1.1 keep-alive server with a per-connection setup cost"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await asyncio.sleep(handshake_ms / 1000)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(BODY)).encode() + b"\r\n\r\n" + BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def run(
+    name: str,
+    request: Callable[[], Awaitable[None]],
+    total: int,
+    concurrency: int
+) -> None:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await request()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{name:<22} p50 {latencies[len(latencies) // 2]:7.2f} ms   "
+        f"p99 {latencies[int(len(latencies) * 0.99)]:7.2f} ms   "
+        f"mean {statistics.fmean(latencies):7.2f} ms   "
+        f"{total / elapsed:8.0f} req/s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Upstream URL to GET (default: local simulated upstream)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--handshake-ms", type=float, default=15.0, help="Simulated connection setup cost")
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 for the shared client (needs h2)")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = await serve("127.0.0.1", 0, args.handshake_ms)
+        port = server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}/api/v2/Market/Securities"
+        print(f"Local upstream with {args.handshake_ms:.0f} ms connection setup")
+    print(f"{args.requests} requests, concurrency {args.concurrency}\n")
+
+    async def per_request_client() -> None:
+        # Old behaviour: FCDataService -> FCDataClient -> new AsyncClient per API request
+        async with httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        ) as client:
+            (await client.get(url)).raise_for_status()
+
+    shared = httpx.AsyncClient(
+        http2=args.http2,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0)
+    )
+
+    async def shared_client() -> None:
+        (await shared.get(url)).raise_for_status()
+
+    try:
+        await run("per-request client", per_request_client, args.requests, args.concurrency)
+        await run("shared client", shared_client, args.requests, args.concurrency)
+    finally:
+        await shared.aclose()
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
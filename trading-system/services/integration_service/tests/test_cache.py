@@ -0,0 +1,119 @@
+"""
+Stale-while-revalidate cache fills made through FC Data clients
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.clients import fc_data
+from app.clients.base import http_clients
+from app.schemas.fc_data import GetDailyStockPriceRequest
+from app.services.fc_data_service import FCDataService
+from app.utils.cache import cache_manager
+from config import settings
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self.calls:
+            if name == "set":
+                results.append(await self.redis.set(*args, **kwargs))
+            elif name == "get":
+                results.append(await self.redis.get(*args))
+            elif name == "pttl":
+                results.append(-1)
+            else:
+                results.append(0)  # Namespace index upkeep
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+
+    async def publish(self, channel, message):
+        return 0
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """SSI's daily stock price endpoint, answering with a new close each call"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        row = {"TradingDate": "02/01/2025", "Symbol": "VCB", "ClosePrice": 90_000 + len(calls)}
+        return httpx.Response(200, json={"message": "Success", "status": 200, "data": [row], "totalRecord": 1})
+
+    async def get_token():
+        return "token"
+
+    monkeypatch.setattr(cache_manager, "_redis", FakeRedis())
+    monkeypatch.setattr(fc_data.fc_data_tokens, "get_token", get_token)
+    monkeypatch.setitem(http_clients._clients, settings.fc_data_url.rstrip('/'), httpx.AsyncClient(
+        base_url=settings.fc_data_url, transport=httpx.MockTransport(handler)
+    ))
+    return calls
+
+
+def make_stale(key):
+    entry = cache_manager.codec.decode(cache_manager.redis.data[key])
+    entry["fresh_until"] = 0
+    cache_manager.redis.data[key] = cache_manager.codec.encode(entry)
+
+
+async def close_price(request):
+    async with FCDataService() as service:
+        response = await service.client.get_daily_stock_price(request)
+    return response.data[0].close_price
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_refreshed_after_the_request_client_closes(upstream):
+    request = GetDailyStockPriceRequest(symbol="VCB", from_date="01/01/2025", to_date="02/01/2025")
+
+    assert await close_price(request) == 90_001
+    key, = cache_manager.redis.data
+    make_stale(key)
+
+    # The stale value is served; its refresh outlives the request's client
+    assert await close_price(request) == 90_001
+    await asyncio.gather(*cache_manager._inflight.values())
+
+    assert len(upstream) == 2
+    assert await close_price(request) == 90_002
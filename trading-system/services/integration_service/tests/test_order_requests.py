@@ -0,0 +1,172 @@
+"""
+Order request IDs: each one reaches SSI at most once
+"""
+
+import httpx
+import pytest
+
+from app.clients.base import http_clients
+from app.clients.fc_trading import FCTradingClient
+from app.core.exceptions import SSIAPIError, SSIDuplicateRequestError, SSINetworkError, SSIServerError
+from app.schemas.fc_trading import NewOrderRequest
+from app.utils.cache import CacheKeys, cache_manager
+from config import settings
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self.calls:
+            if name == "set":
+                results.append(await self.redis.set(*args, **kwargs))
+            elif name == "delete":
+                results.append(int(self.redis.data.pop(args[0], None) is not None))
+            else:
+                results.append(0)  # Namespace index upkeep
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def ssi(monkeypatch):
+    """SSI's trading API, answering each NewOrder with the next queued outcome"""
+    outcomes = []
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, body = outcome
+        return httpx.Response(status, json=body)
+
+    monkeypatch.setattr(cache_manager, "_redis", FakeRedis())
+    monkeypatch.setitem(http_clients._clients, settings.fc_trading_url.rstrip('/'), httpx.AsyncClient(
+        base_url=settings.fc_trading_url, transport=httpx.MockTransport(handler)
+    ))
+    return outcomes, calls
+
+
+def accepted(message):
+    return 200, {"message": message, "status": 200, "data": None}
+
+
+def order(request_id="00000001"):
+    return NewOrderRequest(
+        account="ACC1", instrument_id="VCB", market="VN", buy_sell="B",
+        order_type="LO", price=90_000, quantity=100, request_id=request_id
+    )
+
+
+async def place(request):
+    async with FCTradingClient(access_token="token") as client:
+        return await client.new_order(request)
+
+
+async def request_state(request_id="00000001"):
+    return await cache_manager.get(CacheKeys.order_request_key("ACC1", request_id))
+
+
+@pytest.mark.asyncio
+async def test_a_repeated_request_id_gets_the_stored_response(ssi):
+    outcomes, calls = ssi
+    outcomes.extend([accepted("first"), accepted("second")])
+
+    assert (await place(order())).message == "first"
+    assert (await place(order())).message == "first"
+    assert len(calls) == 1
+    assert (await request_state())["state"] == "done"
+
+    # Another request ID is sent
+    assert (await place(order("00000002"))).message == "second"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_a_repeat_while_the_first_is_pending_conflicts(ssi):
+    outcomes, calls = ssi
+    await cache_manager.add(CacheKeys.order_request_key("ACC1", "00000001"), {"state": "pending"}, 60)
+
+    with pytest.raises(SSIDuplicateRequestError) as e:
+        await place(order())
+
+    assert e.value.status_code == 409
+    assert e.value.details["state"] == "pending"
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_a_rejection_frees_the_request_id(ssi):
+    outcomes, calls = ssi
+    outcomes.extend([(400, {"message": "Insufficient buying power"}), accepted("retried")])
+
+    with pytest.raises(SSIAPIError):
+        await place(order())
+    assert await request_state() is None
+
+    assert (await place(order())).message == "retried"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_a_server_error_leaves_the_outcome_unknown(ssi):
+    outcomes, calls = ssi
+    outcomes.append((502, {"message": "Bad gateway"}))
+
+    with pytest.raises(SSIServerError):
+        await place(order())
+    assert (await request_state())["state"] == "unknown"
+
+    with pytest.raises(SSIDuplicateRequestError) as e:
+        await place(order())
+    assert e.value.details["state"] == "unknown"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_a_read_timeout_is_not_retried_and_leaves_the_outcome_unknown(ssi):
+    outcomes, calls = ssi
+    outcomes.extend([httpx.ReadTimeout("timed out"), accepted("sent twice")])
+
+    with pytest.raises(SSINetworkError):
+        await place(order())
+
+    # SSI may have received the order, so the POST is sent only once
+    assert len(calls) == 1
+    assert (await request_state())["state"] == "unknown"
+    with pytest.raises(SSIDuplicateRequestError):
+        await place(order())
+    assert len(calls) == 1
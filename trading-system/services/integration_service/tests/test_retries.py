@@ -0,0 +1,94 @@
+"""
+Hedged reads and the per-upstream retry budget
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.clients import base
+from app.clients.base import BaseHTTPClient
+from app.core.exceptions import SSIServerError
+from app.utils.retry import RetryBudget
+
+
+class HedgedClient(BaseHTTPClient):
+    hedge_reads = True
+
+
+def make_client(handler, client_class=BaseHTTPClient):
+    client = client_class(base_url="http://ssi", retries=3)
+    client._client = httpx.AsyncClient(base_url="http://ssi", transport=httpx.MockTransport(handler))
+    client._owns_client = True
+    return client
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """One upstream budget holding a single retry, with no waiting between attempts"""
+    budget = RetryBudget(ratio=0.0, min_per_second=0.0, capacity=1.0)
+    monkeypatch.setattr(base, "retry_budget", lambda upstream: budget)
+    monkeypatch.setattr(base, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setattr(base, "hedge_delay", lambda url: 0.01)
+    return budget
+
+
+@pytest.mark.asyncio
+async def test_the_hedge_wins_and_the_slow_attempt_is_cancelled(budget):
+    calls = []
+    cancelled = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(request)
+                raise
+            return httpx.Response(200, json={"attempt": "first"})
+        return httpx.Response(200, json={"attempt": "hedge"})
+
+    client = make_client(handler, HedgedClient)
+
+    assert await client.get("quotes") == {"attempt": "hedge"}
+    await asyncio.sleep(0)
+
+    assert len(calls) == 2
+    assert len(cancelled) == 1
+    assert budget.tokens < 1
+
+
+@pytest.mark.asyncio
+async def test_a_hedge_is_not_sent_without_budget(budget):
+    budget.tokens = 0
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"attempt": len(calls)})
+
+    client = make_client(handler, HedgedClient)
+
+    assert await client.get("quotes") == {"attempt": 1}
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_when_the_budget_is_exhausted(budget):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    client = make_client(handler)
+
+    with pytest.raises(SSIServerError):
+        await client.get("quotes")
+
+    # One retry was banked; the remaining attempts were not made
+    assert len(calls) == 2
+    assert budget.tokens < 1
@@ -0,0 +1,34 @@
+"""
+Assembling symbol snapshots from the responses of their parts
+"""
+
+from app.schemas.fc_data import GetDailyStockPriceResponse, GetSecuritiesDetailsResponse
+from app.services.fc_data_service import FCDataService
+
+
+def prices(*rows):
+    return GetDailyStockPriceResponse(message="Success", status=200, data=[
+        {"TradingDate": date, "Symbol": symbol, "ClosePrice": close} for symbol, date, close in rows
+    ])
+
+
+def assemble(price_response):
+    results = {
+        "details": GetSecuritiesDetailsResponse(message="Success", status="Success", data=[]),
+        "latest_price": price_response,
+        "daily_ohlc": RuntimeError("timeout"),
+    }
+    return FCDataService()._assemble_snapshot("VCB", results)
+
+
+def test_latest_price_is_the_most_recent_row_of_the_symbol():
+    snapshot = assemble(prices(("VCB", "02/01/2025", 91_000), ("VCB", "03/01/2025", 92_000), ("FPT", "04/01/2025", 1)))
+
+    assert snapshot.latest_price.close_price == 92_000
+    assert snapshot.errors == {"daily_ohlc": "timeout"}
+
+
+def test_rows_of_other_symbols_are_never_the_latest_price():
+    snapshot = assemble(prices(("FPT", "03/01/2025", 120_000)))
+
+    assert snapshot.latest_price is None
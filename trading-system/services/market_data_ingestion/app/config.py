@@ -257,6 +257,44 @@ class Settings(BaseSettings):
         ge=1,
         description="Circuit breaker timeout in seconds"
     )
+    circuit_breaker_failure_rate: float = Field(
+        default=0.5,
+        env="MARKET_DATA_CIRCUIT_BREAKER_FAILURE_RATE",
+        gt=0,
+        le=1,
+        description="Share of failed calls in the window that opens an endpoint's breaker"
+    )
+    circuit_breaker_slow_call_ms: int = Field(
+        default=3000,
+        env="MARKET_DATA_CIRCUIT_BREAKER_SLOW_CALL_MS",
+        ge=0,
+        description="Calls slower than this count as slow (0 disables)"
+    )
+    circuit_breaker_slow_call_rate: float = Field(
+        default=0.8,
+        env="MARKET_DATA_CIRCUIT_BREAKER_SLOW_CALL_RATE",
+        gt=0,
+        le=1,
+        description="Share of slow calls in the window that opens an endpoint's breaker"
+    )
+    circuit_breaker_window: int = Field(
+        default=30,
+        env="MARKET_DATA_CIRCUIT_BREAKER_WINDOW",
+        ge=1,
+        description="Sliding window for failure and slow-call rates in seconds"
+    )
+    circuit_breaker_minimum_calls: int = Field(
+        default=10,
+        env="MARKET_DATA_CIRCUIT_BREAKER_MINIMUM_CALLS",
+        ge=1,
+        description="Calls in the window before the rates are evaluated"
+    )
+    circuit_breaker_half_open_probes: int = Field(
+        default=1,
+        env="MARKET_DATA_CIRCUIT_BREAKER_HALF_OPEN_PROBES",
+        ge=1,
+        description="Concurrent trial calls let through once the breaker timeout has passed"
+    )
     
     # Monitoring Configuration
     enable_metrics: bool = Field(
@@ -0,0 +1,463 @@
+"""
+Exchange calendar for the Vietnamese stock market.
+
+Precomputes, per exchange and year, every session interval (including the
+closed intervals between them) as a sorted array of epoch-second boundaries,
+so "session at t" is a single binary search and needs no datetime objects.
+Holidays include lunar-calendar dates (Tet, Hung Kings) computed for any
+year rather than hardcoded.
+
+Service images are built from their own directory only, so each service
+ships a copy of this file; tests/test_vendored_modules.py keeps the copies
+identical to this one.
+"""
+
+import bisect
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+
+VN_TZ = timezone(timedelta(hours=7), "Asia/Ho_Chi_Minh")
+_VN_OFFSET_SECONDS = 7 * 3600
+
+
+class Exchange(str, Enum):
+    """Vietnamese equity exchanges."""
+    HOSE = "HOSE"
+    HNX = "HNX"
+    UPCOM = "UPCOM"
+
+
+# SSI market codes
+_EXCHANGE_ALIASES = {"VN": Exchange.HOSE, "HN": Exchange.HNX, "UP": Exchange.UPCOM}
+
+
+def to_exchange(exchange: Union[str, Exchange]) -> Exchange:
+    """Exchange from an exchange name or SSI market code ("VN", "HN", "UP")."""
+    if isinstance(exchange, Exchange):
+        return exchange
+    return _EXCHANGE_ALIASES.get(exchange) or Exchange(exchange)
+
+
+class Session(str, Enum):
+    """Trading sessions; values match order_management's TradingSession."""
+    PRE_MARKET = "PRE_MARKET"
+    MORNING_AUCTION = "MORNING_AUCTION"
+    CONTINUOUS_MORNING = "CONTINUOUS_MORNING"
+    LUNCH_BREAK = "LUNCH_BREAK"
+    CONTINUOUS_AFTERNOON = "CONTINUOUS_AFTERNOON"
+    CLOSING_AUCTION = "CLOSING_AUCTION"
+    POST_MARKET = "POST_MARKET"
+    CLOSED = "CLOSED"
+
+
+# (session, start, end, market_status, can_place, can_modify, can_cancel)
+_SessionSpec = Tuple[Session, dt_time, dt_time, str, bool, bool, bool]
+
+SCHEDULES: Dict[Exchange, List[_SessionSpec]] = {
+    Exchange.HOSE: [
+        (Session.PRE_MARKET, dt_time(8, 30), dt_time(9, 0), "PRE_OPEN", False, False, False),
+        (Session.MORNING_AUCTION, dt_time(9, 0), dt_time(9, 15), "OPEN", True, False, False),
+        (Session.CONTINUOUS_MORNING, dt_time(9, 15), dt_time(11, 30), "OPEN", True, True, True),
+        (Session.LUNCH_BREAK, dt_time(11, 30), dt_time(13, 0), "CLOSED", False, False, False),
+        (Session.CONTINUOUS_AFTERNOON, dt_time(13, 0), dt_time(14, 30), "OPEN", True, True, True),
+        (Session.CLOSING_AUCTION, dt_time(14, 30), dt_time(14, 45), "CLOSING", True, False, False),
+        (Session.POST_MARKET, dt_time(14, 45), dt_time(15, 0), "POST_TRADING", True, False, False),
+    ],
+    Exchange.HNX: [
+        (Session.PRE_MARKET, dt_time(8, 30), dt_time(9, 0), "PRE_OPEN", False, False, False),
+        (Session.CONTINUOUS_MORNING, dt_time(9, 0), dt_time(11, 30), "OPEN", True, True, True),
+        (Session.LUNCH_BREAK, dt_time(11, 30), dt_time(13, 0), "CLOSED", False, False, False),
+        (Session.CONTINUOUS_AFTERNOON, dt_time(13, 0), dt_time(14, 30), "OPEN", True, True, True),
+        (Session.CLOSING_AUCTION, dt_time(14, 30), dt_time(14, 45), "CLOSING", True, False, False),
+        (Session.POST_MARKET, dt_time(14, 45), dt_time(15, 0), "POST_TRADING", True, False, False),
+    ],
+    Exchange.UPCOM: [
+        (Session.PRE_MARKET, dt_time(8, 30), dt_time(9, 0), "PRE_OPEN", False, False, False),
+        (Session.CONTINUOUS_MORNING, dt_time(9, 0), dt_time(11, 30), "OPEN", True, True, True),
+        (Session.LUNCH_BREAK, dt_time(11, 30), dt_time(13, 0), "CLOSED", False, False, False),
+        (Session.CONTINUOUS_AFTERNOON, dt_time(13, 0), dt_time(15, 0), "OPEN", True, True, True),
+    ],
+}
+
+# Sessions in which orders can match
+TRADING_SESSIONS = frozenset({
+    Session.MORNING_AUCTION,
+    Session.CONTINUOUS_MORNING,
+    Session.CONTINUOUS_AFTERNOON,
+    Session.CLOSING_AUCTION,
+    Session.POST_MARKET,
+})
+
+# Tet closure around lunar new year's day (1/1), per the usual exchange announcements
+TET_DAYS_BEFORE = 2
+TET_DAYS_AFTER = 4
+
+
+# ----------------------------------------------------------------------
+# Lunar calendar (astronomical new moons and solar terms at UTC+7)
+# ----------------------------------------------------------------------
+
+def _jd_from_date(dd: int, mm: int, yy: int) -> int:
+    a = (14 - mm) // 12
+    y = yy + 4800 - a
+    m = mm + 12 * a - 3
+    return dd + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+
+
+def _jd_to_date(jd: int) -> date:
+    a = jd + 32044
+    b = (4 * a + 3) // 146097
+    c = a - (b * 146097) // 4
+    d = (4 * c + 3) // 1461
+    e = c - (1461 * d) // 4
+    m = (5 * e + 2) // 153
+    day = e - (153 * m + 2) // 5 + 1
+    month = m + 3 - 12 * (m // 10)
+    year = b * 100 + d - 4800 + m // 10
+    return date(year, month, day)
+
+
+def _new_moon(k: int) -> float:
+    """Julian day of the k-th new moon after 1900-01-01."""
+    t = k / 1236.85
+    t2 = t * t
+    t3 = t2 * t
+    dr = math.pi / 180
+    jd1 = 2415020.75933 + 29.53058868 * k + 0.0001178 * t2 - 0.000000155 * t3
+    jd1 += 0.00033 * math.sin((166.56 + 132.87 * t - 0.009173 * t2) * dr)
+    m = 359.2242 + 29.10535608 * k - 0.0000333 * t2 - 0.00000347 * t3
+    mpr = 306.0253 + 385.81691806 * k + 0.0107306 * t2 + 0.00001236 * t3
+    f = 21.2964 + 390.67050646 * k - 0.0016528 * t2 - 0.00000239 * t3
+    c1 = (0.1734 - 0.000393 * t) * math.sin(m * dr) + 0.0021 * math.sin(2 * dr * m)
+    c1 -= 0.4068 * math.sin(mpr * dr) - 0.0161 * math.sin(dr * 2 * mpr)
+    c1 -= 0.0004 * math.sin(dr * 3 * mpr)
+    c1 += 0.0104 * math.sin(dr * 2 * f) - 0.0051 * math.sin(dr * (m + mpr))
+    c1 -= 0.0074 * math.sin(dr * (m - mpr)) + 0.0004 * math.sin(dr * (2 * f + m))
+    c1 -= 0.0004 * math.sin(dr * (2 * f - m)) - 0.0006 * math.sin(dr * (2 * f + mpr))
+    c1 += 0.0010 * math.sin(dr * (2 * f - mpr)) + 0.0005 * math.sin(dr * (2 * mpr + m))
+    if t < -11:
+        delta_t = 0.001 + 0.000839 * t + 0.0002261 * t2 - 0.00000845 * t3 - 0.000000081 * t * t3
+    else:
+        delta_t = -0.000278 + 0.000265 * t + 0.000262 * t2
+    return jd1 + c1 - delta_t
+
+
+def _new_moon_day(k: int, tz: int) -> int:
+    return math.floor(_new_moon(k) + 0.5 + tz / 24)
+
+
+def _sun_longitude_sector(jdn: float) -> int:
+    """Sun longitude in 30-degree sectors (0-11) at the given Julian day."""
+    t = (jdn - 2451545.0) / 36525
+    t2 = t * t
+    dr = math.pi / 180
+    m = 357.52910 + 35999.05030 * t - 0.0001559 * t2 - 0.00000048 * t * t2
+    l0 = 280.46645 + 36000.76983 * t + 0.0003032 * t2
+    dl = (1.914600 - 0.004817 * t - 0.000014 * t2) * math.sin(dr * m)
+    dl += (0.019993 - 0.000101 * t) * math.sin(dr * 2 * m) + 0.000290 * math.sin(dr * 3 * m)
+    longitude = (l0 + dl) * dr
+    longitude -= math.pi * 2 * math.floor(longitude / (math.pi * 2))
+    return math.floor(longitude / math.pi * 6)
+
+
+def _sun_sector_on_day(day_number: int, tz: int) -> int:
+    return _sun_longitude_sector(day_number - 0.5 - tz / 24)
+
+
+def _lunar_month_11(year: int, tz: int) -> int:
+    """Day number of the start of lunar month 11 (the month holding the winter solstice)."""
+    offset = _jd_from_date(31, 12, year) - 2415021
+    k = math.floor(offset / 29.530588853)
+    new_moon = _new_moon_day(k, tz)
+    if _sun_sector_on_day(new_moon, tz) >= 9:
+        new_moon = _new_moon_day(k - 1, tz)
+    return new_moon
+
+
+def _leap_month_offset(a11: int, tz: int) -> int:
+    k = math.floor((a11 - 2415021.076998695) / 29.530588853 + 0.5)
+    i = 1
+    arc = _sun_sector_on_day(_new_moon_day(k + i, tz), tz)
+    while True:
+        last = arc
+        i += 1
+        arc = _sun_sector_on_day(_new_moon_day(k + i, tz), tz)
+        if arc == last or i >= 14:
+            break
+    return i - 1
+
+
+def lunar_to_solar(lunar_day: int, lunar_month: int, lunar_year: int, leap: bool = False, tz: int = 7) -> Optional[date]:
+    """Convert a Vietnamese lunar date to the Gregorian date."""
+    if lunar_month < 11:
+        a11 = _lunar_month_11(lunar_year - 1, tz)
+        b11 = _lunar_month_11(lunar_year, tz)
+    else:
+        a11 = _lunar_month_11(lunar_year, tz)
+        b11 = _lunar_month_11(lunar_year + 1, tz)
+    k = math.floor(0.5 + (a11 - 2415021.076998695) / 29.530588853)
+    offset = lunar_month - 11
+    if offset < 0:
+        offset += 12
+    if b11 - a11 > 365:
+        leap_offset = _leap_month_offset(a11, tz)
+        leap_month = leap_offset - 2
+        if leap_month < 0:
+            leap_month += 12
+        if leap and lunar_month != leap_month:
+            return None
+        if leap or offset >= leap_offset:
+            offset += 1
+    month_start = _new_moon_day(k + offset, tz)
+    return _jd_to_date(month_start + lunar_day - 1)
+
+
+# ----------------------------------------------------------------------
+# Holidays
+# ----------------------------------------------------------------------
+
+def vietnam_market_holidays(year: int) -> Set[date]:
+    """Exchange closing days for a year: public holidays plus weekday make-up days."""
+    holidays: Set[date] = set()
+
+    # Fixed-date holidays; when one falls on a weekend the next weekday is off
+    fixed = [date(year, 1, 1), date(year, 4, 30), date(year, 5, 1), date(year, 9, 1), date(year, 9, 2)]
+
+    # Hung Kings' Commemoration (10th day of the 3rd lunar month)
+    fixed.append(lunar_to_solar(10, 3, year))
+
+    for day in fixed:
+        holidays.add(day)
+    for day in sorted(fixed):
+        if day.weekday() >= 5:
+            makeup = day + timedelta(days=1)
+            while makeup.weekday() >= 5 or makeup in holidays:
+                makeup += timedelta(days=1)
+            holidays.add(makeup)
+
+    # Lunar New Year (Tet); the closure can start in the previous Gregorian year's lunar year
+    for lunar_year in (year, year + 1):
+        tet = lunar_to_solar(1, 1, lunar_year)
+        for offset in range(-TET_DAYS_BEFORE, TET_DAYS_AFTER + 1):
+            day = tet + timedelta(days=offset)
+            if day.year == year:
+                holidays.add(day)
+
+    return holidays
+
+
+# ----------------------------------------------------------------------
+# Session lookup
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class SessionInterval:
+    """One precomputed session interval; start/end are epoch seconds."""
+    exchange: Exchange
+    session: Session
+    start: float
+    end: float
+    market_status: str
+    can_place_orders: bool
+    can_modify_orders: bool
+    can_cancel_orders: bool
+    next_session: Session
+
+    @property
+    def is_trading(self) -> bool:
+        return self.session in TRADING_SESSIONS
+
+    @property
+    def start_time(self) -> datetime:
+        """Start as a naive Vietnam-local datetime."""
+        return datetime.fromtimestamp(self.start, VN_TZ).replace(tzinfo=None)
+
+    @property
+    def end_time(self) -> datetime:
+        return datetime.fromtimestamp(self.end, VN_TZ).replace(tzinfo=None)
+
+
+class _YearTable:
+    """Sorted session boundaries for one exchange and one calendar year."""
+    __slots__ = ("start", "end", "starts", "intervals")
+
+    def __init__(self, start: float, end: float, intervals: List[SessionInterval]):
+        self.start = start
+        self.end = end
+        self.intervals = intervals
+        self.starts = [interval.start for interval in intervals]
+
+
+def _local_epoch(day: date, at: dt_time) -> float:
+    """Epoch seconds of a Vietnam-local wall-clock time, without tz arithmetic per call."""
+    return (day.toordinal() - 719163) * 86400 + at.hour * 3600 + at.minute * 60 + at.second - _VN_OFFSET_SECONDS
+
+
+def to_epoch(at: Union[None, float, datetime]) -> float:
+    """Normalize a timestamp: None is now, naive datetimes are Vietnam-local."""
+    if at is None:
+        return time.time()
+    if isinstance(at, datetime):
+        if at.tzinfo is None:
+            return at.replace(tzinfo=VN_TZ).timestamp()
+        return at.timestamp()
+    return float(at)
+
+
+class ExchangeCalendar:
+    """
+    Session and trading-day lookups for HOSE, HNX and UPCOM.
+
+    Tables are built once per exchange and year on first use (a few thousand
+    intervals) and then only read, so lookups are lock-free. Extra closing
+    days announced by the exchanges can be passed as `extra_holidays`.
+    """
+
+    def __init__(self, extra_holidays: Optional[Iterable[date]] = None):
+        self.extra_holidays = set(extra_holidays or ())
+        self._holidays: Dict[int, Set[date]] = {}
+        self._tables: Dict[Tuple[Exchange, int], _YearTable] = {}
+        self._latest: Dict[Exchange, _YearTable] = {}
+        self._lock = threading.Lock()
+
+    # Holidays and trading days
+
+    def holidays(self, year: int) -> Set[date]:
+        holidays = self._holidays.get(year)
+        if holidays is None:
+            holidays = vietnam_market_holidays(year) | {d for d in self.extra_holidays if d.year == year}
+            self._holidays[year] = holidays
+        return holidays
+
+    def is_trading_day(self, day: Union[None, date, datetime] = None) -> bool:
+        if day is None:
+            day = datetime.now(VN_TZ).date()
+        elif isinstance(day, datetime):
+            day = (day if day.tzinfo is None else day.astimezone(VN_TZ)).date()
+        return day.weekday() < 5 and day not in self.holidays(day.year)
+
+    def next_trading_day(self, day: Union[None, date, datetime] = None) -> date:
+        """First trading day strictly after `day`."""
+        if day is None:
+            day = datetime.now(VN_TZ).date()
+        elif isinstance(day, datetime):
+            day = (day if day.tzinfo is None else day.astimezone(VN_TZ)).date()
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    # Tables
+
+    def _build(self, exchange: Exchange, year: int) -> _YearTable:
+        schedule = SCHEDULES[exchange]
+        first_session = schedule[0][0]
+        year_start = _local_epoch(date(year, 1, 1), dt_time(0))
+        year_end = _local_epoch(date(year + 1, 1, 1), dt_time(0))
+
+        intervals: List[SessionInterval] = []
+        closed_from = year_start
+        day = date(year, 1, 1)
+        while day.year == year:
+            if self.is_trading_day(day):
+                for i, (session, start, end, status, place, modify, cancel) in enumerate(schedule):
+                    start_ts = _local_epoch(day, start)
+                    if start_ts > closed_from:
+                        intervals.append(SessionInterval(
+                            exchange, Session.CLOSED, closed_from, start_ts,
+                            "CLOSED", False, False, False, session
+                        ))
+                    next_session = schedule[i + 1][0] if i + 1 < len(schedule) else Session.CLOSED
+                    end_ts = _local_epoch(day, end)
+                    intervals.append(SessionInterval(
+                        exchange, session, start_ts, end_ts, status, place, modify, cancel, next_session
+                    ))
+                    closed_from = end_ts
+            day += timedelta(days=1)
+        intervals.append(SessionInterval(
+            exchange, Session.CLOSED, closed_from, year_end, "CLOSED", False, False, False, first_session
+        ))
+        return _YearTable(year_start, year_end, intervals)
+
+    def _table(self, exchange: Exchange, ts: float) -> _YearTable:
+        latest = self._latest.get(exchange)
+        if latest is not None and latest.start <= ts < latest.end:
+            return latest
+        year = datetime.fromtimestamp(ts, VN_TZ).year
+        key = (exchange, year)
+        table = self._tables.get(key)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(key)
+                if table is None:
+                    table = self._tables[key] = self._build(exchange, year)
+        self._latest[exchange] = table
+        return table
+
+    # Lookups
+
+    def session_at(self, exchange: Union[str, Exchange] = Exchange.HOSE, at: Union[None, float, datetime] = None) -> SessionInterval:
+        """The session interval containing `at` (default now)."""
+        exchange = to_exchange(exchange)
+        ts = to_epoch(at)
+        table = self._table(exchange, ts)
+        return table.intervals[bisect.bisect_right(table.starts, ts) - 1]
+
+    def next_session_start(
+        self,
+        exchange: Union[str, Exchange] = Exchange.HOSE,
+        at: Union[None, float, datetime] = None,
+        session: Optional[Session] = None
+    ) -> SessionInterval:
+        """The next interval after `at` that is a trading session (or the given session)."""
+        exchange = to_exchange(exchange)
+        ts = to_epoch(at)
+        while True:
+            table = self._table(exchange, ts)
+            i = bisect.bisect_right(table.starts, ts)
+            for interval in table.intervals[i:]:
+                if session is not None:
+                    if interval.session == session:
+                        return interval
+                elif interval.session != Session.CLOSED:
+                    return interval
+            ts = table.end  # Continue in the next year's table
+
+    def is_market_open(self, exchange: Union[str, Exchange] = Exchange.HOSE, at: Union[None, float, datetime] = None) -> bool:
+        """True while orders can match (auctions and continuous sessions)."""
+        return self.session_at(exchange, at).session in TRADING_SESSIONS
+
+    def schedule(self, exchange: Union[str, Exchange] = Exchange.HOSE, day: Union[None, date, datetime] = None) -> List[SessionInterval]:
+        """The day's sessions in order; empty on non-trading days."""
+        exchange = to_exchange(exchange)
+        if day is None:
+            day = datetime.now(VN_TZ).date()
+        elif isinstance(day, datetime):
+            day = (day if day.tzinfo is None else day.astimezone(VN_TZ)).date()
+        if not self.is_trading_day(day):
+            return []
+        day_start = _local_epoch(day, dt_time(0))
+        day_end = day_start + 86400
+        table = self._table(exchange, day_start)
+        i = bisect.bisect_right(table.starts, day_start)
+        return [
+            interval for interval in table.intervals[i:]
+            if interval.start < day_end and interval.session != Session.CLOSED
+        ]
+
+
+_calendar: Optional[ExchangeCalendar] = None
+
+
+def get_exchange_calendar() -> ExchangeCalendar:
+    """Process-wide shared calendar."""
+    global _calendar
+    if _calendar is None:
+        _calendar = ExchangeCalendar()
+    return _calendar
@@ -9,6 +9,7 @@ import json
 import base64
 import hashlib
 import hmac
+import time
 from typing import Dict, List, Optional, Any, AsyncGenerator
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -16,6 +17,8 @@ import structlog
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from ..config import settings
+from .circuit_breaker import BreakerPolicy, CircuitBreakerRegistry, CircuitOpenError
+from .exchange_calendar import Session, get_exchange_calendar
 from ..models import (
     QuoteData, TradeData, OrderBookData, IndexData, MarketNewsData,
     MarketDataRequest, HistoricalDataRequest, StreamSubscriptionRequest,
@@ -25,6 +28,18 @@ from ..models import (
 
 logger = structlog.get_logger(__name__)
 
+# Exchange calendar sessions as reported on market data
+_CALENDAR_SESSIONS = {
+    Session.PRE_MARKET: SessionEnum.PRE_OPEN,
+    Session.MORNING_AUCTION: SessionEnum.PRE_OPEN,
+    Session.CONTINUOUS_MORNING: SessionEnum.CONTINUOUS,
+    Session.LUNCH_BREAK: SessionEnum.INTERMISSION,
+    Session.CONTINUOUS_AFTERNOON: SessionEnum.CONTINUOUS,
+    Session.CLOSING_AUCTION: SessionEnum.CLOSE,
+    Session.POST_MARKET: SessionEnum.POST_CLOSE,
+    Session.CLOSED: SessionEnum.POST_CLOSE,
+}
+
 
 class SSIDataClientError(Exception):
     """Base exception for SSI data client"""
@@ -46,58 +61,14 @@ class SSIDataUnavailableError(SSIDataClientError):
     pass
 
 
-class CircuitBreakerOpen(SSIDataClientError):
-    """Circuit breaker is open"""
+class SSIUpstreamError(SSIDataClientError):
+    """SSI unreachable, timing out or failing (5xx); counts against the endpoint's breaker"""
     pass
 
 
-class CircuitBreaker:
-    """Simple circuit breaker implementation"""
-    
-    def __init__(self, failure_threshold: int = 5, timeout: int = 60):
-        self.failure_threshold = failure_threshold
-        self.timeout = timeout
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
-    
-    def call(self, func):
-        """Decorator for circuit breaker"""
-        async def wrapper(*args, **kwargs):
-            if self.state == "OPEN":
-                if datetime.utcnow().timestamp() - self.last_failure_time < self.timeout:
-                    raise CircuitBreakerOpen("Circuit breaker is open")
-                else:
-                    self.state = "HALF_OPEN"
-            
-            try:
-                result = await func(*args, **kwargs)
-                if self.state == "HALF_OPEN":
-                    self.reset()
-                return result
-            except Exception as e:
-                self.record_failure()
-                raise e
-        
-        return wrapper
-    
-    def record_failure(self):
-        """Record a failure"""
-        self.failure_count += 1
-        self.last_failure_time = datetime.utcnow().timestamp()
-        
-        if self.failure_count >= self.failure_threshold:
-            self.state = "OPEN"
-            logger.warning("Circuit breaker opened", 
-                         failure_count=self.failure_count,
-                         threshold=self.failure_threshold)
-    
-    def reset(self):
-        """Reset the circuit breaker"""
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = "CLOSED"
-        logger.info("Circuit breaker reset")
+class CircuitBreakerOpen(SSIDataClientError):
+    """Circuit breaker is open"""
+    pass
 
 
 class RateLimiter:
@@ -143,11 +114,8 @@ class SSIDataClient:
         self.access_token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
         
-        # Resilience patterns
-        self.circuit_breaker = CircuitBreaker(
-            failure_threshold=settings.circuit_breaker_failure_threshold,
-            timeout=settings.circuit_breaker_timeout
-        )
+        # Resilience patterns: one breaker per endpoint
+        self.circuit_breakers = CircuitBreakerRegistry(BreakerPolicy.from_settings(settings))
         self.rate_limiter = RateLimiter(settings.rate_limit_requests)
         
         # Performance tracking
@@ -256,20 +224,40 @@ class SSIDataClient:
                           data: Optional[Dict] = None, use_data_url: bool = False) -> Dict[str, Any]:
         """Make authenticated request to SSI API"""
         
-        # Rate limiting
-        if not await self.rate_limiter.acquire():
-            await asyncio.sleep(1.0)  # Wait before retry
-            if not await self.rate_limiter.acquire():
-                raise SSIRateLimitError("Rate limit exceeded")
-        
-        # Circuit breaker check
-        if self.circuit_breaker.state == "OPEN":
-            raise CircuitBreakerOpen("Circuit breaker is open")
-        
-        # Ensure authentication
-        if not self.access_token or self._is_token_expired():
-            await self._authenticate()
+        # Fail fast while the endpoint is down, before waiting on the rate limiter
+        breaker = self.circuit_breakers.get(endpoint)
+        try:
+            permit = breaker.acquire()
+        except CircuitOpenError as e:
+            raise CircuitBreakerOpen(str(e))
         
+        try:
+            # Rate limiting
+            if not await self.rate_limiter.acquire():
+                await asyncio.sleep(1.0)  # Wait before retry
+                if not await self.rate_limiter.acquire():
+                    raise SSIRateLimitError("Rate limit exceeded")
+            
+            # Ensure authentication
+            if not self.access_token or self._is_token_expired():
+                await self._authenticate()
+            
+            started = time.perf_counter()
+            result = await self._send_request(method, endpoint, params, data, use_data_url)
+        except SSIUpstreamError:
+            breaker.record_failure(permit, time.perf_counter() - started)
+            raise
+        except BaseException:
+            # Rate limits, auth, 4xx and cancellation say nothing about the endpoint
+            breaker.release(permit)
+            raise
+        
+        breaker.record_success(permit, time.perf_counter() - started)
+        return result
+    
+    async def _send_request(self, method: str, endpoint: str, params: Optional[Dict],
+                            data: Optional[Dict], use_data_url: bool) -> Dict[str, Any]:
+        """Send one request, re-authenticating once on 401"""
         # Prepare request
         base_url = self.data_url if use_data_url else self.trading_url
         url = f"{base_url}{endpoint}"
@@ -306,17 +294,19 @@ class SSIDataClient:
                     raise SSIRateLimitError("Rate limit exceeded")
                 elif response.status == 404:
                     raise SSIDataUnavailableError("Requested data not found")
+                elif response.status >= 500:
+                    error_text = await response.text()
+                    raise SSIUpstreamError(f"Request failed: {response.status} - {error_text}")
                 else:
                     error_text = await response.text()
                     raise SSIDataClientError(f"Request failed: {response.status} - {error_text}")
                     
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             self.error_count += 1
-            self.circuit_breaker.record_failure()
             logger.error("SSI API request failed", 
                         endpoint=endpoint, 
                         error=str(e))
-            raise SSIDataClientError(f"Request error: {str(e)}")
+            raise SSIUpstreamError(f"Request error: {str(e)}")
     
     # Market Data Methods
     
@@ -340,10 +330,11 @@ class SSIDataClient:
         quote_data = response.get("data", {})
         
         # Map SSI response to our model
+        market = MarketEnum(quote_data.get("exchange", "HOSE"))
         return QuoteData(
             symbol=symbol.upper(),
-            market=MarketEnum(quote_data.get("exchange", "HOSE")),
-            session=self._determine_current_session(),
+            market=market,
+            session=self._determine_current_session(market),
             last_price=Decimal(str(quote_data.get("lastPrice", 0))),
             last_volume=quote_data.get("lastVolume", 0),
             ceiling_price=Decimal(str(quote_data.get("ceilingPrice", 0))),
@@ -375,10 +366,11 @@ class SSIDataClient:
         
         trades = []
         for trade in trades_data:
+            market = MarketEnum(trade.get("exchange", "HOSE"))
             trades.append(TradeData(
                 symbol=symbol.upper(),
-                market=MarketEnum(trade.get("exchange", "HOSE")),
-                session=self._determine_current_session(),
+                market=market,
+                session=self._determine_current_session(market),
                 trade_id=trade.get("tradeId", ""),
                 price=Decimal(str(trade.get("price", 0))),
                 volume=trade.get("volume", 0),
@@ -421,10 +413,11 @@ class SSIDataClient:
             for level in book_data.get("asks", [])
         ]
         
+        market = MarketEnum(book_data.get("exchange", "HOSE"))
         return OrderBookData(
             symbol=symbol.upper(),
-            market=MarketEnum(book_data.get("exchange", "HOSE")),
-            session=self._determine_current_session(),
+            market=market,
+            session=self._determine_current_session(market),
             bids=bids,
             asks=asks,
             total_bid_volume=sum(b.volume for b in bids),
@@ -470,30 +463,9 @@ class SSIDataClient:
         
         return indices
     
-    def _determine_current_session(self) -> SessionEnum:
-        """Determine current trading session based on time"""
-        now = datetime.now()
-        current_time = now.time()
-        
-        # Vietnamese market sessions (ICT timezone)
-        if current_time < time(8, 0):
-            return SessionEnum.PRE_OPEN
-        elif time(8, 0) <= current_time < time(9, 0):
-            return SessionEnum.PRE_OPEN
-        elif time(9, 0) <= current_time < time(11, 30):
-            return SessionEnum.CONTINUOUS
-        elif time(11, 30) <= current_time < time(13, 0):
-            return SessionEnum.INTERMISSION
-        elif time(13, 0) <= current_time < time(15, 0):
-            return SessionEnum.CONTINUOUS
-        elif time(15, 0) <= current_time < time(15, 15):
-            return SessionEnum.CLOSE
-        elif time(15, 15) <= current_time < time(15, 30):
-            return SessionEnum.POST_CLOSE
-        elif time(15, 30) <= current_time < time(16, 30):
-            return SessionEnum.AFTER_HOURS
-        else:
-            return SessionEnum.POST_CLOSE
+    def _determine_current_session(self, market: MarketEnum = MarketEnum.HOSE) -> SessionEnum:
+        """Determine current trading session from the shared exchange calendar"""
+        return _CALENDAR_SESSIONS[get_exchange_calendar().session_at(market.value).session]
     
     # Streaming Methods
     
@@ -533,6 +505,7 @@ class SSIDataClient:
             "error_count": self.error_count,
             "error_rate": self.error_count / max(self.request_count, 1),
             "last_request_time": self.last_request_time.isoformat() if self.last_request_time else None,
-            "circuit_breaker_state": self.circuit_breaker.state,
+            "circuit_breaker_state": self.circuit_breakers.summary_state(),
+            "circuit_breakers": self.circuit_breakers.metrics(),
             "is_authenticated": bool(self.access_token and not self._is_token_expired())
         }
@@ -9,6 +9,11 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Sorted sets of chat IDs scored by last activity, so counts and cleanup
+# never have to scan session keys
+SESSION_INDEX_KEY = "telegram_sessions:by_activity"
+AUTH_INDEX_KEY = "telegram_sessions:authenticated"
+
 class TelegramSessionManager:
     """Session manager for Telegram bot using Redis"""
     
@@ -16,6 +21,8 @@ class TelegramSessionManager:
         try:
             self.redis_client = redis.from_url(settings.redis_url)
             self.session_timeout = settings.telegram_session_timeout_minutes * 60  # Convert to seconds
+            if not self.redis_client.exists(SESSION_INDEX_KEY):
+                self._rebuild_index()
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
             self.redis_client = None
@@ -28,6 +35,28 @@ class TelegramSessionManager:
         """Generate auth key for a chat ID"""
         return f"telegram_auth:{chat_id}"
     
+    def _index_session(self, pipe, chat_id: int, session: Dict[str, Any]) -> None:
+        """Queue index updates for a session written in the same pipeline"""
+        pipe.zadd(SESSION_INDEX_KEY, {chat_id: session['last_activity']})
+        if session.get('authenticated'):
+            pipe.zadd(AUTH_INDEX_KEY, {chat_id: session['last_activity']})
+        else:
+            pipe.zrem(AUTH_INDEX_KEY, chat_id)
+    
+    def _rebuild_index(self) -> None:
+        """Index sessions written before the indexes existed (incremental SCAN)"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        keys = list(self.redis_client.scan_iter(match="telegram_session:*", count=500))
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            for key, session_data in zip(batch, self.redis_client.mget(batch)):
+                if session_data:
+                    session = json.loads(session_data)
+                    self._index_session(pipe, session['chat_id'], session)
+            pipe.execute()
+        if keys:
+            logger.info(f"Indexed {len(keys)} existing sessions")
+    
     def create_session(self, chat_id: int, user_data: Dict[str, Any]) -> bool:
         """Create a new session for a user"""
         try:
@@ -44,11 +73,14 @@ class TelegramSessionManager:
                 'fc_session': None
             }
             
-            self.redis_client.setex(
+            pipe = self.redis_client.pipeline()
+            pipe.setex(
                 session_key,
                 self.session_timeout,
                 json.dumps(session_data)
             )
+            self._index_session(pipe, chat_id, session_data)
+            pipe.execute()
             
             logger.info(f"Session created for chat_id: {chat_id}")
             return True
@@ -88,11 +120,14 @@ class TelegramSessionManager:
             session['last_activity'] = time.time()
             
             session_key = self._get_session_key(chat_id)
-            self.redis_client.setex(
+            pipe = self.redis_client.pipeline()
+            pipe.setex(
                 session_key,
                 self.session_timeout,
                 json.dumps(session)
             )
+            self._index_session(pipe, chat_id, session)
+            pipe.execute()
             
             return True
             
@@ -109,8 +144,11 @@ class TelegramSessionManager:
             session_key = self._get_session_key(chat_id)
             auth_key = self._get_auth_key(chat_id)
             
-            self.redis_client.delete(session_key)
-            self.redis_client.delete(auth_key)
+            pipe = self.redis_client.pipeline()
+            pipe.delete(session_key, auth_key)
+            pipe.zrem(SESSION_INDEX_KEY, chat_id)
+            pipe.zrem(AUTH_INDEX_KEY, chat_id)
+            pipe.execute()
             
             logger.info(f"Session deleted for chat_id: {chat_id}")
             return True
@@ -188,28 +226,15 @@ class TelegramSessionManager:
         try:
             if not self.redis_client:
                 return 0
-                
-            # Redis automatically handles expiration, but we can do additional cleanup
-            pattern = "telegram_session:*"
-            keys = self.redis_client.keys(pattern)
             
-            expired_count = 0
-            current_time = time.time()
+            # Session keys expire on their own with the same timeout as
+            # last_activity; only the index entries need trimming
+            cutoff = time.time() - self.session_timeout
+            pipe = self.redis_client.pipeline()
+            pipe.zremrangebyscore(SESSION_INDEX_KEY, "-inf", cutoff)
+            pipe.zremrangebyscore(AUTH_INDEX_KEY, "-inf", cutoff)
+            expired_count, _ = pipe.execute()
             
-            for key in keys:
-                try:
-                    session_data = self.redis_client.get(key)
-                    if session_data:
-                        session = json.loads(session_data)
-                        last_activity = session.get('last_activity', 0)
-                        
-                        if current_time - last_activity > self.session_timeout:
-                            self.redis_client.delete(key)
-                            expired_count += 1
-                            
-                except Exception as e:
-                    logger.error(f"Error processing session key {key}: {e}")
-                    
             if expired_count > 0:
                 logger.info(f"Cleaned up {expired_count} expired sessions")
                 
@@ -219,14 +244,17 @@ class TelegramSessionManager:
             logger.error(f"Error during session cleanup: {e}")
             return 0
     
+    def _count_active(self, index_key: str, window_seconds: int) -> int:
+        """Indexed sessions active within the window"""
+        return self.redis_client.zcount(index_key, f"({time.time() - window_seconds}", "+inf")
+    
     def get_active_sessions_count(self) -> int:
         """Get count of active sessions"""
         try:
             if not self.redis_client:
                 return 0
                 
-            pattern = "telegram_session:*"
-            return len(self.redis_client.keys(pattern))
+            return self._count_active(SESSION_INDEX_KEY, self.session_timeout)
             
         except Exception as e:
             logger.error(f"Error getting active sessions count: {e}")
@@ -238,27 +266,8 @@ class TelegramSessionManager:
             if not self.redis_client:
                 return 0
             
-            # Get all session keys
-            session_pattern = "telegram_session:*"
-            session_keys = self.redis_client.keys(session_pattern)
-            
-            active_count = 0
-            current_time = time.time()
-            
-            for key in session_keys:
-                try:
-                    session_data = self.redis_client.get(key)
-                    if session_data:
-                        session = json.loads(session_data)
-                        last_activity = session.get('last_activity', 0)
-                        
-                        # Consider user active if last activity within 1 hour
-                        if current_time - last_activity < 3600:  # 1 hour
-                            active_count += 1
-                except:
-                    continue
-            
-            return active_count
+            # Consider user active if last activity within 1 hour
+            return self._count_active(SESSION_INDEX_KEY, min(3600, self.session_timeout))
             
         except Exception as e:
             logger.error(f"Error getting active users count: {e}")
@@ -271,18 +280,7 @@ class TelegramSessionManager:
             authenticated_sessions = 0
             
             if self.redis_client:
-                pattern = "telegram_session:*"
-                keys = self.redis_client.keys(pattern)
-                
-                for key in keys:
-                    try:
-                        session_data = self.redis_client.get(key)
-                        if session_data:
-                            session = json.loads(session_data)
-                            if session.get('authenticated'):
-                                authenticated_sessions += 1
-                    except:
-                        continue
+                authenticated_sessions = self._count_active(AUTH_INDEX_KEY, self.session_timeout)
             
             return {
                 'total_sessions': total_sessions,
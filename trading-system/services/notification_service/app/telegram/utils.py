@@ -12,6 +12,8 @@ from telegram.ext import ContextTypes
 from telegram.constants import ChatAction
 import logging
 
+from ..utils.exchange_calendar import get_exchange_calendar
+
 logger = logging.getLogger(__name__)
 
 
@@ -245,19 +247,8 @@ def calculate_percentage_change(old_value: float, new_value: float) -> float:
 
 
 def is_market_open() -> bool:
-    """Check if market is currently open"""
-    now = datetime.now()
-    current_time = now.time()
-    
-    # Vietnamese market hours: 9:00 AM - 3:00 PM (Monday to Friday)
-    if now.weekday() >= 5:  # Saturday = 5, Sunday = 6
-        return False
-    
-    from datetime import time
-    market_open = time(9, 0)
-    market_close = time(15, 0)
-    
-    return market_open <= current_time <= market_close
+    """Check if market is currently open (trading session on a trading day)"""
+    return get_exchange_calendar().is_market_open()
 
 
 def is_authorized_user(chat_id: int) -> bool:
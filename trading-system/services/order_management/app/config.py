@@ -159,11 +159,62 @@ class Settings(BaseSettings):
     )
     kafka_topic_prefix: str = Field(default="trading", description="Kafka topic prefix")
     
+    # Order Journal Configuration (write-ahead log for crash recovery)
+    order_journal_enabled: bool = Field(default=True, description="Journal order events to disk")
+    order_journal_dir: str = Field(default="data/order_journal", description="Order journal directory")
+    order_journal_flush_interval_ms: int = Field(
+        default=5,
+        ge=1,
+        le=1000,
+        description="Group commit interval in milliseconds"
+    )
+    order_journal_batch_size: int = Field(
+        default=500,
+        ge=1,
+        le=100000,
+        description="Pending events that trigger an immediate group commit"
+    )
+    order_journal_snapshot_every: int = Field(
+        default=50000,
+        ge=100,
+        description="Journal events between order book snapshots"
+    )
+    
     # HTTP Client Configuration
     http_timeout: int = Field(default=30, ge=1, le=300, description="HTTP timeout in seconds")
     http_max_connections: int = Field(default=20, ge=1, le=100, description="Max HTTP connections")
     http_retries: int = Field(default=3, ge=0, le=10, description="Number of HTTP retries")
     
+    # SSI Gateway Lanes (order entry/modify/cancel vs. account queries)
+    ssi_order_pool_size: int = Field(default=10, ge=1, le=100, description="Connections reserved for order traffic")
+    ssi_query_pool_size: int = Field(default=10, ge=1, le=100, description="Connections for account queries")
+    ssi_order_timeout: float = Field(default=10.0, gt=0, le=60, description="Order request timeout in seconds")
+    ssi_max_in_flight: int = Field(default=16, ge=1, le=200, description="Max concurrent SSI requests")
+    ssi_query_max_in_flight: int = Field(
+        default=8,
+        ge=1,
+        le=200,
+        description="Max concurrent query requests; the remainder is kept free for orders"
+    )
+    
+    # SSI Request Scheduling (budgets per account and operation class)
+    ssi_rate_limit_requests: int = Field(default=100, ge=1, description="SSI requests allowed per window")
+    ssi_rate_limit_window: float = Field(default=60.0, gt=0, description="SSI rate limit window in seconds")
+    ssi_order_rate_share: float = Field(default=0.8, gt=0, le=1, description="Share of the SSI rate for new/modify orders")
+    ssi_query_rate_share: float = Field(default=0.5, gt=0, le=1, description="Share of the SSI rate for queries")
+    ssi_account_rate_share: float = Field(default=0.5, gt=0, le=1, description="Share of each class budget one account may use")
+    ssi_cancel_deadline: float = Field(default=5.0, gt=0, description="Max queueing time for cancels in seconds")
+    ssi_order_deadline: float = Field(default=3.0, gt=0, description="Max queueing time for new/modify orders in seconds")
+    ssi_query_deadline: float = Field(default=10.0, gt=0, description="Max queueing time for queries in seconds")
+    
+    # Bulk Order Configuration
+    bulk_max_orders: int = Field(default=200, ge=1, le=1000, description="Max orders per bulk request")
+    bulk_order_deadline: float = Field(
+        default=30.0,
+        gt=0,
+        description="Max queueing time per order in bulk and cancel-all requests, in seconds"
+    )
+    
     # Circuit Breaker Configuration
     circuit_breaker_failure_threshold: int = Field(
         default=5, 
@@ -177,6 +228,88 @@ class Settings(BaseSettings):
         le=300, 
         description="Circuit breaker timeout in seconds"
     )
+    circuit_breaker_failure_rate: float = Field(default=0.5, gt=0, le=1, description="Failed share of calls in the window that opens an endpoint's breaker")
+    circuit_breaker_slow_call_ms: int = Field(default=3000, ge=0, description="Calls slower than this count as slow (0 disables)")
+    circuit_breaker_slow_call_rate: float = Field(default=0.8, gt=0, le=1, description="Slow share of calls in the window that opens an endpoint's breaker")
+    circuit_breaker_window: int = Field(default=30, ge=1, description="Sliding window for failure and slow-call rates in seconds")
+    circuit_breaker_minimum_calls: int = Field(default=10, ge=1, description="Calls in the window before the rates are evaluated")
+    circuit_breaker_half_open_probes: int = Field(default=1, ge=1, description="Concurrent trial calls once the breaker timeout has passed")
+    
+    # Pre-Trade Risk Configuration
+    pre_trade_fee_rate: float = Field(default=0.0015, ge=0, le=0.05, description="Trading fee rate reserved on buys")
+    pre_trade_max_order_value: float = Field(default=5_000_000_000, gt=0, description="Max notional per order (VND)")
+    pre_trade_max_order_quantity: int = Field(default=500_000, gt=0, description="Max shares per order")
+    pre_trade_max_position_value: float = Field(
+        default=20_000_000_000,
+        gt=0,
+        description="Max position value per symbol after a buy (VND)"
+    )
+    pre_trade_fat_finger_pct: float = Field(
+        default=0.05,
+        gt=0,
+        le=1,
+        description="Max price deviation from the last traded price"
+    )
+    pre_trade_require_state: bool = Field(
+        default=True,
+        description="Reject orders for accounts/symbols whose risk state could not be loaded"
+    )
+    
+    # Execution Report Configuration (order book polling and position reconciliation)
+    execution_reports_enabled: bool = Field(default=True, description="Poll SSI for fills and order status")
+    execution_accounts: List[str] = Field(
+        default=[],
+        description="Accounts to follow; defaults to default_account_id"
+    )
+    execution_poll_interval_ms: int = Field(
+        default=500,
+        ge=50,
+        le=60000,
+        description="Order book polling interval in milliseconds for accounts with working orders"
+    )
+    execution_idle_poll_interval: float = Field(
+        default=10.0,
+        ge=0.1,
+        description="Seconds between order book polls for accounts with no working orders"
+    )
+    execution_reconcile_interval: float = Field(
+        default=60.0,
+        ge=1,
+        description="Seconds between position reconciliations against SSI"
+    )
+    execution_events_topic: str = Field(
+        default="order-events",
+        description="Kafka topic (after kafka_topic_prefix) for order state events"
+    )
+    execution_publish_events: bool = Field(default=True, description="Publish order state events to Kafka")
+    
+    # Pricing Configuration (batched quotes for portfolio mark-to-market)
+    market_data_service_url: str = Field(
+        default="http://market-data-ingestion:8001",
+        description="Market Data Service URL (the docker-compose service name)"
+    )
+    price_cache_ttl: float = Field(
+        default=2.0,
+        ge=0,
+        le=300,
+        description="Seconds a fetched price is served before it is fetched again"
+    )
+    price_batch_size: int = Field(
+        default=50,
+        ge=1,
+        le=50,
+        description="Symbols per market data request (the service accepts at most 50)"
+    )
+    price_request_timeout: float = Field(default=5.0, ge=0.1, le=60, description="Market data request timeout in seconds")
+    mark_to_market_cache_size: int = Field(default=256, ge=1, description="Memoized portfolio valuations")
+    
+    # Order Statistics Configuration (per-account daily rollups)
+    order_stats_retention_days: int = Field(
+        default=400,
+        ge=1,
+        le=3650,
+        description="Days of daily activity rows kept per account"
+    )
     
     # Monitoring Configuration
     enable_metrics: bool = Field(default=True, description="Enable Prometheus metrics")
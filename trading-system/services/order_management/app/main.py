@@ -13,22 +13,37 @@ from .middleware import RateLimitMiddleware, RequestLoggingMiddleware, ErrorHand
 
 # Import routers
 from .routers import auth, orders, accounts
+from .services.execution_reports import ExecutionReportProcessor
+from .services.order_tracker import order_tracker
+from .services.pricing_service import price_book
+from .services.ssi_client import get_ssi_client
 
 # Setup logging
 setup_logging(settings.log_level, settings.log_format)
 logger = get_logger(__name__)
 
+# Applies SSI order status and fills to the orders placed through the routers
+execution_reports = ExecutionReportProcessor(order_tracker) if settings.execution_reports_enabled else None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting FC Trading API application...")
+    await order_tracker.start()
+    if execution_reports:
+        await execution_reports.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down FC Trading API application...")
+    # Stop applying fills before the order book is flushed
+    if execution_reports:
+        await execution_reports.stop()
+    await order_tracker.stop()
+    await price_book.close()
 
 
 # Create FastAPI application
@@ -74,10 +89,14 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    client = await get_ssi_client()
     return {
         "status": "healthy",
         "version": settings.app_version,
-        "timestamp": "2025-07-16T00:00:00Z"
+        "timestamp": "2025-07-16T00:00:00Z",
+        "ssi_circuit": client.circuit_breakers.summary_state(),
+        "circuit_breakers": client.circuit_breakers.metrics(),
+        "execution_reports": execution_reports.get_status() if execution_reports else None
     }
 
 
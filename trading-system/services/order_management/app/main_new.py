@@ -164,10 +164,15 @@ async def initialize_order_processing():
     try:
         logger.info("Initializing order processing...")
         
-        # In production, this would:
-        # - Start order execution monitoring
+        # Rebuild working orders from the journal before accepting new ones
+        await order_service.start()
+        
+        # Apply SSI fills and status changes, publish order events
+        if execution_reports:
+            await execution_reports.start()
+        
+        # In production, this would also:
         # - Initialize message queue connections
-        # - Set up order state synchronization
         
         logger.info("Order processing initialized")
         
@@ -269,7 +274,10 @@ async def save_pending_orders():
     """Save pending orders state."""
     try:
         logger.info("Saving pending orders state...")
-        # Save any pending order state to disk/database
+        if execution_reports:
+            await execution_reports.stop()
+        # Commit the journal tail and write a final snapshot
+        await order_service.stop()
         logger.info("Pending orders state saved")
     except Exception as e:
         logger.error(f"Error saving pending orders state: {str(e)}")
@@ -280,6 +288,7 @@ async def cleanup_market_data():
     try:
         logger.info("Cleaning up market data connections...")
         # Close market data feeds
+        await price_book.close()
         logger.info("Market data connections cleaned up")
     except Exception as e:
         logger.error(f"Error cleaning up market data connections: {str(e)}")
@@ -639,7 +648,11 @@ except ImportError:
 
 # Import service modules
 from .routers import orders, accounts, positions
+from .config import settings
+from .services.execution_reports import ExecutionReportProcessor
+from .services.order_journal import OrderJournal
 from .services.order_service import OrderService
+from .services.pricing_service import price_book
 from .services.trading_session_service import TradingSessionService
 
 logger = get_logger(__name__)
@@ -665,7 +678,8 @@ except:
     )
 
 # Initialize services
-order_service = OrderService()
+order_service = OrderService(journal=OrderJournal() if settings.order_journal_enabled else None)
+execution_reports = ExecutionReportProcessor(order_service) if settings.execution_reports_enabled else None
 trading_session_service = TradingSessionService()
 
 # Add routers
@@ -730,6 +744,8 @@ async def detailed_health_check():
                 "ssi_fastconnect": ssi_status,
                 "redis": redis_status,
             },
+            "order_journal": order_service.journal.get_status() if order_service.journal else None,
+            "execution_reports": execution_reports.get_status() if execution_reports else None,
             "trading_session": session_info,
             "capabilities": {
                 "can_place_orders": session_info.get("can_place_orders", False),
@@ -794,6 +810,13 @@ async def startup_event():
         # Initialize SSI FastConnect client
         # TODO: Add SSI client initialization
         
+        # Recover orders from the journal and start group commit
+        await order_service.start()
+        
+        # Poll SSI order books for fills and reconcile positions
+        if execution_reports:
+            await execution_reports.start()
+        
         # Start background tasks
         # TODO: Add background tasks for monitoring, etc.
         
@@ -819,6 +842,13 @@ async def shutdown_event():
         # Close SSI client connections
         # TODO: Add SSI client cleanup
         
+        # Stop applying fills before the final journal snapshot
+        if execution_reports:
+            await execution_reports.stop()
+        
+        # Flush the order journal and snapshot working orders
+        await order_service.stop()
+        
         logger.info("Order Management Service shut down successfully")
         
     except Exception as e:
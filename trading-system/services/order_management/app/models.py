@@ -43,6 +43,7 @@ class OrderStatus(str, Enum):
     CANCELLED = "CANCELLED"
     REJECTED = "REJECTED"
     EXPIRED = "EXPIRED"
+    UNKNOWN = "UNKNOWN"     # Placement timed out; settled by execution reports
 
 
 class Market(str, Enum):
@@ -221,6 +222,31 @@ class CancelOrderRequest(BaseModel):
             }
         }
 
+
+class BulkOrderRequest(BaseModel):
+    """Several new orders submitted in one call"""
+    orders: List[NewOrderRequest] = Field(..., min_length=1, description="Orders to place")
+
+
+class CancelAllRequest(BaseModel):
+    """Cancel every open order on an account, optionally by symbol or side"""
+    account: str = Field(..., description="Trading account")
+    instrument_id: Optional[str] = Field(None, description="Only cancel orders for this symbol")
+    buy_sell: Optional[BuySellEnum] = Field(None, description="Only cancel orders on this side")
+    market: Optional[MarketEnum] = Field(None, description="Only cancel orders on this market")
+
+    device_id: Optional[str] = Field(None, description="Device identifier")
+    user_agent: Optional[str] = Field(None, description="User agent string")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "account": "0001234567",
+                "instrument_id": "VCB",
+                "buy_sell": "S"
+            }
+        }
+
 class AccountBalanceRequest(BaseModel):
     """Account balance query request"""
     account: str = Field(..., description="Trading account")
@@ -453,7 +479,19 @@ class MaxQuantityResponse(APIResponse):
 
 
 # Trading session validation models
-class TradingSession(BaseModel):
+class TradingSessionInfo(BaseModel):
+    """Current trading session and what it permits"""
+    current_session: TradingSession
+    next_session: Optional[TradingSession] = None
+    session_start_time: Optional[datetime] = None
+    session_end_time: Optional[datetime] = None
+    market_status: str
+    can_place_orders: bool
+    can_modify_orders: bool
+    can_cancel_orders: bool
+
+
+class TradingSessionRules(BaseModel):
     """Trading session information"""
     session: TradingSessionEnum
     start_time: str = Field(..., description="Session start time (HH:MM)")
@@ -3,7 +3,7 @@ Accounts API Router
 Account management endpoints for balance, portfolio, and trading capabilities.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 import structlog
 from datetime import datetime
 
@@ -16,6 +16,7 @@ from ..models import (
     MaxQuantityResponse,
     APIResponse
 )
+from ..services.order_stats import order_stats
 from ..services.ssi_client import get_ssi_client, SSIFastConnectClient
 from ..utils.exceptions import SSIAPIError
 
@@ -44,7 +45,7 @@ async def get_account_balance(
     try:
         result = await client.get_account_balance(account)
         
-        balance_data = result.get("data", {})
+        balance_data = result.data or {}
         balance = balance_data.get("balance", 0.0)
         
         return BalanceResponse(
@@ -90,14 +91,14 @@ async def get_portfolio(
     try:
         result = await client.get_portfolio(account)
         
-        positions_data = result.get("data", [])
+        positions_data = result.data or []
         
         return PositionResponse(
             success=True,
             message="Portfolio retrieved successfully",
             account=account,
             positions=positions_data,
-            data=result,
+            data={"status": result.status, "message": result.message},
             timestamp=datetime.now()
         )
         
@@ -141,7 +142,7 @@ async def get_max_quantity(
     try:
         result = await client.get_max_quantity(account, instrument_id, price)
         
-        data = result.get("data", {})
+        data = result.data or {}
         max_buy = data.get("maxBuyQuantity", 0)
         max_sell = data.get("maxSellQuantity", 0)
         
@@ -178,6 +179,29 @@ async def get_max_quantity(
         })
 
 
+@router.get("/activity-summary/{account}", response_model=APIResponse)
+async def get_account_activity_summary(
+    account: str,
+    days: int = Query(30, ge=1, le=365, description="Number of days to look back")
+):
+    """
+    Get order activity for an account over the last `days` days
+    
+    Summed from the daily rollups of orders placed through this service;
+    no order is scanned and SSI is not called.
+    """
+    
+    summary = order_stats.summarize_days(account, days)
+    logger.info("Retrieved activity summary", account=account, days=days)
+    
+    return APIResponse(
+        success=True,
+        message="Activity summary retrieved successfully",
+        data=summary,
+        timestamp=datetime.now()
+    )
+
+
 @router.get("/account-info/{account}", response_model=APIResponse)
 async def get_account_info(
     account: str,
@@ -99,7 +99,7 @@ async def request_otp(
         return APIResponse(
             success=True,
             message="OTP sent successfully",
-            data=result.get("data", {}),
+            data=result.data or {},
             timestamp=datetime.now()
         )
         
@@ -4,26 +4,42 @@ Enhanced order management endpoints with comprehensive validation,
 error handling, and logging.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from functools import partial
+import asyncio
+import json
+import time
 import structlog
 from datetime import datetime
 
+from ..config import settings
 from ..models import (
     NewOrderRequest,
     ModifyOrderRequest, 
     CancelOrderRequest,
+    BulkOrderRequest,
+    CancelAllRequest,
     OrderHistoryRequest,
     OrderResponse,
     APIResponse,
-    OrderBookResponse
+    OrderBookResponse,
+    OrderSide,
+    OrderStatus
 )
-from ..services.ssi_client import get_ssi_client, SSIFastConnectClient
+from ..services.order_store import OPEN_STATUSES, Cursor, decode_cursor, encode_cursor
+from ..services.order_tracker import order_tracker
+from ..services.pre_trade_risk import pre_trade_risk
+from ..services.pre_trade_state import pre_trade_state
+from ..services.ssi_client import get_ssi_client, SSIFastConnectClient, SSIResult
 from ..utils.trading_validator import validate_trading_request, get_trading_session_info
 from ..utils.exceptions import (
+    TradingSystemError,
     TradingSessionError,
     ValidationError,
     OrderError,
+    RiskManagementError,
     SSIAPIError
 )
 
@@ -61,6 +77,75 @@ def validate_order_request(request: NewOrderRequest) -> None:
         raise ValidationError("ATO/ATC orders should have price = 0", field="price")
 
 
+def build_new_order_data(request: NewOrderRequest) -> Dict[str, Any]:
+    """Map a new order request to the SSI NewOrder payload"""
+    return {
+        "instrumentID": request.instrument_id,
+        "market": request.market.value,
+        "buySell": request.buy_sell.value,
+        "orderType": request.order_type.value,
+        "price": request.price,
+        "quantity": request.quantity,
+        "account": request.account,
+        "requestID": request.request_id,
+        "stopOrder": request.stop_order,
+        "stopPrice": request.stop_price,
+        "stopType": request.stop_type,
+        "stopStep": request.stop_step,
+        "lossStep": request.loss_step,
+        "profitStep": request.profit_step,
+        "deviceID": request.device_id or "",
+        "userAgent": request.user_agent or ""
+    }
+
+
+def reserve_order(request: NewOrderRequest) -> None:
+    """Run pre-trade risk checks and hold the order's cash or shares under its request ID
+    
+    Raises RiskManagementError listing every failed check.
+    """
+    pre_trade_risk.check_and_reserve(
+        request.request_id,
+        request.account,
+        request.instrument_id.upper(),
+        OrderSide(request.buy_sell.value),
+        request.quantity,
+        request.price
+    )
+
+
+async def send_reserved_order(
+    client: SSIFastConnectClient,
+    request: NewOrderRequest,
+    timeout: float = None
+) -> SSIResult:
+    """Submit a reserved order to SSI
+    
+    The order is recorded and its reservation moved under SSI's order ID,
+    where execution reports find and settle them, or the reservation is
+    released if SSI does not take the order.
+    """
+    try:
+        result = await client.place_order(build_new_order_data(request), timeout=timeout)
+    except BaseException:
+        pre_trade_risk.on_closed(request.request_id)
+        raise
+    if not result.success:
+        pre_trade_risk.on_closed(request.request_id)
+    elif result.order_id:
+        pre_trade_risk.rekey(request.request_id, str(result.order_id))
+    order_tracker.record_placed(request, result)
+    return result
+
+
+def risk_rejection(e: RiskManagementError) -> HTTPException:
+    return HTTPException(status_code=422, detail={
+        "error": e.error_code,
+        "message": str(e),
+        "violations": e.details.get("violations", [])
+    })
+
+
 @router.post("/new-order", response_model=OrderResponse, status_code=201)
 async def place_new_order(
     request: NewOrderRequest,
@@ -84,47 +169,31 @@ async def place_new_order(
         # Validate order request
         validate_order_request(request)
         
-        # Prepare order data for SSI API
-        order_data = {
-            "instrumentID": request.instrument_id,
-            "market": request.market.value,
-            "buySell": request.buy_sell.value,
-            "orderType": request.order_type.value,
-            "price": request.price,
-            "quantity": request.quantity,
-            "account": request.account,
-            "requestID": request.request_id,
-            "stopOrder": request.stop_order,
-            "stopPrice": request.stop_price,
-            "stopType": request.stop_type,
-            "stopStep": request.stop_step,
-            "lossStep": request.loss_step,
-            "profitStep": request.profit_step,
-            "deviceID": request.device_id or "",
-            "userAgent": request.user_agent or ""
-        }
+        # Pre-trade risk checks against the account's cash/holdings and the symbol's price band
+        await pre_trade_state.ensure([request.account], [request.instrument_id])
+        reserve_order(request)
         
         # Submit order to SSI
-        result = await client.place_order(order_data)
+        result = await send_reserved_order(client, request)
         
         # Log successful order
         logger.info("Order placed successfully",
                    instrument=request.instrument_id,
                    request_id=request.request_id,
-                   order_id=result.get("data", {}).get("orderID"))
+                   order_id=result.order_id)
         
         # Background task for order tracking
         background_tasks.add_task(
             track_order_status, 
             request.request_id, 
-            result.get("data", {}).get("orderID")
+            result.order_id
         )
         
         return OrderResponse(
             success=True,
             message="Order placed successfully",
-            data=result.get("data", {}),
-            order_id=result.get("data", {}).get("orderID"),
+            data=result.data or {},
+            order_id=result.order_id,
             request_id=request.request_id,
             timestamp=datetime.now()
         )
@@ -145,6 +214,10 @@ async def place_new_order(
             "field": e.field
         })
     
+    except RiskManagementError as e:
+        logger.warning("Pre-trade risk check failed", error=str(e))
+        raise risk_rejection(e)
+    
     except SSIAPIError as e:
         logger.error("SSI API error", error=str(e))
         raise HTTPException(status_code=502, detail={
@@ -189,6 +262,20 @@ async def modify_order(
         if not is_valid:
             raise TradingSessionError(message)
         
+        # Re-check the new price and unfilled quantity with the order's current reservation released
+        await pre_trade_state.ensure([request.account], [request.instrument_id])
+        tracked = order_tracker.store.get_by_ssi_order_id(request.order_id)
+        filled_quantity = tracked["filled_quantity"] if tracked else 0
+        previous = pre_trade_risk.get_reservation(request.order_id)
+        pre_trade_risk.check_and_replace(
+            request.order_id,
+            request.account,
+            request.instrument_id.upper(),
+            OrderSide(request.buy_sell.value),
+            max(request.quantity - filled_quantity, 0),
+            request.price
+        )
+        
         # Prepare modification data
         order_data = {
             "orderID": request.order_id,
@@ -203,15 +290,29 @@ async def modify_order(
             "userAgent": request.user_agent or ""
         }
         
-        # Submit modification to SSI
-        result = await client.modify_order(order_data)
+        # Submit modification to SSI; the order keeps its old reservation unless SSI takes it
+        try:
+            result = await client.modify_order(order_data)
+        except BaseException:
+            pre_trade_risk.reinstate(request.order_id, previous)
+            raise
+        if not result.success:
+            pre_trade_risk.reinstate(request.order_id, previous)
+            logger.warning("Order modification rejected", order_id=request.order_id, message=result.message)
+            return OrderResponse(
+                success=False,
+                message=result.message or "Order modification rejected",
+                data=result.data or {},
+                order_id=request.order_id,
+                timestamp=datetime.now()
+            )
         
         logger.info("Order modified successfully", order_id=request.order_id)
         
         return OrderResponse(
             success=True,
             message="Order modified successfully",
-            data=result.get("data", {}),
+            data=result.data or {},
             order_id=request.order_id,
             timestamp=datetime.now()
         )
@@ -224,6 +325,10 @@ async def modify_order(
             "session_info": get_trading_session_info(request.market)
         })
     
+    except RiskManagementError as e:
+        logger.warning("Pre-trade risk check failed for modification", error=str(e))
+        raise risk_rejection(e)
+    
     except SSIAPIError as e:
         logger.error("SSI API error modifying order", error=str(e))
         raise HTTPException(status_code=502, detail={
@@ -284,7 +389,7 @@ async def cancel_order(
         return OrderResponse(
             success=True,
             message="Order cancelled successfully",
-            data=result.get("data", {}),
+            data=result.data or {},
             order_id=request.order_id,
             timestamp=datetime.now()
         )
@@ -312,6 +417,294 @@ async def cancel_order(
         })
 
 
+# SSI order statuses that can still be cancelled
+CANCELLABLE_STATUSES = {"WA", "RS", "SD", "QU", "PF", "WM", "SOR", "IAV", "SOI"}
+
+
+# (index in the request, order or request ID, SSI call to make)
+BulkCall = Tuple[int, str, Callable[[], Awaitable[SSIResult]]]
+
+
+async def _submit(index: int, key: str, call: Callable[[], Awaitable[SSIResult]]) -> Dict[str, Any]:
+    """Await one SSI call and turn its outcome into a per-order result line"""
+    try:
+        result = await call()
+    except TradingSystemError as e:
+        return {"index": index, "id": key, "success": False, "error": e.error_code, "message": e.message}
+    except Exception as e:
+        logger.error("Unexpected error in bulk submission", id=key, error=str(e))
+        return {"index": index, "id": key, "success": False, "error": "INTERNAL_ERROR", "message": str(e)}
+    return {
+        "index": index,
+        "id": key,
+        "success": result.success,
+        "order_id": result.order_id,
+        "status": result.status,
+        "message": result.message,
+        "elapsed_ms": round(result.elapsed_ms, 2)
+    }
+
+
+async def _stream_results(
+    operation: str,
+    rejected: List[Dict[str, Any]],
+    calls: List[BulkCall]
+) -> AsyncIterator[str]:
+    """
+    Dispatch every call at once and yield NDJSON result lines as they finish.
+    
+    The SSI client's request scheduler paces admission against the rate
+    budget, so this only has to start the calls. Validation rejections are
+    streamed first and a summary line closes the stream. Calls are not
+    cancelled if the client disconnects; orders already queued still go out
+    and their results are logged.
+    """
+    started = time.perf_counter()
+    succeeded = failed = 0
+    
+    for line in rejected:
+        failed += 1
+        yield json.dumps(line) + "\n"
+    
+    tasks = [asyncio.ensure_future(_submit(index, key, call)) for index, key, call in calls]
+    for next_done in asyncio.as_completed(tasks):
+        line = await next_done
+        if line["success"]:
+            succeeded += 1
+        else:
+            failed += 1
+        yield json.dumps(line) + "\n"
+    
+    summary = {
+        "summary": True,
+        "operation": operation,
+        "total": len(rejected) + len(calls),
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+    logger.info("Bulk operation completed", **summary)
+    yield json.dumps(summary) + "\n"
+
+
+@router.post("/bulk", status_code=200)
+async def place_bulk_orders(
+    request: BulkOrderRequest,
+    client: SSIFastConnectClient = Depends(get_trading_client)
+):
+    """
+    Place many orders in one call
+    
+    All orders are validated and risk checked in request order, so each
+    sees the cash and shares reserved by the ones before it. Accepted orders
+    are submitted to SSI concurrently within the rate budget, and one NDJSON
+    line per order is streamed back as each result arrives, followed by a
+    summary line.
+    Orders keep their position in the request as `index`.
+    """
+    
+    if len(request.orders) > settings.bulk_max_orders:
+        raise HTTPException(status_code=422, detail={
+            "error": "VALIDATION_ERROR",
+            "message": f"At most {settings.bulk_max_orders} orders per bulk request",
+            "field": "orders"
+        })
+    
+    logger.info("Processing bulk order request", count=len(request.orders))
+    
+    rejected = []
+    valid = []
+    seen_request_ids = set()
+    for index, order in enumerate(request.orders):
+        try:
+            if order.request_id in seen_request_ids:
+                raise ValidationError("Duplicate request_id in bulk request", field="request_id")
+            seen_request_ids.add(order.request_id)
+            validate_order_request(order)
+        except (TradingSessionError, ValidationError) as e:
+            rejected.append({
+                "index": index,
+                "id": order.request_id,
+                "success": False,
+                "error": e.error_code,
+                "message": e.message
+            })
+            continue
+        valid.append((index, order))
+    
+    # Load risk state for every account and symbol at once, then check in request order
+    # so each order sees the cash and shares reserved by the ones before it
+    await pre_trade_state.ensure(
+        {order.account for _, order in valid},
+        {order.instrument_id for _, order in valid}
+    )
+    calls = []
+    for index, order in valid:
+        try:
+            reserve_order(order)
+        except RiskManagementError as e:
+            rejected.append({
+                "index": index,
+                "id": order.request_id,
+                "success": False,
+                "error": e.error_code,
+                "message": e.message,
+                "violations": e.details.get("violations", [])
+            })
+            continue
+        calls.append((
+            index,
+            order.request_id,
+            partial(send_reserved_order, client, order, timeout=settings.bulk_order_deadline)
+        ))
+    
+    return StreamingResponse(
+        _stream_results("bulk_place", rejected, calls),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/cancel-all", status_code=200)
+async def cancel_all_orders(
+    request: CancelAllRequest,
+    client: SSIFastConnectClient = Depends(get_trading_client)
+):
+    """
+    Cancel every open order on an account
+    
+    Optionally limited to one symbol, side or market. Open orders are read
+    from today's SSI order book, cancels are sent concurrently on the cancel
+    lane, and per-order results are streamed back as NDJSON.
+    """
+    
+    logger.info("Processing cancel-all request",
+                account=request.account,
+                instrument=request.instrument_id,
+                side=request.buy_sell.value if request.buy_sell else None)
+    
+    try:
+        book = await client.get_order_book(request.account)
+    except SSIAPIError as e:
+        logger.error("SSI API error reading order book", error=str(e))
+        raise HTTPException(status_code=502, detail={
+            "error": "SSI_API_ERROR",
+            "message": "Failed to read open orders",
+            "details": str(e)
+        })
+    
+    data = book.data or {}
+    orders = data.get("orderBookDetails", []) if isinstance(data, dict) else data
+    
+    calls = []
+    for index, order in enumerate(orders):
+        if str(order.get("orderStatus", "")).upper() not in CANCELLABLE_STATUSES:
+            continue
+        if request.instrument_id and order.get("instrumentID") != request.instrument_id.upper():
+            continue
+        if request.buy_sell and order.get("buySell") != request.buy_sell.value:
+            continue
+        if request.market and order.get("marketID") != request.market.value:
+            continue
+        
+        cancel_data = {
+            "orderID": order.get("orderID"),
+            "instrumentID": order.get("instrumentID"),
+            "market": order.get("marketID"),
+            "buySell": order.get("buySell"),
+            "account": request.account,
+            "deviceID": request.device_id or "",
+            "userAgent": request.user_agent or ""
+        }
+        calls.append((
+            len(calls),
+            order.get("orderID"),
+            partial(client.cancel_order, cancel_data, timeout=settings.bulk_order_deadline)
+        ))
+    
+    return StreamingResponse(
+        _stream_results("cancel_all", [], calls),
+        media_type="application/x-ndjson"
+    )
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    """Decode a pagination cursor from a query string; malformed cursors are a 400"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={
+            "error": "INVALID_CURSOR",
+            "message": str(e),
+            "field": "cursor"
+        })
+
+
+def order_page(orders: List[Dict[str, Any]], next_cursor: Optional[Cursor]) -> Dict[str, Any]:
+    return {
+        "orders": orders,
+        "count": len(orders),
+        "next_cursor": encode_cursor(next_cursor) if next_cursor else None
+    }
+
+
+@router.get("/list", response_model=APIResponse)
+async def list_orders(
+    account: str,
+    symbol: Optional[str] = None,
+    status: Optional[OrderStatus] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """
+    List an account's orders placed through this service, newest first
+    
+    Pass the returned `next_cursor` back as `cursor` for the next page;
+    it is null on the last page.
+    """
+    
+    orders, next_cursor = order_tracker.store.query(
+        account_id=account,
+        symbol=symbol.upper() if symbol else None,
+        statuses=[status] if status else None,
+        limit=limit,
+        cursor=parse_cursor(cursor)
+    )
+    
+    return APIResponse(
+        success=True,
+        message="Orders retrieved successfully",
+        data=order_page(orders, next_cursor),
+        timestamp=datetime.now()
+    )
+
+
+@router.get("/open", response_model=APIResponse)
+async def list_open_orders(
+    account: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """
+    List an account's working orders, newest first, with the same cursor paging as /list
+    """
+    
+    orders, next_cursor = order_tracker.store.query(
+        account_id=account,
+        statuses=OPEN_STATUSES,
+        limit=limit,
+        cursor=parse_cursor(cursor)
+    )
+    
+    return APIResponse(
+        success=True,
+        message="Open orders retrieved successfully",
+        data=order_page(orders, next_cursor),
+        timestamp=datetime.now()
+    )
+
+
 @router.get("/order-history", response_model=OrderBookResponse)
 async def get_order_history(
     request: OrderHistoryRequest,
@@ -337,7 +730,7 @@ async def get_order_history(
             success=True,
             message="Order history retrieved successfully",
             account=request.account,
-            orders=result.get("data", []),
+            orders=result.data or [],
             timestamp=datetime.now()
         )
         
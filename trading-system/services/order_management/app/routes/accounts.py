@@ -14,6 +14,7 @@ try:
     from ..database import get_db
     from ..services.portfolio_service import PortfolioService
     from ..services.trading_session_service import TradingSessionService
+    from ..services.order_stats import order_stats
     from ....common.logging import LoggerManager
     from ....common.security import SecurityManager
 except ImportError:
@@ -396,50 +397,8 @@ async def get_account_activity_summary(
             # Fallback for development
             account_id = "DEV_ACCOUNT_001"
         
-        # Calculate period
-        from_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Get activity summary (simplified)
-        # In production, this should aggregate actual data from orders and executions
-        
-        activity_summary = {
-            "account_id": account_id,
-            "period": {
-                "from_date": from_date.isoformat(),
-                "to_date": datetime.utcnow().isoformat(),
-                "days": days
-            },
-            "trading_activity": {
-                "total_orders": 45,
-                "filled_orders": 38,
-                "cancelled_orders": 7,
-                "pending_orders": 2,
-                "total_volume": Decimal("15750000"),  # 15.75M VND
-                "buy_volume": Decimal("8250000"),     # 8.25M VND
-                "sell_volume": Decimal("7500000"),    # 7.5M VND
-                "average_order_size": Decimal("350000")  # 350K VND
-            },
-            "portfolio_activity": {
-                "positions_opened": 12,
-                "positions_closed": 8,
-                "net_position_change": 4,
-                "realized_pnl": Decimal("125000"),    # 125K VND profit
-                "largest_gain": Decimal("85000"),     # 85K VND
-                "largest_loss": Decimal("-35000")     # 35K VND loss
-            },
-            "market_participation": {
-                "most_traded_symbol": "VIC",
-                "most_traded_volume": Decimal("2500000"),
-                "unique_symbols_traded": 15,
-                "average_daily_trades": 1.5
-            },
-            "risk_metrics": {
-                "max_daily_loss": Decimal("-125000"),
-                "max_daily_gain": Decimal("275000"),
-                "win_rate": Decimal("65.8"),  # 65.8%
-                "sharpe_ratio": Decimal("1.25")
-            }
-        }
+        # Sum the account's daily rollup rows for the period
+        activity_summary = order_stats.summarize_days(account_id, days)
         
         if logger:
             logger.info(f"Retrieved activity summary for account {account_id}, period {days} days")
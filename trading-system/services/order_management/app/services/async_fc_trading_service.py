@@ -1,14 +1,22 @@
 """
 Async wrapper for FC Trading Service
-Provides async interface for web API integration
+Provides async interface for web API integration.
+
+Trading calls go through the async SSI gateway (pooled httpx client with
+order/query priority lanes); only the FC library calls that have no gateway
+equivalent still run on a thread.
 """
 
 import asyncio
 import logging
+import uuid
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 import json
 
+from ..config import settings
 from .fc_trading_service import FCTradingService
+from .ssi_client import SSIResult, get_ssi_client
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +29,19 @@ class AsyncFCTradingService:
         self._authenticated_users = set()  # Track authenticated users
         
     def _run_in_executor(self, func, *args, **kwargs):
-        """Run sync function in executor"""
+        """Run sync FC library function in executor (library-only calls)"""
         loop = asyncio.get_event_loop()
         return loop.run_in_executor(None, func, *args, **kwargs)
     
+    @staticmethod
+    def _to_response(result: SSIResult, message: str = None) -> Dict[str, Any]:
+        """Gateway result in this service's response shape"""
+        return {
+            'success': result.success,
+            'message': message if message and result.success else result.message,
+            'data': result.data
+        }
+    
     def _parse_response(self, response_str: str) -> Dict[str, Any]:
         """Parse JSON response string"""
         try:
@@ -47,8 +64,8 @@ class AsyncFCTradingService:
     async def get_otp(self, user_id: str) -> Dict[str, Any]:
         """Request OTP for authentication"""
         try:
-            response = await self._run_in_executor(self.fc_service.get_otp)
-            result = self._parse_response(response)
+            client = await get_ssi_client()
+            result = self._to_response(await client.get_otp(settings.default_account_id))
             
             if result.get('success'):
                 # Mark OTP as requested for this user
@@ -66,8 +83,12 @@ class AsyncFCTradingService:
     async def verify_otp(self, user_id: str, otp_code: str) -> Dict[str, Any]:
         """Verify OTP code"""
         try:
-            response = await self._run_in_executor(self.fc_service.verify_code, otp_code)
-            result = self._parse_response(response)
+            # Same gateway session that requested the OTP
+            client = await get_ssi_client()
+            result = self._to_response(
+                await client.verify_code(settings.default_account_id, otp_code),
+                "Authentication successful"
+            )
             
             if result.get('success'):
                 # Mark user as authenticated
@@ -93,12 +114,12 @@ class AsyncFCTradingService:
                     'data': None
                 }
             
-            response = await self._run_in_executor(self.fc_service.get_account_info)
-            result = self._parse_response(response)
+            client = await get_ssi_client()
+            result = await client.get_account_balance(settings.default_account_id)
             
             # Extract balance information from account info
-            if result.get('success') and result.get('data'):
-                account_data = result['data']
+            if result.success and isinstance(result.data, dict):
+                account_data = result.data
                 balance_data = {
                     'cash': account_data.get('cash', 0),
                     'market_value': account_data.get('asset_value', 0),
@@ -111,7 +132,7 @@ class AsyncFCTradingService:
                     'data': balance_data
                 }
             
-            return result
+            return self._to_response(result)
         except Exception as e:
             logger.error(f"Error getting balance for user {user_id}: {e}")
             return {
@@ -130,8 +151,8 @@ class AsyncFCTradingService:
                     'data': None
                 }
             
-            response = await self._run_in_executor(self.fc_service.get_positions)
-            return self._parse_response(response)
+            client = await get_ssi_client()
+            return self._to_response(await client.get_portfolio(settings.default_account_id))
         except Exception as e:
             logger.error(f"Error getting positions for user {user_id}: {e}")
             return {
@@ -150,8 +171,11 @@ class AsyncFCTradingService:
                     'data': None
                 }
             
-            response = await self._run_in_executor(self.fc_service.get_orders)
-            return self._parse_response(response)
+            client = await get_ssi_client()
+            today = datetime.now().strftime("%d/%m/%Y")
+            return self._to_response(
+                await client.get_order_history(settings.default_account_id, today, today)
+            )
         except Exception as e:
             logger.error(f"Error getting orders for user {user_id}: {e}")
             return {
@@ -170,14 +194,15 @@ class AsyncFCTradingService:
                     'data': None
                 }
             
-            # FC Trading Service doesn't have specific order history method
-            # Use get_orders and filter for historical data
-            response = await self._run_in_executor(self.fc_service.get_orders)
-            result = self._parse_response(response)
+            client = await get_ssi_client()
+            today = datetime.now().strftime("%d/%m/%Y")
+            result = self._to_response(
+                await client.get_order_history(settings.default_account_id, today, today)
+            )
             
             if result.get('success'):
                 # Filter for completed orders (history)
-                orders = result.get('data', [])
+                orders = result.get('data') or []
                 history = [order for order in orders if order.get('status') in ['FILLED', 'CANCELLED', 'REJECTED']]
                 return {
                     'success': True,
@@ -265,7 +290,7 @@ class AsyncFCTradingService:
             }
     
     async def place_order(self, user_id: str, symbol: str, side: str, volume: int, 
-                         price: float, order_type: str = 'LO') -> Dict[str, Any]:
+                         price: float, order_type: str = 'LO', market: str = 'VN') -> Dict[str, Any]:
         """Place a trading order"""
         try:
             if not self._is_user_authenticated(user_id):
@@ -277,16 +302,18 @@ class AsyncFCTradingService:
             
             # Prepare order data
             order_data = {
-                'instrument_id': symbol,
+                'instrumentID': symbol,
+                'market': market,
+                'buySell': 'B' if side.upper() == 'BUY' else 'S',
+                'orderType': order_type.upper(),
                 'price': price,
                 'quantity': volume,
-                'buy_sell': 'B' if side.upper() == 'BUY' else 'S',
-                'order_type': order_type.upper(),
-                'account_id': ''  # Will be filled by FC service
+                'account': settings.default_account_id,
+                'requestID': uuid.uuid4().hex[:8]
             }
             
-            response = await self._run_in_executor(self.fc_service.place_order, order_data)
-            result = self._parse_response(response)
+            client = await get_ssi_client()
+            result = self._to_response(await client.place_order(order_data))
             
             if result.get('success'):
                 logger.info(f"Order placed successfully for user {user_id}: {symbol} {side} {volume}@{price}")
@@ -300,7 +327,8 @@ class AsyncFCTradingService:
                 'data': None
             }
     
-    async def cancel_order(self, user_id: str, order_id: str) -> Dict[str, Any]:
+    async def cancel_order(self, user_id: str, order_id: str, symbol: str = '',
+                           side: str = '', market: str = 'VN') -> Dict[str, Any]:
         """Cancel an order"""
         try:
             if not self._is_user_authenticated(user_id):
@@ -310,8 +338,17 @@ class AsyncFCTradingService:
                     'data': None
                 }
             
-            response = await self._run_in_executor(self.fc_service.cancel_order, order_id)
-            return self._parse_response(response)
+            order_data = {
+                'orderID': order_id,
+                'instrumentID': symbol,
+                'market': market,
+                'buySell': 'B' if side.upper() == 'BUY' else 'S' if side else '',
+                'account': settings.default_account_id,
+                'requestID': uuid.uuid4().hex[:8]
+            }
+            
+            client = await get_ssi_client()
+            return self._to_response(await client.cancel_order(order_data))
         except Exception as e:
             logger.error(f"Error cancelling order {order_id} for user {user_id}: {e}")
             return {
@@ -0,0 +1,420 @@
+"""
+Execution Reports - Apply SSI order status and fills to local orders and
+positions, publish order state events and reconcile positions against SSI.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models import OrderStatus
+from .order_store import OPEN_STATUSES
+from .ssi_client import get_ssi_client
+
+try:
+    from aiokafka import AIOKafkaProducer
+except ImportError:  # Events are skipped without a Kafka client
+    AIOKafkaProducer = None
+
+logger = logging.getLogger(__name__)
+
+# SSI order book status codes
+SSI_ORDER_STATUSES = {
+    "WA": OrderStatus.SENT,       # Waiting to send
+    "RS": OrderStatus.SENT,       # Ready to send
+    "SD": OrderStatus.SENT,       # Sent to exchange
+    "IAV": OrderStatus.SENT,      # Waiting for approval
+    "SOR": OrderStatus.SENT,      # Stop order ready
+    "SOI": OrderStatus.SENT,      # Stop order initialised
+    "QU": OrderStatus.ACKNOWLEDGED,
+    "WM": OrderStatus.ACKNOWLEDGED,   # Modify pending
+    "WC": OrderStatus.ACKNOWLEDGED,   # Cancel pending
+    "PF": OrderStatus.PARTIALLY_FILLED,
+    "FF": OrderStatus.FILLED,
+    "FFPC": OrderStatus.CANCELLED,    # Partially filled, rest cancelled
+    "CL": OrderStatus.CANCELLED,
+    "RJ": OrderStatus.REJECTED,
+    "EX": OrderStatus.EXPIRED,
+}
+
+# Called once per new fill, e.g. to persist through PortfolioService.update_position_from_execution
+FillHandler = Callable[[Dict[str, Any], int, float, str], Awaitable[None]]
+
+_MASK = (1 << 64) - 1
+
+
+def position_digest(symbol: str, quantity: int) -> int:
+    """64-bit digest of one holding; flat positions contribute nothing"""
+    if not quantity:
+        return 0
+    digest = hashlib.blake2b(f"{symbol}:{quantity}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def position_checksum(positions: Dict[str, int]) -> int:
+    """Order-independent checksum of an account's holdings.
+
+    Digests are summed mod 2**64, so one changed holding can be folded in by
+    subtracting its old digest and adding the new one.
+    """
+    total = 0
+    for symbol, quantity in positions.items():
+        total = (total + position_digest(symbol, quantity)) & _MASK
+    return total
+
+
+def parse_portfolio(data: Any) -> Dict[str, int]:
+    """Holdings by symbol from a GetPortfolio response.
+
+    Quantities include unsettled buys and exclude today's sells, matching how
+    fills move positions in the pre-trade risk engine.
+    """
+    rows = data.get("stockPositions", []) if isinstance(data, dict) else (data or [])
+    positions: Dict[str, int] = {}
+    for row in rows:
+        symbol = row.get("instrumentID") or row.get("instrumentId")
+        if not symbol:
+            continue
+        quantity = int(
+            (row.get("onHand") or 0)
+            + (row.get("buyT0") or 0) + (row.get("buyT1") or 0) + (row.get("buyT2") or 0)
+            - (row.get("sellT0") or 0)
+        )
+        if quantity:
+            positions[symbol] = positions.get(symbol, 0) + quantity
+    return positions
+
+
+def parse_cash(data: Any) -> Optional[float]:
+    """Cash balance from a GetAccountBalance response.
+
+    Cash is read before open-order holds (not purchasing power), since the
+    pre-trade risk engine reserves for the open orders it knows about itself.
+    """
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        return None
+    for field in ("cashBal", "totalCash", "cash"):
+        value = data.get(field)
+        if value is not None:
+            return float(value)
+    return None
+
+
+class ExecutionReportProcessor:
+    """
+    Follows SSI order books and applies what changed to local orders.
+
+    Followed accounts are the configured ones plus every account the
+    pre-trade risk engine holds state for, i.e. every account orders were
+    placed on. Accounts with working orders are polled every
+    `execution_poll_interval_ms`; idle ones only every
+    `execution_idle_poll_interval`, so quiet accounts cost one request
+    every few seconds instead of several a second.
+
+    Each poll diffs the order book against the last one seen per SSI order ID,
+    so only new status or cumulative fill changes are processed. Fills are
+    derived from cumulative filled quantity, which makes repeated reports
+    harmless and keeps each order's fills in sequence even if a stale book is
+    returned. Every change is published to Kafka keyed by SSI order ID
+    (at-least-once; consumers should dedupe on order ID and filled quantity).
+
+    Positions are reconciled periodically against GetPortfolio by comparing
+    one checksum per account; the full per-symbol comparison only runs, and
+    the local positions are only replaced, when the checksums differ.
+    Followed accounts with no risk state yet are loaded from SSI instead.
+    """
+
+    def __init__(
+        self,
+        tracker: Any,
+        accounts: Optional[List[str]] = None,
+        fill_handler: Optional[FillHandler] = None
+    ):
+        self.tracker = tracker  # OrderTracker (or OrderService) holding the orders sent
+        self.accounts = accounts or settings.execution_accounts or [
+            account for account in (settings.default_account_id or settings.account,) if account
+        ]
+        self.fill_handler = fill_handler
+        self.poll_interval = settings.execution_poll_interval_ms / 1000
+        self.idle_poll_interval = settings.execution_idle_poll_interval
+        self.topic = f"{settings.kafka_topic_prefix}.{settings.execution_events_topic}"
+        self.producer: Optional[Any] = None
+        self._task: Optional[asyncio.Task] = None
+        # account -> SSI order ID -> (status code, cumulative filled quantity)
+        self._seen: Dict[str, Dict[str, Tuple[str, int]]] = {}
+        # account -> (positions dict the checksum was computed over, checksum)
+        self._checksums: Dict[str, Tuple[Dict[str, int], int]] = {}
+        # account -> whether its last order book had working orders / when it was last polled
+        self._working: Dict[str, bool] = {}
+        self._polled_at: Dict[str, float] = {}
+        self._last_reconcile = 0.0
+        self.last_poll: Optional[datetime] = None
+        self.stats = {
+            "polls": 0, "reports": 0, "fills": 0, "events": 0,
+            "reconciliations": 0, "mismatches": 0, "errors": 0
+        }
+
+    def followed_accounts(self) -> List[str]:
+        """Configured accounts plus every account orders were placed on"""
+        return list(dict.fromkeys([*self.accounts, *self.tracker.risk.accounts]))
+
+    def _due(self, now: float) -> List[str]:
+        """Accounts to poll now: working ones every tick, idle ones at the idle interval"""
+        store = self.tracker.store
+        return [
+            account for account in self.followed_accounts()
+            if self._working.get(account)
+            or store.count(account, OPEN_STATUSES)
+            or now - self._polled_at.get(account, float("-inf")) >= self.idle_poll_interval
+        ]
+
+    async def start(self) -> None:
+        """Start the Kafka producer (if enabled) and the polling loop"""
+        if settings.execution_publish_events and AIOKafkaProducer is not None:
+            producer = AIOKafkaProducer(
+                bootstrap_servers=settings.kafka_bootstrap_servers,
+                linger_ms=1
+            )
+            try:
+                await producer.start()
+                self.producer = producer
+            except Exception as e:
+                logger.warning(f"Kafka unavailable, order events will not be published: {e}")
+        self._last_reconcile = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Execution report polling started for {len(self.followed_accounts())} accounts")
+
+    async def stop(self) -> None:
+        """Stop polling and flush pending events"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.producer:
+            await self.producer.stop()
+            self.producer = None
+        logger.info("Execution report polling stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+                if time.monotonic() - self._last_reconcile >= settings.execution_reconcile_interval:
+                    self._last_reconcile = time.monotonic()
+                    await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error in execution report loop: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    # ------------------------------------------------------------------
+    # Order book diffs
+    # ------------------------------------------------------------------
+
+    async def poll(self, accounts: Optional[List[str]] = None) -> None:
+        """Fetch the order books of due accounts (or the given ones) and process what changed"""
+        now = time.monotonic()
+        accounts = self._due(now) if accounts is None else accounts
+        if not accounts:
+            return
+        client = await get_ssi_client()
+        results = await asyncio.gather(
+            *(client.get_order_book(account) for account in accounts),
+            return_exceptions=True
+        )
+        for account, result in zip(accounts, results):
+            self._polled_at[account] = now
+            if isinstance(result, Exception) or not result.success:
+                self.stats["errors"] += 1
+                continue
+            data = result.data or {}
+            rows = data.get("orderBookDetails", []) if isinstance(data, dict) else data
+            await self.process_order_book(account, rows)
+        self.stats["polls"] += 1
+        self.last_poll = datetime.utcnow()
+
+    async def process_order_book(self, account: str, rows: List[Dict[str, Any]]) -> None:
+        """Diff one account's order book against the last one seen"""
+        seen = self._seen.get(account, {})
+        current: Dict[str, Tuple[str, int]] = {}
+        working = False
+        for row in rows:
+            ssi_order_id = str(row.get("orderID") or "")
+            if not ssi_order_id:
+                continue
+            state = (str(row.get("orderStatus", "")).upper(), int(row.get("filledQty") or 0))
+            working = working or SSI_ORDER_STATUSES.get(state[0]) in OPEN_STATUSES
+            previous = seen.get(ssi_order_id)
+            if previous is not None and (state == previous or state[1] < previous[1]):
+                # Unchanged, or a stale report behind fills already applied
+                current[ssi_order_id] = previous
+                continue
+            current[ssi_order_id] = state
+            await self.apply_report(account, ssi_order_id, state[0], state[1], row)
+        # Orders drop out of the book at the end of the day, and out of this map with them
+        self._seen[account] = current
+        self._working[account] = working
+
+    async def apply_report(
+        self,
+        account: str,
+        ssi_order_id: str,
+        status_code: str,
+        filled_quantity: int,
+        row: Dict[str, Any]
+    ) -> None:
+        """Apply one changed order book entry and publish it"""
+        self.stats["reports"] += 1
+        status = SSI_ORDER_STATUSES.get(status_code)
+        average_price = float(row.get("avgPrice") or 0) or None
+        order_data = self.tracker.store.get_by_ssi_order_id(ssi_order_id)
+        if order_data is None and row.get("requestID"):
+            order_data = self._link_unknown(ssi_order_id, str(row["requestID"]))
+
+        applied = None
+        if order_data is not None and status is not None:
+            risk_account = self.tracker.risk.accounts.get(order_data["account_id"])
+            symbol = order_data["symbol"]
+            held_before = risk_account.positions.get(symbol, 0) if risk_account else 0
+            applied = self.tracker.apply_execution(
+                order_data["order_id"], status, filled_quantity, average_price
+            )
+            if applied and "fill_quantity" in applied:
+                self.stats["fills"] += 1
+                if risk_account is not None:
+                    self._fold_checksum(order_data["account_id"], risk_account.positions, symbol, held_before)
+                if self.fill_handler is not None:
+                    execution_id = f"{ssi_order_id}:{filled_quantity}"
+                    try:
+                        await self.fill_handler(
+                            order_data, applied["fill_quantity"], applied["fill_price"], execution_id
+                        )
+                    except Exception as e:
+                        logger.error(f"Fill handler failed for {execution_id}: {e}")
+
+        await self.publish(ssi_order_id, {
+            "event": "order_state",
+            "account": account,
+            "ssi_order_id": ssi_order_id,
+            "order_id": order_data["order_id"] if order_data else None,
+            "symbol": row.get("instrumentID"),
+            "side": row.get("buySell"),
+            "ssi_status": status_code,
+            "status": status.value if status else None,
+            "quantity": row.get("quantity"),
+            "price": row.get("price"),
+            "filled_quantity": filled_quantity,
+            "average_price": average_price,
+            "fill_quantity": applied.get("fill_quantity") if applied else None,
+            "fill_price": applied.get("fill_price") if applied else None,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+
+    def _link_unknown(self, ssi_order_id: str, request_id: str) -> Optional[Dict[str, Any]]:
+        """Give an order whose placement timed out the SSI order ID it was placed under"""
+        for order_data in self.tracker.store.with_status(OrderStatus.UNKNOWN):
+            if order_data.get("request_id") == request_id:
+                return self.tracker.store.update(order_data["order_id"], ssi_order_id=ssi_order_id)
+        return None
+
+    async def publish(self, key: str, event: Dict[str, Any]) -> None:
+        if self.producer is None:
+            return
+        try:
+            await self.producer.send(self.topic, json.dumps(event).encode(), key=key.encode())
+            self.stats["events"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Failed to publish order event for {key}: {e}")
+
+    # ------------------------------------------------------------------
+    # Position reconciliation
+    # ------------------------------------------------------------------
+
+    def _local_checksum(self, account_id: str, positions: Dict[str, int]) -> int:
+        cached = self._checksums.get(account_id)
+        if cached is not None and cached[0] is positions:
+            return cached[1]
+        # First use, or set_account replaced the positions dict
+        checksum = position_checksum(positions)
+        self._checksums[account_id] = (positions, checksum)
+        return checksum
+
+    def _fold_checksum(self, account_id: str, positions: Dict[str, int], symbol: str, held_before: int) -> None:
+        """Update a cached checksum for one changed holding"""
+        cached = self._checksums.get(account_id)
+        if cached is None or cached[0] is not positions:
+            return
+        checksum = cached[1] - position_digest(symbol, held_before) + position_digest(symbol, positions.get(symbol, 0))
+        self._checksums[account_id] = (positions, checksum & _MASK)
+
+    async def reconcile(self) -> None:
+        """Compare local and SSI holdings per account; correct the ones that differ"""
+        client = await get_ssi_client()
+        risk = self.tracker.risk
+        for account_id in self.followed_accounts():
+            account = risk.accounts.get(account_id)
+            try:
+                result = await client.get_portfolio(account_id)
+                if account is None:
+                    balance = await client.get_account_balance(account_id)
+                    cash = parse_cash(balance.data) if balance.success else None
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Position reconciliation failed for {account_id}: {e}")
+                continue
+            if not result.success:
+                self.stats["errors"] += 1
+                continue
+            if account is None:
+                # Not traded yet: load it so its first order is checked against real holdings
+                if cash is None:
+                    self.stats["errors"] += 1
+                    continue
+                risk.set_account(account_id, cash, parse_portfolio(result.data))
+                continue
+
+            self.stats["reconciliations"] += 1
+            remote = parse_portfolio(result.data)
+            remote_checksum = position_checksum(remote)
+            if remote_checksum == self._local_checksum(account_id, account.positions):
+                continue
+
+            self.stats["mismatches"] += 1
+            local = account.positions
+            differences = {
+                symbol: {"local": local.get(symbol, 0), "remote": remote.get(symbol, 0)}
+                for symbol in local.keys() | remote.keys()
+                if local.get(symbol, 0) != remote.get(symbol, 0)
+            }
+            logger.warning(f"Positions for {account_id} differ from SSI, resyncing: {differences}")
+            risk.set_account(account_id, account.cash, remote)
+            self._checksums[account_id] = (account.positions, remote_checksum)
+            await self.publish(account_id, {
+                "event": "position_reconciled",
+                "account": account_id,
+                "differences": differences,
+                "timestamp": datetime.utcnow().isoformat()
+            })
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "accounts": self.followed_accounts(),
+            "working_accounts": [account for account, working in self._working.items() if working],
+            "publishing": self.producer is not None,
+            "last_poll": self.last_poll.isoformat() if self.last_poll else None,
+            **self.stats
+        }
@@ -0,0 +1,349 @@
+"""
+Order Journal - Append-only write-ahead log of order events with periodic snapshots.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..models import Market, OrderSide, OrderStatus, OrderType, TradingSession
+from .order_stats import trading_day, trading_day_start
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".log"
+
+# Event names written for status transitions; anything else is an "updated" event
+STATUS_EVENTS = {
+    OrderStatus.PENDING: "modified",
+    OrderStatus.SENT: "sent",
+    OrderStatus.ACKNOWLEDGED: "acked",
+    OrderStatus.PARTIALLY_FILLED: "filled",
+    OrderStatus.FILLED: "filled",
+    OrderStatus.CANCELLED: "cancelled",
+    OrderStatus.REJECTED: "rejected",
+    OrderStatus.EXPIRED: "expired",
+}
+
+# Enum-typed order fields, restored on decode so indexes see the same keys as live orders
+_ENUM_FIELDS = {
+    "status": OrderStatus,
+    "side": OrderSide,
+    "order_type": OrderType,
+    "market": Market,
+    "trading_session": TradingSession,
+}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    raise TypeError(f"Cannot journal value of type {type(value).__name__}")
+
+
+def _object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+        if "$dec" in obj:
+            return Decimal(obj["$dec"])
+    return obj
+
+
+def _restore_enums(fields: Dict[str, Any]) -> Dict[str, Any]:
+    for name, enum_type in _ENUM_FIELDS.items():
+        value = fields.get(name)
+        if value is not None:
+            fields[name] = enum_type(value)
+    return fields
+
+
+def encode(record: Dict[str, Any]) -> str:
+    """Serialize a journal record or snapshot as one line of JSON."""
+    return json.dumps(record, default=_default, separators=(",", ":"))
+
+
+def decode(line: str) -> Dict[str, Any]:
+    """Parse a line produced by encode."""
+    return json.loads(line, object_hook=_object_hook)
+
+
+class OrderJournal:
+    """Durable order event log with group commit.
+
+    `record` is synchronous and only appends an encoded line to an in-memory
+    buffer, so order handling never waits on disk. A background task writes
+    everything buffered since the last commit with a single write + fsync
+    (one group commit), every `flush_interval_ms` or as soon as `batch_size`
+    events are pending. Every `snapshot_every` events the working orders,
+    the orders closed during the current trading day and the daily rollup
+    rows are written to a snapshot and older journal segments are deleted,
+    so recovery reads one snapshot plus a short tail. Orders closed on
+    earlier days are compacted away; their activity lives on in the rollups.
+
+    Events carry a monotonically increasing sequence number; recovery skips
+    events already covered by the snapshot. A torn last line of a segment
+    (a crash mid-commit) is skipped; an unreadable line anywhere else is
+    corruption and fails recovery rather than silently dropping what follows.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        flush_interval_ms: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        snapshot_every: Optional[int] = None,
+    ):
+        self.directory = directory or settings.order_journal_dir
+        self.flush_interval = (flush_interval_ms or settings.order_journal_flush_interval_ms) / 1000
+        self.batch_size = batch_size or settings.order_journal_batch_size
+        self.snapshot_every = snapshot_every or settings.order_journal_snapshot_every
+
+        self.seq = 0                    # Last sequence number assigned
+        self.durable_seq = 0            # Last sequence number fsynced
+        self.snapshot_seq = 0           # Sequence number covered by the latest snapshot
+        self._buffer: List[str] = []
+        self._segment = None
+        self._segment_path: Optional[str] = None
+        self._store = None  # OrderStore being journaled, for snapshots
+        self._wakeup: Optional[asyncio.Event] = None
+        self._commit_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {"events": 0, "commits": 0, "snapshots": 0, "errors": 0, "last_commit_ms": 0.0}
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                start = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+                segments.append((start, os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def recover(self, store) -> int:
+        """Rebuild `store` from the latest snapshot plus the journal tail.
+
+        Must run before the journal is attached to the store, so replayed
+        events are not journaled again. Returns the number of events replayed.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        started = time.perf_counter()
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = decode(f.read())
+            self.snapshot_seq = snapshot["seq"]
+            rollups = store.rollups
+            if rollups is not None and "rollups" in snapshot:
+                # Rows already include the snapshot orders' fills
+                store.rollups = None
+            # Snapshots written without rollups rebuild them from the orders, oldest first
+            orders = sorted(snapshot["orders"], key=lambda order_data: (order_data["order_time"], order_data["order_id"]))
+            for order_data in orders:
+                store.add(_restore_enums(order_data))
+            if rollups is not None and "rollups" in snapshot:
+                rollups.load(snapshot["rollups"])
+                store.rollups = rollups
+        self.seq = self.snapshot_seq
+
+        replayed = 0
+        for _, path in self._segments():
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            for number, line in enumerate(lines, 1):
+                try:
+                    event = decode(line)
+                except ValueError:
+                    if number < len(lines):
+                        raise ValueError(f"Corrupt order journal record in {path} at line {number}")
+                    # Torn write from a crash mid-commit; it was never acknowledged as durable
+                    logger.warning(f"Ignoring truncated journal record at the end of {path} after seq {self.seq}")
+                    break
+                if event["seq"] <= self.seq:
+                    continue
+                self._apply(store, event)
+                self.seq = event["seq"]
+                replayed += 1
+
+        self.durable_seq = self.seq
+        logger.info(
+            f"Recovered {len(store)} orders (snapshot seq {self.snapshot_seq}, "
+            f"{replayed} journal events) in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return replayed
+
+    @staticmethod
+    def _apply(store, event: Dict[str, Any]) -> None:
+        fields = _restore_enums(event["data"])
+        if event["event"] == "created":
+            if event["order_id"] not in store:
+                store.add(fields)
+        elif event["order_id"] in store:
+            store.update(event["order_id"], **fields)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def record(self, event: str, order_id: str, data: Dict[str, Any]) -> int:
+        """Buffer an event for the next group commit; never blocks."""
+        self.seq += 1
+        self._buffer.append(encode({
+            "seq": self.seq,
+            "ts": time.time(),
+            "event": event,
+            "order_id": order_id,
+            "data": data,
+        }) + "\n")
+        self.stats["events"] += 1
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return self.seq
+
+    def record_created(self, order_data: Dict[str, Any]) -> int:
+        return self.record("created", order_data["order_id"], order_data)
+
+    def record_update(self, order_id: str, changes: Dict[str, Any]) -> int:
+        status = changes.get("status")
+        event = STATUS_EVENTS.get(status, "updated") if status is not None else "updated"
+        return self.record(event, order_id, changes)
+
+    def _open_segment(self, start_seq: int) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{start_seq:012d}{SEGMENT_SUFFIX}")
+        self._segment = open(self._segment_path, "a", encoding="utf-8")
+
+    async def start(self, store) -> None:
+        """Start group commit; `store` is the live order store snapshots are taken from."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._store = store
+        self._wakeup = asyncio.Event()
+        self._commit_lock = asyncio.Lock()
+        self._open_segment(self.seq + 1)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Order journal started in {self.directory} "
+            f"(flush_interval={self.flush_interval * 1000:.0f}ms, batch_size={self.batch_size})"
+        )
+
+    async def stop(self) -> None:
+        """Commit pending events, write a final snapshot and close the journal."""
+        if self._task:
+            # Let an in-flight commit finish rather than cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._segment is not None:
+            await self.snapshot()
+            self._segment.close()
+            self._segment = None
+        logger.info(f"Order journal stopped at seq {self.durable_seq}")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.commit()
+                if self.seq - self.snapshot_seq >= self.snapshot_every:
+                    await self.snapshot()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Order journal commit failed: {e}")
+
+    async def commit(self) -> int:
+        """Write and fsync everything buffered; returns the durable sequence number."""
+        async with self._commit_lock:
+            if not self._buffer:
+                return self.durable_seq
+            batch, self._buffer = self._buffer, []
+            commit_seq = self.seq
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._write_and_sync, self._segment, "".join(batch))
+            except Exception:
+                # Keep the events so the next commit retries them in order
+                self._buffer[:0] = batch
+                raise
+            self.durable_seq = commit_seq
+            self.stats["commits"] += 1
+            self.stats["last_commit_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            return commit_seq
+
+    @staticmethod
+    def _write_and_sync(segment, payload: str) -> None:
+        segment.write(payload)
+        segment.flush()
+        os.fsync(segment.fileno())
+
+    async def snapshot(self) -> None:
+        """Snapshot working and today's orders and rollups and drop journal segments they cover."""
+        await self.commit()
+        async with self._commit_lock:
+            # Copy on the event loop: mutations and record() are synchronous, so the
+            # copy is exactly the state at self.seq. Only working orders (from the
+            # status index), today's closed orders (from the tail of the timeline)
+            # and one rollup row per account and day are copied; encoding and
+            # writing happen in a thread.
+            snapshot_seq = self.seq
+            today = trading_day_start(trading_day(datetime.utcnow()))
+            orders = [dict(order_data) for order_data in self._store.open_orders()]
+            orders += [dict(order_data) for order_data in self._store.closed_since(today)]
+            rollups = self._store.rollups.export() if self._store.rollups is not None else None
+            old_segments = [path for _, path in self._segments()]
+            self._open_segment(snapshot_seq + 1)
+
+        await asyncio.to_thread(self._write_snapshot, snapshot_seq, orders, rollups)
+        self.snapshot_seq = snapshot_seq
+        self.stats["snapshots"] += 1
+
+        for path in old_segments:
+            if path != self._segment_path:
+                os.remove(path)
+
+    def _write_snapshot(self, seq: int, orders: List[Dict[str, Any]], rollups: Optional[Dict[str, Any]]) -> None:
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = f"{path}.tmp"
+        snapshot = {"seq": seq, "orders": orders}
+        if rollups is not None:
+            snapshot["rollups"] = rollups
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(encode(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "seq": self.seq,
+            "durable_seq": self.durable_seq,
+            "snapshot_seq": self.snapshot_seq,
+            "pending": len(self._buffer),
+            **self.stats,
+        }
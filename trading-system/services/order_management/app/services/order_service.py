@@ -2,25 +2,40 @@
 Order Service - Core business logic for order management.
 """
 
-import asyncio
+import logging
 import uuid
-from datetime import datetime, time
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..models import (
     OrderCreateRequest, OrderModifyRequest, OrderCancelRequest,
     OrderResponse, OrderStatus, OrderSide, OrderType, Market,
     TradingSession, TradingSessionInfo
 )
+from .order_stats import trading_day
+from .order_tracker import OrderTracker
+from .ssi_client import SSIResult, get_ssi_client
+from .trading_session_service import get_session_info
+from .order_store import OPEN_STATUSES, CLOSED_STATUSES, encode_cursor, decode_cursor
+from ..utils.exceptions import SSIAPIError
 
+logger = logging.getLogger(__name__)
 
-class OrderService:
+
+# Stored markets to SSI market codes
+SSI_MARKETS = {Market.HOSE: "VN", Market.HNX: "HN", Market.UPCOM: "UP"}
+
+# Orders SSI has taken and may still change
+MODIFIABLE_STATUSES = frozenset({
+    OrderStatus.SENT,
+    OrderStatus.ACKNOWLEDGED,
+    OrderStatus.PARTIALLY_FILLED,
+})
+
+
+class OrderService(OrderTracker):
     """Service for order management operations."""
     
-    def __init__(self):
-        """Initialize order service."""
-        self.orders: Dict[str, Dict] = {}  # In-memory storage for demo
-    
     async def create_order(
         self, 
         order_request: OrderCreateRequest, 
@@ -32,13 +47,23 @@ class OrderService:
         order_id = f"ORD_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}"
         
         # Validate trading session
-        session_info = await self._get_current_session()
+        session_info = await self._get_current_session(order_request.market)
         if not session_info.can_place_orders:
             raise ValueError(f"Cannot place orders during {session_info.current_session}")
         
         # Validate order request
         await self._validate_order_request(order_request)
         
+        # Pre-trade risk: buying power, position, price band, fat finger; reserves on success
+        self.risk.check_and_reserve(
+            order_id,
+            order_request.account_id,
+            order_request.symbol,
+            order_request.side,
+            order_request.quantity,
+            order_request.price
+        )
+        
         # Create order object
         order_data = {
             "id": str(uuid.uuid4()),
@@ -70,9 +95,9 @@ class OrderService:
         }
         
         # Store order
-        self.orders[order_id] = order_data
+        self.store.add(order_data)
         
-        # Send to SSI FastConnect (simulation)
+        # Send to SSI FastConnect
         await self._send_order_to_ssi(order_data)
         
         return OrderResponse(**order_data)
@@ -97,33 +122,51 @@ class OrderService:
             raise ValueError("Access denied: Order belongs to different user")
         
         # Validate order status
-        if order_data["status"] not in [OrderStatus.PENDING, OrderStatus.ACKNOWLEDGED]:
+        if order_data["status"] not in MODIFIABLE_STATUSES:
             raise ValueError(f"Cannot modify order in {order_data['status']} status")
         
         # Validate trading session
-        session_info = await self._get_current_session()
+        session_info = await self._get_current_session(order_data["market"])
         if not session_info.can_modify_orders:
             raise ValueError(f"Cannot modify orders during {session_info.current_session}")
         
         # Update order data
+        changes: Dict[str, Any] = {}
         if modify_request.price is not None:
-            order_data["price"] = modify_request.price
+            changes["price"] = modify_request.price
         
         if modify_request.quantity is not None:
-            old_quantity = order_data["quantity"]
             filled_quantity = order_data["filled_quantity"]
             
             if modify_request.quantity < filled_quantity:
                 raise ValueError("New quantity cannot be less than filled quantity")
             
-            order_data["quantity"] = modify_request.quantity
-            order_data["remaining_quantity"] = modify_request.quantity - filled_quantity
-        
-        order_data["last_updated"] = datetime.utcnow()
-        order_data["status"] = OrderStatus.PENDING  # Reset to pending for modification
-        
-        # Send modification to SSI FastConnect (simulation)
-        await self._modify_order_at_ssi(order_data)
+            changes["quantity"] = modify_request.quantity
+            changes["remaining_quantity"] = modify_request.quantity - filled_quantity
+        
+        # Re-check risk for the new size/price against state without this order's reservation
+        previous = self.risk.get_reservation(order_id)
+        self.risk.check_and_replace(
+            order_id,
+            order_data["account_id"],
+            order_data["symbol"],
+            order_data["side"],
+            changes.get("remaining_quantity", order_data["remaining_quantity"]),
+            changes.get("price", order_data["price"])
+        )
+        
+        # Send modification to SSI FastConnect; the order is unchanged unless SSI takes it
+        try:
+            result = await self._modify_order_at_ssi({**order_data, **changes})
+        except BaseException:
+            self.risk.reinstate(order_id, previous)
+            raise
+        if not result.success:
+            self.risk.reinstate(order_id, previous)
+            raise ValueError(f"SSI rejected modification: {result.message}")
+        
+        changes["last_updated"] = datetime.utcnow()
+        self.store.update(order_id, **changes)
         
         return OrderResponse(**order_data)
     
@@ -147,22 +190,25 @@ class OrderService:
             raise ValueError("Access denied: Order belongs to different user")
         
         # Validate order status
-        if order_data["status"] in [OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.REJECTED]:
+        if order_data["status"] in CLOSED_STATUSES:
             raise ValueError(f"Cannot cancel order in {order_data['status']} status")
         
         # Validate trading session
-        session_info = await self._get_current_session()
+        session_info = await self._get_current_session(order_data["market"])
         if not session_info.can_cancel_orders:
             raise ValueError(f"Cannot cancel orders during {session_info.current_session}")
         
+        # Send cancellation to SSI FastConnect; the order is closed only once SSI takes it
+        result = await self._cancel_order_at_ssi(order_data)
+        if not result.success:
+            raise ValueError(f"SSI rejected cancellation: {result.message}")
+        
         # Update order status
-        order_data["status"] = OrderStatus.CANCELLED
-        order_data["last_updated"] = datetime.utcnow()
+        changes: Dict[str, Any] = {"last_updated": datetime.utcnow()}
         if cancel_request.reason:
-            order_data["notes"] = f"{order_data.get('notes', '')} | Cancelled: {cancel_request.reason}"
-        
-        # Send cancellation to SSI FastConnect (simulation)
-        await self._cancel_order_at_ssi(order_data)
+            changes["notes"] = f"{order_data.get('notes', '')} | Cancelled: {cancel_request.reason}"
+        self.store.set_status(order_id, OrderStatus.CANCELLED, **changes)
+        self.risk.on_closed(order_id)
         
         return OrderResponse(**order_data)
     
@@ -187,36 +233,64 @@ class OrderService:
         symbol: Optional[str] = None,
         status: Optional[OrderStatus] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[OrderResponse]:
         """Get orders with filtering."""
         
-        filtered_orders = []
-        
-        for order_data in self.orders.values():
-            # Filter by user
-            if order_data["user_id"] != user_id:
-                continue
-            
-            # Filter by account
-            if account_id and order_data["account_id"] != account_id:
-                continue
-            
-            # Filter by symbol
-            if symbol and order_data["symbol"] != symbol:
-                continue
-            
-            # Filter by status
-            if status and order_data["status"] != status:
-                continue
-            
-            filtered_orders.append(OrderResponse(**order_data))
-        
-        # Sort by order time (newest first)
-        filtered_orders.sort(key=lambda x: x.order_time, reverse=True)
-        
-        # Apply pagination
-        return filtered_orders[offset:offset + limit]
+        orders, _ = await self.get_orders_page(
+            user_id, account_id, symbol, status, limit, offset, cursor
+        )
+        return orders
+    
+    async def get_orders_page(
+        self,
+        user_id: str,
+        account_id: Optional[str] = None,
+        symbol: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[OrderResponse], Optional[str]]:
+        """Get one page of orders (newest first) and the cursor for the next page."""
+        
+        page, next_cursor = self.store.query(
+            user_id=user_id,
+            account_id=account_id,
+            symbol=symbol,
+            statuses=[status] if status else None,
+            limit=limit,
+            offset=offset,
+            cursor=decode_cursor(cursor) if cursor else None
+        )
+        
+        # Materialize responses only for the returned page
+        return (
+            [OrderResponse(**order_data) for order_data in page],
+            encode_cursor(next_cursor) if next_cursor else None
+        )
+    
+    async def get_open_orders(
+        self,
+        user_id: str,
+        account_id: str,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[OrderResponse], Optional[str]]:
+        """Get an account's working orders from the (account, status) index."""
+        
+        page, next_cursor = self.store.query(
+            user_id=user_id,
+            account_id=account_id,
+            statuses=OPEN_STATUSES,
+            limit=limit,
+            cursor=decode_cursor(cursor) if cursor else None
+        )
+        return (
+            [OrderResponse(**order_data) for order_data in page],
+            encode_cursor(next_cursor) if next_cursor else None
+        )
     
     async def get_order_history(
         self,
@@ -225,42 +299,35 @@ class OrderService:
         from_date: Optional[datetime] = None,
         to_date: Optional[datetime] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[OrderResponse]:
         """Get order history with date filtering."""
         
-        filtered_orders = []
-        
-        for order_data in self.orders.values():
-            # Filter by user
-            if order_data["user_id"] != user_id:
-                continue
-            
-            # Filter by account
-            if account_id and order_data["account_id"] != account_id:
-                continue
-            
-            # Filter by date range
-            order_time = order_data["order_time"]
-            if from_date and order_time < from_date:
-                continue
-            if to_date and order_time > to_date:
-                continue
-            
-            # Only include completed orders in history
-            if order_data["status"] in [
-                OrderStatus.FILLED, 
-                OrderStatus.CANCELLED, 
-                OrderStatus.REJECTED,
-                OrderStatus.EXPIRED
-            ]:
-                filtered_orders.append(OrderResponse(**order_data))
-        
-        # Sort by order time (newest first)
-        filtered_orders.sort(key=lambda x: x.order_time, reverse=True)
-        
-        # Apply pagination
-        return filtered_orders[offset:offset + limit]
+        # Only include completed orders in history
+        page, _ = self.store.query(
+            user_id=user_id,
+            account_id=account_id,
+            statuses=CLOSED_STATUSES,
+            from_date=from_date,
+            to_date=to_date,
+            limit=limit,
+            offset=offset,
+            cursor=decode_cursor(cursor) if cursor else None
+        )
+        
+        return [OrderResponse(**order_data) for order_data in page]
+    
+    async def get_order_statistics(
+        self,
+        account_id: str,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Get order statistics from the daily rollups (default: last 30 days)."""
+        to_date = to_date or datetime.utcnow()
+        from_date = from_date or to_date - timedelta(days=29)
+        return self.rollups.summarize(account_id, trading_day(from_date), trading_day(to_date))
     
     async def _validate_order_request(self, order_request: OrderCreateRequest) -> None:
         """Validate order request."""
@@ -290,7 +357,7 @@ class OrderService:
             raise ValueError("HOSE requires quantity to be in lots of 100 shares")
         
         # Validate order types
-        session_info = await self._get_current_session()
+        session_info = await self._get_current_session(Market.HOSE)
         
         if session_info.current_session == TradingSession.MORNING_AUCTION:
             if order_request.order_type not in [OrderType.AT_THE_OPEN, OrderType.LIMIT]:
@@ -322,7 +389,7 @@ class OrderService:
             OrderType.MATCH_AND_KILL
         ]
         
-        session_info = await self._get_current_session()
+        session_info = await self._get_current_session(Market.HNX)
         
         if session_info.current_session == TradingSession.CLOSING_AUCTION:
             if order_request.order_type not in [OrderType.AT_THE_CLOSE, OrderType.LIMIT]:
@@ -345,131 +412,94 @@ class OrderService:
         if order_request.order_type not in valid_order_types:
             raise ValueError(f"Order type {order_request.order_type} not supported on UPCOM")
     
-    async def _get_current_session(self) -> TradingSessionInfo:
-        """Get current trading session information."""
-        
-        # Simple session determination based on current time
-        now = datetime.now().time()
-        
-        if time(9, 0) <= now < time(9, 15):
-            return TradingSessionInfo(
-                current_session=TradingSession.MORNING_AUCTION,
-                next_session=TradingSession.CONTINUOUS_MORNING,
-                session_start_time=datetime.now().replace(hour=9, minute=0, second=0),
-                session_end_time=datetime.now().replace(hour=9, minute=15, second=0),
-                market_status="OPEN",
-                can_place_orders=True,
-                can_modify_orders=False,
-                can_cancel_orders=False
-            )
-        
-        elif time(9, 15) <= now < time(11, 30):
-            return TradingSessionInfo(
-                current_session=TradingSession.CONTINUOUS_MORNING,
-                next_session=TradingSession.LUNCH_BREAK,
-                session_start_time=datetime.now().replace(hour=9, minute=15, second=0),
-                session_end_time=datetime.now().replace(hour=11, minute=30, second=0),
-                market_status="OPEN",
-                can_place_orders=True,
-                can_modify_orders=True,
-                can_cancel_orders=True
-            )
-        
-        elif time(11, 30) <= now < time(13, 0):
-            return TradingSessionInfo(
-                current_session=TradingSession.LUNCH_BREAK,
-                next_session=TradingSession.CONTINUOUS_AFTERNOON,
-                session_start_time=datetime.now().replace(hour=11, minute=30, second=0),
-                session_end_time=datetime.now().replace(hour=13, minute=0, second=0),
-                market_status="CLOSED",
-                can_place_orders=False,
-                can_modify_orders=False,
-                can_cancel_orders=False
-            )
-        
-        elif time(13, 0) <= now < time(14, 30):
-            return TradingSessionInfo(
-                current_session=TradingSession.CONTINUOUS_AFTERNOON,
-                next_session=TradingSession.CLOSING_AUCTION,
-                session_start_time=datetime.now().replace(hour=13, minute=0, second=0),
-                session_end_time=datetime.now().replace(hour=14, minute=30, second=0),
-                market_status="OPEN",
-                can_place_orders=True,
-                can_modify_orders=True,
-                can_cancel_orders=True
-            )
-        
-        elif time(14, 30) <= now < time(14, 45):
-            return TradingSessionInfo(
-                current_session=TradingSession.CLOSING_AUCTION,
-                next_session=TradingSession.POST_MARKET,
-                session_start_time=datetime.now().replace(hour=14, minute=30, second=0),
-                session_end_time=datetime.now().replace(hour=14, minute=45, second=0),
-                market_status="CLOSING",
-                can_place_orders=True,
-                can_modify_orders=False,
-                can_cancel_orders=False
-            )
-        
-        elif time(14, 45) <= now < time(15, 0):
-            return TradingSessionInfo(
-                current_session=TradingSession.POST_MARKET,
-                next_session=TradingSession.CLOSED,
-                session_start_time=datetime.now().replace(hour=14, minute=45, second=0),
-                session_end_time=datetime.now().replace(hour=15, minute=0, second=0),
-                market_status="POST_TRADING",
-                can_place_orders=True,  # PLO orders only
-                can_modify_orders=False,
-                can_cancel_orders=False
+    async def _get_current_session(self, market: Market = Market.HOSE) -> TradingSessionInfo:
+        """Get current trading session information from the shared exchange calendar."""
+        return get_session_info(market)
+    
+    async def _send_order_to_ssi(self, order_data: Dict[str, Any]) -> None:
+        """Send order to SSI FastConnect and index it under the order ID SSI assigns."""
+        
+        request_id = f"REQ_{uuid.uuid4().hex[:8]}"
+        client = await get_ssi_client()
+        try:
+            result = await client.place_order({
+                "instrumentID": order_data["symbol"],
+                "market": SSI_MARKETS[order_data["market"]],
+                "buySell": order_data["side"].value,
+                "orderType": order_data["order_type"].value,
+                "price": order_data["price"] or 0,
+                "quantity": order_data["quantity"],
+                "account": order_data["account_id"],
+                "requestID": request_id,
+                "stopOrder": False,
+                "stopPrice": 0,
+                "stopType": "",
+                "stopStep": 0,
+                "lossStep": 0,
+                "profitStep": 0,
+                "deviceID": "",
+                "userAgent": ""
+            })
+        except SSIAPIError as e:
+            # A timed-out request may still have reached SSI; execution reports settle it by request ID
+            status = OrderStatus.UNKNOWN if e.details.get("timed_out") else OrderStatus.REJECTED
+            logger.warning(f"Order {order_data['order_id']} not placed at SSI ({status.value}): {e}")
+            self.store.set_status(
+                order_data["order_id"],
+                status,
+                last_updated=datetime.utcnow(),
+                request_id=request_id,
+                error_message=str(e)
             )
+            self.risk.on_closed(order_data["order_id"])
+            return
         
-        else:
-            return TradingSessionInfo(
-                current_session=TradingSession.CLOSED,
-                next_session=TradingSession.MORNING_AUCTION,
-                session_start_time=None,
-                session_end_time=None,
-                market_status="CLOSED",
-                can_place_orders=False,
-                can_modify_orders=False,
-                can_cancel_orders=False
+        if not result.success:
+            self.store.set_status(
+                order_data["order_id"],
+                OrderStatus.REJECTED,
+                last_updated=datetime.utcnow(),
+                request_id=request_id,
+                error_message=result.message
             )
+            self.risk.on_closed(order_data["order_id"])
+            return
+        
+        # Execution reports find the order by this ID
+        self.store.set_status(
+            order_data["order_id"],
+            OrderStatus.SENT,
+            sent_time=datetime.utcnow(),
+            ssi_order_id=str(result.order_id) if result.order_id else None,
+            request_id=request_id
+        )
     
-    async def _send_order_to_ssi(self, order_data: Dict[str, Any]) -> None:
-        """Send order to SSI FastConnect (simulation)."""
-        
-        # Simulate API call delay
-        await asyncio.sleep(0.1)
-        
-        # Simulate SSI response
-        order_data["status"] = OrderStatus.SENT
-        order_data["sent_time"] = datetime.utcnow()
-        order_data["ssi_order_id"] = f"SSI_{order_data['order_id']}"
-        order_data["request_id"] = f"REQ_{uuid.uuid4().hex[:8]}"
-        
-        # Simulate acknowledgment
-        await asyncio.sleep(0.1)
-        order_data["status"] = OrderStatus.ACKNOWLEDGED
-        order_data["acknowledged_time"] = datetime.utcnow()
-        
-        print(f"Order {order_data['order_id']} sent to SSI FastConnect")
+    @staticmethod
+    def _ssi_order_reference(order_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields SSI needs to find an order it has taken."""
+        if not order_data.get("ssi_order_id"):
+            raise ValueError(f"Order {order_data['order_id']} has no SSI order ID")
+        return {
+            "orderID": order_data["ssi_order_id"],
+            "instrumentID": order_data["symbol"],
+            "market": SSI_MARKETS[order_data["market"]],
+            "buySell": order_data["side"].value,
+            "account": order_data["account_id"],
+            "deviceID": "",
+            "userAgent": ""
+        }
     
-    async def _modify_order_at_ssi(self, order_data: Dict[str, Any]) -> None:
-        """Modify order at SSI FastConnect (simulation)."""
-        
-        # Simulate API call delay
-        await asyncio.sleep(0.1)
-        
-        # Update order status
-        order_data["status"] = OrderStatus.ACKNOWLEDGED
-        order_data["last_updated"] = datetime.utcnow()
-        
-        print(f"Order {order_data['order_id']} modified at SSI FastConnect")
+    async def _modify_order_at_ssi(self, order_data: Dict[str, Any]) -> SSIResult:
+        """Send the order's new price and quantity to SSI FastConnect."""
+        client = await get_ssi_client()
+        return await client.modify_order({
+            **self._ssi_order_reference(order_data),
+            "orderType": order_data["order_type"].value,
+            "price": order_data["price"] or 0,
+            "quantity": order_data["quantity"]
+        })
     
-    async def _cancel_order_at_ssi(self, order_data: Dict[str, Any]) -> None:
-        """Cancel order at SSI FastConnect (simulation)."""
-        
-        # Simulate API call delay
-        await asyncio.sleep(0.1)
-        
-        print(f"Order {order_data['order_id']} cancelled at SSI FastConnect")
+    async def _cancel_order_at_ssi(self, order_data: Dict[str, Any]) -> SSIResult:
+        """Send a cancellation to SSI FastConnect."""
+        client = await get_ssi_client()
+        return await client.cancel_order(self._ssi_order_reference(order_data))
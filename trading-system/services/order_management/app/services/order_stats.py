@@ -0,0 +1,337 @@
+"""
+Order Statistics - Per-account daily rollups of order activity, kept up to
+date from order and fill events so reports never scan raw orders.
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.exchange_calendar import VN_TZ
+
+from ..config import settings
+from ..models import OrderSide, OrderStatus
+from .order_store import OPEN_STATUSES
+
+_VN_OFFSET = VN_TZ.utcoffset(None)
+
+
+def trading_day(at: datetime) -> date:
+    """Vietnam-local date of a naive UTC timestamp"""
+    return (at + _VN_OFFSET).date()
+
+
+def trading_day_start(day: date) -> datetime:
+    """Naive UTC timestamp at which a Vietnam-local trading day begins"""
+    return datetime.combine(day, datetime.min.time()) - _VN_OFFSET
+
+
+class DailyActivity:
+    """One account's activity for one trading day; all counters are additive"""
+    __slots__ = (
+        "orders", "statuses", "fills",
+        "buy_quantity", "sell_quantity", "buy_value", "sell_value",
+        "realized_pnl", "wins", "losses", "largest_gain", "largest_loss",
+        "positions_opened", "positions_closed", "symbols"
+    )
+
+    def __init__(self):
+        self.orders = 0
+        self.statuses: Dict[OrderStatus, int] = {}  # Orders placed this day by current status
+        self.fills = 0
+        self.buy_quantity = 0
+        self.sell_quantity = 0
+        self.buy_value = 0.0
+        self.sell_value = 0.0
+        self.realized_pnl = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.largest_gain = 0.0
+        self.largest_loss = 0.0
+        self.positions_opened = 0
+        self.positions_closed = 0
+        self.symbols: Dict[str, float] = {}  # Traded value by symbol
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            **{field: getattr(self, field) for field in self.__slots__ if field not in ("statuses", "symbols")},
+            "statuses": {status.value: count for status, count in self.statuses.items()},
+            "symbols": dict(self.symbols),
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "DailyActivity":
+        activity = cls()
+        for field in cls.__slots__:
+            if field not in ("statuses", "symbols"):
+                setattr(activity, field, row[field])
+        activity.statuses = {OrderStatus(status): count for status, count in row["statuses"].items()}
+        activity.symbols = dict(row["symbols"])
+        return activity
+
+
+class _Holding:
+    """Running quantity and cost of fills, for realized P&L"""
+    __slots__ = ("quantity", "cost")
+
+    def __init__(self):
+        self.quantity = 0
+        self.cost = 0.0
+
+
+class OrderStatsRollup:
+    """
+    Daily activity rows per account, updated on every order add and update.
+
+    The order store calls `on_order_added` and `on_order_updated` (before
+    applying the changes) in the same synchronous step that indexes the
+    order, so rows are rebuilt by journal recovery like the orders
+    themselves. Status counts follow each order's current status on the
+    day it was placed; fills, volume and realized P&L land on that day too
+    (orders are day orders). Realized P&L uses the average cost of fills
+    seen here, so sells of holdings bought elsewhere count as volume only.
+
+    Any lookback is answered by summing the account's rows in the window,
+    at most one per trading day.
+    """
+
+    def __init__(self, retention_days: int = None):
+        self.retention_days = retention_days or settings.order_stats_retention_days
+        self._days: Dict[str, Dict[date, DailyActivity]] = {}
+        self._dates: Dict[str, List[date]] = {}  # Sorted row dates per account
+        self._holdings: Dict[Tuple[str, str], _Holding] = {}
+
+    def _row(self, account_id: str, day: date) -> DailyActivity:
+        days = self._days.setdefault(account_id, {})
+        row = days.get(day)
+        if row is None:
+            row = days[day] = DailyActivity()
+            dates = self._dates.setdefault(account_id, [])
+            if not dates or dates[-1] < day:
+                dates.append(day)
+            else:
+                insort(dates, day)
+            # Drop rows past retention as new days start
+            cutoff = dates[-1] - timedelta(days=self.retention_days)
+            while dates[0] < cutoff:
+                del days[dates.pop(0)]
+        return row
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def on_order_added(self, order_data: Dict[str, Any]) -> None:
+        row = self._row(order_data["account_id"], trading_day(order_data["order_time"]))
+        row.orders += 1
+        status = order_data["status"]
+        row.statuses[status] = row.statuses.get(status, 0) + 1
+
+        # Orders recovered from a snapshot may already carry fills
+        filled = order_data["filled_quantity"]
+        if filled:
+            price = order_data["average_price"] or order_data["price"] or 0
+            self._apply_fill(row, order_data, filled, price * filled)
+
+    def on_order_updated(self, order_data: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        status = changes.get("status")
+        status_changed = status is not None and status != order_data["status"]
+        previous_filled = order_data["filled_quantity"]
+        filled = changes.get("filled_quantity", previous_filled)
+        if not status_changed and filled <= previous_filled:
+            return
+
+        row = self._row(order_data["account_id"], trading_day(order_data["order_time"]))
+        if status_changed:
+            old_status = order_data["status"]
+            row.statuses[old_status] = row.statuses.get(old_status, 0) - 1
+            row.statuses[status] = row.statuses.get(status, 0) + 1
+
+        if filled > previous_filled:
+            quantity = filled - previous_filled
+            average = changes.get("average_price", order_data["average_price"])
+            if average:
+                value = average * filled - (order_data["average_price"] or 0) * previous_filled
+            else:
+                value = (order_data["price"] or 0) * quantity
+            self._apply_fill(row, order_data, quantity, value)
+
+    def _apply_fill(self, row: DailyActivity, order_data: Dict[str, Any], quantity: int, value: float) -> None:
+        account_id = order_data["account_id"]
+        symbol = order_data["symbol"]
+        row.fills += 1
+        row.symbols[symbol] = row.symbols.get(symbol, 0.0) + value
+
+        key = (account_id, symbol)
+        holding = self._holdings.get(key)
+        if order_data["side"] == OrderSide.BUY:
+            row.buy_quantity += quantity
+            row.buy_value += value
+            if holding is None:
+                holding = self._holdings[key] = _Holding()
+            if holding.quantity == 0:
+                row.positions_opened += 1
+            holding.quantity += quantity
+            holding.cost += value
+            return
+
+        row.sell_quantity += quantity
+        row.sell_value += value
+        if holding is None or holding.quantity <= 0:
+            return  # No cost basis seen for these shares
+
+        closed = min(quantity, holding.quantity)
+        cost = holding.cost * closed / holding.quantity
+        pnl = value * closed / quantity - cost
+        holding.quantity -= closed
+        holding.cost -= cost
+        row.realized_pnl += pnl
+        if pnl > 0:
+            row.wins += 1
+            row.largest_gain = max(row.largest_gain, pnl)
+        elif pnl < 0:
+            row.losses += 1
+            row.largest_loss = min(row.largest_loss, pnl)
+        if holding.quantity == 0:
+            row.positions_closed += 1
+            del self._holdings[key]
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def export(self) -> Dict[str, Any]:
+        """Rows and open cost bases as plain data, for journal snapshots"""
+        return {
+            "days": [
+                [account_id, day.isoformat(), row.to_row()]
+                for account_id, days in self._days.items()
+                for day, row in days.items()
+            ],
+            "holdings": [
+                [account_id, symbol, holding.quantity, holding.cost]
+                for (account_id, symbol), holding in self._holdings.items()
+            ],
+        }
+
+    def load(self, state: Dict[str, Any]) -> None:
+        """Replace every row and cost basis with an exported state"""
+        self._days = {}
+        self._dates = {}
+        self._holdings = {}
+        for account_id, day, row in state["days"]:
+            day = date.fromisoformat(day)
+            self._days.setdefault(account_id, {})[day] = DailyActivity.from_row(row)
+            insort(self._dates.setdefault(account_id, []), day)
+        for account_id, symbol, quantity, cost in state["holdings"]:
+            holding = self._holdings[(account_id, symbol)] = _Holding()
+            holding.quantity = quantity
+            holding.cost = cost
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def rows(self, account_id: str, from_day: date, to_day: date) -> List[Tuple[date, DailyActivity]]:
+        """Daily rows for an account within [from_day, to_day], oldest first"""
+        dates = self._dates.get(account_id, [])
+        days = self._days.get(account_id, {})
+        window = dates[bisect_left(dates, from_day):bisect_right(dates, to_day)]
+        return [(day, days[day]) for day in window]
+
+    def summarize(
+        self,
+        account_id: str,
+        from_day: date,
+        to_day: date,
+        top_symbols: int = 5
+    ) -> Dict[str, Any]:
+        """Activity totals for an account over a window of trading days"""
+        rows = self.rows(account_id, from_day, to_day)
+
+        statuses: Dict[OrderStatus, int] = {}
+        symbols: Dict[str, float] = {}
+        orders = fills = wins = losses = 0
+        buy_quantity = sell_quantity = positions_opened = positions_closed = 0
+        buy_value = sell_value = realized_pnl = largest_gain = largest_loss = 0.0
+        max_daily_gain = max_daily_loss = 0.0
+        for _, row in rows:
+            orders += row.orders
+            fills += row.fills
+            wins += row.wins
+            losses += row.losses
+            buy_quantity += row.buy_quantity
+            sell_quantity += row.sell_quantity
+            buy_value += row.buy_value
+            sell_value += row.sell_value
+            realized_pnl += row.realized_pnl
+            positions_opened += row.positions_opened
+            positions_closed += row.positions_closed
+            largest_gain = max(largest_gain, row.largest_gain)
+            largest_loss = min(largest_loss, row.largest_loss)
+            max_daily_gain = max(max_daily_gain, row.realized_pnl)
+            max_daily_loss = min(max_daily_loss, row.realized_pnl)
+            for status, count in row.statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            for symbol, value in row.symbols.items():
+                symbols[symbol] = symbols.get(symbol, 0.0) + value
+
+        total_volume = buy_value + sell_value
+        most_traded = heapq.nlargest(top_symbols, symbols.items(), key=lambda item: item[1])
+        closed_trades = wins + losses
+        return {
+            "account_id": account_id,
+            "period": {
+                "from_date": from_day.isoformat(),
+                "to_date": to_day.isoformat(),
+                "days": (to_day - from_day).days + 1,
+                "trading_days": len(rows)
+            },
+            "trading_activity": {
+                "total_orders": orders,
+                "filled_orders": statuses.get(OrderStatus.FILLED, 0),
+                "cancelled_orders": statuses.get(OrderStatus.CANCELLED, 0),
+                "rejected_orders": statuses.get(OrderStatus.REJECTED, 0),
+                "pending_orders": sum(statuses.get(status, 0) for status in OPEN_STATUSES),
+                "orders_by_status": {status.value: count for status, count in statuses.items() if count},
+                "total_fills": fills,
+                "total_volume": total_volume,
+                "buy_volume": buy_value,
+                "sell_volume": sell_value,
+                "buy_quantity": buy_quantity,
+                "sell_quantity": sell_quantity,
+                "average_order_size": total_volume / orders if orders else 0.0
+            },
+            "portfolio_activity": {
+                "positions_opened": positions_opened,
+                "positions_closed": positions_closed,
+                "net_position_change": positions_opened - positions_closed,
+                "realized_pnl": realized_pnl,
+                "largest_gain": largest_gain,
+                "largest_loss": largest_loss
+            },
+            "market_participation": {
+                "most_traded_symbol": most_traded[0][0] if most_traded else None,
+                "most_traded_volume": most_traded[0][1] if most_traded else 0.0,
+                "top_symbols": [{"symbol": symbol, "volume": value} for symbol, value in most_traded],
+                "unique_symbols_traded": len(symbols),
+                "average_daily_trades": fills / len(rows) if rows else 0.0
+            },
+            "risk_metrics": {
+                "max_daily_loss": max_daily_loss,
+                "max_daily_gain": max_daily_gain,
+                "winning_trades": wins,
+                "losing_trades": losses,
+                "win_rate": wins / closed_trades * 100 if closed_trades else 0.0
+            }
+        }
+
+    def summarize_days(self, account_id: str, days: int, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Activity totals for the last `days` calendar days, including today"""
+        to_day = trading_day(now or datetime.utcnow())
+        return self.summarize(account_id, to_day - timedelta(days=days - 1), to_day)
+
+
+# Global rollups shared by every order store
+order_stats = OrderStatsRollup()
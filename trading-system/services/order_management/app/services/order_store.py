@@ -0,0 +1,305 @@
+"""
+Order Store - Indexed in-memory order book for OrderService.
+"""
+
+import bisect
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..models import OrderStatus
+
+
+OPEN_STATUSES = frozenset({
+    OrderStatus.PENDING,
+    OrderStatus.SENT,
+    OrderStatus.ACKNOWLEDGED,
+    OrderStatus.PARTIALLY_FILLED,
+    OrderStatus.UNKNOWN,
+})
+
+CLOSED_STATUSES = frozenset({
+    OrderStatus.FILLED,
+    OrderStatus.CANCELLED,
+    OrderStatus.REJECTED,
+    OrderStatus.EXPIRED,
+})
+
+# Keyset pagination cursor: (order_time, order_id) of the last row returned
+Cursor = Tuple[datetime, str]
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """Serialize a cursor for API responses."""
+    return f"{cursor[0].isoformat()}|{cursor[1]}"
+
+
+def decode_cursor(value: str) -> Cursor:
+    """Parse a cursor produced by encode_cursor; raises ValueError for anything else."""
+    order_time, separator, order_id = value.partition("|")
+    if not separator or not order_id:
+        raise ValueError(f"Invalid cursor: {value!r}")
+    try:
+        parsed = datetime.fromisoformat(order_time)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {value!r}") from None
+    # Order times are naive UTC; an offset would not compare against them
+    if parsed.tzinfo is not None:
+        raise ValueError(f"Invalid cursor: {value!r}")
+    return parsed, order_id
+
+
+class OrderStore:
+    """In-memory order storage with secondary indexes.
+
+    Orders are plain dicts keyed by order_id. Secondary indexes map user,
+    account, symbol, status and (account, status) to order ID sets, SSI order
+    IDs map back to local order IDs for execution reports, and each
+    account keeps its orders sorted by (order_time, order_id) so pages are
+    read newest-first with a keyset cursor instead of sort-and-slice.
+
+    All index maintenance is synchronous, so an update is never observed
+    half-applied by another coroutine. When a journal is attached, every add
+    and update is also recorded to it in the same synchronous step, and
+    likewise folded into attached daily rollups.
+    """
+
+    def __init__(self):
+        """Initialize empty store and indexes."""
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+        self._by_account: Dict[str, Set[str]] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._by_status: Dict[OrderStatus, Set[str]] = {}
+        self._by_account_status: Dict[Tuple[str, OrderStatus], Set[str]] = {}
+        self._by_ssi_order_id: Dict[str, str] = {}
+        self._account_timeline: Dict[str, List[Cursor]] = {}
+        self._timeline: List[Cursor] = []
+        self.journal = None  # Optional OrderJournal; attached after recovery
+        self.rollups = None  # Optional OrderStatsRollup; attached before recovery
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self.orders
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get raw order data by ID."""
+        return self.orders.get(order_id)
+
+    def open_orders(self) -> Iterator[Dict[str, Any]]:
+        """Working orders, from the status index."""
+        for status in OPEN_STATUSES:
+            for order_id in self._by_status.get(status, ()):
+                yield self.orders[order_id]
+
+    def closed_since(self, start: datetime) -> Iterator[Dict[str, Any]]:
+        """Closed orders placed at or after `start`, newest first, from the timeline."""
+        for order_time, order_id in self._iter_newest_first(self._timeline, None):
+            if order_time < start:
+                break
+            order_data = self.orders[order_id]
+            if order_data["status"] in CLOSED_STATUSES:
+                yield order_data
+
+    def with_status(self, status: OrderStatus) -> Iterator[Dict[str, Any]]:
+        """Orders in one status, from the status index."""
+        for order_id in self._by_status.get(status, ()):
+            yield self.orders[order_id]
+
+    def get_by_ssi_order_id(self, ssi_order_id: str) -> Optional[Dict[str, Any]]:
+        """Get raw order data by the order ID SSI assigned."""
+        order_id = self._by_ssi_order_id.get(ssi_order_id)
+        return self.orders.get(order_id) if order_id is not None else None
+
+    @staticmethod
+    def _index_add(index: Dict, key: Any, order_id: str) -> None:
+        bucket = index.get(key)
+        if bucket is None:
+            bucket = index[key] = set()
+        bucket.add(order_id)
+
+    @staticmethod
+    def _index_remove(index: Dict, key: Any, order_id: str) -> None:
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(order_id)
+            if not bucket:
+                del index[key]
+
+    @staticmethod
+    def _insert_sorted(timeline: List[Cursor], key: Cursor) -> None:
+        # Orders almost always arrive in time order, so appending is the common case
+        if not timeline or timeline[-1] <= key:
+            timeline.append(key)
+        else:
+            bisect.insort(timeline, key)
+
+    def add(self, order_data: Dict[str, Any]) -> None:
+        """Store a new order and index it."""
+        order_id = order_data["order_id"]
+        if order_id in self.orders:
+            raise ValueError(f"Order {order_id} already exists")
+
+        self.orders[order_id] = order_data
+        account_id = order_data["account_id"]
+        status = order_data["status"]
+
+        self._index_add(self._by_user, order_data["user_id"], order_id)
+        self._index_add(self._by_account, account_id, order_id)
+        self._index_add(self._by_symbol, order_data["symbol"], order_id)
+        self._index_add(self._by_status, status, order_id)
+        self._index_add(self._by_account_status, (account_id, status), order_id)
+        if order_data.get("ssi_order_id"):
+            self._by_ssi_order_id[order_data["ssi_order_id"]] = order_id
+
+        key = (order_data["order_time"], order_id)
+        self._insert_sorted(self._account_timeline.setdefault(account_id, []), key)
+        self._insert_sorted(self._timeline, key)
+
+        if self.rollups is not None:
+            self.rollups.on_order_added(order_data)
+        if self.journal is not None:
+            self.journal.record_created(order_data)
+
+    def update(self, order_id: str, **changes: Any) -> Dict[str, Any]:
+        """Apply field changes, moving the order between status indexes if needed."""
+        order_data = self.orders.get(order_id)
+        if order_data is None:
+            raise ValueError(f"Order {order_id} not found")
+
+        new_status = changes.get("status")
+        old_status = order_data["status"]
+        if new_status is not None and new_status != old_status:
+            account_id = order_data["account_id"]
+            self._index_remove(self._by_status, old_status, order_id)
+            self._index_remove(self._by_account_status, (account_id, old_status), order_id)
+            self._index_add(self._by_status, new_status, order_id)
+            self._index_add(self._by_account_status, (account_id, new_status), order_id)
+        if changes.get("ssi_order_id"):
+            self._by_ssi_order_id[changes["ssi_order_id"]] = order_id
+        if self.rollups is not None:
+            self.rollups.on_order_updated(order_data, changes)
+
+        order_data.update(changes)
+        if self.journal is not None:
+            self.journal.record_update(order_id, changes)
+        return order_data
+
+    def set_status(self, order_id: str, status: OrderStatus, **changes: Any) -> Dict[str, Any]:
+        """Transition an order to a new status."""
+        return self.update(order_id, status=status, **changes)
+
+    def _filter_groups(
+        self,
+        user_id: Optional[str],
+        account_id: Optional[str],
+        symbol: Optional[str],
+        statuses: Optional[Iterable[OrderStatus]],
+    ) -> List[List[Set[str]]]:
+        """Filters as groups of index sets; an order matches a group if it is in any
+        of its sets. Groups are returned smallest first and are never materialized
+        as unions, so multi-status filters stay cheap on large accounts."""
+        groups: List[List[Set[str]]] = []
+
+        if statuses is not None:
+            if account_id:
+                sets = [self._by_account_status.get((account_id, s)) for s in statuses]
+            else:
+                sets = [self._by_status.get(s) for s in statuses]
+            groups.append([ids for ids in sets if ids])
+        elif account_id:
+            # (account, status) sets already imply the account
+            groups.append([self._by_account.get(account_id, set())])
+        if symbol:
+            groups.append([self._by_symbol.get(symbol, set())])
+        if user_id:
+            groups.append([self._by_user.get(user_id, set())])
+
+        groups.sort(key=lambda group: sum(len(ids) for ids in group))
+        return groups
+
+    @staticmethod
+    def _matches(order_id: str, groups: List[List[Set[str]]]) -> bool:
+        return all(any(order_id in ids for ids in group) for group in groups)
+
+    def _iter_newest_first(self, timeline: List[Cursor], before: Optional[Cursor]) -> Iterator[Cursor]:
+        end = bisect.bisect_left(timeline, before) if before else len(timeline)
+        for i in range(end - 1, -1, -1):
+            yield timeline[i]
+
+    def query(
+        self,
+        user_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        symbol: Optional[str] = None,
+        statuses: Optional[Iterable[OrderStatus]] = None,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[Cursor] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Cursor]]:
+        """Return one page of orders, newest first, and the cursor for the next page.
+
+        Only the returned page is touched; callers materialize responses for it alone.
+        """
+        groups = self._filter_groups(user_id, account_id, symbol, statuses)
+
+        timeline = self._account_timeline.get(account_id, []) if account_id else self._timeline
+        smallest = sum(len(ids) for ids in groups[0]) if groups else len(timeline)
+
+        # Walking the timeline visits about limit * len(timeline) / smallest entries before
+        # the page fills; sorting the smallest candidate set costs about its size
+        if groups and smallest * smallest <= (offset + limit) * len(timeline):
+            # Selective filter (e.g. an account's open orders): order just the candidates
+            others = groups[1:]
+            keys = sorted(
+                (
+                    (self.orders[oid]["order_time"], oid)
+                    for ids in groups[0] for oid in ids
+                    if not others or self._matches(oid, others)
+                ),
+                reverse=True,
+            )
+            ordered: Iterable[Cursor] = [k for k in keys if k < cursor] if cursor else keys
+            groups = []
+        else:
+            # Dense matches: walk the account (or global) timeline newest-first and filter lazily
+            ordered = self._iter_newest_first(timeline, cursor)
+            if account_id:
+                account_ids = self._by_account.get(account_id)
+                groups = [g for g in groups if not (len(g) == 1 and g[0] is account_ids)]
+
+        page: List[Dict[str, Any]] = []
+        skipped = 0
+        last_key: Optional[Cursor] = None
+        for key in ordered:
+            order_time, order_id = key
+            if to_date and order_time > to_date:
+                continue
+            if from_date and order_time < from_date:
+                break
+            if groups and not self._matches(order_id, groups):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            page.append(self.orders[order_id])
+            last_key = key
+            if len(page) >= limit:
+                break
+
+        next_cursor = last_key if len(page) >= limit else None
+        return page, next_cursor
+
+    def count(self, account_id: Optional[str] = None, statuses: Optional[Iterable[OrderStatus]] = None) -> int:
+        """Count orders for an account and/or set of statuses from the indexes."""
+        if statuses is not None:
+            statuses = list(statuses)
+            if account_id:
+                return sum(len(self._by_account_status.get((account_id, s), ())) for s in statuses)
+            return sum(len(self._by_status.get(s, ())) for s in statuses)
+        if account_id:
+            return len(self._by_account.get(account_id, ()))
+        return len(self.orders)
@@ -0,0 +1,165 @@
+"""
+Order Tracker - Local record of orders sent to SSI, kept current from
+execution reports: indexed store, journal, daily rollups and pre-trade
+reservations.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ..config import settings
+from ..models import Market, MarketEnum, NewOrderRequest, OrderSide, OrderStatus, OrderType
+from .order_journal import OrderJournal
+from .order_stats import OrderStatsRollup, order_stats
+from .order_store import OrderStore, OPEN_STATUSES, CLOSED_STATUSES
+from .pre_trade_risk import PreTradeRiskEngine, pre_trade_risk
+from .ssi_client import SSIResult
+from .trading_session_service import get_session_info
+
+# SSI market codes to the markets orders are stored under (derivatives have none)
+STORE_MARKETS = {
+    MarketEnum.HOSE: Market.HOSE,
+    MarketEnum.HNX: Market.HNX,
+    MarketEnum.UPCOM: Market.UPCOM,
+}
+
+
+class OrderTracker:
+    """
+    Orders this service has sent, keyed so execution reports find them.
+
+    Orders placed through the API are recorded under the order ID SSI
+    assigned (the same ID their pre-trade reservation is moved to), so an
+    order book row maps straight to the local order, its reservation and
+    its daily rollup. `apply_execution` folds SSI's cumulative fill state
+    into all three.
+    """
+
+    def __init__(
+        self,
+        journal: Optional[OrderJournal] = None,
+        risk: Optional[PreTradeRiskEngine] = None,
+        rollups: Optional[OrderStatsRollup] = None
+    ):
+        self.store = OrderStore()  # Indexed in-memory storage
+        self.rollups = rollups or order_stats  # Daily activity rows, rebuilt during recovery
+        self.store.rollups = self.rollups
+        self.orders: Dict[str, Dict] = self.store.orders  # Read-only view; mutate via self.store
+        self.journal = journal  # Durable event log; None keeps orders in memory only
+        self.risk = risk or pre_trade_risk  # Pre-trade checks and reservations
+
+    async def start(self) -> None:
+        """Rebuild orders from the journal, then journal every change from here on."""
+        if self.journal is None:
+            return
+        self.journal.recover(self.store)
+
+        # Recovered working orders still hold cash/shares
+        for order_data in self.store.orders.values():
+            if order_data["status"] in OPEN_STATUSES:
+                self.risk.restore(
+                    order_data["order_id"], order_data["account_id"], order_data["symbol"],
+                    order_data["side"], order_data["remaining_quantity"], order_data["price"]
+                )
+
+        self.store.journal = self.journal
+        await self.journal.start(self.store)
+
+    async def stop(self) -> None:
+        """Commit pending journal events and snapshot the order book."""
+        if self.journal is None:
+            return
+        await self.journal.stop()
+        self.store.journal = None
+
+    def record_placed(self, request: NewOrderRequest, result: SSIResult, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Record an order SSI answered, under SSI's order ID (rejections under the request ID)."""
+        ssi_order_id = str(result.order_id) if result.success and result.order_id else None
+        existing = self.store.get(ssi_order_id or request.request_id)
+        if existing is not None:
+            return existing  # A retried request ID SSI already answered
+        now = datetime.utcnow()
+        market = STORE_MARKETS.get(request.market)
+        order_data = {
+            "id": str(uuid.uuid4()),
+            "order_id": ssi_order_id or request.request_id,
+            "client_order_id": None,
+            "instrument_id": request.instrument_id,
+            "symbol": request.instrument_id.upper(),
+            "market": market,
+            "side": OrderSide(request.buy_sell.value),
+            "order_type": OrderType(request.order_type.value),
+            "quantity": request.quantity,
+            "price": request.price,
+            "filled_quantity": 0,
+            "remaining_quantity": request.quantity,
+            "average_price": None,
+            "status": OrderStatus.SENT if result.success else OrderStatus.REJECTED,
+            "order_time": now,
+            "sent_time": now,
+            "acknowledged_time": None,
+            "last_updated": now,
+            "account_id": request.account,
+            "user_id": user_id,
+            "ssi_order_id": ssi_order_id,
+            "request_id": request.request_id,
+            "notes": None,
+            "error_message": None if result.success else result.message,
+            "trading_session": get_session_info(market).current_session if market else None,
+            "strategy_id": None
+        }
+        self.store.add(order_data)
+        return order_data
+
+    def apply_execution(
+        self,
+        order_id: str,
+        status: OrderStatus,
+        filled_quantity: int,
+        average_price: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Apply an execution report carrying cumulative fill state.
+
+        Reports are idempotent: the fill applied is the increase in cumulative
+        filled quantity, so a repeated or stale report changes nothing, and a
+        closed order never moves back to an open status. Returns the changes
+        applied (plus fill_quantity/fill_price for a new fill), or None.
+        """
+        order_data = self.store.get(order_id)
+        if order_data is None:
+            return None
+
+        changes: Dict[str, Any] = {}
+        fill_quantity = filled_quantity - order_data["filled_quantity"]
+        fill_price = None
+        if fill_quantity > 0:
+            # Price of this fill, from the change in cumulative average price
+            if average_price:
+                previous_value = (order_data["average_price"] or 0) * order_data["filled_quantity"]
+                fill_price = (average_price * filled_quantity - previous_value) / fill_quantity
+            else:
+                fill_price = order_data["price"]
+            changes["filled_quantity"] = filled_quantity
+            changes["remaining_quantity"] = max(order_data["quantity"] - filled_quantity, 0)
+            changes["average_price"] = average_price or fill_price
+            self.risk.on_fill(order_id, fill_quantity, fill_price)
+
+        if status != order_data["status"] and order_data["status"] not in CLOSED_STATUSES:
+            changes["status"] = status
+
+        if not changes:
+            return None
+
+        changes["last_updated"] = datetime.utcnow()
+        self.store.update(order_id, **changes)
+        if status in CLOSED_STATUSES:
+            self.risk.on_closed(order_id)
+
+        if fill_price is not None:
+            return {**changes, "fill_quantity": fill_quantity, "fill_price": fill_price}
+        return changes
+
+
+# Global tracker for orders placed through the API routers
+order_tracker = OrderTracker(journal=OrderJournal() if settings.order_journal_enabled else None)
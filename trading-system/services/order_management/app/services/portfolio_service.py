@@ -15,14 +15,16 @@ from ..models import (
     PositionResponse, PortfolioSummary, PositionHistory
 )
 from ....common.logging import LoggerManager
+from .pricing_service import Holding, MarkToMarket, PriceBook, price_book
 
 
 class PortfolioService:
     """Service for managing portfolio positions and calculations."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, pricing: Optional[PriceBook] = None):
         """Initialize portfolio service."""
         self.db = db
+        self.pricing = pricing or price_book  # Shared batched prices and valuations
         self.logger = LoggerManager.get_logger("portfolio_service")
     
     async def get_positions(
@@ -44,27 +46,10 @@ class PortfolioService:
             
             positions = query.all()
             
-            # Convert to response models
-            position_responses = []
-            for position in positions:
-                # Calculate current market value and P&L
-                current_price = await self._get_current_price(position.symbol)
-                market_value = position.quantity * current_price
-                unrealized_pnl = market_value - (position.quantity * position.average_price)
-                
-                position_response = PositionResponse(
-                    id=position.id,
-                    account_id=position.account_id,
-                    symbol=position.symbol,
-                    quantity=position.quantity,
-                    available_quantity=position.available_quantity,
-                    average_price=position.average_price,
-                    market_value=market_value,
-                    unrealized_pnl=unrealized_pnl,
-                    cost_basis=position.quantity * position.average_price,
-                    last_updated=position.updated_at
-                )
-                position_responses.append(position_response)
+            # One price fetch for the whole position set
+            await self.pricing.get_prices(position.symbol for position in positions)
+            marks = self.pricing.mark_to_market(self._holdings(positions), key=(account_id, symbol))
+            position_responses = self._position_responses(positions, marks)
             
             self.logger.info(f"Retrieved {len(position_responses)} positions for account {account_id}")
             return position_responses
@@ -87,12 +72,24 @@ class PortfolioService:
             if not position:
                 return None
             
-            # Calculate current market value and P&L
-            current_price = await self._get_current_price(symbol)
-            market_value = position.quantity * current_price
-            unrealized_pnl = market_value - (position.quantity * position.average_price)
+            await self.pricing.get_prices([symbol])
+            marks = self.pricing.mark_to_market(self._holdings([position]), key=(account_id, symbol))
+            return self._position_responses([position], marks)[0]
             
-            return PositionResponse(
+        except Exception as e:
+            self.logger.error(f"Error getting position for {account_id}/{symbol}: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _holdings(positions: List[Position]) -> List[Holding]:
+        """(symbol, quantity, average price) per position, as the price book values them."""
+        return [(position.symbol, position.quantity, position.average_price) for position in positions]
+    
+    @staticmethod
+    def _position_responses(positions: List[Position], marks: MarkToMarket) -> List[PositionResponse]:
+        """Build responses from positions and their valuation, which share the same order."""
+        return [
+            PositionResponse(
                 id=position.id,
                 account_id=position.account_id,
                 symbol=position.symbol,
@@ -101,13 +98,13 @@ class PortfolioService:
                 average_price=position.average_price,
                 market_value=market_value,
                 unrealized_pnl=unrealized_pnl,
-                cost_basis=position.quantity * position.average_price,
+                cost_basis=cost_basis,
                 last_updated=position.updated_at
             )
-            
-        except Exception as e:
-            self.logger.error(f"Error getting position for {account_id}/{symbol}: {str(e)}")
-            raise
+            for position, market_value, cost_basis, unrealized_pnl in zip(
+                positions, marks.market_values, marks.cost_bases, marks.unrealized_pnl
+            )
+        ]
     
     async def update_position_from_execution(
         self, 
@@ -281,19 +278,26 @@ class PortfolioService:
         """Get portfolio summary with totals and performance metrics."""
         
         try:
-            positions = await self.get_positions(account_id, include_zero_positions=False)
-            
-            total_market_value = Decimal('0')
-            total_cost_basis = Decimal('0')
-            total_unrealized_pnl = Decimal('0')
+            positions = self.db.query(Position).filter(
+                and_(
+                    Position.account_id == account_id,
+                    Position.quantity > 0
+                )
+            ).all()
+            today_executions = self._get_today_executions(account_id)
             
-            for position in positions:
-                total_market_value += position.market_value
-                total_cost_basis += position.cost_basis
-                total_unrealized_pnl += position.unrealized_pnl
+            # Price held and sold symbols together in one fetch
+            await self.pricing.get_prices(
+                {position.symbol for position in positions}
+                | {execution.order.symbol for execution in today_executions}
+            )
+            marks = self.pricing.mark_to_market(self._holdings(positions), key=(account_id, None))
+            total_market_value = marks.total_market_value
+            total_cost_basis = marks.total_cost_basis
+            total_unrealized_pnl = marks.total_unrealized_pnl
             
             # Calculate daily P&L
-            daily_pnl = await self._calculate_daily_pnl(account_id)
+            daily_pnl = self._daily_pnl(today_executions)
             
             # Calculate cash balance (simplified - should integrate with cash management)
             cash_balance = await self._get_cash_balance(account_id)
@@ -383,57 +387,49 @@ class PortfolioService:
     async def _get_current_price(self, symbol: str) -> Decimal:
         """Get current market price for a symbol."""
         
-        # This is a placeholder - in production, this should fetch from
-        # market data service or SSI API
         try:
-            # For now, return a mock price
-            # In production, integrate with market data service
-            mock_prices = {
-                "VIC": Decimal("85.5"),
-                "VHM": Decimal("72.3"),
-                "VCB": Decimal("92.8"),
-                "TCB": Decimal("26.4"),
-                "FPT": Decimal("125.2"),
-                "MSN": Decimal("68.9"),
-                "HPG": Decimal("25.7"),
-                "GAS": Decimal("75.2"),
-                "SAB": Decimal("165.8"),
-                "CTG": Decimal("34.1")
-            }
-            
-            return mock_prices.get(symbol, Decimal("50.0"))
+            prices = await self.pricing.get_prices([symbol])
+            return prices.get(symbol, Decimal("0"))
             
         except Exception as e:
             self.logger.error(f"Error getting current price for {symbol}: {str(e)}")
             return Decimal("0")
     
+    def _get_today_executions(self, account_id: str) -> List[OrderExecution]:
+        """Get today's executions of filled orders for the account."""
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.db.query(OrderExecution).join(Order).filter(
+            and_(
+                Order.account_id == account_id,
+                OrderExecution.execution_time >= today_start,
+                Order.status == OrderStatus.FILLED
+            )
+        ).all()
+    
+    def _daily_pnl(self, today_executions: List[OrderExecution]) -> Decimal:
+        """Daily P&L from today's executions at the price book's current prices."""
+        
+        # This is a simplified calculation
+        # In production, this should track actual daily changes
+        prices = self.pricing.prices
+        daily_pnl = Decimal('0')
+        for execution in today_executions:
+            # Simplified calculation - should be more sophisticated
+            if execution.order.side == OrderSide.SELL:
+                # For sells, calculate realized P&L
+                # This is simplified - should track cost basis properly
+                current_price = prices.get(execution.order.symbol.upper(), execution.price)
+                daily_pnl += (execution.price - current_price) * execution.quantity
+        
+        return daily_pnl
+    
     async def _calculate_daily_pnl(self, account_id: str) -> Decimal:
         """Calculate daily P&L for the account."""
         
         try:
-            # This is a simplified calculation
-            # In production, this should track actual daily changes
-            today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            # Get executions from today
-            today_executions = self.db.query(OrderExecution).join(Order).filter(
-                and_(
-                    Order.account_id == account_id,
-                    OrderExecution.execution_time >= today_start,
-                    Order.status == OrderStatus.FILLED
-                )
-            ).all()
-            
-            daily_pnl = Decimal('0')
-            for execution in today_executions:
-                # Simplified calculation - should be more sophisticated
-                if execution.order.side == OrderSide.SELL:
-                    # For sells, calculate realized P&L
-                    # This is simplified - should track cost basis properly
-                    current_price = await self._get_current_price(execution.order.symbol)
-                    daily_pnl += (execution.price - current_price) * execution.quantity
-            
-            return daily_pnl
+            today_executions = self._get_today_executions(account_id)
+            await self.pricing.get_prices({execution.order.symbol for execution in today_executions})
+            return self._daily_pnl(today_executions)
             
         except Exception as e:
             self.logger.error(f"Error calculating daily P&L for {account_id}: {str(e)}")
@@ -0,0 +1,357 @@
+"""
+Pre-Trade Risk Engine - In-memory buying power, position, price band and
+fat-finger checks for Vietnamese equity orders.
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from ..config import settings
+from ..models import OrderSide
+from ..utils.exceptions import RiskManagementError
+
+
+# Violation codes, reported together so one rejection explains every failed check
+INSUFFICIENT_BUYING_POWER = "INSUFFICIENT_BUYING_POWER"
+INSUFFICIENT_POSITION = "INSUFFICIENT_POSITION"
+POSITION_LIMIT = "POSITION_LIMIT"
+ABOVE_CEILING = "ABOVE_CEILING"
+BELOW_FLOOR = "BELOW_FLOOR"
+FAT_FINGER_PRICE = "FAT_FINGER_PRICE"
+FAT_FINGER_QUANTITY = "FAT_FINGER_QUANTITY"
+FAT_FINGER_VALUE = "FAT_FINGER_VALUE"
+UNKNOWN_ACCOUNT = "UNKNOWN_ACCOUNT"
+UNKNOWN_SYMBOL = "UNKNOWN_SYMBOL"
+
+
+class RiskCheckResult(NamedTuple):
+    """Outcome of a pre-trade check"""
+    passed: bool
+    violations: Tuple[str, ...]
+    required_cash: float
+
+
+class AccountState:
+    """Cash, reservations and holdings for one account"""
+    __slots__ = ("cash", "reserved_cash", "positions", "reserved_qty", "pending_buy_qty")
+
+    def __init__(self, cash: float = 0.0, positions: Optional[Dict[str, int]] = None):
+        self.cash = cash
+        self.reserved_cash = 0.0
+        self.positions: Dict[str, int] = dict(positions or {})
+        self.reserved_qty: Dict[str, int] = {}   # Shares held by open sell orders
+        self.pending_buy_qty: Dict[str, int] = {}   # Shares open buy orders may still add
+
+    @property
+    def buying_power(self) -> float:
+        return self.cash - self.reserved_cash
+
+
+class SymbolState:
+    """Daily price band and last traded price for one symbol"""
+    __slots__ = ("reference", "ceiling", "floor", "last_price")
+
+    def __init__(self, reference: float, ceiling: float, floor: float, last_price: Optional[float] = None):
+        self.reference = reference
+        self.ceiling = ceiling
+        self.floor = floor
+        self.last_price = last_price or reference
+
+
+class _Reservation:
+    __slots__ = ("account_id", "symbol", "is_buy", "remaining", "price")
+
+    def __init__(self, account_id: str, symbol: str, is_buy: bool, remaining: int, price: float):
+        self.account_id = account_id
+        self.symbol = symbol
+        self.is_buy = is_buy
+        self.remaining = remaining
+        self.price = price
+
+    def copy(self) -> "_Reservation":
+        return _Reservation(self.account_id, self.symbol, self.is_buy, self.remaining, self.price)
+
+
+class PreTradeRiskEngine:
+    """
+    Pre-trade risk checks against live in-memory state.
+
+    `check` evaluates buying power, sellable position, position limit,
+    ceiling/floor band and fat-finger thresholds in one pass using only dict
+    lookups and arithmetic, so it runs in microseconds. State is updated
+    incrementally: accepted orders reserve cash (buys) or shares (sells),
+    fills move reservations into cash and positions, and cancels, rejects or
+    expiries release what is left.
+
+    State is filled by PreTradeStateLoader before orders are checked.
+    Accounts or symbols it could not load are rejected while `require_state`
+    is set (the default); otherwise the checks that need them are skipped.
+    """
+
+    def __init__(
+        self,
+        fee_rate: float = None,
+        max_order_value: float = None,
+        max_order_quantity: int = None,
+        max_position_value: float = None,
+        fat_finger_pct: float = None,
+        require_state: bool = None
+    ):
+        self.fee_rate = settings.pre_trade_fee_rate if fee_rate is None else fee_rate
+        self.max_order_value = max_order_value or settings.pre_trade_max_order_value
+        self.max_order_quantity = max_order_quantity or settings.pre_trade_max_order_quantity
+        self.max_position_value = max_position_value or settings.pre_trade_max_position_value
+        self.fat_finger_pct = fat_finger_pct or settings.pre_trade_fat_finger_pct
+        self.require_state = settings.pre_trade_require_state if require_state is None else require_state
+
+        self.accounts: Dict[str, AccountState] = {}
+        self.symbols: Dict[str, SymbolState] = {}
+        self._reservations: Dict[str, _Reservation] = {}
+
+    # ------------------------------------------------------------------
+    # State loading
+    # ------------------------------------------------------------------
+
+    def set_account(self, account_id: str, cash: float, positions: Optional[Dict[str, int]] = None) -> None:
+        """Load or replace an account's cash and holdings; open reservations are kept."""
+        account = self.accounts.get(account_id)
+        if account is None:
+            self.accounts[account_id] = AccountState(cash, positions)
+        else:
+            account.cash = cash
+            if positions is not None:
+                account.positions = dict(positions)
+
+    def set_symbol(
+        self,
+        symbol: str,
+        reference: float,
+        ceiling: float,
+        floor: float,
+        last_price: Optional[float] = None
+    ) -> None:
+        """Load the day's reference/ceiling/floor prices for a symbol"""
+        self.symbols[symbol] = SymbolState(reference, ceiling, floor, last_price)
+
+    def update_last_price(self, symbol: str, price: float) -> None:
+        state = self.symbols.get(symbol)
+        if state is not None:
+            state.last_price = price
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+
+    def check(self, account_id: str, symbol: str, side: OrderSide, quantity: int, price: Optional[float]) -> RiskCheckResult:
+        """Run every pre-trade check for one order in a single pass"""
+        violations = []
+        is_buy = side == OrderSide.BUY
+        symbol_state = self.symbols.get(symbol)
+
+        # Market-type orders (no price) are valued at the worst price they can fill at
+        if not price:
+            if symbol_state is not None:
+                price = symbol_state.ceiling if is_buy else symbol_state.floor
+            else:
+                price = 0.0
+
+        notional = price * quantity
+        required_cash = notional * (1.0 + self.fee_rate) if is_buy else 0.0
+
+        if quantity > self.max_order_quantity:
+            violations.append(FAT_FINGER_QUANTITY)
+        if notional > self.max_order_value:
+            violations.append(FAT_FINGER_VALUE)
+
+        if symbol_state is not None:
+            if price > symbol_state.ceiling:
+                violations.append(ABOVE_CEILING)
+            elif price < symbol_state.floor:
+                violations.append(BELOW_FLOOR)
+            last = symbol_state.last_price
+            if last and abs(price - last) > last * self.fat_finger_pct:
+                violations.append(FAT_FINGER_PRICE)
+        elif self.require_state:
+            violations.append(UNKNOWN_SYMBOL)
+
+        account = self.accounts.get(account_id)
+        if account is not None:
+            held = account.positions.get(symbol, 0)
+            if is_buy:
+                if required_cash > account.cash - account.reserved_cash:
+                    violations.append(INSUFFICIENT_BUYING_POWER)
+                pending = account.pending_buy_qty.get(symbol, 0)
+                if (held + pending + quantity) * price > self.max_position_value:
+                    violations.append(POSITION_LIMIT)
+            elif quantity > held - account.reserved_qty.get(symbol, 0):
+                violations.append(INSUFFICIENT_POSITION)
+        elif self.require_state:
+            violations.append(UNKNOWN_ACCOUNT)
+
+        return RiskCheckResult(not violations, tuple(violations), required_cash)
+
+    def check_and_reserve(
+        self,
+        order_id: str,
+        account_id: str,
+        symbol: str,
+        side: OrderSide,
+        quantity: int,
+        price: Optional[float]
+    ) -> RiskCheckResult:
+        """Check an order and, if it passes, reserve its cash or shares.
+
+        Raises RiskManagementError listing every violation.
+        """
+        result = self.check(account_id, symbol, side, quantity, price)
+        if not result.passed:
+            raise RiskManagementError(
+                f"Pre-trade risk check failed: {', '.join(result.violations)}",
+                risk_type=result.violations[0],
+                details={"violations": list(result.violations), "required_cash": result.required_cash}
+            )
+        is_buy = side == OrderSide.BUY
+        unit_price = result.required_cash / quantity if is_buy and quantity else (price or 0.0)
+        self._reserve(order_id, account_id, symbol, is_buy, quantity, unit_price)
+        return result
+
+    # ------------------------------------------------------------------
+    # Incremental updates from order events
+    # ------------------------------------------------------------------
+
+    def _reserve(self, order_id: str, account_id: str, symbol: str, is_buy: bool, quantity: int, unit_price: float) -> None:
+        account = self.accounts.get(account_id)
+        if account is None:
+            return
+        if is_buy:
+            account.reserved_cash += quantity * unit_price
+            account.pending_buy_qty[symbol] = account.pending_buy_qty.get(symbol, 0) + quantity
+        else:
+            account.reserved_qty[symbol] = account.reserved_qty.get(symbol, 0) + quantity
+        self._reservations[order_id] = _Reservation(account_id, symbol, is_buy, quantity, unit_price)
+
+    def restore(self, order_id: str, account_id: str, symbol: str, side: OrderSide, remaining: int, price: Optional[float]) -> None:
+        """Reserve for an already-accepted open order without checking it (e.g. after recovery)"""
+        if order_id in self._reservations or remaining <= 0:
+            return
+        is_buy = side == OrderSide.BUY
+        if not price:
+            symbol_state = self.symbols.get(symbol)
+            price = (symbol_state.ceiling if is_buy else symbol_state.floor) if symbol_state else 0.0
+        unit_price = price * (1.0 + self.fee_rate) if is_buy else price
+        self._reserve(order_id, account_id, symbol, is_buy, remaining, unit_price)
+
+    def _release(self, reservation: _Reservation, quantity: int) -> None:
+        account = self.accounts.get(reservation.account_id)
+        if account is None:
+            return
+        if reservation.is_buy:
+            account.reserved_cash = max(account.reserved_cash - quantity * reservation.price, 0.0)
+            reserved = account.pending_buy_qty
+        else:
+            reserved = account.reserved_qty
+        remaining = reserved.get(reservation.symbol, 0) - quantity
+        if remaining > 0:
+            reserved[reservation.symbol] = remaining
+        else:
+            reserved.pop(reservation.symbol, None)
+
+    def on_fill(self, order_id: str, fill_quantity: int, fill_price: float) -> None:
+        """Apply an execution: settle cash and position, shrink the reservation"""
+        reservation = self._reservations.get(order_id)
+        if reservation is None:
+            return
+        fill_quantity = min(fill_quantity, reservation.remaining)
+        self._release(reservation, fill_quantity)
+        reservation.remaining -= fill_quantity
+
+        account = self.accounts.get(reservation.account_id)
+        if account is not None:
+            value = fill_quantity * fill_price
+            symbol = reservation.symbol
+            if reservation.is_buy:
+                account.cash -= value * (1.0 + self.fee_rate)
+                account.positions[symbol] = account.positions.get(symbol, 0) + fill_quantity
+            else:
+                account.cash += value * (1.0 - self.fee_rate)
+                held = account.positions.get(symbol, 0) - fill_quantity
+                if held > 0:
+                    account.positions[symbol] = held
+                else:
+                    account.positions.pop(symbol, None)
+
+        self.update_last_price(reservation.symbol, fill_price)
+        if reservation.remaining <= 0:
+            del self._reservations[order_id]
+
+    def check_and_replace(
+        self,
+        order_id: str,
+        account_id: str,
+        symbol: str,
+        side: OrderSide,
+        remaining_quantity: int,
+        price: Optional[float]
+    ) -> RiskCheckResult:
+        """Re-check a modified order against state without its own reservation, then re-reserve.
+
+        An order with no reservation (e.g. placed before a restart) is checked
+        like a new one. On failure the original reservation is restored and
+        RiskManagementError is raised.
+        """
+        reservation = self._reservations.pop(order_id, None)
+        if reservation is None:
+            return self.check_and_reserve(order_id, account_id, symbol, side, remaining_quantity, price)
+        self._release(reservation, reservation.remaining)
+        try:
+            return self.check_and_reserve(
+                order_id, reservation.account_id, reservation.symbol, side, remaining_quantity, price
+            )
+        except RiskManagementError:
+            self._reserve(
+                order_id, reservation.account_id, reservation.symbol,
+                reservation.is_buy, reservation.remaining, reservation.price
+            )
+            raise
+
+    def get_reservation(self, order_id: str) -> Optional[_Reservation]:
+        """A copy of what an order reserves now, to hand back to `reinstate`"""
+        reservation = self._reservations.get(order_id)
+        return reservation.copy() if reservation is not None else None
+
+    def reinstate(self, order_id: str, reservation: Optional[_Reservation]) -> None:
+        """Put back a reservation saved by `get_reservation`, e.g. when SSI rejects a modification"""
+        self.on_closed(order_id)
+        if reservation is not None:
+            self._reserve(
+                order_id, reservation.account_id, reservation.symbol,
+                reservation.is_buy, reservation.remaining, reservation.price
+            )
+
+    def rekey(self, order_id: str, new_order_id: str) -> None:
+        """Move a reservation to another ID, e.g. from the request ID to SSI's order ID"""
+        reservation = self._reservations.pop(order_id, None)
+        if reservation is not None:
+            self._reservations[new_order_id] = reservation
+
+    def on_closed(self, order_id: str) -> None:
+        """Release whatever an order still reserves (cancelled, rejected, expired)"""
+        reservation = self._reservations.pop(order_id, None)
+        if reservation is not None:
+            self._release(reservation, reservation.remaining)
+
+    def get_account_status(self, account_id: str) -> Optional[Dict[str, object]]:
+        account = self.accounts.get(account_id)
+        if account is None:
+            return None
+        return {
+            "cash": account.cash,
+            "reserved_cash": account.reserved_cash,
+            "buying_power": account.buying_power,
+            "positions": dict(account.positions),
+            "reserved_quantity": dict(account.reserved_qty),
+            "pending_buy_quantity": dict(account.pending_buy_qty),
+        }
+
+
+# Global engine instance
+pre_trade_risk = PreTradeRiskEngine()
@@ -0,0 +1,126 @@
+"""
+Pre-Trade State Loader - Fill the pre-trade risk engine with account cash
+and holdings from SSI and each symbol's daily price band from the market
+data service, the first time an order needs them each trading day.
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.exchange_calendar import VN_TZ
+from .execution_reports import parse_cash, parse_portfolio
+from .pre_trade_risk import PreTradeRiskEngine, pre_trade_risk
+from .pricing_service import PriceBook, price_book
+from .ssi_client import SSIFastConnectClient, get_ssi_client
+
+logger = logging.getLogger(__name__)
+
+
+def parse_price_band(quote: Any) -> Optional[Tuple[float, float, float, Optional[float]]]:
+    """(reference, ceiling, floor, last) from a market data quote, or None if the band is missing"""
+    if not isinstance(quote, dict):
+        return None
+    band = []
+    for field in ("reference_price", "ceiling_price", "floor_price"):
+        value = float(quote.get(field) or 0)
+        if value <= 0:
+            return None
+        band.append(value)
+    last = float(quote.get("last_price") or 0) or None
+    return band[0], band[1], band[2], last
+
+
+class PreTradeStateLoader:
+    """
+    Loads the account and symbol state pre-trade checks run against.
+
+    `ensure` loads what the given orders need and is a dict lookup per
+    account and symbol once they are loaded. Accounts (cash and holdings)
+    and symbols (reference, ceiling, floor) are loaded once per trading day;
+    during the day fills keep accounts current and execution report
+    reconciliation corrects holdings. Missing accounts are fetched
+    concurrently and missing symbols in one batched quote request.
+
+    A failed load is logged and retried by the next order that needs it;
+    meanwhile the engine rejects orders for that account or symbol when
+    `pre_trade_require_state` is set.
+    """
+
+    def __init__(
+        self,
+        risk: PreTradeRiskEngine = None,
+        prices: PriceBook = None,
+        client_factory: Callable[[], Awaitable[SSIFastConnectClient]] = get_ssi_client
+    ):
+        self.risk = risk or pre_trade_risk
+        self.prices = prices or price_book
+        self.client_factory = client_factory
+        self._accounts: Dict[str, date] = {}   # account -> trading day loaded
+        self._symbols: Dict[str, date] = {}    # symbol -> trading day loaded
+        self._lock = asyncio.Lock()
+        self.stats = {"account_loads": 0, "symbol_loads": 0, "errors": 0}
+
+    def _missing(self, loaded: Dict[str, date], keys: Iterable[str], today: date) -> List[str]:
+        return [key for key in keys if loaded.get(key) != today]
+
+    async def ensure(self, accounts: Iterable[str], symbols: Iterable[str]) -> None:
+        """Load any of these accounts and symbols not yet loaded today"""
+        accounts = set(accounts)
+        symbols = {symbol.upper() for symbol in symbols}
+        today = datetime.now(VN_TZ).date()
+        if not (self._missing(self._accounts, accounts, today) or self._missing(self._symbols, symbols, today)):
+            return
+        async with self._lock:
+            # Whoever held the lock may already have loaded them
+            missing_accounts = self._missing(self._accounts, accounts, today)
+            missing_symbols = self._missing(self._symbols, symbols, today)
+            await asyncio.gather(
+                *(self._load_account(account, today) for account in missing_accounts),
+                self._load_symbols(missing_symbols, today)
+            )
+
+    async def _load_account(self, account_id: str, today: date) -> None:
+        try:
+            client = await self.client_factory()
+            balance, portfolio = await asyncio.gather(
+                client.get_account_balance(account_id),
+                client.get_portfolio(account_id)
+            )
+            cash = parse_cash(balance.data) if balance.success else None
+            if cash is None or not portfolio.success:
+                raise ValueError(balance.message if cash is None else portfolio.message)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Could not load pre-trade state for account {account_id}: {e}")
+            return
+        self.risk.set_account(account_id, cash, parse_portfolio(portfolio.data))
+        self._accounts[account_id] = today
+        self.stats["account_loads"] += 1
+
+    async def _load_symbols(self, symbols: List[str], today: date) -> None:
+        if not symbols:
+            return
+        try:
+            quotes = await self.prices.get_quotes(symbols)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Could not load price bands for {len(symbols)} symbols: {e}")
+            return
+        for symbol in symbols:
+            band = parse_price_band(quotes.get(symbol))
+            if band is None:
+                self.stats["errors"] += 1
+                logger.warning(f"No price band for {symbol}")
+                continue
+            self.risk.set_symbol(symbol, *band)
+            self._symbols[symbol] = today
+            self.stats["symbol_loads"] += 1
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"accounts": len(self._accounts), "symbols": len(self._symbols), **self.stats}
+
+
+# Global loader for the global engine
+pre_trade_state = PreTradeStateLoader()
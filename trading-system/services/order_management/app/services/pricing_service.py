@@ -0,0 +1,216 @@
+"""
+Pricing Service - Batched last-price lookups and memoized mark-to-market
+for portfolio valuation.
+"""
+
+import asyncio
+import logging
+import operator
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# (symbol, quantity, average price) for one holding
+Holding = Tuple[str, Decimal, Decimal]
+
+_ZERO = Decimal("0")
+
+
+class MarkToMarket(NamedTuple):
+    """Valuation of a position set at one price version; per-holding tuples follow the input order"""
+    prices: Tuple[Decimal, ...]
+    market_values: Tuple[Decimal, ...]
+    cost_bases: Tuple[Decimal, ...]
+    unrealized_pnl: Tuple[Decimal, ...]
+    total_market_value: Decimal
+    total_cost_basis: Decimal
+    total_unrealized_pnl: Decimal
+
+
+def _quote_price(quote: Any) -> Optional[Decimal]:
+    """Last price from a market data quote, falling back to the reference price"""
+    if not isinstance(quote, dict) or "error" in quote:
+        return None
+    for field in ("last_price", "reference_price"):
+        value = quote.get(field)
+        if value:
+            return Decimal(str(value))
+    return None
+
+
+class PriceBook:
+    """
+    Last traded prices shared by every portfolio valuation.
+
+    `get_prices` serves prices fetched within `ttl` seconds from memory and
+    resolves the rest with one batched request to the market data service
+    (split only at the service's per-request symbol limit, and sent
+    concurrently), so valuing a portfolio costs one fetch however many
+    positions it holds. Concurrent callers share an in-flight fetch.
+
+    Symbols are matched case-insensitively; prices are stored under the
+    upper-case symbol and returned under the symbol the caller asked for.
+
+    `version` increases whenever any price changes. `mark_to_market`
+    memoizes the valuation of each named position set (e.g. an account) at
+    the current version, so repeated reads between ticks return the same
+    result without recomputing.
+    """
+
+    def __init__(
+        self,
+        base_url: str = None,
+        ttl: float = None,
+        batch_size: int = None,
+        cache_size: int = None
+    ):
+        self.base_url = (base_url or settings.market_data_service_url).rstrip("/")
+        self.ttl = settings.price_cache_ttl if ttl is None else ttl
+        self.batch_size = batch_size or settings.price_batch_size
+        self.cache_size = cache_size or settings.mark_to_market_cache_size
+
+        self.prices: Dict[str, Decimal] = {}
+        self.version = 0
+        self._fetched_at: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._marks: "OrderedDict[Hashable, Tuple[int, Tuple[Holding, ...], MarkToMarket]]" = OrderedDict()
+        self.stats = {"fetches": 0, "requests": 0, "symbols_fetched": 0, "mark_hits": 0, "mark_misses": 0}
+
+    # ------------------------------------------------------------------
+    # Prices
+    # ------------------------------------------------------------------
+
+    def update_price(self, symbol: str, price: Decimal) -> None:
+        """Record a pushed quote, e.g. from a market data stream"""
+        symbol = symbol.upper()
+        self._fetched_at[symbol] = time.monotonic()
+        if self.prices.get(symbol) != price:
+            self.prices[symbol] = price
+            self.version += 1
+
+    def _stale(self, symbols: Iterable[str]) -> List[str]:
+        cutoff = time.monotonic() - self.ttl
+        fetched_at = self._fetched_at
+        return [symbol for symbol in symbols if fetched_at.get(symbol, float("-inf")) < cutoff]
+
+    async def get_prices(self, symbols: Iterable[str]) -> Dict[str, Decimal]:
+        """Current prices for the given symbols; symbols with no quote are left out"""
+        requested = {symbol: symbol.upper() for symbol in symbols}
+        missing = self._stale(set(requested.values()))
+        if missing:
+            async with self._lock:
+                # Whoever held the lock may already have fetched them
+                missing = self._stale(missing)
+                if missing:
+                    await self._fetch(missing)
+        prices = self.prices
+        return {symbol: prices[upper] for symbol, upper in requested.items() if upper in prices}
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch full quotes (including the day's price band) now; symbols with no quote are left out.
+
+        The last prices they carry update the book as well.
+        """
+        requested = {symbol: symbol.upper() for symbol in symbols}
+        if not requested:
+            return {}
+        quotes = await self._fetch(sorted(set(requested.values())))
+        return {symbol: quotes[upper] for symbol, upper in requested.items() if upper in quotes}
+
+    async def _fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        quotes: Dict[str, Dict[str, Any]] = {}
+        chunks = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        results = await asyncio.gather(*(self._request(chunk) for chunk in chunks), return_exceptions=True)
+        self.stats["fetches"] += 1
+        self.stats["requests"] += len(chunks)
+
+        now = time.monotonic()
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                # Keep serving the previous prices; retried on the next call
+                logger.warning(f"Price fetch failed for {len(chunk)} symbols: {result}")
+                continue
+            self.stats["symbols_fetched"] += len(chunk)
+            for symbol in chunk:
+                # Symbols without a quote are not asked for again until the TTL passes
+                self._fetched_at[symbol] = now
+                quote = result.get(symbol)
+                price = _quote_price(quote)
+                if price is None:
+                    continue
+                quotes[symbol] = quote
+                if self.prices.get(symbol) != price:
+                    self.prices[symbol] = price
+                    self.version += 1
+        return quotes
+
+    async def _request(self, symbols: List[str]) -> Dict[str, Any]:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=settings.price_request_timeout)
+        response = await self._client.post(
+            f"{self.base_url}/api/v1/market-data",
+            json={"symbols": symbols, "data_types": ["QUOTE"]}
+        )
+        response.raise_for_status()
+        return response.json().get("data") or {}
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ------------------------------------------------------------------
+    # Valuation
+    # ------------------------------------------------------------------
+
+    def mark_to_market(self, holdings: Sequence[Holding], key: Optional[Hashable] = None) -> MarkToMarket:
+        """Value holdings at the current prices.
+
+        Holdings without a price are carried at their average price, so they
+        show no unrealized P&L rather than a made-up one. With a `key` naming
+        the position set, the last valuation per key is reused while prices
+        have not moved and the holdings compare equal, which costs no hashing
+        of the holdings.
+        """
+        holdings = tuple(holdings)
+        if key is not None:
+            cached = self._marks.get(key)
+            if cached is not None and cached[0] == self.version and cached[1] == holdings:
+                self._marks.move_to_end(key)
+                self.stats["mark_hits"] += 1
+                return cached[2]
+
+        self.stats["mark_misses"] += 1
+        prices = self.prices
+        quantities = [quantity for _, quantity, _ in holdings]
+        averages = [average for _, _, average in holdings]
+        marked = tuple(prices.get(symbol.upper(), average) for symbol, _, average in holdings)
+        market_values = tuple(map(operator.mul, quantities, marked))
+        cost_bases = tuple(map(operator.mul, quantities, averages))
+        unrealized = tuple(map(operator.sub, market_values, cost_bases))
+        marks = MarkToMarket(
+            marked, market_values, cost_bases, unrealized,
+            sum(market_values, _ZERO), sum(cost_bases, _ZERO), sum(unrealized, _ZERO)
+        )
+
+        if key is not None:
+            self._marks[key] = (self.version, holdings, marks)
+            self._marks.move_to_end(key)
+            if len(self._marks) > self.cache_size:
+                self._marks.popitem(last=False)
+        return marks
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"symbols": len(self.prices), "version": self.version, **self.stats}
+
+
+# Global price book shared by every PortfolioService
+price_book = PriceBook()
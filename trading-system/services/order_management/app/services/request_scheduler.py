@@ -0,0 +1,286 @@
+"""
+SSI Request Scheduler
+Weighted, deadline-aware admission control in front of the SSI trading API.
+"""
+
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+from ..utils.exceptions import SSIRateLimitError
+
+logger = structlog.get_logger(__name__)
+
+
+class RequestLane(IntEnum):
+    """Operation classes; lower values are admitted first"""
+    CANCEL = 0  # Order cancellation
+    ORDER = 1   # Order entry, modify and authentication
+    QUERY = 2   # Balances, positions, history and other reads
+
+
+queue_wait_seconds = Histogram(
+    "ssi_request_queue_wait_seconds",
+    "Time SSI requests spend queued before admission",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+queue_depth = Gauge(
+    "ssi_request_queue_depth",
+    "SSI requests waiting for admission",
+    ["operation"]
+)
+queue_expired_total = Counter(
+    "ssi_request_queue_expired_total",
+    "SSI requests that reached their deadline while queued",
+    ["operation"]
+)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def has_token(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def take(self) -> None:
+        self.tokens -= 1.0
+
+    def seconds_until_token(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+@dataclass(order=True)
+class _Waiter:
+    deadline: float
+    seq: int
+    lane: RequestLane = field(compare=False)
+    account: str = field(compare=False)
+    enqueued: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class RequestScheduler:
+    """
+    Admits SSI requests by operation class, account budget and deadline.
+
+    Every request needs a token from the global SSI budget and from the
+    bucket for its (account, operation class); class shares weight how much
+    of the global rate each class may use (cancels may use all of it, reads
+    the least), so one account polling balances cannot consume the budget
+    another account, or its own cancels, depend on. Concurrency is capped by
+    `max_in_flight`, with reads limited to `query_max_in_flight`.
+
+    Requests that cannot be admitted queue instead of failing. Queues are
+    served cancel-first, then new/modify, then reads, earliest deadline first
+    within a class; a waiter blocked only by its own account budget does not
+    hold up other accounts. A request fails with SSIRateLimitError only if
+    its deadline passes while queued.
+    """
+
+    def __init__(
+        self,
+        rate_limit: int,
+        rate_window: float,
+        max_in_flight: int,
+        query_max_in_flight: int,
+        class_shares: Dict[RequestLane, float],
+        account_share: float,
+        deadlines: Dict[RequestLane, float]
+    ):
+        self.rate = rate_limit / rate_window
+        self.capacity = float(rate_limit)
+        self.max_in_flight = max_in_flight
+        self.query_max_in_flight = min(query_max_in_flight, max_in_flight)
+        self.class_shares = class_shares
+        self.account_share = account_share
+        self.deadlines = deadlines
+
+        self.global_bucket = TokenBucket(self.rate, self.capacity)
+        self._buckets: Dict[Tuple[str, RequestLane], TokenBucket] = {}
+        self.in_flight = {lane: 0 for lane in RequestLane}
+        self._queues: Dict[RequestLane, List[_Waiter]] = {lane: [] for lane in RequestLane}
+        self._seq = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = float("inf")
+        self.stats = {
+            lane.name.lower(): {"admitted": 0, "queued": 0, "expired": 0, "max_wait_ms": 0.0}
+            for lane in RequestLane
+        }
+
+    def _bucket(self, account: str, lane: RequestLane) -> TokenBucket:
+        key = (account, lane)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            share = self.class_shares.get(lane, 1.0) * self.account_share
+            bucket = self._buckets[key] = TokenBucket(self.rate * share, self.capacity * share)
+        return bucket
+
+    def _has_slot(self, lane: RequestLane) -> bool:
+        if sum(self.in_flight.values()) >= self.max_in_flight:
+            return False
+        if lane == RequestLane.QUERY:
+            return self.in_flight[RequestLane.QUERY] < self.query_max_in_flight
+        return True
+
+    def _admit(self, lane: RequestLane, bucket: TokenBucket) -> None:
+        self.global_bucket.take()
+        bucket.take()
+        self.in_flight[lane] += 1
+        self.stats[lane.name.lower()]["admitted"] += 1
+
+    async def acquire(self, lane: RequestLane, account: Optional[str] = None, timeout: Optional[float] = None) -> None:
+        """Wait until the request may be sent; raises SSIRateLimitError past its deadline"""
+        account = account or ""
+        now = time.monotonic()
+        bucket = self._bucket(account, lane)
+
+        # Fast path: nothing of equal or higher priority is waiting and budgets allow it
+        if (
+            not any(self._queues[l] for l in RequestLane if l <= lane)
+            and self._has_slot(lane)
+            and self.global_bucket.has_token(now)
+            and bucket.has_token(now)
+        ):
+            self._admit(lane, bucket)
+            queue_wait_seconds.labels(lane.name.lower()).observe(0.0)
+            return
+
+        self._seq += 1
+        waiter = _Waiter(
+            deadline=now + (timeout if timeout is not None else self.deadlines[lane]),
+            seq=self._seq,
+            lane=lane,
+            account=account,
+            enqueued=now,
+            future=asyncio.get_running_loop().create_future()
+        )
+        bisect.insort(self._queues[lane], waiter)
+        waiter.future.add_done_callback(lambda future: future.cancelled() and self._remove(waiter))
+        self.stats[lane.name.lower()]["queued"] += 1
+        queue_depth.labels(lane.name.lower()).inc()
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just before cancellation; hand the slot back
+                self.release(lane)
+            else:
+                self._remove(waiter)
+            raise
+
+    def release(self, lane: RequestLane) -> None:
+        """Mark a request finished and admit queued work that now fits"""
+        self.in_flight[lane] -= 1
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.lane]
+        i = bisect.bisect_left(queue, waiter)
+        if i < len(queue) and queue[i] is waiter:
+            del queue[i]
+            queue_depth.labels(waiter.lane.name.lower()).dec()
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        next_wake = float("inf")
+
+        for lane in RequestLane:
+            queue = self._queues[lane]
+            name = lane.name.lower()
+            i = 0
+            while i < len(queue):
+                waiter = queue[i]
+                if waiter.future.done():
+                    # Cancelled while queued; its task has not run its cleanup yet
+                    del queue[i]
+                    queue_depth.labels(name).dec()
+                    continue
+                if waiter.deadline <= now:
+                    del queue[i]
+                    queue_depth.labels(name).dec()
+                    queue_expired_total.labels(name).inc()
+                    self.stats[name]["expired"] += 1
+                    waiter.future.set_exception(SSIRateLimitError(
+                        f"{name} request for account '{waiter.account}' not admitted before its deadline"
+                    ))
+                    continue
+                next_wake = min(next_wake, waiter.deadline)
+
+                if not self._has_slot(lane):
+                    break  # Lower lanes get no slot either; release() re-dispatches
+                if not self.global_bucket.has_token(now):
+                    next_wake = min(next_wake, now + self.global_bucket.seconds_until_token(now))
+                    break
+                bucket = self._bucket(waiter.account, lane)
+                if not bucket.has_token(now):
+                    # Only this account is out of budget; let other accounts through
+                    next_wake = min(next_wake, now + bucket.seconds_until_token(now))
+                    i += 1
+                    continue
+
+                del queue[i]
+                queue_depth.labels(name).dec()
+                self._admit(lane, bucket)
+                wait = now - waiter.enqueued
+                queue_wait_seconds.labels(name).observe(wait)
+                self.stats[name]["max_wait_ms"] = max(self.stats[name]["max_wait_ms"], round(wait * 1000, 3))
+                waiter.future.set_result(None)
+
+            if queue and (not self._has_slot(lane) or not self.global_bucket.has_token(now)):
+                # Higher-priority work is still waiting on a shared resource; don't let
+                # lower classes take it
+                for lower in RequestLane:
+                    if lower > lane and self._queues[lower]:
+                        next_wake = min(next_wake, self._queues[lower][0].deadline)
+                break
+
+        self._schedule(next_wake)
+
+    def _schedule(self, when: float) -> None:
+        if when == float("inf") or when >= self._timer_at:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer_at = when
+        self._timer = loop.call_later(max(when - time.monotonic(), 0.0), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._timer_at = float("inf")
+        self._dispatch()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": round(self.rate, 3),
+            "global_tokens": round(self.global_bucket.tokens, 2),
+            "max_in_flight": self.max_in_flight,
+            "query_max_in_flight": self.query_max_in_flight,
+            "in_flight": {lane.name.lower(): count for lane, count in self.in_flight.items()},
+            "waiting": {lane.name.lower(): len(queue) for lane, queue in self._queues.items()},
+            "lanes": self.stats
+        }
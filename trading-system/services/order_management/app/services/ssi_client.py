@@ -18,12 +18,14 @@ from urllib.parse import urljoin
 import structlog
 
 from ..config import settings
+from ..utils.circuit_breaker import BreakerPolicy, CircuitBreakerRegistry, CircuitOpenError
 from ..utils.exceptions import (
     SSIAPIError, 
     SSIAuthenticationError, 
     SSIRateLimitError,
     SSINetworkError
 )
+from .request_scheduler import RequestLane, RequestScheduler
 
 logger = structlog.get_logger(__name__)
 
@@ -47,33 +49,84 @@ class TradingSession:
     two_fa_verified: bool = False
 
 
+@dataclass
+class SSIResult:
+    """Parsed SSI API response, decoded once from the HTTP body"""
+    success: bool
+    status: int
+    message: str = ""
+    data: Any = None
+    lane: RequestLane = RequestLane.QUERY
+    elapsed_ms: float = 0.0
+    
+    @property
+    def order_id(self) -> Optional[str]:
+        """SSI order ID for order entry responses"""
+        if isinstance(self.data, dict):
+            return self.data.get("orderID")
+        return None
+    
+    @classmethod
+    def from_payload(
+        cls, 
+        payload: Dict[str, Any], 
+        lane: RequestLane, 
+        elapsed_ms: float
+    ) -> "SSIResult":
+        """Build a result from SSI's {status, message, data} envelope"""
+        status = payload.get("status", 200)
+        try:
+            status = int(status)
+        except (TypeError, ValueError):
+            status = 200
+        return cls(
+            success=bool(payload.get("success", status == 200)),
+            status=status,
+            message=payload.get("message", ""),
+            data=payload.get("data"),
+            lane=lane,
+            elapsed_ms=elapsed_ms
+        )
+
+
 class SSIFastConnectClient:
     """
     Enhanced SSI FastConnect API client with comprehensive features:
     - Automatic token refresh
     - Rate limiting compliance
-    - Circuit breaker pattern
+    - Per-endpoint circuit breakers
     - Comprehensive error handling
     - Request/response logging
+    - Separate connection pools and priority lanes, so order entry,
+      modify and cancel never queue behind account queries
     """
     
     def __init__(self, credentials: SSICredentials = None):
         self.credentials = credentials or self._load_credentials()
         self.base_url = settings.fc_trading_url
         self.session: Optional[TradingSession] = None
-        self.http_client: Optional[httpx.AsyncClient] = None
-        
-        # Rate limiting
-        self.last_request_time = 0
-        self.request_count = 0
-        self.rate_limit_window = 60  # 1 minute
-        self.max_requests_per_window = 100
+        self.http_clients: Dict[RequestLane, httpx.AsyncClient] = {}
+        self.scheduler = RequestScheduler(
+            rate_limit=settings.ssi_rate_limit_requests,
+            rate_window=settings.ssi_rate_limit_window,
+            max_in_flight=settings.ssi_max_in_flight,
+            query_max_in_flight=settings.ssi_query_max_in_flight,
+            class_shares={
+                RequestLane.CANCEL: 1.0,
+                RequestLane.ORDER: settings.ssi_order_rate_share,
+                RequestLane.QUERY: settings.ssi_query_rate_share,
+            },
+            account_share=settings.ssi_account_rate_share,
+            deadlines={
+                RequestLane.CANCEL: settings.ssi_cancel_deadline,
+                RequestLane.ORDER: settings.ssi_order_deadline,
+                RequestLane.QUERY: settings.ssi_query_deadline,
+            }
+        )
+        self._token_lock = asyncio.Lock()
         
-        # Circuit breaker
-        self.failure_count = 0
-        self.circuit_open = False
-        self.circuit_open_time = None
-        self.circuit_timeout = 60  # 1 minute
+        # Circuit breakers per endpoint, so queries failing never block order entry
+        self.circuit_breakers = CircuitBreakerRegistry(BreakerPolicy.from_settings(settings))
         
         self._init_http_client()
     
@@ -87,24 +140,40 @@ class SSIFastConnectClient:
         )
     
     def _init_http_client(self):
-        """Initialize HTTP client with proper settings"""
-        timeout = httpx.Timeout(30.0, connect=10.0)
-        limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
+        """Initialize one pooled HTTP client per lane"""
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "User-Agent": f"TradingSystem/1.0.0 (FastAPI)"
+        }
+        pools = {
+            RequestLane.ORDER: (settings.ssi_order_pool_size, settings.ssi_order_timeout),
+            RequestLane.QUERY: (settings.ssi_query_pool_size, float(settings.http_timeout)),
+        }
         
-        self.http_client = httpx.AsyncClient(
-            timeout=timeout,
-            limits=limits,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "User-Agent": f"TradingSystem/1.0.0 (FastAPI)"
-            }
-        )
+        for lane, (pool_size, timeout) in pools.items():
+            self.http_clients[lane] = httpx.AsyncClient(
+                timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+                limits=httpx.Limits(max_keepalive_connections=pool_size, max_connections=pool_size),
+                headers=headers
+            )
+        # Cancels ride the order pool; the scheduler already admits them first
+        self.http_clients[RequestLane.CANCEL] = self.http_clients[RequestLane.ORDER]
+    
+    @property
+    def http_client(self) -> Optional[httpx.AsyncClient]:
+        """Order-lane client (kept for callers that expect a single client)"""
+        return self.http_clients.get(RequestLane.ORDER)
     
     async def close(self):
-        """Close HTTP client"""
-        if self.http_client:
-            await self.http_client.aclose()
+        """Close HTTP clients"""
+        for client in set(self.http_clients.values()):
+            await client.aclose()
+        self.http_clients.clear()
+    
+    def get_lane_status(self) -> Dict[str, Any]:
+        """In-flight, queueing and budget statistics per operation class"""
+        return self.scheduler.get_status()
     
     def _generate_signature(self, method: str, url: str, body: str = "") -> str:
         """Generate X-Signature for API authentication"""
@@ -128,84 +197,56 @@ class SSIFastConnectClient:
             logger.error("Failed to generate signature", error=str(e))
             raise SSIAuthenticationError(f"Signature generation failed: {str(e)}")
     
-    def _check_rate_limit(self):
-        """Check if request is within rate limits"""
-        current_time = time.time()
-        
-        # Reset counter if window has passed
-        if current_time - self.last_request_time > self.rate_limit_window:
-            self.request_count = 0
-        
-        # Check if rate limit exceeded
-        if self.request_count >= self.max_requests_per_window:
-            raise SSIRateLimitError("Rate limit exceeded")
-        
-        self.request_count += 1
-        self.last_request_time = current_time
-    
-    def _check_circuit_breaker(self):
-        """Check circuit breaker status"""
-        if not self.circuit_open:
-            return
-        
-        # Check if circuit should be closed
-        if time.time() - self.circuit_open_time > self.circuit_timeout:
-            self.circuit_open = False
-            self.failure_count = 0
-            logger.info("Circuit breaker closed")
-        else:
-            raise SSINetworkError("Circuit breaker is open")
-    
-    def _record_success(self):
-        """Record successful request"""
-        self.failure_count = 0
-        if self.circuit_open:
-            self.circuit_open = False
-            logger.info("Circuit breaker closed after successful request")
-    
-    def _record_failure(self):
-        """Record failed request"""
-        self.failure_count += 1
-        
-        # Open circuit if too many failures
-        if self.failure_count >= 5:
-            self.circuit_open = True
-            self.circuit_open_time = time.time()
-            logger.warning("Circuit breaker opened due to failures")
-    
     async def _make_request(
         self, 
         method: str, 
         endpoint: str, 
         data: Dict[str, Any] = None,
-        require_auth: bool = True
-    ) -> Dict[str, Any]:
-        """Make authenticated API request with error handling"""
+        require_auth: bool = True,
+        lane: RequestLane = RequestLane.QUERY,
+        account: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> SSIResult:
+        """Make authenticated API request with error handling
         
-        # Check preconditions
-        self._check_rate_limit()
-        self._check_circuit_breaker()
+        `timeout` overrides how long the request may queue for admission.
+        """
         
-        url = urljoin(self.base_url, endpoint)
-        headers = {
-            "ConsumerID": self.credentials.consumer_id,
-            "ConsumerSecret": self.credentials.consumer_secret,
-        }
-        
-        # Add authentication if required
-        if require_auth and self.session:
-            headers["Authorization"] = f"Bearer {self.session.access_token}"
-        
-        # Prepare body
-        body = json.dumps(data) if data else ""
+        # Fail fast while this endpoint's breaker is open
+        breaker = self.circuit_breakers.get(endpoint)
+        try:
+            permit = breaker.acquire()
+        except CircuitOpenError as e:
+            raise SSINetworkError(str(e), details={"endpoint": endpoint, "retry_after": round(e.retry_after, 3)})
         
-        # Generate signature
-        headers["X-Signature"] = self._generate_signature(method, url, body)
+        try:
+            url = urljoin(self.base_url, endpoint)
+            headers = {
+                "ConsumerID": self.credentials.consumer_id,
+                "ConsumerSecret": self.credentials.consumer_secret,
+            }
+            
+            # Add authentication if required
+            if require_auth and self.session:
+                headers["Authorization"] = f"Bearer {self.session.access_token}"
+            
+            # Prepare body
+            body = json.dumps(data) if data else ""
+            
+            # Generate signature
+            headers["X-Signature"] = self._generate_signature(method, url, body)
+            
+            # Queues (by operation class and account budget) rather than failing
+            await self.scheduler.acquire(lane, account or (data or {}).get("account"), timeout)
+        except BaseException:
+            breaker.release(permit)
+            raise
         
+        started = time.perf_counter()
         try:
-            logger.info("Making API request", method=method, endpoint=endpoint)
+            logger.info("Making API request", method=method, endpoint=endpoint, lane=lane.name)
             
-            response = await self.http_client.request(
+            response = await self.http_clients[lane].request(
                 method=method,
                 url=url,
                 content=body,
@@ -214,19 +255,28 @@ class SSIFastConnectClient:
             
             # Handle response
             response.raise_for_status()
-            result = response.json()
+            result = SSIResult.from_payload(
+                response.json(), 
+                lane, 
+                (time.perf_counter() - started) * 1000
+            )
             
-            self._record_success()
+            breaker.record_success(permit, time.perf_counter() - started)
             
             logger.info("API request successful", 
                        method=method, 
                        endpoint=endpoint,
-                       status_code=response.status_code)
+                       status_code=response.status_code,
+                       elapsed_ms=round(result.elapsed_ms, 2))
             
             return result
             
         except httpx.HTTPStatusError as e:
-            self._record_failure()
+            # Only server errors count against the endpoint; 4xx are about the request
+            if e.response.status_code >= 500:
+                breaker.record_failure(permit, time.perf_counter() - started)
+            else:
+                breaker.release(permit)
             
             if e.response.status_code == 401:
                 raise SSIAuthenticationError("Authentication failed")
@@ -236,13 +286,32 @@ class SSIFastConnectClient:
                 raise SSIAPIError(f"HTTP {e.response.status_code}: {e.response.text}")
                 
         except httpx.RequestError as e:
-            self._record_failure()
-            raise SSINetworkError(f"Network error: {str(e)}")
+            breaker.record_failure(permit, time.perf_counter() - started)
+            # Past the connect phase SSI may have received the request
+            raise SSINetworkError(f"Network error: {str(e)}", details={
+                "endpoint": endpoint,
+                "timed_out": isinstance(e, (httpx.ReadTimeout, httpx.WriteTimeout))
+            })
         
         except Exception as e:
-            self._record_failure()
+            breaker.record_failure(permit, time.perf_counter() - started)
             logger.error("Unexpected error in API request", error=str(e))
             raise SSIAPIError(f"Unexpected error: {str(e)}")
+        
+        except BaseException:
+            breaker.release(permit)
+            raise
+        
+        finally:
+            self.scheduler.release(lane)
+    
+    async def _ensure_session(self):
+        """Obtain an access token once, even when many requests race for it"""
+        if self.session:
+            return
+        async with self._token_lock:
+            if not self.session:
+                await self.get_access_token()
     
     async def get_access_token(self) -> str:
         """Get access token for API authentication"""
@@ -250,11 +319,12 @@ class SSIFastConnectClient:
             result = await self._make_request(
                 method="POST",
                 endpoint="Trading/AccessToken",
-                require_auth=False
+                require_auth=False,
+                lane=RequestLane.ORDER
             )
             
-            if result.get("success"):
-                access_token = result.get("data", {}).get("accessToken")
+            if result.success and isinstance(result.data, dict):
+                access_token = result.data.get("accessToken")
                 if access_token:
                     # Store session
                     self.session = TradingSession(
@@ -270,11 +340,10 @@ class SSIFastConnectClient:
             logger.error("Failed to get access token", error=str(e))
             raise
     
-    async def get_otp(self, account: str) -> Dict[str, Any]:
+    async def get_otp(self, account: str) -> SSIResult:
         """Request OTP for 2FA authentication"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             data = {
                 "account": account,
@@ -284,7 +353,8 @@ class SSIFastConnectClient:
             result = await self._make_request(
                 method="POST",
                 endpoint="Trading/GetOTP",
-                data=data
+                data=data,
+                lane=RequestLane.ORDER
             )
             
             logger.info("OTP requested successfully", account=account)
@@ -294,16 +364,50 @@ class SSIFastConnectClient:
             logger.error("Failed to request OTP", account=account, error=str(e))
             raise
     
-    async def place_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def verify_code(self, account: str, code: str) -> SSIResult:
+        """Complete 2FA: exchange the OTP/PIN for a verified access token on this session"""
+        try:
+            result = await self._make_request(
+                method="POST",
+                endpoint="Trading/AccessToken",
+                data={
+                    "twoFactorType": settings.two_fa_type,
+                    "code": code,
+                    "isSave": False
+                },
+                require_auth=False,
+                lane=RequestLane.ORDER,
+                account=account
+            )
+            
+            access_token = result.data.get("accessToken") if result.success and isinstance(result.data, dict) else None
+            if not access_token:
+                raise SSIAuthenticationError(result.message or "Verification code rejected")
+            
+            self.session = TradingSession(
+                access_token=access_token,
+                expires_at=datetime.now() + timedelta(hours=1),
+                account=account,
+                two_fa_verified=True
+            )
+            logger.info("2FA verification successful", account=account)
+            return result
+            
+        except Exception as e:
+            logger.error("Failed to verify 2FA code", account=account, error=str(e))
+            raise
+    
+    async def place_order(self, order_data: Dict[str, Any], timeout: Optional[float] = None) -> SSIResult:
         """Place a new order"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             result = await self._make_request(
                 method="POST",
                 endpoint="Trading/NewOrder",
-                data=order_data
+                data=order_data,
+                lane=RequestLane.ORDER,
+                timeout=timeout
             )
             
             logger.info("Order placed successfully", 
@@ -317,16 +421,16 @@ class SSIFastConnectClient:
                         error=str(e))
             raise
     
-    async def modify_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def modify_order(self, order_data: Dict[str, Any]) -> SSIResult:
         """Modify existing order"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             result = await self._make_request(
                 method="POST",
                 endpoint="Trading/ModifyOrder",
-                data=order_data
+                data=order_data,
+                lane=RequestLane.ORDER
             )
             
             logger.info("Order modified successfully", 
@@ -339,16 +443,17 @@ class SSIFastConnectClient:
                         error=str(e))
             raise
     
-    async def cancel_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def cancel_order(self, order_data: Dict[str, Any], timeout: Optional[float] = None) -> SSIResult:
         """Cancel existing order"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             result = await self._make_request(
                 method="POST",
                 endpoint="Trading/CancelOrder",
-                data=order_data
+                data=order_data,
+                lane=RequestLane.CANCEL,
+                timeout=timeout
             )
             
             logger.info("Order cancelled successfully", 
@@ -361,11 +466,10 @@ class SSIFastConnectClient:
                         error=str(e))
             raise
     
-    async def get_account_balance(self, account: str) -> Dict[str, Any]:
+    async def get_account_balance(self, account: str) -> SSIResult:
         """Get account balance information"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             data = {"account": account}
             
@@ -383,11 +487,10 @@ class SSIFastConnectClient:
                         account=account, error=str(e))
             raise
     
-    async def get_portfolio(self, account: str) -> Dict[str, Any]:
+    async def get_portfolio(self, account: str) -> SSIResult:
         """Get portfolio positions"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             data = {
                 "account": account,
@@ -413,11 +516,10 @@ class SSIFastConnectClient:
         account: str, 
         instrument_id: str, 
         price: float = 0
-    ) -> Dict[str, Any]:
+    ) -> SSIResult:
         """Get maximum tradeable quantity"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             data = {
                 "account": account,
@@ -443,16 +545,33 @@ class SSIFastConnectClient:
                         error=str(e))
             raise
     
+    async def get_order_book(self, account: str) -> SSIResult:
+        """Get today's orders for an account"""
+        try:
+            await self._ensure_session()
+            
+            result = await self._make_request(
+                method="GET",
+                endpoint="Trading/orderBook",
+                data={"account": account}
+            )
+            
+            logger.debug("Order book retrieved", account=account)
+            return result
+            
+        except Exception as e:
+            logger.error("Failed to get order book", account=account, error=str(e))
+            raise
+    
     async def get_order_history(
         self, 
         account: str, 
         start_date: str, 
         end_date: str
-    ) -> Dict[str, Any]:
+    ) -> SSIResult:
         """Get order history for date range"""
         try:
-            if not self.session:
-                await self.get_access_token()
+            await self._ensure_session()
             
             data = {
                 "account": account,
@@ -2,160 +2,61 @@
 Trading Session Service - Manages trading session information and rules.
 """
 
-from datetime import datetime, time, timedelta
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from ..utils.exchange_calendar import VN_TZ, Session, SessionInterval, get_exchange_calendar
 
 from ..models import TradingSession, TradingSessionInfo, Market
 
 
+# Display names and types for schedule entries
+_SCHEDULE_LABELS = {
+    TradingSession.MORNING_AUCTION: ("Morning Auction", "AUCTION"),
+    TradingSession.CONTINUOUS_MORNING: ("Continuous Morning", "CONTINUOUS"),
+    TradingSession.LUNCH_BREAK: ("Lunch Break", "BREAK"),
+    TradingSession.CONTINUOUS_AFTERNOON: ("Continuous Afternoon", "CONTINUOUS"),
+    TradingSession.CLOSING_AUCTION: ("Closing Auction", "AUCTION"),
+    TradingSession.POST_MARKET: ("Post Market", "POST_MARKET"),
+}
+
+# Last interval seen per exchange and its TradingSessionInfo; intervals are shared
+# immutable objects, so an identity check is enough to reuse the model
+_session_info_cache: Dict[str, Tuple[SessionInterval, TradingSessionInfo]] = {}
+
+
+def get_session_info(market: Market = Market.HOSE, at: Optional[datetime] = None) -> TradingSessionInfo:
+    """Trading session for a market at `at` (default now) from the shared exchange calendar."""
+    interval = get_exchange_calendar().session_at(market.value, at)
+    cached = _session_info_cache.get(market.value)
+    if cached is not None and cached[0] is interval:
+        return cached[1]
+
+    info = TradingSessionInfo(
+        current_session=TradingSession(interval.session.value),
+        next_session=TradingSession(interval.next_session.value),
+        session_start_time=interval.start_time,
+        session_end_time=interval.end_time,
+        market_status=interval.market_status,
+        can_place_orders=interval.can_place_orders,
+        can_modify_orders=interval.can_modify_orders,
+        can_cancel_orders=interval.can_cancel_orders
+    )
+    _session_info_cache[market.value] = (interval, info)
+    return info
+
+
 class TradingSessionService:
     """Service for managing trading session information."""
     
-    def __init__(self):
+    def __init__(self, market: Market = Market.HOSE):
         """Initialize trading session service."""
-        self.session_cache: Optional[TradingSessionInfo] = None
-        self.cache_expiry: Optional[datetime] = None
-        self.cache_duration = timedelta(minutes=1)  # Cache for 1 minute
+        self.market = market
+        self.calendar = get_exchange_calendar()
     
     async def get_current_session(self) -> Dict[str, any]:
         """Get current trading session information."""
-        
-        # Check cache
-        if (self.session_cache and 
-            self.cache_expiry and 
-            datetime.now() < self.cache_expiry):
-            return self._session_to_dict(self.session_cache)
-        
-        # Calculate current session
-        session_info = await self._calculate_current_session()
-        
-        # Update cache
-        self.session_cache = session_info
-        self.cache_expiry = datetime.now() + self.cache_duration
-        
-        return self._session_to_dict(session_info)
-    
-    async def _calculate_current_session(self) -> TradingSessionInfo:
-        """Calculate current trading session based on Vietnam time."""
-        
-        now = datetime.now()
-        current_time = now.time()
-        
-        # Check if it's a weekend
-        if now.weekday() >= 5:  # Saturday (5) or Sunday (6)
-            return TradingSessionInfo(
-                current_session=TradingSession.CLOSED,
-                next_session=TradingSession.MORNING_AUCTION,
-                session_start_time=None,
-                session_end_time=None,
-                market_status="WEEKEND",
-                can_place_orders=False,
-                can_modify_orders=False,
-                can_cancel_orders=False
-            )
-        
-        # Define trading session times
-        sessions = [
-            {
-                "session": TradingSession.MORNING_AUCTION,
-                "start": time(9, 0),
-                "end": time(9, 15),
-                "next_session": TradingSession.CONTINUOUS_MORNING,
-                "market_status": "AUCTION",
-                "can_place_orders": True,
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            },
-            {
-                "session": TradingSession.CONTINUOUS_MORNING,
-                "start": time(9, 15),
-                "end": time(11, 30),
-                "next_session": TradingSession.LUNCH_BREAK,
-                "market_status": "OPEN",
-                "can_place_orders": True,
-                "can_modify_orders": True,
-                "can_cancel_orders": True
-            },
-            {
-                "session": TradingSession.LUNCH_BREAK,
-                "start": time(11, 30),
-                "end": time(13, 0),
-                "next_session": TradingSession.CONTINUOUS_AFTERNOON,
-                "market_status": "BREAK",
-                "can_place_orders": False,
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            },
-            {
-                "session": TradingSession.CONTINUOUS_AFTERNOON,
-                "start": time(13, 0),
-                "end": time(14, 30),
-                "next_session": TradingSession.CLOSING_AUCTION,
-                "market_status": "OPEN",
-                "can_place_orders": True,
-                "can_modify_orders": True,
-                "can_cancel_orders": True
-            },
-            {
-                "session": TradingSession.CLOSING_AUCTION,
-                "start": time(14, 30),
-                "end": time(14, 45),
-                "next_session": TradingSession.POST_MARKET,
-                "market_status": "CLOSING",
-                "can_place_orders": True,
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            },
-            {
-                "session": TradingSession.POST_MARKET,
-                "start": time(14, 45),
-                "end": time(15, 0),
-                "next_session": TradingSession.CLOSED,
-                "market_status": "POST_TRADING",
-                "can_place_orders": True,  # PLO orders only
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            }
-        ]
-        
-        # Find current session
-        for session_info in sessions:
-            start_time = session_info["start"]
-            end_time = session_info["end"]
-            
-            if start_time <= current_time < end_time:
-                return TradingSessionInfo(
-                    current_session=session_info["session"],
-                    next_session=session_info["next_session"],
-                    session_start_time=now.replace(
-                        hour=start_time.hour,
-                        minute=start_time.minute,
-                        second=0,
-                        microsecond=0
-                    ),
-                    session_end_time=now.replace(
-                        hour=end_time.hour,
-                        minute=end_time.minute,
-                        second=0,
-                        microsecond=0
-                    ),
-                    market_status=session_info["market_status"],
-                    can_place_orders=session_info["can_place_orders"],
-                    can_modify_orders=session_info["can_modify_orders"],
-                    can_cancel_orders=session_info["can_cancel_orders"]
-                )
-        
-        # Outside trading hours
-        return TradingSessionInfo(
-            current_session=TradingSession.CLOSED,
-            next_session=TradingSession.MORNING_AUCTION,
-            session_start_time=None,
-            session_end_time=None,
-            market_status="CLOSED",
-            can_place_orders=False,
-            can_modify_orders=False,
-            can_cancel_orders=False
-        )
+        return self._session_to_dict(get_session_info(self.market))
     
     def _session_to_dict(self, session_info: TradingSessionInfo) -> Dict[str, any]:
         """Convert TradingSessionInfo to dictionary."""
@@ -174,7 +75,7 @@ class TradingSessionService:
         """Get market schedule for a specific date."""
         
         if date is None:
-            date = datetime.now()
+            date = datetime.now(VN_TZ)
         
         # Check if it's a weekend
         if date.weekday() >= 5:
@@ -185,9 +86,8 @@ class TradingSessionService:
                 "sessions": []
             }
         
-        # Check if it's a public holiday (simplified)
-        holidays = await self._get_public_holidays(date.year)
-        if date.date() in holidays:
+        # Check if it's a public holiday
+        if not self.calendar.is_trading_day(date):
             return {
                 "date": date.strftime("%Y-%m-%d"),
                 "is_trading_day": False,
@@ -195,63 +95,20 @@ class TradingSessionService:
                 "sessions": []
             }
         
-        # Return normal trading schedule
-        sessions = [
-            {
-                "name": "Morning Auction",
-                "type": "AUCTION",
-                "start_time": "09:00:00",
-                "end_time": "09:15:00",
-                "can_place_orders": True,
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            },
-            {
-                "name": "Continuous Morning",
-                "type": "CONTINUOUS",
-                "start_time": "09:15:00",
-                "end_time": "11:30:00",
-                "can_place_orders": True,
-                "can_modify_orders": True,
-                "can_cancel_orders": True
-            },
-            {
-                "name": "Lunch Break",
-                "type": "BREAK",
-                "start_time": "11:30:00",
-                "end_time": "13:00:00",
-                "can_place_orders": False,
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            },
-            {
-                "name": "Continuous Afternoon",
-                "type": "CONTINUOUS",
-                "start_time": "13:00:00",
-                "end_time": "14:30:00",
-                "can_place_orders": True,
-                "can_modify_orders": True,
-                "can_cancel_orders": True
-            },
-            {
-                "name": "Closing Auction",
-                "type": "AUCTION",
-                "start_time": "14:30:00",
-                "end_time": "14:45:00",
-                "can_place_orders": True,
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            },
-            {
-                "name": "Post Market",
-                "type": "POST_MARKET",
-                "start_time": "14:45:00",
-                "end_time": "15:00:00",
-                "can_place_orders": True,  # PLO only
-                "can_modify_orders": False,
-                "can_cancel_orders": False
-            }
-        ]
+        sessions = []
+        for interval in self.calendar.schedule(self.market.value, date):
+            label = _SCHEDULE_LABELS.get(TradingSession(interval.session.value))
+            if label is None:
+                continue
+            sessions.append({
+                "name": label[0],
+                "type": label[1],
+                "start_time": interval.start_time.strftime("%H:%M:%S"),
+                "end_time": interval.end_time.strftime("%H:%M:%S"),
+                "can_place_orders": interval.can_place_orders,
+                "can_modify_orders": interval.can_modify_orders,
+                "can_cancel_orders": interval.can_cancel_orders
+            })
         
         return {
             "date": date.strftime("%Y-%m-%d"),
@@ -261,35 +118,8 @@ class TradingSessionService:
         }
     
     async def _get_public_holidays(self, year: int) -> set:
-        """Get public holidays for Vietnam (simplified)."""
-        
-        # This is a simplified list - in production, this should be
-        # fetched from a holiday calendar service or database
-        holidays = set()
-        
-        # New Year's Day
-        holidays.add(datetime(year, 1, 1).date())
-        
-        # Vietnamese New Year (Tet) - approximate dates
-        # This should be calculated properly based on lunar calendar
-        if year == 2025:
-            # Tet 2025: January 28 - February 3
-            for day in range(28, 32):
-                holidays.add(datetime(year, 1, day).date())
-            for day in range(1, 4):
-                holidays.add(datetime(year, 2, day).date())
-        
-        # Hung Kings' Day (10th day of 3rd lunar month)
-        # Liberation Day (April 30)
-        holidays.add(datetime(year, 4, 30).date())
-        
-        # International Workers' Day (May 1)
-        holidays.add(datetime(year, 5, 1).date())
-        
-        # National Day (September 2)
-        holidays.add(datetime(year, 9, 2).date())
-        
-        return holidays
+        """Get market holidays for Vietnam, including lunar-calendar dates."""
+        return self.calendar.holidays(year)
     
     async def is_trading_allowed(
         self, 
@@ -389,60 +219,24 @@ class TradingSessionService:
         """Get information about the next trading session."""
         
         current_session = await self.get_current_session()
+        next_interval = self.calendar.next_session_start(self.market.value)
         
-        if current_session["next_session"]:
-            return {
-                "next_session": current_session["next_session"],
-                "estimated_start_time": self._get_next_session_start_time(current_session["next_session"]),
-                "current_session_ends_at": current_session["session_end_time"]
-            }
-        
-        # If no next session today, return next trading day
-        next_trading_day = await self._get_next_trading_day()
-        
-        return {
-            "next_session": "MORNING_AUCTION",
-            "estimated_start_time": f"{next_trading_day}T09:00:00",
-            "next_trading_date": next_trading_day
+        result = {
+            "next_session": next_interval.session.value,
+            "estimated_start_time": next_interval.start_time.isoformat(),
+            "current_session_ends_at": current_session["session_end_time"]
         }
+        if next_interval.start_time.date() != datetime.now(VN_TZ).date():
+            result["next_trading_date"] = next_interval.start_time.strftime("%Y-%m-%d")
+        return result
     
-    def _get_next_session_start_time(self, next_session: str) -> str:
-        """Get estimated start time for next session."""
-        
-        session_times = {
-            "MORNING_AUCTION": "09:00:00",
-            "CONTINUOUS_MORNING": "09:15:00",
-            "LUNCH_BREAK": "11:30:00",
-            "CONTINUOUS_AFTERNOON": "13:00:00",
-            "CLOSING_AUCTION": "14:30:00",
-            "POST_MARKET": "14:45:00",
-            "CLOSED": None
-        }
-        
-        today = datetime.now().strftime("%Y-%m-%d")
-        time_str = session_times.get(next_session)
-        
-        if time_str:
-            return f"{today}T{time_str}"
-        
-        return None
+    def _get_next_session_start_time(self, next_session: str) -> Optional[str]:
+        """Get start time of the next occurrence of a session."""
+        if next_session == TradingSession.CLOSED.value:
+            return None
+        interval = self.calendar.next_session_start(self.market.value, session=Session(next_session))
+        return interval.start_time.isoformat()
     
     async def _get_next_trading_day(self) -> str:
         """Get next trading day (skipping weekends and holidays)."""
-        
-        current_date = datetime.now().date()
-        next_date = current_date + timedelta(days=1)
-        
-        # Skip weekends
-        while next_date.weekday() >= 5:  # Saturday or Sunday
-            next_date += timedelta(days=1)
-        
-        # Skip holidays (simplified check)
-        holidays = await self._get_public_holidays(next_date.year)
-        while next_date in holidays:
-            next_date += timedelta(days=1)
-            # Skip weekends again if holiday skip leads to weekend
-            while next_date.weekday() >= 5:
-                next_date += timedelta(days=1)
-        
-        return next_date.strftime("%Y-%m-%d")
+        return self.calendar.next_trading_day().strftime("%Y-%m-%d")
@@ -0,0 +1,355 @@
+"""
+Per-endpoint circuit breakers for upstream APIs (SSI FastConnect).
+
+Each endpoint gets its own breaker, so one failing API (e.g. market data)
+is cut off while the others keep flowing. A breaker trips on the error
+rate or slow-call rate over a sliding time window (once it has seen
+`minimum_calls`), or on a run of consecutive failures for low-traffic
+endpoints. While open, calls are rejected without touching the network;
+after `open_duration` a limited number of probes are let through and
+their outcome decides whether the breaker closes or opens again.
+
+Admission and outcome recording are O(1) and take a short lock, so a
+breaker can be shared by coroutines and threads alike.
+
+Service images are built from their own directory only, so each service
+ships a copy of this file; tests/test_vendored_modules.py keeps the copies
+identical to this one.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Type, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BreakerState(str, Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitOpenError(Exception):
+    """Call rejected because the endpoint's breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit breaker for {name} is open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """Thresholds shared by the breakers of a registry; durations in seconds"""
+    failure_rate: float = 0.5
+    slow_call_duration: float = 0.0  # 0 disables slow-call tracking
+    slow_call_rate: float = 0.8
+    window: float = 30.0
+    buckets: int = 10
+    minimum_calls: int = 10
+    consecutive_failures: int = 5
+    open_duration: float = 60.0
+    half_open_probes: int = 1
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "BreakerPolicy":
+        """Policy from a service's `circuit_breaker_*` settings
+
+        `circuit_breaker_failure_threshold` is the consecutive-failure
+        threshold, `circuit_breaker_timeout` the open duration and
+        `circuit_breaker_slow_call_ms` the slow-call latency; any setting a
+        service does not define keeps its default.
+        """
+        renamed = {
+            "consecutive_failures": "circuit_breaker_failure_threshold",
+            "open_duration": "circuit_breaker_timeout",
+        }
+        values = {}
+        for field in fields(cls):
+            name = renamed.get(field.name, f"circuit_breaker_{field.name}")
+            if hasattr(settings, name):
+                values[field.name] = getattr(settings, name)
+        slow_ms = getattr(settings, "circuit_breaker_slow_call_ms", None)
+        if slow_ms is not None:
+            values["slow_call_duration"] = slow_ms / 1000
+        return cls(**values)
+
+
+class _Window:
+    """Call, failure and slow-call counts over the last `span` seconds, in buckets"""
+
+    __slots__ = ("width", "size", "calls", "failures", "slow", "total_calls",
+                 "total_failures", "total_slow", "_epoch")
+
+    def __init__(self, span: float, buckets: int):
+        self.size = max(1, buckets)
+        self.width = span / self.size
+        self.calls = [0] * self.size
+        self.failures = [0] * self.size
+        self.slow = [0] * self.size
+        self.total_calls = self.total_failures = self.total_slow = 0
+        self._epoch = 0
+
+    def add(self, now: float, failed: bool, slow: bool) -> None:
+        self.advance(now)
+        i = self._epoch % self.size
+        self.calls[i] += 1
+        self.total_calls += 1
+        if failed:
+            self.failures[i] += 1
+            self.total_failures += 1
+        if slow:
+            self.slow[i] += 1
+            self.total_slow += 1
+
+    def advance(self, now: float) -> None:
+        """Drop buckets that have slid out of the window"""
+        epoch = int(now / self.width)
+        if epoch == self._epoch:
+            return
+        for step in range(1, min(epoch - self._epoch, self.size) + 1):
+            i = (self._epoch + step) % self.size
+            self.total_calls -= self.calls[i]
+            self.total_failures -= self.failures[i]
+            self.total_slow -= self.slow[i]
+            self.calls[i] = self.failures[i] = self.slow[i] = 0
+        self._epoch = epoch
+
+    def clear(self) -> None:
+        for i in range(self.size):
+            self.calls[i] = self.failures[i] = self.slow[i] = 0
+        self.total_calls = self.total_failures = self.total_slow = 0
+
+
+class CircuitBreaker:
+    """
+    Breaker for one endpoint.
+
+    `acquire()` returns a permit (or raises CircuitOpenError) and every
+    permit must be settled with `record_success`, `record_failure` or, when
+    the outcome says nothing about the endpoint (cancelled, client error),
+    `release`. Outcomes of calls admitted before the last state change are
+    counted in the metrics but do not move the breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        policy: BreakerPolicy,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.policy = policy
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._generation = 0
+        self._opened_at = 0.0
+        self._window = _Window(policy.window, policy.buckets)
+        self._consecutive_failures = 0
+        self._probes = 0
+        self._probe_successes = 0
+        self._latencies: Deque[float] = deque(maxlen=256)
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> BreakerState:
+        return self._state
+
+    def acquire(self) -> int:
+        """Admit a call or raise CircuitOpenError"""
+        with self._lock:
+            if self._state is BreakerState.CLOSED:
+                return self._generation
+            now = self._clock()
+            if self._state is BreakerState.OPEN:
+                remaining = self._opened_at + self.policy.open_duration - now
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(BreakerState.HALF_OPEN, now)
+            if self._probes >= self.policy.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._probes += 1
+            return self._generation
+
+    def record_success(self, permit: int, elapsed: float) -> None:
+        slow = 0 < self.policy.slow_call_duration <= elapsed
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(elapsed)
+            if permit != self._generation:
+                return
+            if self._state is BreakerState.HALF_OPEN:
+                self._settle_probe(not slow)
+                return
+            self._consecutive_failures = 0
+            now = self._clock()
+            self._window.add(now, False, slow)
+            if slow:
+                self._check_rates(now)
+
+    def record_failure(self, permit: int, elapsed: Optional[float] = None) -> None:
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            if elapsed is not None:
+                self._latencies.append(elapsed)
+            if permit != self._generation:
+                return
+            if self._state is BreakerState.HALF_OPEN:
+                self._settle_probe(False)
+                return
+            now = self._clock()
+            self._window.add(now, True, False)
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.policy.consecutive_failures:
+                self._transition(BreakerState.OPEN, now, f"{self._consecutive_failures} consecutive failures")
+            else:
+                self._check_rates(now)
+
+    def release(self, permit: int) -> None:
+        """Give back a permit without an outcome"""
+        with self._lock:
+            if permit == self._generation and self._state is BreakerState.HALF_OPEN:
+                self._probes -= 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._transition(BreakerState.CLOSED, self._clock(), "reset")
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+        **kwargs: Any
+    ) -> T:
+        """Await `func` under the breaker; `failure_types` count against the endpoint"""
+        permit = self.acquire()
+        started = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except failure_types:
+            self.record_failure(permit, time.perf_counter() - started)
+            raise
+        except BaseException:
+            self.release(permit)
+            raise
+        self.record_success(permit, time.perf_counter() - started)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._window.advance(self._clock())
+            window = self._window
+            latencies = sorted(self._latencies)
+            state = self._state
+            retry_after = None
+            if state is BreakerState.OPEN:
+                retry_after = max(0.0, self._opened_at + self.policy.open_duration - self._clock())
+            return {
+                "state": state.value,
+                "retry_after": retry_after,
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "window_calls": window.total_calls,
+                "window_failure_rate": window.total_failures / window.total_calls if window.total_calls else 0.0,
+                "window_slow_rate": window.total_slow / window.total_calls if window.total_calls else 0.0,
+                "latency_p50_ms": _quantile_ms(latencies, 0.5),
+                "latency_p99_ms": _quantile_ms(latencies, 0.99),
+            }
+
+    def _check_rates(self, now: float) -> None:
+        window = self._window
+        if window.total_calls < self.policy.minimum_calls:
+            return
+        failure_rate = window.total_failures / window.total_calls
+        if failure_rate >= self.policy.failure_rate:
+            self._transition(BreakerState.OPEN, now, f"failure rate {failure_rate:.0%}")
+            return
+        slow_rate = window.total_slow / window.total_calls
+        if self.policy.slow_call_duration > 0 and slow_rate >= self.policy.slow_call_rate:
+            self._transition(BreakerState.OPEN, now, f"slow call rate {slow_rate:.0%}")
+
+    def _settle_probe(self, ok: bool) -> None:
+        now = self._clock()
+        if not ok:
+            self._transition(BreakerState.OPEN, now, "probe failed")
+            return
+        self._probe_successes += 1
+        if self._probe_successes >= self.policy.half_open_probes:
+            self._transition(BreakerState.CLOSED, now, "probes succeeded")
+
+    def _transition(self, state: BreakerState, now: float, reason: str = "") -> None:
+        previous = self._state
+        self._state = state
+        self._generation += 1
+        self._probes = self._probe_successes = 0
+        if state is BreakerState.OPEN:
+            self._opened_at = now
+            self.times_opened += 1
+            logger.warning("Circuit breaker for %s opened: %s", self.name, reason)
+        elif state is BreakerState.CLOSED:
+            self._consecutive_failures = 0
+            self._window.clear()
+            if previous is not BreakerState.CLOSED:
+                logger.info("Circuit breaker for %s closed: %s", self.name, reason)
+
+
+def _quantile_ms(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+
+
+class CircuitBreakerRegistry:
+    """Breakers keyed by endpoint, created on first use with a shared policy"""
+
+    def __init__(self, policy: BreakerPolicy, clock: Callable[[], float] = time.monotonic):
+        self.policy = policy
+        self._clock = clock
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = self._breakers[name] = CircuitBreaker(name, self.policy, self._clock)
+        return breaker
+
+    def open_endpoints(self) -> List[str]:
+        return [name for name, b in self._breakers.items() if b.state is not BreakerState.CLOSED]
+
+    def summary_state(self) -> str:
+        """OPEN when every endpoint seen is cut off, DEGRADED when some are, else CLOSED"""
+        open_count = len(self.open_endpoints())
+        if not open_count:
+            return BreakerState.CLOSED.value
+        if open_count == len(self._breakers):
+            return BreakerState.OPEN.value
+        return "DEGRADED"
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.metrics() for name, breaker in list(self._breakers.items())}
+
+    def reset(self) -> None:
+        for breaker in list(self._breakers.values()):
+            breaker.reset()
@@ -15,6 +15,8 @@ from ..models import (
 )
 from ..utils.exceptions import TradingSessionError, ValidationError
 
+from .exchange_calendar import VN_TZ, Session, get_exchange_calendar
+
 
 class TradingRules:
     """Trading rules for Vietnamese exchanges"""
@@ -150,6 +152,17 @@ class TradingRules:
     }
 
 
+# Exchange calendar sessions mapped to the validator's session periods
+_CALENDAR_SESSIONS = {
+    Session.MORNING_AUCTION: TradingSessionEnum.OPENING_AUCTION,
+    Session.CONTINUOUS_MORNING: TradingSessionEnum.CONTINUOUS_1,
+    Session.LUNCH_BREAK: TradingSessionEnum.LUNCH_BREAK,
+    Session.CONTINUOUS_AFTERNOON: TradingSessionEnum.CONTINUOUS_2,
+    Session.CLOSING_AUCTION: TradingSessionEnum.CLOSING_AUCTION,
+    Session.POST_MARKET: TradingSessionEnum.AFTER_HOURS,
+}
+
+
 class TradingSessionValidator:
     """Validates trading operations based on current session and market rules"""
     
@@ -157,25 +170,26 @@ class TradingSessionValidator:
         self.rules = TradingRules()
     
     def get_current_session(self, market: MarketEnum, current_time: datetime = None) -> Tuple[TradingSessionEnum, Dict]:
-        """Get current trading session for the specified market"""
-        if current_time is None:
-            current_time = datetime.now()
-        
-        current_time_only = current_time.time()
+        """Get current trading session for the specified market
         
+        Naive `current_time` values are Vietnam local time; None means now.
+        """
         # Select appropriate sessions based on market
-        if market == MarketEnum.HOSE:
-            sessions = self.rules.HOSE_SESSIONS
-        elif market == MarketEnum.HNX:
+        if market == MarketEnum.HNX:
             sessions = self.rules.HNX_SESSIONS
         else:
             # Default to HOSE rules for other markets
             sessions = self.rules.HOSE_SESSIONS
         
-        # Find current session
-        for session_type, session_info in sessions.items():
-            if session_info["start"] <= current_time_only <= session_info["end"]:
-                return session_type, session_info
+        # Session from the shared exchange calendar (accounts for weekends and holidays)
+        exchange = market.value if market != MarketEnum.DERIVATIVE else MarketEnum.HOSE.value
+        interval = get_exchange_calendar().session_at(exchange, current_time)
+        session_type = _CALENDAR_SESSIONS.get(interval.session)
+        if session_type not in sessions and interval.is_trading:
+            # e.g. HOSE after the closing auction: only put-through trades
+            session_type = TradingSessionEnum.PUT_THROUGH
+        if session_type in sessions:
+            return session_type, sessions[session_type]
         
         # If no session found, market is closed
         return None, {"description": "Market closed", "allowed_orders": [], "can_cancel": False, "can_modify": False}
@@ -269,7 +283,7 @@ class TradingSessionValidator:
         session_type, session_info = self.get_current_session(market, current_time)
         
         if current_time is None:
-            current_time = datetime.now()
+            current_time = datetime.now(VN_TZ)
         
         return {
             "market": market.value,
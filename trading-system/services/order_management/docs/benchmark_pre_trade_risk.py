@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark pre-trade risk checks (checks/sec and per-check latency)
+
+Run from the service root: python docs/benchmark_pre_trade_risk.py
+"""
+
+import random
+import statistics
+import time
+
+from app.models import OrderSide
+from app.services.pre_trade_risk import PreTradeRiskEngine
+
+ACCOUNTS = 1_000
+SYMBOLS = 1_600
+CHECKS = 500_000
+
+
+def build_engine() -> PreTradeRiskEngine:
+    """Engine loaded with a realistic number of accounts and HOSE/HNX/UPCOM symbols"""
+    rng = random.Random(42)
+    engine = PreTradeRiskEngine(require_state=True)
+    symbols = [f"S{i:04d}" for i in range(SYMBOLS)]
+    for symbol in symbols:
+        reference = rng.randrange(5_000, 150_000, 100)
+        engine.set_symbol(symbol, reference, reference * 1.07, reference * 0.93)
+    for i in range(ACCOUNTS):
+        positions = {s: rng.randrange(100, 10_000, 100) for s in rng.sample(symbols, 20)}
+        engine.set_account(f"ACC{i:05d}", rng.uniform(1e8, 5e9), positions)
+    return engine
+
+
+def build_orders(engine: PreTradeRiskEngine):
+    rng = random.Random(7)
+    accounts = list(engine.accounts)
+    symbols = list(engine.symbols)
+    orders = []
+    for _ in range(CHECKS):
+        symbol = rng.choice(symbols)
+        reference = engine.symbols[symbol].reference
+        orders.append((
+            rng.choice(accounts),
+            symbol,
+            OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL,
+            rng.randrange(100, 5_000, 100),
+            round(reference * rng.uniform(0.95, 1.05), -2)
+        ))
+    return orders
+
+
+def main():
+    engine = build_engine()
+    orders = build_orders(engine)
+    check = engine.check
+
+    # Throughput
+    started = time.perf_counter()
+    rejected = 0
+    for account_id, symbol, side, quantity, price in orders:
+        if not check(account_id, symbol, side, quantity, price).passed:
+            rejected += 1
+    elapsed = time.perf_counter() - started
+
+    # Latency distribution on a sample
+    samples = []
+    for account_id, symbol, side, quantity, price in orders[:50_000]:
+        t0 = time.perf_counter_ns()
+        check(account_id, symbol, side, quantity, price)
+        samples.append(time.perf_counter_ns() - t0)
+    samples.sort()
+
+    # Check + reserve + fill lifecycle
+    lifecycle = orders[:100_000]
+    started_lifecycle = time.perf_counter()
+    for i, (account_id, symbol, side, quantity, price) in enumerate(lifecycle):
+        order_id = f"O{i}"
+        if engine.check(account_id, symbol, side, quantity, price).passed:
+            engine.restore(order_id, account_id, symbol, side, quantity, price)
+            engine.on_fill(order_id, quantity, price)
+    lifecycle_elapsed = time.perf_counter() - started_lifecycle
+
+    print(f"Checks:           {CHECKS:,} ({rejected:,} rejected)")
+    print(f"Throughput:       {CHECKS / elapsed:,.0f} checks/sec")
+    print(f"Latency p50:      {samples[len(samples) // 2] / 1000:.2f} us")
+    print(f"Latency p99:      {samples[int(len(samples) * 0.99)] / 1000:.2f} us")
+    print(f"Latency mean:     {statistics.fmean(samples) / 1000:.2f} us")
+    print(f"Check+reserve+fill: {len(lifecycle) / lifecycle_elapsed:,.0f} orders/sec")
+
+
+if __name__ == "__main__":
+    main()
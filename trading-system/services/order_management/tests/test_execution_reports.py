@@ -0,0 +1,116 @@
+"""
+Execution reports: fills keyed by SSI order ID, account discovery and reconciliation
+"""
+
+import pytest
+
+from app.models import NewOrderRequest, OrderSide, OrderStatus
+from app.services import execution_reports
+from app.services.execution_reports import ExecutionReportProcessor
+from app.services.order_stats import OrderStatsRollup
+from app.services.order_tracker import OrderTracker
+from app.services.pre_trade_risk import PreTradeRiskEngine
+from app.services.ssi_client import SSIResult
+
+
+def make_tracker() -> OrderTracker:
+    risk = PreTradeRiskEngine(fee_rate=0.0, require_state=True)
+    risk.set_account("A", 10_000_000, {})
+    risk.set_symbol("VCB", reference=90_000, ceiling=96_000, floor=84_000)
+    return OrderTracker(risk=risk, rollups=OrderStatsRollup())
+
+
+def place(tracker: OrderTracker, ssi_order_id: str, quantity: int = 100) -> None:
+    request = NewOrderRequest(
+        instrument_id="VCB", market="VN", buy_sell="B", order_type="LO",
+        price=90_000, quantity=quantity, account="A"
+    )
+    tracker.risk.check_and_reserve(request.request_id, "A", "VCB", OrderSide.BUY, quantity, 90_000)
+    tracker.risk.rekey(request.request_id, ssi_order_id)
+    tracker.record_placed(request, SSIResult(True, 200, data={"orderID": ssi_order_id}))
+
+
+def row(ssi_order_id, status, filled, avg=None):
+    return {"orderID": ssi_order_id, "orderStatus": status, "filledQty": filled, "avgPrice": avg,
+            "instrumentID": "VCB", "buySell": "B", "quantity": 100, "price": 90_000}
+
+
+@pytest.mark.asyncio
+async def test_order_book_fills_reach_orders_placed_through_the_api():
+    tracker = make_tracker()
+    place(tracker, "778899")
+    processor = ExecutionReportProcessor(tracker, accounts=["A"])
+
+    await processor.process_order_book("A", [row("778899", "PF", 40, 90_000)])
+    await processor.process_order_book("A", [row("778899", "PF", 40, 90_000)])
+    await processor.process_order_book("A", [row("778899", "FF", 100, 90_000)])
+
+    order = tracker.store.get_by_ssi_order_id("778899")
+    assert order["status"] == OrderStatus.FILLED
+    assert order["filled_quantity"] == 100
+    account = tracker.risk.get_account_status("A")
+    assert account["positions"] == {"VCB": 100}
+    assert account["reserved_cash"] == 0
+    assert account["cash"] == 1_000_000
+    assert processor.stats["fills"] == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_accounts_are_polled_at_the_idle_interval():
+    tracker = make_tracker()
+    tracker.risk.set_account("B", 0, {})
+    processor = ExecutionReportProcessor(tracker, accounts=["A"])
+    processor.idle_poll_interval = 10
+
+    assert processor.followed_accounts() == ["A", "B"]
+    assert processor._due(100.0) == ["A", "B"]
+    processor._polled_at = {"A": 100.0, "B": 100.0}
+    assert processor._due(101.0) == []
+
+    place(tracker, "1")
+    await processor.process_order_book("B", [row("2", "QU", 0)])
+    assert processor._due(101.0) == ["A", "B"]
+
+
+class FakeClient:
+    async def get_portfolio(self, account):
+        return SSIResult(True, 200, data={"stockPositions": [{"instrumentID": "FPT", "onHand": 500}]})
+
+    async def get_account_balance(self, account):
+        return SSIResult(True, 200, data={"cashBal": 2_000_000})
+
+
+@pytest.mark.asyncio
+async def test_reconcile_loads_followed_accounts_with_no_risk_state(monkeypatch):
+    async def get_client():
+        return FakeClient()
+
+    monkeypatch.setattr(execution_reports, "get_ssi_client", get_client)
+    tracker = make_tracker()
+    processor = ExecutionReportProcessor(tracker, accounts=["A", "C"])
+
+    await processor.reconcile()
+
+    assert tracker.risk.get_account_status("C")["cash"] == 2_000_000
+    assert tracker.risk.accounts["C"].positions == {"FPT": 500}
+    # Known accounts are corrected to SSI's holdings
+    assert tracker.risk.accounts["A"].positions == {"FPT": 500}
+    assert processor.stats["mismatches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_order_whose_placement_timed_out_is_settled_by_request_id():
+    tracker = make_tracker()
+    request = NewOrderRequest(
+        instrument_id="VCB", market="VN", buy_sell="B", order_type="LO",
+        price=90_000, quantity=100, account="A"
+    )
+    tracker.record_placed(request, SSIResult(False, 0, message="timed out"))
+    tracker.store.set_status(request.request_id, OrderStatus.UNKNOWN)
+    processor = ExecutionReportProcessor(tracker, accounts=["A"])
+
+    await processor.process_order_book("A", [{**row("445566", "QU", 0), "requestID": request.request_id}])
+
+    order = tracker.store.get_by_ssi_order_id("445566")
+    assert order["order_id"] == request.request_id
+    assert order["status"] == OrderStatus.ACKNOWLEDGED
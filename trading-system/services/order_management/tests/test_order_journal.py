@@ -0,0 +1,133 @@
+"""
+Order journal: snapshots of working and same-day orders and rollups, and recovery
+"""
+
+import os
+from datetime import timedelta
+
+import pytest
+
+from app.models import NewOrderRequest, OrderStatus
+from app.services import order_journal
+from app.services.order_journal import OrderJournal
+from app.services.order_stats import OrderStatsRollup, trading_day
+from app.services.order_tracker import OrderTracker
+from app.services.pre_trade_risk import PreTradeRiskEngine
+from app.services.ssi_client import SSIResult
+
+
+def make_tracker(directory) -> OrderTracker:
+    journal = OrderJournal(directory=str(directory), flush_interval_ms=1000, batch_size=1000, snapshot_every=100_000)
+    return OrderTracker(journal=journal, risk=PreTradeRiskEngine(require_state=False), rollups=OrderStatsRollup())
+
+
+def place(tracker, ssi_order_id, side="B", quantity=100, price=10_000):
+    request = NewOrderRequest(
+        instrument_id="VCB", market="VN", buy_sell=side, order_type="LO",
+        price=price, quantity=quantity, account="A"
+    )
+    tracker.record_placed(request, SSIResult(True, 200, data={"orderID": ssi_order_id}))
+
+
+def summary(tracker):
+    return tracker.rollups.summarize_days("A", 1)
+
+
+async def trade(tracker):
+    """A round trip that closes two orders and leaves a third working"""
+    place(tracker, "1")
+    tracker.apply_execution("1", OrderStatus.FILLED, 100, 10_000)
+    place(tracker, "2", side="S", price=12_000)
+    tracker.apply_execution("2", OrderStatus.FILLED, 100, 12_000)
+    place(tracker, "3", quantity=50)
+    tracker.apply_execution("3", OrderStatus.PARTIALLY_FILLED, 20, 10_000)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_keeps_working_orders_and_rollups(tmp_path):
+    tracker = make_tracker(tmp_path)
+    await tracker.start()
+    await trade(tracker)
+    before = summary(tracker)
+    await tracker.stop()
+
+    recovered = make_tracker(tmp_path)
+    await recovered.start()
+
+    # Orders closed today stay listed after a restart
+    assert sorted(recovered.orders) == ["1", "2", "3"]
+    assert recovered.orders["2"]["status"] == OrderStatus.FILLED
+    assert recovered.orders["3"]["filled_quantity"] == 20
+    assert summary(recovered) == before
+    assert before["portfolio_activity"]["realized_pnl"] == 200_000
+    await recovered.stop()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_compacts_orders_closed_on_earlier_days(tmp_path, monkeypatch):
+    tracker = make_tracker(tmp_path)
+    await tracker.start()
+    await trade(tracker)
+    before = summary(tracker)
+    monkeypatch.setattr(order_journal, "trading_day", lambda at: trading_day(at) + timedelta(days=1))
+    await tracker.stop()
+
+    recovered = make_tracker(tmp_path)
+    await recovered.start()
+
+    assert list(recovered.orders) == ["3"]
+    assert summary(recovered) == before
+    await recovered.stop()
+
+
+def write_segment(directory, start, lines):
+    path = os.path.join(directory, f"journal-{start:012d}.log")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(lines))
+
+
+def journal_lines(tmp_path):
+    """Journal lines for one placed order, written but never snapshotted"""
+    journal = OrderJournal(directory=str(tmp_path))
+    tracker = OrderTracker(risk=PreTradeRiskEngine(require_state=False), rollups=OrderStatsRollup())
+    tracker.store.journal = journal
+    place(tracker, "1")
+    tracker.apply_execution("1", OrderStatus.ACKNOWLEDGED, 0)
+    tracker.apply_execution("1", OrderStatus.PARTIALLY_FILLED, 30, 10_000)
+    return journal._buffer
+
+
+def recover(tmp_path):
+    tracker = make_tracker(tmp_path)
+    tracker.journal.recover(tracker.store)
+    return tracker
+
+
+def test_torn_final_line_is_skipped(tmp_path):
+    created, acked, filled = journal_lines(tmp_path)
+    write_segment(tmp_path, 1, [created, acked, filled[:20]])
+
+    tracker = recover(tmp_path)
+
+    assert tracker.orders["1"]["status"] == OrderStatus.ACKNOWLEDGED
+    assert tracker.journal.seq == 2
+
+
+def test_torn_tail_of_an_older_segment_does_not_hide_later_segments(tmp_path):
+    created, acked, filled = journal_lines(tmp_path)
+    write_segment(tmp_path, 1, [created, acked[:15]])
+    # After restarting, the journal went on in a new segment
+    write_segment(tmp_path, 2, [acked, filled])
+
+    tracker = recover(tmp_path)
+
+    assert tracker.orders["1"]["filled_quantity"] == 30
+    assert tracker.journal.seq == 3
+
+
+def test_corrupt_line_before_the_end_fails_recovery(tmp_path):
+    created, acked, filled = journal_lines(tmp_path)
+    write_segment(tmp_path, 1, [created, "{not json\n", filled])
+
+    with pytest.raises(ValueError, match="line 2"):
+        recover(tmp_path)
@@ -0,0 +1,63 @@
+"""
+Cursor-paged order listing routes
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.models import NewOrderRequest, OrderStatus
+from app.routers import orders
+from app.services.order_stats import OrderStatsRollup
+from app.services.order_tracker import OrderTracker
+from app.services.pre_trade_risk import PreTradeRiskEngine
+from app.services.ssi_client import SSIResult
+
+
+@pytest.fixture
+def http(monkeypatch):
+    tracker = OrderTracker(risk=PreTradeRiskEngine(require_state=False), rollups=OrderStatsRollup())
+    for i in range(5):
+        request = NewOrderRequest(
+            instrument_id="VCB", market="VN", buy_sell="B", order_type="LO",
+            price=90_000, quantity=100, account="A"
+        )
+        tracker.record_placed(request, SSIResult(True, 200, data={"orderID": str(i)}))
+    tracker.apply_execution("0", OrderStatus.FILLED, 100, 90_000)
+    tracker.apply_execution("1", OrderStatus.CANCELLED, 0)
+    monkeypatch.setattr(orders, "order_tracker", tracker)
+
+    app = FastAPI()
+    app.include_router(orders.router, prefix="/api/v1/orders")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_list_pages_through_every_order_newest_first(http):
+    seen = []
+    cursor = None
+    while True:
+        params = {"account": "A", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        data = (await http.get("/api/v1/orders/list", params=params)).json()["data"]
+        seen += [order["order_id"] for order in data["orders"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ["4", "3", "2", "1", "0"]
+
+
+@pytest.mark.asyncio
+async def test_open_orders_leave_out_closed_ones(http):
+    data = (await http.get("/api/v1/orders/open", params={"account": "A"})).json()["data"]
+    assert [order["order_id"] for order in data["orders"]] == ["4", "3", "2"]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", [
+    "garbage", "not-a-date|ORD1", "2025-01-01T00:00:00|", "2025-01-01T00:00:00+07:00|ORD1"
+])
+async def test_malformed_cursor_is_a_bad_request(http, cursor):
+    response = await http.get("/api/v1/orders/list", params={"account": "A", "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"]["error"] == "INVALID_CURSOR"
@@ -0,0 +1,66 @@
+"""
+Order activity rollups: the activity summary route and rebuilding after recovery
+"""
+
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.models import NewOrderRequest, OrderStatus
+from app.routers import accounts
+from app.services.order_journal import SNAPSHOT_FILE, OrderJournal, encode
+from app.services.order_stats import OrderStatsRollup
+from app.services.order_tracker import OrderTracker
+from app.services.pre_trade_risk import PreTradeRiskEngine
+from app.services.ssi_client import SSIResult
+
+
+def make_tracker(journal=None) -> OrderTracker:
+    return OrderTracker(journal=journal, risk=PreTradeRiskEngine(require_state=False), rollups=OrderStatsRollup())
+
+
+def fill(tracker, ssi_order_id, side, quantity, price):
+    request = NewOrderRequest(
+        instrument_id="VCB", market="VN", buy_sell=side, order_type="LO",
+        price=price, quantity=quantity, account="A"
+    )
+    tracker.record_placed(request, SSIResult(True, 200, data={"orderID": ssi_order_id}))
+    tracker.apply_execution(ssi_order_id, OrderStatus.FILLED, quantity, price)
+
+
+def trade(tracker):
+    fill(tracker, "1", "B", 100, 10_000)
+    fill(tracker, "2", "B", 100, 14_000)
+    fill(tracker, "3", "S", 100, 13_000)
+
+
+@pytest.mark.asyncio
+async def test_activity_summary_route_reads_the_rollups(monkeypatch):
+    tracker = make_tracker()
+    trade(tracker)
+    monkeypatch.setattr(accounts, "order_stats", tracker.rollups)
+    app = FastAPI()
+    app.include_router(accounts.router, prefix="/api/v1/accounts")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        response = await http.get("/api/v1/accounts/activity-summary/A", params={"days": 7})
+
+    data = response.json()["data"]
+    assert response.status_code == 200
+    assert data["trading_activity"]["total_orders"] == 3
+    assert data["portfolio_activity"]["realized_pnl"] == 100 * 13_000 - 100 * 12_000
+
+
+def test_snapshot_without_rollups_rebuilds_the_same_pnl_in_any_order(tmp_path):
+    live = make_tracker()
+    trade(live)
+    orders = [dict(order) for order in reversed(list(live.orders.values()))]
+    with open(os.path.join(tmp_path, SNAPSHOT_FILE), "w", encoding="utf-8") as f:
+        f.write(encode({"seq": 10, "orders": orders}))
+
+    recovered = make_tracker(OrderJournal(directory=str(tmp_path)))
+    recovered.journal.recover(recovered.store)
+
+    assert recovered.rollups.summarize_days("A", 1) == live.rollups.summarize_days("A", 1)
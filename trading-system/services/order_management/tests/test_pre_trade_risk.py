@@ -0,0 +1,257 @@
+"""
+Pre-trade risk: checks, state loading and the live order routes
+"""
+
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.models import OrderSide, OrderStatus
+from app.routers import orders
+from app.services.pre_trade_risk import (
+    ABOVE_CEILING, FAT_FINGER_PRICE, INSUFFICIENT_BUYING_POWER, INSUFFICIENT_POSITION,
+    POSITION_LIMIT, UNKNOWN_ACCOUNT, UNKNOWN_SYMBOL, PreTradeRiskEngine
+)
+from app.services.order_tracker import OrderTracker
+from app.services.pre_trade_state import PreTradeStateLoader
+from app.services.pricing_service import PriceBook
+from app.services.ssi_client import SSIResult
+from app.utils.exceptions import RiskManagementError
+
+
+def make_engine() -> PreTradeRiskEngine:
+    engine = PreTradeRiskEngine(fee_rate=0.0, require_state=True)
+    engine.set_account("A", 10_000_000, {"VCB": 1_000})
+    engine.set_symbol("VCB", reference=90_000, ceiling=96_000, floor=84_000)
+    return engine
+
+
+def test_orders_without_loaded_state_are_rejected():
+    engine = PreTradeRiskEngine(require_state=True)
+    result = engine.check("A", "VCB", OrderSide.BUY, 100, 90_000)
+    assert set(result.violations) == {UNKNOWN_ACCOUNT, UNKNOWN_SYMBOL}
+
+
+def test_every_violation_is_reported():
+    engine = make_engine()
+    result = engine.check("A", "VCB", OrderSide.BUY, 200, 97_000)
+    assert not result.passed
+    assert {INSUFFICIENT_BUYING_POWER, ABOVE_CEILING, FAT_FINGER_PRICE} <= set(result.violations)
+
+
+def test_reservations_limit_later_orders_until_released():
+    engine = make_engine()
+    engine.check_and_reserve("o1", "A", "VCB", OrderSide.SELL, 800, 90_000)
+    with pytest.raises(RiskManagementError) as error:
+        engine.check_and_reserve("o2", "A", "VCB", OrderSide.SELL, 300, 90_000)
+    assert error.value.details["violations"] == [INSUFFICIENT_POSITION]
+
+    engine.on_closed("o1")
+    engine.check_and_reserve("o2", "A", "VCB", OrderSide.SELL, 300, 90_000)
+
+
+def test_rekeyed_reservation_settles_on_fill():
+    engine = make_engine()
+    engine.check_and_reserve("request", "A", "VCB", OrderSide.BUY, 100, 90_000)
+    engine.rekey("request", "SSI-1")
+    engine.on_fill("SSI-1", 100, 90_000)
+
+    status = engine.get_account_status("A")
+    assert status["cash"] == 1_000_000
+    assert status["reserved_cash"] == 0
+    assert status["positions"]["VCB"] == 1_100
+
+
+def test_replace_without_a_reservation_is_checked_like_a_new_order():
+    engine = make_engine()
+    with pytest.raises(RiskManagementError):
+        engine.check_and_replace("unknown", "A", "VCB", OrderSide.BUY, 1_000, 90_000)
+
+    engine.check_and_replace("unknown", "A", "VCB", OrderSide.BUY, 100, 90_000)
+    assert engine.get_account_status("A")["reserved_cash"] == 9_000_000
+
+
+def test_position_limit_counts_shares_open_buys_may_add():
+    engine = PreTradeRiskEngine(fee_rate=0.0, max_position_value=100_000_000, require_state=True)
+    engine.set_account("A", 1_000_000_000, {"VCB": 500})
+    engine.set_symbol("VCB", reference=90_000, ceiling=96_000, floor=84_000)
+
+    engine.check_and_reserve("o1", "A", "VCB", OrderSide.BUY, 400, 90_000)
+    assert engine.check("A", "VCB", OrderSide.BUY, 300, 90_000).violations == (POSITION_LIMIT,)
+
+    engine.on_closed("o1")
+    assert engine.check("A", "VCB", OrderSide.BUY, 300, 90_000).passed
+
+
+class FakeSSIClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_account_balance(self, account):
+        self.calls += 1
+        return SSIResult(True, 200, data={"cashBal": 5_000_000, "purchasingPower": 1})
+
+    async def get_portfolio(self, account):
+        return SSIResult(True, 200, data={"stockPositions": [{"instrumentID": "VCB", "onHand": 300}]})
+
+
+def make_price_book(quotes):
+    def handler(request):
+        symbols = json.loads(request.content)["symbols"]
+        return httpx.Response(200, json={"data": {s: quotes[s] for s in symbols if s in quotes}})
+
+    book = PriceBook(base_url="http://market-data")
+    book._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return book
+
+
+def make_loader(engine, quotes=None):
+    client = FakeSSIClient()
+
+    async def factory():
+        return client
+
+    quotes = quotes or {"VCB": {
+        "reference_price": 90_000, "ceiling_price": 96_000, "floor_price": 84_000, "last_price": 91_000
+    }}
+    return PreTradeStateLoader(engine, make_price_book(quotes), factory), client
+
+
+@pytest.mark.asyncio
+async def test_loader_fills_account_and_symbol_state_once_per_day():
+    engine = PreTradeRiskEngine(require_state=True)
+    loader, client = make_loader(engine)
+
+    await loader.ensure(["A"], ["vcb"])
+    await loader.ensure(["A"], ["VCB"])
+
+    assert client.calls == 1
+    assert engine.get_account_status("A")["cash"] == 5_000_000
+    assert engine.accounts["A"].positions == {"VCB": 300}
+    band = engine.symbols["VCB"]
+    assert (band.reference, band.ceiling, band.floor, band.last_price) == (90_000, 96_000, 84_000, 91_000)
+
+
+@pytest.mark.asyncio
+async def test_symbol_without_a_band_stays_unloaded_and_rejected():
+    engine = PreTradeRiskEngine(require_state=True)
+    loader, _ = make_loader(engine, {"VCB": {"last_price": 91_000}})
+
+    await loader.ensure(["A"], ["VCB"])
+
+    assert UNKNOWN_SYMBOL in engine.check("A", "VCB", OrderSide.BUY, 10, 90_000).violations
+    assert loader.stats["errors"] == 1
+
+
+class FakeTradingClient:
+    def __init__(self):
+        self.placed = []
+        self.modify_result = SSIResult(True, 200, data={})
+
+    async def place_order(self, order_data, timeout=None):
+        self.placed.append(order_data)
+        return SSIResult(True, 200, data={"orderID": f"SSI-{len(self.placed)}"})
+
+    async def modify_order(self, order_data):
+        return self.modify_result
+
+
+@pytest.fixture
+def live_routes(monkeypatch):
+    engine = make_engine()
+    client = FakeTradingClient()
+
+    async def ensure(accounts, symbols):
+        return None
+
+    monkeypatch.setattr(orders, "pre_trade_risk", engine)
+    monkeypatch.setattr(orders, "order_tracker", OrderTracker(risk=engine))
+    monkeypatch.setattr(orders.pre_trade_state, "ensure", ensure)
+    monkeypatch.setattr(orders, "validate_trading_request", lambda **kwargs: (True, ""))
+
+    app = FastAPI()
+    app.include_router(orders.router, prefix="/api/v1/orders")
+    app.dependency_overrides[orders.get_trading_client] = lambda: client
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    return http, engine, client
+
+
+def order(quantity, price=90_000, request_id=None):
+    body = {
+        "instrument_id": "VCB", "market": "VN", "buy_sell": "B", "order_type": "LO",
+        "price": price, "quantity": quantity, "account": "A"
+    }
+    if request_id:
+        body["request_id"] = request_id
+    return body
+
+
+@pytest.mark.asyncio
+async def test_new_order_route_rejects_orders_that_fail_risk_checks(live_routes):
+    http, engine, client = live_routes
+
+    response = await http.post("/api/v1/orders/new-order", json=order(200))
+
+    assert response.status_code == 422
+    assert INSUFFICIENT_BUYING_POWER in response.json()["detail"]["violations"]
+    assert client.placed == []
+
+
+@pytest.mark.asyncio
+async def test_new_order_route_reserves_under_the_ssi_order_id(live_routes):
+    http, engine, client = live_routes
+
+    response = await http.post("/api/v1/orders/new-order", json=order(100))
+
+    assert response.status_code == 201
+    assert len(client.placed) == 1
+    assert "SSI-1" in engine._reservations
+    assert engine.get_account_status("A")["reserved_cash"] == 9_000_000
+
+
+@pytest.mark.asyncio
+async def test_bulk_route_checks_each_order_against_earlier_reservations(live_routes):
+    http, engine, client = live_routes
+
+    response = await http.post("/api/v1/orders/bulk", json={"orders": [
+        order(60, request_id="r1"), order(60, request_id="r2"), order(40, request_id="r3")
+    ]})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["id"]: line for line in lines if "id" in line}
+    assert results["r1"]["success"] and results["r3"]["success"]
+    assert results["r2"]["error"] == "RISK_MANAGEMENT_ERROR"
+    assert INSUFFICIENT_BUYING_POWER in results["r2"]["violations"]
+    assert len(client.placed) == 2
+
+
+def modification(quantity, price=90_000):
+    return {**order(quantity, price), "order_id": "SSI-1"}
+
+
+@pytest.mark.asyncio
+async def test_modify_route_reserves_only_the_unfilled_quantity(live_routes):
+    http, engine, client = live_routes
+    await http.post("/api/v1/orders/new-order", json=order(100))
+    orders.order_tracker.apply_execution("SSI-1", OrderStatus.PARTIALLY_FILLED, 60, 90_000)
+
+    response = await http.post("/api/v1/orders/modify-order", json=modification(100, 88_000))
+
+    assert response.json()["success"]
+    assert engine._reservations["SSI-1"].remaining == 40
+    assert engine.get_account_status("A")["reserved_cash"] == 40 * 88_000
+
+
+@pytest.mark.asyncio
+async def test_rejected_modification_keeps_the_old_reservation(live_routes):
+    http, engine, client = live_routes
+    await http.post("/api/v1/orders/new-order", json=order(100))
+    client.modify_result = SSIResult(False, 400, message="Order is not modifiable")
+
+    response = await http.post("/api/v1/orders/modify-order", json=modification(50, 88_000))
+
+    assert not response.json()["success"]
+    assert engine._reservations["SSI-1"].remaining == 100
+    assert engine.get_account_status("A")["reserved_cash"] == 9_000_000
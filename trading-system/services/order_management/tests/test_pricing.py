@@ -0,0 +1,50 @@
+"""
+Price book: case-insensitive symbols and memoized mark-to-market
+"""
+
+import json
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app.services.pricing_service import PriceBook
+
+
+def make_book(requests):
+    def handler(request):
+        symbols = json.loads(request.content)["symbols"]
+        requests.append(symbols)
+        return httpx.Response(200, json={"data": {symbol: {"last_price": 25_000} for symbol in symbols}})
+
+    book = PriceBook(base_url="http://market-data", ttl=60)
+    book._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return book
+
+
+@pytest.mark.asyncio
+async def test_symbols_are_fetched_and_stored_upper_case():
+    requests = []
+    book = make_book(requests)
+
+    prices = await book.get_prices(["vcb", "VCB"])
+    await book.get_prices(["Vcb"])
+
+    assert prices == {"vcb": Decimal("25000"), "VCB": Decimal("25000")}
+    assert requests == [["VCB"]]
+    assert book.mark_to_market([("vcb", Decimal("100"), Decimal("20000"))]).total_unrealized_pnl == 500_000
+
+
+@pytest.mark.asyncio
+async def test_valuations_are_reused_until_prices_or_holdings_change():
+    book = make_book([])
+    await book.get_prices(["VCB"])
+    holdings = [("VCB", Decimal("100"), Decimal("20000"))]
+
+    first = book.mark_to_market(holdings, key="A")
+    assert book.mark_to_market(list(holdings), key="A") is first
+
+    book.update_price("VCB", Decimal("26000"))
+    assert book.mark_to_market(holdings, key="A").total_market_value == 2_600_000
+    assert book.mark_to_market([("VCB", Decimal("200"), Decimal("20000"))], key="A").total_market_value == 5_200_000
+    assert book.stats["mark_hits"] == 1
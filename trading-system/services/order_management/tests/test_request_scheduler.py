@@ -0,0 +1,71 @@
+"""
+Admission and cancellation in the SSI request scheduler
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.request_scheduler import RequestLane, RequestScheduler
+
+
+def make_scheduler(max_in_flight: int = 1) -> RequestScheduler:
+    return RequestScheduler(
+        rate_limit=1000,
+        rate_window=1.0,
+        max_in_flight=max_in_flight,
+        query_max_in_flight=max_in_flight,
+        class_shares={lane: 1.0 for lane in RequestLane},
+        account_share=1.0,
+        deadlines={lane: 5.0 for lane in RequestLane}
+    )
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_the_slot():
+    scheduler = make_scheduler()
+    await scheduler.acquire(RequestLane.ORDER, "A")
+
+    waiting = asyncio.create_task(scheduler.acquire(RequestLane.ORDER, "B"))
+    await asyncio.sleep(0)
+    assert scheduler.get_status()["waiting"]["order"] == 1
+
+    # Cancel, then release before the cancelled task gets to run its cleanup
+    waiting.cancel()
+    scheduler.release(RequestLane.ORDER)
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert scheduler.in_flight[RequestLane.ORDER] == 0
+    assert scheduler.get_status()["waiting"]["order"] == 0
+    await asyncio.wait_for(scheduler.acquire(RequestLane.ORDER, "C"), 1.0)
+    assert scheduler.in_flight[RequestLane.ORDER] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue_immediately():
+    scheduler = make_scheduler()
+    await scheduler.acquire(RequestLane.ORDER, "A")
+    waiting = asyncio.create_task(scheduler.acquire(RequestLane.ORDER, "B"))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.get_status()["waiting"]["order"] == 0
+    scheduler.release(RequestLane.ORDER)
+    assert scheduler.in_flight[RequestLane.ORDER] == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_are_admitted_cancels_first():
+    scheduler = make_scheduler()
+    await scheduler.acquire(RequestLane.QUERY, "A")
+    order = asyncio.create_task(scheduler.acquire(RequestLane.ORDER, "A"))
+    cancel = asyncio.create_task(scheduler.acquire(RequestLane.CANCEL, "A"))
+    await asyncio.sleep(0)
+
+    scheduler.release(RequestLane.QUERY)
+    await asyncio.sleep(0)
+    assert cancel.done() and not order.done()
+    scheduler.release(RequestLane.CANCEL)
+    await asyncio.wait_for(order, 1.0)
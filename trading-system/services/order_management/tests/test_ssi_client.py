@@ -0,0 +1,107 @@
+"""
+SSI gateway client: token acquisition, 2FA and per-endpoint breakers
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.ssi_client import SSIFastConnectClient
+from app.utils.exceptions import SSIAPIError, SSINetworkError
+
+
+def make_client(handler) -> SSIFastConnectClient:
+    client = SSIFastConnectClient()
+    client._generate_signature = lambda *args: "signature"
+    for lane in list(client.http_clients):
+        client.http_clients[lane] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def ok(data=None):
+    return httpx.Response(200, json={"status": 200, "message": "Success", "data": data or {}})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_token_request():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("AccessToken"):
+            return ok({"accessToken": "token"})
+        return ok()
+
+    client = make_client(handler)
+    await asyncio.wait_for(
+        asyncio.gather(*(client.get_portfolio("A") for _ in range(5))),
+        1.0
+    )
+    assert sum(path.endswith("AccessToken") for path in calls) == 1
+    assert client.session.access_token == "token"
+
+
+@pytest.mark.asyncio
+async def test_otp_is_requested_and_verified_on_the_same_session():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path.endswith("AccessToken"):
+            body = json.loads(request.content or b"{}")
+            return ok({"accessToken": "verified" if body.get("code") else "plain"})
+        return ok()
+
+    client = make_client(handler)
+    await client.get_otp("A")
+    assert requests[-1].headers["Authorization"] == "Bearer plain"
+
+    await client.verify_code("A", "123456")
+    assert json.loads(requests[-1].content)["code"] == "123456"
+    assert client.session.two_fa_verified
+    assert client.session.access_token == "verified"
+
+    await client.get_portfolio("A")
+    assert requests[-1].headers["Authorization"] == "Bearer verified"
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_does_not_block_order_entry():
+    def handler(request):
+        if request.url.path.endswith("GetPortfolio"):
+            return httpx.Response(503, text="unavailable")
+        if request.url.path.endswith("AccessToken"):
+            return ok({"accessToken": "token"})
+        return ok()
+
+    client = make_client(handler)
+    for _ in range(client.circuit_breakers.policy.consecutive_failures):
+        with pytest.raises(SSIAPIError):
+            await client.get_portfolio("A")
+    with pytest.raises(SSINetworkError):
+        await client.get_portfolio("A")
+
+    result = await client.place_order({"account": "A", "instrumentID": "SSI"})
+    assert result.success
+    assert client.circuit_breakers.summary_state() == "DEGRADED"
+
+
+@pytest.mark.asyncio
+async def test_only_timeouts_after_sending_leave_the_outcome_unknown():
+    def handler(request):
+        if request.url.path.endswith("AccessToken"):
+            return ok({"accessToken": "token"})
+        if request.url.path.endswith("NewOrder"):
+            raise httpx.ReadTimeout("read timed out", request=request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = make_client(handler)
+    with pytest.raises(SSINetworkError) as timed_out:
+        await client.place_order({"account": "A", "instrumentID": "SSI"})
+    with pytest.raises(SSINetworkError) as refused:
+        await client.cancel_order({"account": "A", "orderID": "1"})
+
+    assert timed_out.value.details["timed_out"]
+    assert not refused.value.details["timed_out"]
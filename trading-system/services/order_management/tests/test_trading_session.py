@@ -0,0 +1,41 @@
+"""
+Trading session lookups against the vendored exchange calendar
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import Market, MarketEnum, TradingSession, TradingSessionEnum
+from app.services.trading_session_service import TradingSessionService, get_session_info
+from app.utils.exchange_calendar import VN_TZ
+from app.utils.trading_validator import trading_validator
+
+
+# Monday 20 Oct 2025, 10:00 in Hanoi is 03:00 UTC
+MORNING_VN = datetime(2025, 10, 20, 10, 0, tzinfo=VN_TZ)
+
+
+def test_trading_session_is_the_enum():
+    assert TradingSession.MORNING_AUCTION.value == "MORNING_AUCTION"
+    info = get_session_info(Market.HOSE, MORNING_VN)
+    assert info.current_session is TradingSession.CONTINUOUS_MORNING
+    assert info.can_place_orders
+
+
+@pytest.mark.asyncio
+async def test_market_schedule_lists_sessions():
+    schedule = await TradingSessionService(Market.HOSE).get_market_schedule(datetime(2025, 10, 20))
+    assert schedule["is_trading_day"]
+    assert [s["name"] for s in schedule["sessions"]][:2] == ["Morning Auction", "Continuous Morning"]
+
+
+def test_validator_reads_aware_times_in_vietnam_time():
+    utc = MORNING_VN.astimezone(timezone.utc)
+    session, _ = trading_validator.get_current_session(MarketEnum.HOSE, utc)
+    assert session is TradingSessionEnum.CONTINUOUS_1
+
+
+def test_validator_treats_naive_times_as_vietnam_local():
+    session, _ = trading_validator.get_current_session(MarketEnum.HOSE, datetime(2025, 10, 20, 10, 0))
+    assert session is TradingSessionEnum.CONTINUOUS_1
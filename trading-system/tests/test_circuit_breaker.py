@@ -0,0 +1,157 @@
+"""
+State transitions of the shared per-endpoint circuit breaker
+"""
+
+import asyncio
+
+import pytest
+
+from common.circuit_breaker import (
+    BreakerPolicy, BreakerState, CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def rate_policy(**overrides):
+    values = dict(
+        failure_rate=0.5, minimum_calls=10, consecutive_failures=100, open_duration=5,
+        half_open_probes=2, slow_call_duration=0.5, slow_call_rate=0.8, window=10
+    )
+    values.update(overrides)
+    return BreakerPolicy(**values)
+
+
+def trip(breaker):
+    for _ in range(breaker.policy.consecutive_failures):
+        breaker.record_failure(breaker.acquire())
+
+
+def test_opens_on_failure_rate_per_endpoint(clock):
+    registry = CircuitBreakerRegistry(rate_policy(), clock)
+    data, trading = registry.get("/market"), registry.get("/trading")
+    for i in range(10):
+        permit = data.acquire()
+        if i % 2:
+            data.record_failure(permit)
+        else:
+            data.record_success(permit, 0.01)
+        trading.record_success(trading.acquire(), 0.01)
+
+    assert data.state is BreakerState.OPEN
+    assert trading.state is BreakerState.CLOSED
+    assert registry.summary_state() == "DEGRADED"
+    with pytest.raises(CircuitOpenError) as excinfo:
+        data.acquire()
+    assert excinfo.value.retry_after == pytest.approx(5)
+
+
+def test_rates_wait_for_minimum_calls(clock):
+    breaker = CircuitBreaker("x", rate_policy(), clock)
+    for _ in range(9):
+        breaker.record_failure(breaker.acquire())
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_old_failures_slide_out_of_the_window(clock):
+    breaker = CircuitBreaker("x", rate_policy(), clock)
+    for _ in range(9):
+        breaker.record_failure(breaker.acquire())
+    clock.now += 11
+    for _ in range(9):
+        breaker.record_success(breaker.acquire(), 0.01)
+    breaker.record_failure(breaker.acquire())
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_opens_on_slow_call_rate(clock):
+    breaker = CircuitBreaker("x", rate_policy(), clock)
+    for _ in range(10):
+        breaker.record_success(breaker.acquire(), 0.6)
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_opens_on_consecutive_failures(clock):
+    breaker = CircuitBreaker("x", BreakerPolicy(consecutive_failures=3), clock)
+    trip(breaker)
+    assert breaker.state is BreakerState.OPEN
+    assert breaker.metrics()["times_opened"] == 1
+
+
+def test_half_open_limits_probes_and_closes_after_successes(clock):
+    breaker = CircuitBreaker("x", rate_policy(consecutive_failures=1), clock)
+    trip(breaker)
+    clock.now += 6
+
+    first, second = breaker.acquire(), breaker.acquire()
+    assert breaker.state is BreakerState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record_success(first, 0.01)
+    assert breaker.state is BreakerState.HALF_OPEN
+    # A released probe frees its slot for another one
+    breaker.release(second)
+    breaker.record_success(breaker.acquire(), 0.01)
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_failed_or_slow_probe_reopens(clock):
+    breaker = CircuitBreaker("x", rate_policy(consecutive_failures=1, half_open_probes=1), clock)
+    trip(breaker)
+    clock.now += 6
+    breaker.record_failure(breaker.acquire())
+    assert breaker.state is BreakerState.OPEN
+
+    clock.now += 6
+    breaker.record_success(breaker.acquire(), 0.6)
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_outcomes_from_before_a_transition_are_ignored(clock):
+    breaker = CircuitBreaker("x", BreakerPolicy(consecutive_failures=1), clock)
+    permit = breaker.acquire()
+    breaker.reset()
+    breaker.record_failure(permit)
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_call_counts_only_failure_types(clock):
+    breaker = CircuitBreaker("x", BreakerPolicy(consecutive_failures=1), clock)
+
+    async def fails(exc):
+        raise exc
+
+    with pytest.raises(KeyError):
+        asyncio.run(breaker.call(fails, KeyError(), failure_types=(ConnectionError,)))
+    assert breaker.state is BreakerState.CLOSED
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(breaker.call(fails, ConnectionError(), failure_types=(ConnectionError,)))
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_policy_from_settings():
+    class Settings:
+        circuit_breaker_failure_threshold = 7
+        circuit_breaker_timeout = 30
+        circuit_breaker_slow_call_ms = 2000
+        circuit_breaker_window = 20
+
+    policy = BreakerPolicy.from_settings(Settings())
+    assert policy.consecutive_failures == 7
+    assert policy.open_duration == 30
+    assert policy.slow_call_duration == 2.0
+    assert policy.window == 20
+    assert policy.minimum_calls == BreakerPolicy.minimum_calls
@@ -0,0 +1,46 @@
+"""
+Service images are built from their own directory, so shared modules in
+common/ are copied into each service that uses them. The copies must stay
+identical to the canonical file.
+"""
+
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+VENDORED = {
+    "common/exchange_calendar.py": [
+        "services/order_management/app/utils/exchange_calendar.py",
+        "services/market_data_ingestion/app/services/exchange_calendar.py",
+        "services/decision_engine/app/services/exchange_calendar.py",
+        "services/notification_service/app/utils/exchange_calendar.py",
+    ],
+    "common/circuit_breaker.py": [
+        "services/order_management/app/utils/circuit_breaker.py",
+        "services/market_data_ingestion/app/services/circuit_breaker.py",
+        "services/config_service/app/services/circuit_breaker.py",
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    "canonical,copy",
+    [(canonical, copy) for canonical, copies in VENDORED.items() for copy in copies]
+)
+def test_vendored_copy_matches_common(canonical, copy):
+    assert (ROOT / copy).read_text() == (ROOT / canonical).read_text(), (
+        f"{copy} is out of date; copy {canonical} over it"
+    )
+
+
+def test_services_do_not_import_common():
+    offenders = []
+    for path in (ROOT / "services").rglob("app/**/*.py"):
+        text = path.read_text(errors="ignore")
+        if "from common." in text or "import common" in text:
+            if path.name.startswith("main_"):
+                continue  # legacy entry points that fall back to standalone mode
+            offenders.append(str(path.relative_to(ROOT)))
+    assert not offenders, f"common/ is not shipped in service images: {offenders}"